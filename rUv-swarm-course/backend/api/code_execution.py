@@ -1,17 +1,31 @@
 """
 Code Execution API Routes
 """
+import asyncio
 import logging
 import json
 import subprocess
 import tempfile
 import os
-from typing import Dict, Any, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Dict, Any, AsyncIterator, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
+from backend.config import settings
 from backend.api.auth import get_current_user
 from backend.models.user import User
+from backend.services.active_executions import (
+    DuplicateExecutionError, ExecutionCancelledError, active_executions
+)
+from backend.services.case_fanout import fan_out
+from backend.services.cpu_budget import CpuBudgetExceededError, cpu_budget
+from backend.services.execution_queue import QueueFullError, execution_queue
+from backend.services.grading_harness import grading_harness, test_results_summary
+from backend.services.result_cache import result_cache
+from backend.services.runner_registry import runner_registry
+from backend.services.runners.common import find_dangerous_pattern
+from backend.services.stage_timing import StageTimer, stage_latency, timed_stage, tracing
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -22,6 +36,9 @@ class CodeExecutionRequest(BaseModel):
     language: str = "javascript"
     test_cases: Optional[str] = None
     timeout: int = 30
+    stream: bool = False
+    debug: bool = False  # Return per-stage timings in the result
+    execution_id: Optional[str] = None  # Lets POST /executions/{id}/cancel stop the run
 
 
 class CodeExecutionResult(BaseModel):
@@ -31,11 +48,22 @@ class CodeExecutionResult(BaseModel):
     execution_time_ms: int
     memory_used_kb: int
     test_results: Optional[Dict[str, Any]] = None
+    # Measured by the run's cgroup (or rusage); None when not measured
+    cpu_user_ms: Optional[int] = None
+    cpu_system_ms: Optional[int] = None
+    memory_peak_kb: Optional[int] = None
+    cpu_throttled_count: Optional[int] = None
+    cpu_throttled_ms: Optional[int] = None
+    measured_by: Optional[str] = None
+    cancelled: bool = False
+    debug: Optional[Dict[str, Any]] = None  # Per-stage timings, when requested
 
 
 class CodeSubmissionRequest(BaseModel):
     exercise_id: int
     submitted_code: str
+    stop_on_first_failure: bool = False
+    debug: bool = False  # Return per-stage timings in the response
 
 
 class CodeSubmissionResponse(BaseModel):
@@ -48,44 +76,336 @@ class CodeSubmissionResponse(BaseModel):
     execution_time_ms: int
     memory_used_kb: int
     submitted_at: str
+    # Measured by the run's cgroup (or rusage); None when not measured
+    cpu_user_ms: Optional[int] = None
+    cpu_system_ms: Optional[int] = None
+    memory_peak_kb: Optional[int] = None
+    cpu_throttled_count: Optional[int] = None
+    cpu_throttled_ms: Optional[int] = None
+    measured_by: Optional[str] = None
+    cached: bool = False
+    debug: Optional[Dict[str, Any]] = None  # Per-stage timings, when requested
     
     class Config:
         from_attributes = True
 
 
+class ExecutionJobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str  # queued, running, completed, failed, cancelled
+    created_at: str
+    queue_wait_ms: Optional[int] = None
+    service_time_ms: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+# Result fields filled from cgroup (or rusage) accounting of real runs
+RESOURCE_USAGE_FIELDS = (
+    "cpu_user_ms", "cpu_system_ms", "memory_peak_kb",
+    "cpu_throttled_count", "cpu_throttled_ms", "measured_by"
+)
+
+# Mock exercise data and test cases
+EXERCISE_TEST_CASES = {
+    1: {
+        "test_cases": [
+            {"input": "5", "expected": "10", "description": "Test with input 5"},
+            {"input": "0", "expected": "0", "description": "Test with input 0"},
+            {"input": "-3", "expected": "-6", "description": "Test with negative input"}
+        ],
+        "function_name": "doubleNumber",
+        "updated_at": "2024-01-01T00:00:00Z",
+        "cache_results": True
+    }
+}
+
+
 @router.post("/execute", response_model=CodeExecutionResult)
 async def execute_code(
     request: CodeExecutionRequest,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    """Execute code in a sandboxed environment.
+    
+    With `stream` set, the response is a server-sent event stream of stage
+    changes, output chunks and the final verdict instead of a single result.
+    The streamed verdict carries the remaining CPU budget, since the
+    headers are sent before the run. Closing the stream stops the run.
+    
+    A run given an `execution_id` can be stopped with
+    POST /executions/{execution_id}/cancel; it then returns a cancelled
+    result and is not charged. Ids are per user, so only another run of the
+    same user with the same id in flight is a conflict (409).
+    """
+    _check_cpu_budget(current_user.id)
+    if request.execution_id is not None and active_executions.active(request.execution_id, current_user.id):
+        raise _duplicate_execution(request.execution_id)
+    if request.stream:
+        return StreamingResponse(
+            _stream_execution(request, current_user.id),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+                **cpu_budget.headers(current_user.id)
+            }
+        )
+    try:
+        result = await active_executions.run(request.execution_id, current_user.id,
+                                             _run_execution(request))
+    except ExecutionCancelledError:
+        return _cancelled_result()
+    except DuplicateExecutionError as e:
+        raise _duplicate_execution(e.execution_id)
+    cpu_budget.charge(current_user.id, result.model_dump())
+    response.headers.update(cpu_budget.headers(current_user.id))
+    return result
+
+
+@router.post("/executions/{execution_id}/cancel")
+async def cancel_execution(
+    execution_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Stop a direct or streamed run the current user started with this `execution_id`"""
+    if not active_executions.cancel(execution_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Execution not found or already finished"
+        )
+    return {"execution_id": execution_id, "cancelled": True}
+
+
+@router.post("/submit", response_model=CodeSubmissionResponse)
+async def submit_code_exercise(
+    request: CodeSubmissionRequest,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    """Submit code for a specific exercise"""
+    _check_cpu_budget(current_user.id)
+    result = await _grade_submission(request, current_user.id)
+    _charge_submission(current_user.id, result)
+    response.headers.update(cpu_budget.headers(current_user.id))
+    return result
+
+
+@router.post("/jobs/execute", response_model=ExecutionJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_execution(
+    request: CodeExecutionRequest,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    """Queue a code execution and return its job id without waiting for the run"""
+    user_id = current_user.id
+    _check_cpu_budget(user_id)
+    
+    async def run() -> Dict[str, Any]:
+        result = (await _run_execution(request)).model_dump()
+        cpu_budget.charge(user_id, result)
+        return result
+    
+    response.headers.update(cpu_budget.headers(user_id))
+    return _enqueue("execute", run, user_id)
+
+
+@router.post("/jobs/submit", response_model=ExecutionJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_submission(
+    request: CodeSubmissionRequest,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    """Queue an exercise submission and return its job id without waiting for grading"""
+    if request.exercise_id not in EXERCISE_TEST_CASES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Exercise not found"
+        )
+    
+    user_id = current_user.id
+    _check_cpu_budget(user_id)
+    
+    async def run() -> Dict[str, Any]:
+        result = await _grade_submission(request, user_id)
+        _charge_submission(user_id, result)
+        return result.model_dump()
+    
+    response.headers.update(cpu_budget.headers(user_id))
+    return _enqueue("submit", run, user_id)
+
+
+@router.get("/jobs/metrics")
+async def get_execution_queue_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """Queue depth, wait time and service time of the execution queue"""
+    return execution_queue.metrics()
+
+
+@router.get("/budget")
+async def get_cpu_budget(
+    current_user: User = Depends(get_current_user)
+):
+    """The caller's remaining sandbox CPU budget"""
+    return {
+        "enabled": cpu_budget.enabled,
+        "limit_seconds": cpu_budget.limit_ms / 1000,
+        "remaining_seconds": round(cpu_budget.remaining(current_user.id), 3),
+        "window_seconds": int(cpu_budget.window),
+    }
+
+
+@router.get("/runners/metrics")
+async def get_runner_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """Resource profile, concurrency, latency and error counts of each language runner"""
+    return runner_registry.metrics()
+
+
+@router.get("/stages/metrics")
+async def get_stage_latency_metrics(
+    format: str = Query("json", pattern="^(json|prometheus)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """Latency histograms of each execution stage, per language"""
+    if format == "prometheus":
+        return PlainTextResponse(stage_latency.render_prometheus(), media_type="text/plain; version=0.0.4")
+    return stage_latency.snapshot()
+
+
+@router.get("/jobs/{job_id}", response_model=ExecutionJobResponse)
+async def get_execution_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Seconds to long-poll for the result"),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a job's status and result, optionally waiting until it finishes"""
+    job = await execution_queue.wait(job_id, min(wait, settings.EXECUTION_MAX_POLL_WAIT))
+    if job is None or job.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found or expired"
+        )
+    return ExecutionJobResponse(**job.to_dict())
+
+
+@router.delete("/jobs/{job_id}", response_model=ExecutionJobResponse)
+async def cancel_execution_job(
+    job_id: str,
     current_user: User = Depends(get_current_user)
 ):
-    """Execute code in a sandboxed environment"""
+    """Cancel a queued or running job, killing its run.
+    
+    Returns the job once its run has stopped, or as `running` if it is
+    still stopping after EXECUTION_CANCEL_WAIT seconds.
+    """
+    job = execution_queue.get(job_id)
+    if job is None or job.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found or expired"
+        )
+    if job.finished and job.status != "cancelled":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job already {job.status}"
+        )
+    execution_queue.cancel(job_id)
+    job = await execution_queue.wait(job_id, settings.EXECUTION_CANCEL_WAIT) or job
+    return ExecutionJobResponse(**job.to_dict())
+
+
+def _check_cpu_budget(user_id: int) -> None:
+    """Refuse a run with 429 and Retry-After once the user's CPU budget is spent"""
+    try:
+        cpu_budget.check(user_id)
+    except CpuBudgetExceededError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Execution CPU budget exhausted, please retry later",
+            headers={"Retry-After": str(e.retry_after), **cpu_budget.headers(user_id)}
+        )
+
+
+def _charge_submission(user_id: int, result: CodeSubmissionResponse) -> None:
+    """Charge a graded submission; cached gradings ran nothing"""
+    if not result.cached:
+        cpu_budget.charge(user_id, result.model_dump())
+
+
+def _duplicate_execution(execution_id: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Execution {execution_id} is already running"
+    )
+
+
+def _cancelled_result() -> CodeExecutionResult:
+    """Result of a run stopped by its user; nothing is charged for it"""
+    return CodeExecutionResult(
+        success=False,
+        output="",
+        error="Execution cancelled",
+        execution_time_ms=0,
+        memory_used_kb=0,
+        cancelled=True
+    )
+
+
+def _enqueue(kind: str, runner, user_id: int) -> ExecutionJobResponse:
+    """Submit a job, translating a full queue into 429 with Retry-After"""
     try:
-        if request.language == "javascript":
-            result = await _execute_javascript(request.code, request.timeout)
-        elif request.language == "python":
-            result = await _execute_python(request.code, request.timeout)
-        elif request.language == "java":
-            result = await _execute_java(request.code, request.timeout)
-        elif request.language == "cpp":
-            result = await _execute_cpp(request.code, request.timeout)
-        elif request.language == "rust":
-            result = await _execute_rust(request.code, request.timeout)
-        elif request.language == "go":
-            result = await _execute_go(request.code, request.timeout)
-        else:
+        job = execution_queue.submit(kind, runner, owner_id=user_id)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Execution queue is full, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    return ExecutionJobResponse(**job.to_dict())
+
+
+async def _run_execution(request: CodeExecutionRequest) -> CodeExecutionResult:
+    """Run a code execution request and build its result, timing each stage"""
+    timer = StageTimer()
+    with tracing(timer):
+        result = await _execute_request(request)
+    _observe_stages(request.language, timer)
+    if request.debug:
+        result.debug = timer.to_dict()
+    return result
+
+
+def _observe_stages(language: str, timer: StageTimer) -> None:
+    """Add a run's stage timings to the histograms of a supported language"""
+    if runner_registry.get(language) is not None:
+        stage_latency.observe(language, timer)
+
+
+async def _execute_request(request: CodeExecutionRequest) -> CodeExecutionResult:
+    try:
+        runner = runner_registry.get(request.language)
+        if runner is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Unsupported language: {request.language}"
             )
+        result = await runner.run(request.code, min(request.timeout, runner.profile.timeout))
         
         # Run test cases if provided
         test_results = None
         if request.test_cases:
-            test_results = await _run_test_cases(
-                request.code, 
-                request.test_cases, 
-                request.language
-            )
+            # Cases run concurrently, so their own stages are not broken down
+            with timed_stage("test_cases"), tracing(None):
+                test_results = await _run_test_cases(
+                    request.code, 
+                    request.test_cases, 
+                    request.language
+                )
         
         return CodeExecutionResult(
             success=result["success"],
@@ -93,7 +413,8 @@ async def execute_code(
             error=result.get("error"),
             execution_time_ms=result["execution_time_ms"],
             memory_used_kb=result["memory_used_kb"],
-            test_results=test_results
+            test_results=test_results,
+            **_resource_usage(result)
         )
         
     except Exception as e:
@@ -107,120 +428,209 @@ async def execute_code(
         )
 
 
-@router.post("/submit", response_model=CodeSubmissionResponse)
-async def submit_code_exercise(
-    request: CodeSubmissionRequest,
-    current_user: User = Depends(get_current_user)
-):
-    """Submit code for a specific exercise"""
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_execution(request: CodeExecutionRequest, user_id: int):
+    """Yield server-sent events for a run: stages, output chunks and the verdict.
+    
+    The run is a task of its own that hands each chunk over as the program
+    writes it; while no chunk comes, a keep-alive comment is sent every
+    EXECUTION_STREAM_HEARTBEAT seconds, so a client that has gone away is
+    noticed and the generator closed, which cancels the task and kills its
+    sandbox. A run cancelled by its execution id ends the stream with a
+    cancelled verdict and is not charged.
+    
+    Runners that stream kill the run once its output passes
+    EXECUTION_MAX_OUTPUT_BYTES; the cap is applied to the stream as well, so
+    nothing beyond it is sent or held for the client.
+    """
+    yield _sse_event("stage", {"stage": "validation"})
+    runner = runner_registry.get(request.language)
+    if runner is None:
+        yield _sse_event("verdict", {
+            "success": False,
+            "error": f"Unsupported language: {request.language}",
+            "stage": "validation"
+        })
+        return
+    
+    if runner.profile.compiled:
+        yield _sse_event("stage", {"stage": "compilation"})
+    yield _sse_event("stage", {"stage": "execution"})
+    
+    timer = StageTimer()
+    chunks: asyncio.Queue = asyncio.Queue()
     try:
-        # Mock exercise data and test cases
-        exercise_test_cases = {
-            1: {
-                "test_cases": [
-                    {"input": "5", "expected": "10", "description": "Test with input 5"},
-                    {"input": "0", "expected": "0", "description": "Test with input 0"},
-                    {"input": "-3", "expected": "-6", "description": "Test with negative input"}
-                ],
-                "function_name": "doubleNumber"
-            }
-        }
-        
-        if request.exercise_id not in exercise_test_cases:
+        # Started inside the trace, so the task records its stages to the timer
+        with tracing(timer):
+            task = active_executions.start(
+                request.execution_id, user_id,
+                _pump_output(
+                    runner.stream(request.code, min(request.timeout, runner.profile.timeout)),
+                    chunks
+                )
+            )
+    except DuplicateExecutionError as e:
+        yield _sse_event("verdict", {"success": False, "error": str(e), "stage": "execution"})
+        return
+    
+    remaining = settings.EXECUTION_MAX_OUTPUT_BYTES
+    truncated = False
+    streamed_stderr = False
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.get(), settings.EXECUTION_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if chunk is None:
+                break
+            if truncated:
+                continue
+            
+            kind, text = chunk
+            data = text.encode()
+            if len(data) > remaining:
+                data = data[:remaining]
+                truncated = True
+            remaining -= len(data)
+            if data:
+                streamed_stderr = streamed_stderr or kind == "stderr"
+                yield _sse_event(kind, {"data": data.decode(errors="ignore")})
+    finally:
+        if not task.done():
+            task.cancel()  # The client went away
+    
+    if task.cancelled():
+        yield _sse_event("verdict", {
+            **_cancelled_result().model_dump(include={"success", "error", "cancelled"}),
+            "stage": "execution"
+        })
+        return
+    try:
+        result = task.result()
+    except Exception as e:
+        logger.error(f"Code execution error: {e}")
+        result = {"success": False, "output": "", "error": str(e),
+                  "execution_time_ms": 0, "memory_used_kb": 0}
+    
+    truncated = truncated or bool(result.get("output_limited"))
+    if result.get("error") and not streamed_stderr:
+        yield _sse_event("stderr", {"data": result["error"]})
+    
+    _observe_stages(request.language, timer)
+    verdict = {
+        "success": result["success"] and not truncated,
+        "error": "Output limit exceeded" if truncated else result.get("error"),
+        "execution_time_ms": result["execution_time_ms"],
+        "memory_used_kb": result["memory_used_kb"],
+        **_resource_usage(result),
+        "truncated": truncated,
+        "cpu_budget_remaining": round(cpu_budget.charge(user_id, result), 3),
+        "stage": "execution"
+    }
+    if request.debug:
+        verdict["debug"] = timer.to_dict()
+    yield _sse_event("verdict", verdict)
+
+
+async def _pump_output(events: AsyncIterator[Tuple[str, Any]], chunks: asyncio.Queue) -> Dict[str, Any]:
+    """Move a runner's output chunks onto `chunks` and return its result; None marks the end"""
+    result = None
+    try:
+        async for kind, data in events:
+            if kind == "result":
+                result = data
+            else:
+                chunks.put_nowait((kind, data))
+    finally:
+        await events.aclose()
+        chunks.put_nowait(None)
+    return result
+
+
+def _resource_usage(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Measured resource fields of a run result, for responses and storage"""
+    return {field: result.get(field) for field in RESOURCE_USAGE_FIELDS}
+
+
+async def _grade_submission(request: CodeSubmissionRequest, user_id: int) -> CodeSubmissionResponse:
+    """Run an exercise's test cases against a submission, timing each stage"""
+    timer = StageTimer()
+    with tracing(timer):
+        result = await _grade(request, user_id)
+    stage_latency.observe("javascript", timer)
+    if request.debug:
+        result.debug = timer.to_dict()
+    return result
+
+
+async def _grade(request: CodeSubmissionRequest, user_id: int) -> CodeSubmissionResponse:
+    try:
+        if request.exercise_id not in EXERCISE_TEST_CASES:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Exercise not found"
             )
         
-        # Execute code with test cases
-        execution_result = await _execute_javascript(request.submitted_code, 30)
-        
-        # Run specific test cases for the exercise
-        test_cases = exercise_test_cases[request.exercise_id]["test_cases"]
-        function_name = exercise_test_cases[request.exercise_id]["function_name"]
-        
-        test_results = []
-        all_passed = True
-        
-        for i, test_case in enumerate(test_cases):
-            try:
-                # Create test code
-                test_code = f"""
-{request.submitted_code}
-
-// Test case {i + 1}
-try {{
-    const result = {function_name}({test_case['input']});
-    const expected = {test_case['expected']};
-    const passed = result == expected;
-    console.log(JSON.stringify({{
-        test_case: {i + 1},
-        input: {test_case['input']},
-        expected: expected,
-        actual: result,
-        passed: passed,
-        description: "{test_case['description']}"
-    }}));
-}} catch (error) {{
-    console.log(JSON.stringify({{
-        test_case: {i + 1},
-        error: error.message,
-        passed: false,
-        description: "{test_case['description']}"
-    }}));
-}}
-"""
-                
-                result = await _execute_javascript(test_code, 10)
-                
-                if result["success"]:
-                    # Parse test result from output
-                    try:
-                        test_result = json.loads(result["output"].strip().split('\n')[-1])
-                        test_results.append(test_result)
-                        if not test_result["passed"]:
-                            all_passed = False
-                    except:
-                        test_results.append({
-                            "test_case": i + 1,
-                            "passed": False,
-                            "error": "Failed to parse test result",
-                            "description": test_case["description"]
-                        })
-                        all_passed = False
-                else:
-                    test_results.append({
-                        "test_case": i + 1,
-                        "passed": False,
-                        "error": result.get("error", "Execution failed"),
-                        "description": test_case["description"]
-                    })
-                    all_passed = False
-                    
-            except Exception as e:
-                test_results.append({
-                    "test_case": i + 1,
-                    "passed": False,
-                    "error": str(e),
-                    "description": test_case["description"]
-                })
-                all_passed = False
+        exercise = EXERCISE_TEST_CASES[request.exercise_id]
+        test_cases = exercise["test_cases"]
+        function_name = exercise["function_name"]
+        
+        # Identical submissions to a deterministic exercise reuse the earlier grading
+        with timed_stage("cache"):
+            cache_key = None
+            if exercise.get("cache_results", True):
+                cache_key = result_cache.key(
+                    request.exercise_id,
+                    exercise["updated_at"],
+                    "javascript",
+                    request.submitted_code,
+                    grading_harness.toolchain_version(),
+                    request.stop_on_first_failure
+                )
+            grading = result_cache.get(cache_key) if cache_key else None
+        cached = grading is not None
+        
+        if grading is None:
+            # Load the submission once and evaluate every test case in the same run
+            violation = find_dangerous_pattern("javascript", request.submitted_code)
+            if violation:
+                grading = grading_harness.rejected(
+                    test_cases,
+                    f"Security violation: Dangerous pattern detected - {violation}"
+                )
+            else:
+                with timed_stage("grading"):
+                    grading = await grading_harness.grade_javascript(
+                        request.submitted_code,
+                        function_name,
+                        test_cases,
+                        timeout=30,
+                        stop_on_first_failure=request.stop_on_first_failure
+                    )
+                # Timeouts and harness failures may not repeat, so only completed runs are kept
+                if cache_key and grading["success"]:
+                    result_cache.put(cache_key, grading)
+        
+        test_results = test_results_summary(grading, len(test_cases))
         
         return CodeSubmissionResponse(
             id=1,
-            user_id=current_user.id,
+            user_id=user_id,
             exercise_id=request.exercise_id,
             submitted_code=request.submitted_code,
-            passed=all_passed,
-            test_results={
-                "all_passed": all_passed,
-                "total_tests": len(test_cases),
-                "passed_tests": sum(1 for t in test_results if t["passed"]),
-                "test_cases": test_results
-            },
-            execution_time_ms=execution_result["execution_time_ms"],
-            memory_used_kb=execution_result["memory_used_kb"],
-            submitted_at="2024-01-01T15:30:00Z"
+            passed=test_results["all_passed"],
+            test_results=test_results,
+            execution_time_ms=grading["execution_time_ms"],
+            memory_used_kb=grading["memory_used_kb"],
+            submitted_at="2024-01-01T15:30:00Z",
+            cached=cached,
+            **_resource_usage(grading)
         )
         
     except HTTPException:
@@ -233,220 +643,50 @@ try {{
         )
 
 
-async def _execute_javascript(code: str, timeout: int = 30) -> Dict[str, Any]:
-    """Execute JavaScript code in a simulated safe environment for demonstration"""
-    import time
-    import re
-    
-    start_time = time.time()
-    
-    try:
-        # Simulate execution with pattern matching for demonstration
-        output_lines = []
-        
-        # Check for dangerous patterns (basic security simulation)
-        dangerous_patterns = [
-            r'require\s*\([\'"]fs[\'"]\)',
-            r'require\s*\([\'"]child_process[\'"]\)',
-            r'require\s*\([\'"]os[\'"]\)',
-            r'process\.',
-            r'eval\s*\(',
-            r'Function\s*\(',
-        ]
-        
-        for pattern in dangerous_patterns:
-            if re.search(pattern, code, re.IGNORECASE):
-                return {
-                    "success": False,
-                    "output": "",
-                    "error": f"Security violation: Dangerous pattern detected - {pattern}",
-                    "execution_time_ms": int((time.time() - start_time) * 1000),
-                    "memory_used_kb": 0
-                }
-        
-        # Extract console.log statements for simulation
-        console_logs = re.findall(r'console\.log\s*\(([^)]+)\)', code)
-        for log in console_logs:
-            # Simple evaluation of basic expressions
-            try:
-                # Handle string literals
-                if log.strip().startswith('"') and log.strip().endswith('"'):
-                    output_lines.append(log.strip()[1:-1])
-                elif log.strip().startswith("'") and log.strip().endswith("'"):
-                    output_lines.append(log.strip()[1:-1])
-                else:
-                    # Handle variables and expressions
-                    output_lines.append(f"[Simulated output for: {log.strip()}]")
-            except:
-                output_lines.append(f"[Output: {log.strip()}]")
-        
-        # Simulate swarm algorithm execution
-        if 'swarm' in code.lower() or 'agent' in code.lower():
-            output_lines.append("[rUv-Swarm Simulation]")
-            output_lines.append("Swarm initialized with 5 agents")
-            output_lines.append("Agent positions updated")
-            output_lines.append("Swarm behavior: Flocking patterns detected")
-        
-        # Simulate mathematical calculations
-        math_operations = re.findall(r'Math\.(\w+)\s*\([^)]*\)', code)
-        for op in math_operations:
-            output_lines.append(f"Math.{op} calculated successfully")
-        
-        # Check for function definitions and calls
-        functions = re.findall(r'function\s+(\w+)\s*\(', code)
-        for func in functions:
-            output_lines.append(f"Function '{func}' defined")
-        
-        # Check for return statements
-        returns = re.findall(r'return\s+([^;\n]+)', code)
-        for ret in returns:
-            output_lines.append(f"Returned: {ret.strip()}")
-        
-        # If no specific patterns found, provide generic success message
-        if not output_lines:
-            output_lines.append("Code executed successfully (simulated)")
-            output_lines.append("No console output detected")
-        
-        execution_time = int((time.time() - start_time) * 1000)
-        
-        return {
-            "success": True,
-            "output": "\n".join(output_lines),
-            "execution_time_ms": execution_time,
-            "memory_used_kb": 1024  # Mock memory usage
-        }
-        
-    except Exception as e:
-        return {
-            "success": False,
-            "output": "",
-            "error": f"Simulation error: {str(e)}",
-            "execution_time_ms": int((time.time() - start_time) * 1000),
-            "memory_used_kb": 0
-        }
-
-
-async def _execute_python(code: str, timeout: int = 30) -> Dict[str, Any]:
-    """Execute Python code in a simulated safe environment for demonstration"""
-    import time
-    import re
-    import ast
-    
-    start_time = time.time()
-    
-    try:
-        # Check for dangerous patterns (basic security simulation)
-        dangerous_patterns = [
-            r'import\s+os',
-            r'import\s+subprocess',
-            r'import\s+sys',
-            r'from\s+os\s+import',
-            r'__import__',
-            r'exec\s*\(',
-            r'eval\s*\(',
-            r'open\s*\(',
-            r'file\s*\(',
-        ]
-        
-        for pattern in dangerous_patterns:
-            if re.search(pattern, code, re.IGNORECASE):
-                return {
-                    "success": False,
-                    "output": "",
-                    "error": f"Security violation: Dangerous pattern detected - {pattern}",
-                    "execution_time_ms": int((time.time() - start_time) * 1000),
-                    "memory_used_kb": 0
-                }
-        
-        output_lines = []
-        
-        # Extract print statements for simulation
-        print_statements = re.findall(r'print\s*\(([^)]+)\)', code)
-        for print_stmt in print_statements:
-            # Simple evaluation of basic expressions
-            try:
-                # Handle string literals
-                if print_stmt.strip().startswith('"') and print_stmt.strip().endswith('"'):
-                    output_lines.append(print_stmt.strip()[1:-1])
-                elif print_stmt.strip().startswith("'") and print_stmt.strip().endswith("'"):
-                    output_lines.append(print_stmt.strip()[1:-1])
-                else:
-                    # Handle variables and expressions
-                    output_lines.append(f"[Simulated output for: {print_stmt.strip()}]")
-            except:
-                output_lines.append(f"[Output: {print_stmt.strip()}]")
-        
-        # Simulate swarm algorithm execution
-        if 'swarm' in code.lower() or 'agent' in code.lower():
-            output_lines.append("[rUv-Swarm Python Simulation]")
-            output_lines.append("Swarm class initialized")
-            output_lines.append("Agents created and positioned")
-            output_lines.append("Swarm update cycle completed")
-        
-        # Check for class definitions
-        classes = re.findall(r'class\s+(\w+)', code)
-        for cls in classes:
-            output_lines.append(f"Class '{cls}' defined")
-        
-        # Check for function definitions
-        functions = re.findall(r'def\s+(\w+)\s*\(', code)
-        for func in functions:
-            output_lines.append(f"Function '{func}' defined")
-        
-        # Simulate mathematical operations
-        if 'math.' in code or 'random.' in code or 'numpy.' in code:
-            output_lines.append("Mathematical operations completed")
-        
-        # Check for loops
-        if 'for ' in code or 'while ' in code:
-            output_lines.append("Loop execution simulated")
-        
-        # If no specific patterns found, provide generic success message
-        if not output_lines:
-            output_lines.append("Python code executed successfully (simulated)")
-            output_lines.append("No print output detected")
-        
-        execution_time = int((time.time() - start_time) * 1000)
-        
-        return {
-            "success": True,
-            "output": "\n".join(output_lines),
-            "execution_time_ms": execution_time,
-            "memory_used_kb": 2048  # Mock memory usage
-        }
-        
-    except Exception as e:
-        return {
-            "success": False,
-            "output": "",
-            "error": f"Simulation error: {str(e)}",
-            "execution_time_ms": int((time.time() - start_time) * 1000),
-            "memory_used_kb": 0
-        }
-
-
 async def _run_test_cases(code: str, test_cases_json: str, language: str) -> Dict[str, Any]:
-    """Run test cases against the code"""
+    """Run test cases against the code concurrently, within an aggregate deadline"""
     try:
         test_cases = json.loads(test_cases_json)
-        results = []
         
-        for test_case in test_cases:
-            # This is a simplified implementation
-            # In production, you'd want more sophisticated test running
-            if language == "javascript":
+        # This is a simplified implementation
+        # In production, you'd want more sophisticated test running
+        if language != "javascript":
+            return {
+                "total": len(test_cases),
+                "passed": 0,
+                "results": []
+            }
+        
+        def make_case(test_case: Dict[str, Any]):
+            async def run() -> Dict[str, Any]:
                 test_code = f"{code}\n\n{test_case.get('test_code', '')}"
-                result = await _execute_javascript(test_code, 10)
-                results.append({
-                    "name": test_case.get("name", "Test"),
-                    "passed": result["success"] and "true" in result["output"].lower(),
-                    "output": result["output"],
-                    "error": result.get("error")
-                })
+                return await runner_registry.run("javascript", test_code, settings.TEST_CASE_TIMEOUT)
+            return run
+        
+        outcomes = await fan_out(
+            [make_case(test_case) for test_case in test_cases],
+            concurrency=settings.TEST_CASE_CONCURRENCY,
+            case_timeout=settings.TEST_CASE_TIMEOUT,
+            deadline=settings.TEST_RUN_DEADLINE
+        )
+        
+        results = []
+        for test_case, outcome in zip(test_cases, outcomes):
+            result = outcome.value if outcome.ok else {"success": False, "output": "", "error": outcome.error}
+            results.append({
+                "name": test_case.get("name", "Test"),
+                "passed": result["success"] and "true" in result["output"].lower(),
+                "status": outcome.status,
+                "output": result["output"],
+                "error": result.get("error"),
+                "elapsed_ms": outcome.elapsed_ms
+            })
         
         return {
             "total": len(test_cases),
             "passed": sum(1 for r in results if r["passed"]),
+            "completed": sum(1 for o in outcomes if o.status != "deadline"),
+            "deadline_exceeded": any(o.status == "deadline" for o in outcomes),
             "results": results
         }
         
@@ -457,287 +697,3 @@ async def _run_test_cases(code: str, test_cases_json: str, language: str) -> Dic
             "error": str(e),
             "results": []
         }
-
-
-async def _execute_java(code: str, timeout: int = 30) -> Dict[str, Any]:
-    """Execute Java code in a simulated environment for demonstration"""
-    import time
-    import re
-    
-    start_time = time.time()
-    
-    try:
-        # Check for dangerous patterns
-        dangerous_patterns = [
-            r'Runtime\.',
-            r'ProcessBuilder',
-            r'System\.exit',
-            r'System\.getProperty',
-            r'Class\.forName',
-            r'reflection',
-        ]
-        
-        for pattern in dangerous_patterns:
-            if re.search(pattern, code, re.IGNORECASE):
-                return {
-                    "success": False,
-                    "output": "",
-                    "error": f"Security violation: Dangerous pattern detected - {pattern}",
-                    "execution_time_ms": int((time.time() - start_time) * 1000),
-                    "memory_used_kb": 0
-                }
-        
-        output_lines = []
-        
-        # Extract System.out.println statements
-        print_statements = re.findall(r'System\.out\.println\s*\(([^)]+)\)', code)
-        for print_stmt in print_statements:
-            if print_stmt.strip().startswith('"') and print_stmt.strip().endswith('"'):
-                output_lines.append(print_stmt.strip()[1:-1])
-            else:
-                output_lines.append(f"[Java output: {print_stmt.strip()}]")
-        
-        # Simulate swarm execution
-        if 'swarm' in code.lower() or 'agent' in code.lower():
-            output_lines.append("[rUv-Swarm Java Simulation]")
-            output_lines.append("Swarm initialized with agent objects")
-            output_lines.append("Agent behaviors executed")
-        
-        # Check for class definitions
-        classes = re.findall(r'class\s+(\w+)', code)
-        for cls in classes:
-            output_lines.append(f"Java class '{cls}' compiled and loaded")
-        
-        if not output_lines:
-            output_lines.append("Java code executed successfully (simulated)")
-        
-        return {
-            "success": True,
-            "output": "\n".join(output_lines),
-            "execution_time_ms": int((time.time() - start_time) * 1000),
-            "memory_used_kb": 4096
-        }
-        
-    except Exception as e:
-        return {
-            "success": False,
-            "output": "",
-            "error": f"Java simulation error: {str(e)}",
-            "execution_time_ms": int((time.time() - start_time) * 1000),
-            "memory_used_kb": 0
-        }
-
-
-async def _execute_cpp(code: str, timeout: int = 30) -> Dict[str, Any]:
-    """Execute C++ code in a simulated environment for demonstration"""
-    import time
-    import re
-    
-    start_time = time.time()
-    
-    try:
-        # Check for dangerous patterns
-        dangerous_patterns = [
-            r'system\s*\(',
-            r'exec\w*\s*\(',
-            r'popen\s*\(',
-            r'__asm',
-            r'#include\s*<unistd\.h>',
-        ]
-        
-        for pattern in dangerous_patterns:
-            if re.search(pattern, code, re.IGNORECASE):
-                return {
-                    "success": False,
-                    "output": "",
-                    "error": f"Security violation: Dangerous pattern detected - {pattern}",
-                    "execution_time_ms": int((time.time() - start_time) * 1000),
-                    "memory_used_kb": 0
-                }
-        
-        output_lines = []
-        
-        # Extract cout statements
-        cout_statements = re.findall(r'cout\s*<<\s*([^;]+)', code)
-        for cout_stmt in cout_statements:
-            if '"' in cout_stmt:
-                # Extract string literals
-                strings = re.findall(r'"([^"]+)"', cout_stmt)
-                output_lines.extend(strings)
-            else:
-                output_lines.append(f"[C++ output: {cout_stmt.strip()}]")
-        
-        # Extract printf statements
-        printf_statements = re.findall(r'printf\s*\(([^)]+)\)', code)
-        for printf_stmt in printf_statements:
-            if printf_stmt.strip().startswith('"'):
-                # Simple string extraction
-                string_match = re.match(r'"([^"]+)"', printf_stmt.strip())
-                if string_match:
-                    output_lines.append(string_match.group(1))
-        
-        # Simulate swarm execution
-        if 'swarm' in code.lower() or 'agent' in code.lower():
-            output_lines.append("[rUv-Swarm C++ Simulation]")
-            output_lines.append("High-performance swarm algorithms initialized")
-            output_lines.append("Memory-efficient agent processing completed")
-        
-        if not output_lines:
-            output_lines.append("C++ code compiled and executed successfully (simulated)")
-        
-        return {
-            "success": True,
-            "output": "\n".join(output_lines),
-            "execution_time_ms": int((time.time() - start_time) * 1000),
-            "memory_used_kb": 3072
-        }
-        
-    except Exception as e:
-        return {
-            "success": False,
-            "output": "",
-            "error": f"C++ simulation error: {str(e)}",
-            "execution_time_ms": int((time.time() - start_time) * 1000),
-            "memory_used_kb": 0
-        }
-
-
-async def _execute_rust(code: str, timeout: int = 30) -> Dict[str, Any]:
-    """Execute Rust code in a simulated environment for demonstration"""
-    import time
-    import re
-    
-    start_time = time.time()
-    
-    try:
-        # Check for dangerous patterns
-        dangerous_patterns = [
-            r'std::process',
-            r'std::fs',
-            r'unsafe\s*{',
-            r'libc::', 
-        ]
-        
-        for pattern in dangerous_patterns:
-            if re.search(pattern, code, re.IGNORECASE):
-                return {
-                    "success": False,
-                    "output": "",
-                    "error": f"Security violation: Dangerous pattern detected - {pattern}",
-                    "execution_time_ms": int((time.time() - start_time) * 1000),
-                    "memory_used_kb": 0
-                }
-        
-        output_lines = []
-        
-        # Extract println! statements
-        println_statements = re.findall(r'println!\s*\(([^)]+)\)', code)
-        for println_stmt in println_statements:
-            if println_stmt.strip().startswith('"') and println_stmt.strip().endswith('"'):
-                output_lines.append(println_stmt.strip()[1:-1])
-            else:
-                output_lines.append(f"[Rust output: {println_stmt.strip()}]")
-        
-        # Simulate swarm execution
-        if 'swarm' in code.lower() or 'agent' in code.lower():
-            output_lines.append("[rUv-Swarm Rust Simulation]")
-            output_lines.append("Memory-safe swarm algorithms compiled")
-            output_lines.append("Zero-cost abstractions for agent systems")
-        
-        # Check for struct definitions  
-        structs = re.findall(r'struct\s+(\w+)', code)
-        for struct in structs:
-            output_lines.append(f"Rust struct '{struct}' defined")
-        
-        if not output_lines:
-            output_lines.append("Rust code compiled and executed successfully (simulated)")
-        
-        return {
-            "success": True,
-            "output": "\n".join(output_lines),
-            "execution_time_ms": int((time.time() - start_time) * 1000),
-            "memory_used_kb": 2560
-        }
-        
-    except Exception as e:
-        return {
-            "success": False,
-            "output": "",
-            "error": f"Rust simulation error: {str(e)}",
-            "execution_time_ms": int((time.time() - start_time) * 1000),
-            "memory_used_kb": 0
-        }
-
-
-async def _execute_go(code: str, timeout: int = 30) -> Dict[str, Any]:
-    """Execute Go code in a simulated environment for demonstration"""
-    import time
-    import re
-    
-    start_time = time.time()
-    
-    try:
-        # Check for dangerous patterns
-        dangerous_patterns = [
-            r'os/exec',
-            r'os\.Exec',
-            r'syscall\.',
-            r'unsafe\.',
-        ]
-        
-        for pattern in dangerous_patterns:
-            if re.search(pattern, code, re.IGNORECASE):
-                return {
-                    "success": False,
-                    "output": "",
-                    "error": f"Security violation: Dangerous pattern detected - {pattern}",
-                    "execution_time_ms": int((time.time() - start_time) * 1000),
-                    "memory_used_kb": 0
-                }
-        
-        output_lines = []
-        
-        # Extract fmt.Println statements
-        println_statements = re.findall(r'fmt\.Println\s*\(([^)]+)\)', code)
-        for println_stmt in println_statements:
-            if println_stmt.strip().startswith('"') and println_stmt.strip().endswith('"'):
-                output_lines.append(println_stmt.strip()[1:-1])
-            else:
-                output_lines.append(f"[Go output: {println_stmt.strip()}]")
-        
-        # Extract fmt.Printf statements
-        printf_statements = re.findall(r'fmt\.Printf\s*\(([^)]+)\)', code)
-        for printf_stmt in printf_statements:
-            if '"' in printf_stmt:
-                string_match = re.search(r'"([^"]+)"', printf_stmt)
-                if string_match:
-                    output_lines.append(string_match.group(1))
-        
-        # Simulate swarm execution
-        if 'swarm' in code.lower() or 'agent' in code.lower():
-            output_lines.append("[rUv-Swarm Go Simulation]")
-            output_lines.append("Concurrent swarm processing with goroutines")
-            output_lines.append("Channel-based agent communication established")
-        
-        # Check for goroutines
-        if 'go ' in code or 'goroutine' in code.lower():
-            output_lines.append("Goroutine execution simulated")
-        
-        if not output_lines:
-            output_lines.append("Go code compiled and executed successfully (simulated)")
-        
-        return {
-            "success": True,
-            "output": "\n".join(output_lines),
-            "execution_time_ms": int((time.time() - start_time) * 1000),
-            "memory_used_kb": 2048
-        }
-        
-    except Exception as e:
-        return {
-            "success": False,
-            "output": "",
-            "error": f"Go simulation error: {str(e)}",
-            "execution_time_ms": int((time.time() - start_time) * 1000),
-            "memory_used_kb": 0
-        }
\ No newline at end of file
@@ -72,6 +72,65 @@ class Settings(BaseSettings):
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_PERIOD: int = 60  # seconds
     
+    # Code Execution Queue
+    EXECUTION_QUEUE_SIZE: int = 100  # queued jobs before answering 429
+    EXECUTION_WORKERS: int = 4
+    EXECUTION_RESULT_TTL: int = 300  # seconds
+    EXECUTION_JOB_TIMEOUT: int = 60  # seconds
+    EXECUTION_MAX_POLL_WAIT: int = 30  # seconds
+    EXECUTION_MAX_OUTPUT_BYTES: int = 64 * 1024  # streamed output cap
+    EXECUTION_STREAM_HEARTBEAT: float = 1.0  # seconds between keep-alives while a streamed run is going
+    EXECUTION_CANCEL_WAIT: float = 5.0  # seconds a job cancel waits for the run to stop
+    
+    # Test Case Fan-out
+    TEST_CASE_CONCURRENCY: int = 8  # concurrent cases per request
+    TEST_CASE_TIMEOUT: int = 10  # seconds per case
+    TEST_RUN_DEADLINE: int = 30  # seconds for all cases of a request
+    
+    # Language Runners
+    RUNNER_INTERPRETED_CONCURRENCY: int = 8  # concurrent runs per interpreted language
+    RUNNER_COMPILED_CONCURRENCY: int = 2  # concurrent runs per compiled language
+    
+    # Python Fork Server
+    PYTHON_ZYGOTE_ENABLED: bool = False  # run Python submissions instead of simulating them
+    PYTHON_ZYGOTE_PRELOAD: List[str] = [
+        "math", "random", "json", "collections", "itertools", "functools",
+        "statistics", "dataclasses", "typing", "heapq", "bisect", "re"
+    ]
+    PYTHON_ZYGOTE_MAX_FORKS: int = 1000  # runs before the zygote is replaced
+    PYTHON_ZYGOTE_MAX_RSS_MB: int = 256  # zygote size before it is replaced
+    PYTHON_ZYGOTE_USER: str = "nobody"  # runs drop to this user when started as root
+    PYTHON_RUN_MEMORY_MB: int = 128  # address space a run may add to the zygote image
+    
+    # JavaScript Grading Sandbox
+    GRADING_USER: str = "nobody"  # node drops to this user when started as root
+    GRADING_HEAP_MB: int = 128  # V8 heap limit (--max-old-space-size)
+    GRADING_ADDRESS_SPACE_MB: int = 1024  # RLIMIT_AS of node; V8 reserves ~700 MB up front
+    GRADING_MAX_FILE_MB: int = 16  # RLIMIT_FSIZE, bounds the results file
+    GRADING_MAX_PROCESSES: int = 256  # RLIMIT_NPROC, threads of every run of GRADING_USER
+    GRADING_MAX_OPEN_FILES: int = 64
+    
+    # Run Resource Accounting
+    CGROUP_ACCOUNTING_ENABLED: bool = True
+    CGROUP_ROOT: Optional[str] = None  # cgroup v2 mount point; found in /proc/self/mounts if unset
+    CGROUP_PARENT: str = "ruv-runs"  # created under the server's own cgroup
+    
+    # Execution CPU Budget
+    CPU_BUDGET_ENABLED: bool = True
+    CPU_BUDGET_SECONDS: float = 300.0  # sandbox CPU-seconds a user may consume per window
+    CPU_BUDGET_WINDOW: int = 3600  # seconds
+    
+    # Bulk Regrade
+    REGRADE_BATCH_SIZE: int = 200  # submissions read and written per transaction
+    REGRADE_PROCESSES: int = 2  # grading worker processes
+    REGRADE_CONCURRENCY: int = 4  # sandbox runs at once per worker process
+    REGRADE_NICE: int = 10  # niceness of workers and their sandboxes, below live traffic
+    REGRADE_TIMEOUT: int = 30  # seconds per submission
+    
+    # Grading Result Cache
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_SIZE: int = 10000  # cached grading results
+    
     # File Upload Settings
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_UPLOAD_EXTENSIONS: List[str] = [".jpg", ".jpeg", ".png", ".pdf", ".doc", ".docx"]
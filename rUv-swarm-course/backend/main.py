@@ -12,6 +12,8 @@ from backend.config import settings
 from backend.api import health, auth, users, courses, lessons, quizzes, code_execution
 from backend.utils.logging import setup_logging
 from backend.utils.database import database_manager
+from backend.services.execution_queue import execution_queue
+from backend.services.python_zygote import python_zygote
 
 # Setup logging
 setup_logging()
@@ -36,6 +38,8 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down FastAPI application...")
     try:
+        await execution_queue.shutdown()
+        await python_zygote.shutdown()
         await database_manager.disconnect()
         logger.info("Database connection closed")
     except Exception as e:
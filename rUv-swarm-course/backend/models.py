@@ -162,6 +162,7 @@ class CodeExercise(Base):
     difficulty = Column(Integer)
     order_index = Column(Integer, nullable=False)
     hints = Column(Text)  # JSON array
+    cache_results = Column(Boolean, default=True)  # False for time- or random-dependent tests
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -372,6 +373,12 @@ class CodeSubmission(Base):
     passed = Column(Boolean, default=False)
     execution_time_ms = Column(Integer)
     memory_used_kb = Column(Integer)
+    # Measured from the run's cgroup (cpu.stat, memory.peak); NULL when not measured
+    cpu_user_ms = Column(Integer)
+    cpu_system_ms = Column(Integer)
+    memory_peak_kb = Column(Integer)
+    cpu_throttled_count = Column(Integer)
+    cpu_throttled_ms = Column(Integer)
     submitted_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -380,12 +387,60 @@ class CodeSubmission(Base):
     
     __table_args__ = (
         Index('idx_code_submissions_user', 'user_id'),
+        Index('idx_code_submissions_exercise', 'exercise_id', 'id'),
     )
     
     def __repr__(self):
         return f"<CodeSubmission(user_id={self.user_id}, exercise_id={self.exercise_id}, passed={self.passed})>"
 
 
+class RegradeRun(Base):
+    """Progress checkpoint of a bulk regrade of an exercise's submissions"""
+    __tablename__ = 'regrade_runs'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    exercise_id = Column(Integer, ForeignKey('code_exercises.id', ondelete='CASCADE'), nullable=False)
+    status = Column(String(20), default='running')  # running, completed, failed
+    last_submission_id = Column(Integer, default=0)  # submissions up to this id are written
+    max_submission_id = Column(Integer)  # last submission when the run started; later ones are not part of it
+    total = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    changed = Column(Integer, default=0)  # submissions whose passed verdict flipped
+    errors = Column(Integer, default=0)
+    failed = Column(Integer, default=0)  # submissions the harness could not grade; retried on resume
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+    
+    __table_args__ = (
+        CheckConstraint("status IN ('running', 'completed', 'failed')"),
+        Index('idx_regrade_runs_exercise', 'exercise_id', 'status'),
+    )
+    
+    def __repr__(self):
+        return f"<RegradeRun(exercise_id={self.exercise_id}, status='{self.status}', processed={self.processed})>"
+
+
+class RegradeItem(Base):
+    """Outcome of one submission in a bulk regrade"""
+    __tablename__ = 'regrade_items'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(Integer, ForeignKey('regrade_runs.id', ondelete='CASCADE'), nullable=False)
+    submission_id = Column(Integer, ForeignKey('code_submissions.id', ondelete='CASCADE'), nullable=False)
+    status = Column(String(20), nullable=False)  # done, failed
+    error = Column(Text)
+    
+    __table_args__ = (
+        CheckConstraint("status IN ('done', 'failed')"),
+        UniqueConstraint('run_id', 'submission_id'),
+        Index('idx_regrade_items_run', 'run_id', 'status'),
+    )
+    
+    def __repr__(self):
+        return f"<RegradeItem(run_id={self.run_id}, submission_id={self.submission_id}, status='{self.status}')>"
+
+
 class Achievement(Base):
     """Achievement/badge model"""
     __tablename__ = 'achievements'
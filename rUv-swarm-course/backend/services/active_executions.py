@@ -0,0 +1,100 @@
+"""
+Active Executions - direct runs in flight, cancellable by the id the client gave them
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+RunKey = Tuple[Optional[int], str]  # (owner id, execution id)
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionCancelledError(Exception):
+    """Raised by ActiveExecutions.run() for a run cancelled by its id"""
+    
+    def __init__(self, execution_id: str):
+        super().__init__(f"Execution {execution_id} was cancelled")
+        self.execution_id = execution_id
+
+
+class DuplicateExecutionError(Exception):
+    """Raised when an execution id is already in use by a run in flight of the same user"""
+    
+    def __init__(self, execution_id: str):
+        super().__init__(f"Execution {execution_id} is already running")
+        self.execution_id = execution_id
+
+
+class ActiveExecutions:
+    """Runs started with an execution id, so a later request can cancel them.
+    
+    Each run is a task of its own; cancelling it kills its sandbox the same
+    way a client disconnect does. Ids are scoped by the user who started the
+    run: two users can use the same id, and a user only ever sees and
+    cancels their own runs. Must be used from a single event loop.
+    """
+    
+    def __init__(self):
+        self._runs: Dict[RunKey, asyncio.Task] = {}
+        
+        # Metrics
+        self.started = 0
+        self.cancelled = 0
+    
+    def active(self, execution_id: str, owner_id: Optional[int]) -> bool:
+        return (owner_id, execution_id) in self._runs
+    
+    def start(self, execution_id: Optional[str], owner_id: Optional[int], run: Awaitable) -> asyncio.Task:
+        """Start a run as a task, registered under `owner_id`'s `execution_id` until it finishes"""
+        key = (owner_id, execution_id)
+        if execution_id is not None and key in self._runs:
+            if asyncio.iscoroutine(run):
+                run.close()
+            raise DuplicateExecutionError(execution_id)
+        
+        task = asyncio.ensure_future(run)
+        if execution_id is None:
+            return task
+        self._runs[key] = task
+        self.started += 1
+        
+        def forget(_):
+            if self._runs.get(key) is task:
+                del self._runs[key]
+        
+        task.add_done_callback(forget)
+        return task
+    
+    async def run(self, execution_id: Optional[str], owner_id: Optional[int], run: Awaitable) -> Any:
+        """Run to completion; raises ExecutionCancelledError if cancelled by id"""
+        task = self.start(execution_id, owner_id, run)
+        try:
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            task.cancel()  # The request itself went away
+            raise
+        if task.cancelled():
+            raise ExecutionCancelledError(execution_id)
+        return task.result()
+    
+    def cancel(self, execution_id: str, owner_id: Optional[int]) -> bool:
+        """Cancel a run of `owner_id`; False if there is none in flight"""
+        task = self._runs.get((owner_id, execution_id))
+        if task is None or task.done():
+            return False
+        task.cancel()
+        self.cancelled += 1
+        logger.info(f"Execution {execution_id} cancelled")
+        return True
+    
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._runs),
+            "started": self.started,
+            "cancelled": self.cancelled,
+        }
+
+
+# Create a single instance for import
+active_executions = ActiveExecutions()
@@ -0,0 +1,369 @@
+"""
+Bulk Regrade - regrades every submission of an exercise after its test cases change
+
+Run from the command line once an exercise's test cases are fixed:
+
+    python -m backend.services.bulk_regrade EXERCISE_ID [--database-url URL]
+
+Rerunning the command after a crash, or after a run that ended with
+submissions the harness could not grade, resumes that run: the failed
+submissions are retried and grading continues after the last written batch.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import create_engine, delete, func, insert, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.config import settings
+from backend.models import CodeExercise, CodeSubmission, RegradeItem, RegradeRun
+from backend.services.grading_harness import grading_harness, test_results_summary
+from backend.services.result_cache import normalize_code
+from backend.services.security_scanner import security_scanner
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FUNCTION_NAME = "solution"
+RESOURCE_USAGE_FIELDS = (
+    "cpu_user_ms", "cpu_system_ms", "memory_peak_kb",
+    "cpu_throttled_count", "cpu_throttled_ms",
+)
+
+
+def load_test_cases(raw: Optional[str]) -> Tuple[List[Dict[str, Any]], str]:
+    """Test cases and function name from a CodeExercise.test_cases value.
+    
+    The column holds either a JSON list of cases, graded against a function
+    named `solution`, or an object with "test_cases" and "function_name".
+    """
+    data = json.loads(raw or "[]")
+    if isinstance(data, dict):
+        return data.get("test_cases", []), data.get("function_name", DEFAULT_FUNCTION_NAME)
+    return data, DEFAULT_FUNCTION_NAME
+
+
+def _lower_priority(nice: int) -> None:
+    """Worker process initializer; sandboxes started by the worker inherit it"""
+    os.nice(nice)
+
+
+def grade_chunk(codes: List[str], function_name: str, test_cases: List[Dict[str, Any]],
+                concurrency: int, timeout: float) -> List[Dict[str, Any]]:
+    """Grade submissions in a worker process, `concurrency` sandbox runs at a time.
+    
+    A submission whose grading raises gets a harness-error result, so one
+    failure does not lose the others' gradings.
+    """
+    async def grade_all() -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def grade(code: str) -> Dict[str, Any]:
+            violations = security_scanner.scan("javascript", code)
+            if violations:
+                return grading_harness.rejected(
+                    test_cases,
+                    f"Security violation: Dangerous pattern detected - {violations[0].rule}"
+                )
+            async with semaphore:
+                return await grading_harness.grade_javascript(code, function_name, test_cases, timeout=timeout)
+        
+        gradings = await asyncio.gather(*(grade(code) for code in codes), return_exceptions=True)
+        return [
+            grading_harness.rejected(test_cases, f"Grading failed: {grading}", harness_error=True)
+            if isinstance(grading, Exception) else grading
+            for grading in gradings
+        ]
+    
+    return asyncio.run(grade_all())
+
+
+@dataclass
+class RegradeProgress:
+    """Throughput and completion estimate of a regrade"""
+    run_id: int
+    exercise_id: int
+    status: str
+    total: int
+    processed: int
+    changed: int
+    errors: int
+    failed: int
+    elapsed_seconds: float
+    per_second: float
+    eta_seconds: Optional[float]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class BulkRegrade:
+    """Regrades an exercise's submissions in checkpointed batches.
+    
+    A run covers the submissions that existed when it started. They are read
+    by id in batches of `batch_size`. Each batch's distinct sources are
+    spread over a pool of worker processes, each grading `concurrency`
+    submissions at once, while the previous batch is written. A batch's new
+    results, the status of each of its submissions and the run's cursor are
+    committed in one transaction. A submission the harness could not grade
+    keeps its old result and is recorded as failed, and the run then ends
+    as failed. The next run of the same exercise resumes it: failed
+    submissions are retried and grading continues after the cursor, so
+    nothing is regraded, skipped or added. Workers run niced, as do the
+    sandboxes they start, so live runs keep priority on shared hosts.
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        batch_size: int = settings.REGRADE_BATCH_SIZE,
+        processes: int = settings.REGRADE_PROCESSES,
+        concurrency: int = settings.REGRADE_CONCURRENCY,
+        nice: int = settings.REGRADE_NICE,
+        timeout: float = settings.REGRADE_TIMEOUT,
+        on_progress: Optional[Callable[[RegradeProgress], None]] = None
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.processes = processes
+        self.concurrency = concurrency
+        self.nice = nice
+        self.timeout = timeout
+        self.on_progress = on_progress
+    
+    def run(self, exercise_id: int) -> RegradeProgress:
+        """Regrade every submission of an exercise, resuming an unfinished run"""
+        test_cases, function_name = self._exercise(exercise_id)
+        run_id, last_id, max_id = self._start(exercise_id)
+        started = time.monotonic()
+        graded_here = 0
+        
+        try:
+            with ProcessPoolExecutor(max_workers=self.processes, initializer=_lower_priority,
+                                     initargs=(self.nice,)) as pool:
+                batches = self._batches(run_id, exercise_id, last_id, max_id)
+                batch = next(batches, [])
+                pending = self._submit(pool, batch, function_name, test_cases)
+                while batch:
+                    # Grade the next batch while this one is collected and written
+                    next_batch = next(batches, [])
+                    next_pending = self._submit(pool, next_batch, function_name, test_cases)
+                    
+                    self._write_batch(run_id, batch, self._collect(batch, pending), len(test_cases))
+                    graded_here += len(batch)
+                    self._report(run_id, started, graded_here)
+                    batch, pending = next_batch, next_pending
+        except BaseException:
+            self._finish(run_id, "failed")
+            raise
+        
+        self._finish(run_id, "completed")
+        return self._report(run_id, started, graded_here)
+    
+    def _exercise(self, exercise_id: int) -> Tuple[List[Dict[str, Any]], str]:
+        with self.session_factory() as session:
+            exercise = session.get(CodeExercise, exercise_id)
+            if exercise is None:
+                raise ValueError(f"Exercise {exercise_id} not found")
+            return load_test_cases(exercise.test_cases)
+    
+    def _start(self, exercise_id: int) -> Tuple[int, int, int]:
+        """Checkpoint row to continue from, its cursor and the last submission id of the run"""
+        with self.session_factory() as session, session.begin():
+            run = session.execute(
+                select(RegradeRun)
+                .where(RegradeRun.exercise_id == exercise_id, RegradeRun.status != "completed")
+                .order_by(RegradeRun.id.desc())
+                .limit(1)
+            ).scalar_one_or_none()
+            if run is None:
+                run = RegradeRun(exercise_id=exercise_id, last_submission_id=0,
+                                 processed=0, changed=0, errors=0, failed=0)
+                session.add(run)
+            else:
+                logger.info(f"Resuming regrade {run.id} of exercise {exercise_id} "
+                            f"after submission {run.last_submission_id}, "
+                            f"retrying {run.failed or 0} failed submissions")
+            if run.max_submission_id is None:
+                run.max_submission_id = session.execute(
+                    select(func.coalesce(func.max(CodeSubmission.id), 0))
+                    .where(CodeSubmission.exercise_id == exercise_id)
+                ).scalar_one()
+            run.failed = run.failed or 0
+            run.status = "running"
+            run.finished_at = None
+            run.total = session.execute(
+                select(func.count()).where(CodeSubmission.exercise_id == exercise_id,
+                                           CodeSubmission.id <= run.max_submission_id)
+            ).scalar_one()
+            session.flush()
+            return run.id, run.last_submission_id, run.max_submission_id
+    
+    def _batches(self, run_id: int, exercise_id: int, after_id: int,
+                 max_id: int) -> Iterator[List[Tuple[int, str, bool]]]:
+        """Batches still to grade: earlier failures of the run, then those after its cursor"""
+        failed = self._read_failed(run_id)
+        for i in range(0, len(failed), self.batch_size):
+            yield failed[i:i + self.batch_size]
+        while True:
+            batch = self._read_batch(exercise_id, after_id, max_id)
+            if not batch:
+                return
+            yield batch
+            after_id = batch[-1][0]
+    
+    def _read_failed(self, run_id: int) -> List[Tuple[int, str, bool]]:
+        """(id, code, passed) rows of the submissions a run could not grade"""
+        with self.session_factory() as session:
+            rows = session.execute(
+                select(CodeSubmission.id, CodeSubmission.submitted_code, CodeSubmission.passed)
+                .join(RegradeItem, RegradeItem.submission_id == CodeSubmission.id)
+                .where(RegradeItem.run_id == run_id, RegradeItem.status == "failed")
+                .order_by(CodeSubmission.id)
+            ).all()
+        return [tuple(row) for row in rows]
+    
+    def _read_batch(self, exercise_id: int, after_id: int, max_id: int) -> List[Tuple[int, str, bool]]:
+        """Next (id, code, passed) rows by id; keyset paging keeps every read an index range"""
+        with self.session_factory() as session:
+            rows = session.execute(
+                select(CodeSubmission.id, CodeSubmission.submitted_code, CodeSubmission.passed)
+                .where(CodeSubmission.exercise_id == exercise_id,
+                       CodeSubmission.id > after_id, CodeSubmission.id <= max_id)
+                .order_by(CodeSubmission.id)
+                .limit(self.batch_size)
+            ).all()
+        return [tuple(row) for row in rows]
+    
+    def _submit(self, pool: ProcessPoolExecutor, batch: List[Tuple[int, str, bool]],
+                function_name: str, test_cases: List[Dict[str, Any]]
+                ) -> List[Tuple[List[str], Future]]:
+        """Hand a batch's distinct sources to the workers in one chunk per process"""
+        codes = list(dict.fromkeys(normalize_code(code) for _, code, _ in batch))
+        if not codes:
+            return []
+        size = math.ceil(len(codes) / self.processes)
+        chunks = [codes[i:i + size] for i in range(0, len(codes), size)]
+        return [
+            (chunk, pool.submit(grade_chunk, chunk, function_name, test_cases, self.concurrency, self.timeout))
+            for chunk in chunks
+        ]
+    
+    @staticmethod
+    def _collect(batch: List[Tuple[int, str, bool]],
+                 pending: List[Tuple[List[str], Future]]) -> List[Dict[str, Any]]:
+        """Gradings in batch order; identical sources share one grading"""
+        by_code: Dict[str, Dict[str, Any]] = {}
+        for chunk, future in pending:
+            by_code.update(zip(chunk, future.result()))
+        return [by_code[normalize_code(code)] for _, code, _ in batch]
+    
+    def _write_batch(self, run_id: int, batch: List[Tuple[int, str, bool]],
+                     gradings: List[Dict[str, Any]], total_tests: int) -> None:
+        """Store a batch's results and item statuses and advance the checkpoint in one transaction.
+        
+        Submissions the harness could not grade keep their stored result.
+        """
+        rows = []
+        items = []
+        changed = errors = 0
+        for (submission_id, _, was_passed), grading in zip(batch, gradings):
+            if grading.get("harness_error"):
+                items.append({"run_id": run_id, "submission_id": submission_id,
+                              "status": "failed", "error": grading["error"]})
+                continue
+            items.append({"run_id": run_id, "submission_id": submission_id,
+                          "status": "done", "error": None})
+            test_results = test_results_summary(grading, total_tests)
+            changed += bool(was_passed) != test_results["all_passed"]
+            errors += grading["error"] is not None
+            rows.append({
+                "id": submission_id,
+                "test_results": json.dumps(test_results),
+                "passed": test_results["all_passed"],
+                "execution_time_ms": grading["execution_time_ms"],
+                "memory_used_kb": grading["memory_used_kb"],
+                **{field: grading.get(field) for field in RESOURCE_USAGE_FIELDS},
+            })
+        
+        ids = [submission_id for submission_id, _, _ in batch]
+        with self.session_factory() as session, session.begin():
+            retried = session.execute(
+                select(func.count()).select_from(RegradeItem)
+                .where(RegradeItem.run_id == run_id, RegradeItem.status == "failed",
+                       RegradeItem.submission_id.in_(ids))
+            ).scalar_one()
+            session.execute(delete(RegradeItem).where(RegradeItem.run_id == run_id,
+                                                      RegradeItem.submission_id.in_(ids)))
+            session.execute(insert(RegradeItem), items)
+            if rows:
+                session.execute(update(CodeSubmission), rows)
+            run = session.get(RegradeRun, run_id)
+            # Retried failures sit behind the cursor, which never moves back
+            run.last_submission_id = max(run.last_submission_id, ids[-1])
+            run.processed += len(rows)
+            run.failed += len(items) - len(rows) - retried
+            run.changed += changed
+            run.errors += errors
+    
+    def _finish(self, run_id: int, status: str) -> None:
+        with self.session_factory() as session, session.begin():
+            run = session.get(RegradeRun, run_id)
+            if status == "completed" and run.failed:
+                # Left unfinished, so the next run retries those submissions
+                logger.warning(f"Regrade {run_id}: {run.failed} submissions could not be graded")
+                status = "failed"
+            run.status = status
+            run.finished_at = datetime.utcnow()
+    
+    def _report(self, run_id: int, started: float, graded_here: int) -> RegradeProgress:
+        with self.session_factory() as session:
+            run = session.get(RegradeRun, run_id)
+            elapsed = time.monotonic() - started
+            per_second = graded_here / elapsed if elapsed > 0 else 0.0
+            remaining = max(0, run.total - run.processed)
+            progress = RegradeProgress(
+                run_id=run.id,
+                exercise_id=run.exercise_id,
+                status=run.status,
+                total=run.total,
+                processed=run.processed,
+                changed=run.changed,
+                errors=run.errors,
+                failed=run.failed,
+                elapsed_seconds=round(elapsed, 3),
+                per_second=round(per_second, 2),
+                eta_seconds=round(remaining / per_second, 1) if per_second else None
+            )
+        logger.info(f"Regrade {run_id}: {progress.processed}/{progress.total} submissions, "
+                    f"{progress.per_second}/s, ETA {progress.eta_seconds}s")
+        if self.on_progress is not None:
+            self.on_progress(progress)
+        return progress
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Regrade every submission of an exercise")
+    parser.add_argument("exercise_id", type=int)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--batch-size", type=int, default=settings.REGRADE_BATCH_SIZE)
+    parser.add_argument("--processes", type=int, default=settings.REGRADE_PROCESSES)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format=settings.LOG_FORMAT)
+    engine = create_engine(args.database_url)
+    regrade = BulkRegrade(sessionmaker(bind=engine), batch_size=args.batch_size,
+                          processes=args.processes)
+    print(json.dumps(regrade.run(args.exercise_id).to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Test Case Fan-out - runs independent test cases concurrently under a deadline
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+CaseRunner = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class CaseOutcome:
+    """Result of one test case run by fan_out"""
+    index: int
+    status: str  # ok, error, timeout, deadline
+    value: Any = None
+    error: Optional[str] = None
+    elapsed_ms: int = 0
+    
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+async def fan_out(
+    cases: Sequence[CaseRunner],
+    concurrency: int,
+    case_timeout: float,
+    deadline: float
+) -> List[CaseOutcome]:
+    """Run `cases` concurrently and return one outcome per case, in order.
+    
+    At most `concurrency` cases run at once and each is cancelled after
+    `case_timeout` seconds. When the aggregate `deadline` passes, cases
+    still running or waiting for a slot are cancelled and reported with
+    status "deadline", so callers always get partial results back.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    outcomes: List[Optional[CaseOutcome]] = [None] * len(cases)
+    
+    async def run(index: int, case: CaseRunner) -> None:
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                value = await asyncio.wait_for(case(), case_timeout)
+                outcomes[index] = CaseOutcome(index, "ok", value=value)
+            except asyncio.TimeoutError:
+                outcomes[index] = CaseOutcome(
+                    index, "timeout", error=f"Test case timed out after {case_timeout}s"
+                )
+            except Exception as e:
+                outcomes[index] = CaseOutcome(index, "error", error=str(e))
+            outcomes[index].elapsed_ms = int((time.monotonic() - start) * 1000)
+    
+    tasks = [asyncio.create_task(run(i, case)) for i, case in enumerate(cases)]
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    return [
+        outcome or CaseOutcome(i, "deadline", error=f"Test run deadline of {deadline}s exceeded")
+        for i, outcome in enumerate(outcomes)
+    ]
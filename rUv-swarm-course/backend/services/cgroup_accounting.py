@@ -0,0 +1,265 @@
+"""
+Cgroup Accounting - measured CPU time, peak memory and throttling of each run
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Holds a started child until its parent has moved it into the run cgroup.
+# Status 70 means the parent went away before releasing it.
+GATE_SCRIPT = 'read -r _ || exit 70; exec "$@" </dev/null'
+
+
+@dataclass
+class ResourceUsage:
+    """Resources a run consumed; fields the host could not measure stay None"""
+    cpu_user_ms: Optional[int] = None
+    cpu_system_ms: Optional[int] = None
+    memory_peak_kb: Optional[int] = None
+    cpu_throttled_count: Optional[int] = None
+    cpu_throttled_ms: Optional[int] = None
+    measured_by: str = "none"  # cgroup, rusage, runtime, none
+    
+    def merge(self, fallback: "ResourceUsage") -> "ResourceUsage":
+        """These values, with gaps filled from another measurement"""
+        merged = ResourceUsage(**asdict(self))
+        filled = False
+        for name in ("cpu_user_ms", "cpu_system_ms", "memory_peak_kb",
+                     "cpu_throttled_count", "cpu_throttled_ms"):
+            if getattr(merged, name) is None and getattr(fallback, name) is not None:
+                setattr(merged, name, getattr(fallback, name))
+                filled = True
+        if merged.measured_by == "none":
+            merged.measured_by = fallback.measured_by
+        elif filled and fallback.measured_by != "none":
+            merged.measured_by = f"{merged.measured_by}+{fallback.measured_by}"
+        return merged
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def parse_cpu_stat(text: str) -> Dict[str, int]:
+    """Key/value pairs of a cgroup v2 cpu.stat file"""
+    stats = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[1].isdigit():
+            stats[parts[0]] = int(parts[1])
+    return stats
+
+
+def read_usage(cgroup_path: str) -> ResourceUsage:
+    """Usage recorded in a cgroup's cpu.stat and memory.peak.
+    
+    user/system time are always in cpu.stat; throttling needs the cpu
+    controller and memory.peak the memory controller (Linux 5.19+), so
+    either may be missing.
+    """
+    usage = ResourceUsage()
+    try:
+        with open(os.path.join(cgroup_path, "cpu.stat")) as f:
+            stats = parse_cpu_stat(f.read())
+    except OSError:
+        return usage
+    
+    usage.measured_by = "cgroup"
+    if "user_usec" in stats:
+        usage.cpu_user_ms = stats["user_usec"] // 1000
+    if "system_usec" in stats:
+        usage.cpu_system_ms = stats["system_usec"] // 1000
+    if "nr_throttled" in stats:
+        usage.cpu_throttled_count = stats["nr_throttled"]
+    if "throttled_usec" in stats:
+        usage.cpu_throttled_ms = stats["throttled_usec"] // 1000
+    try:
+        with open(os.path.join(cgroup_path, "memory.peak")) as f:
+            usage.memory_peak_kb = int(f.read().strip()) // 1024
+    except (OSError, ValueError):
+        pass
+    return usage
+
+
+def find_cgroup2_mount(mounts_path: str = "/proc/self/mounts") -> Optional[str]:
+    """Mount point of the cgroup v2 hierarchy, on unified and hybrid hosts"""
+    try:
+        with open(mounts_path) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 3 and fields[2] == "cgroup2":
+                    return fields[1]
+    except OSError:
+        pass
+    return None
+
+
+class CgroupAccounting:
+    """Creates a cgroup per run under the server's own cgroup and reads it back.
+    
+    A run is started inside its cgroup (see `start`), and everything it
+    starts stays inside, so the counters cover the whole run including
+    forked helpers. When cgroup v2 is not
+    mounted or not writable, `create` returns None and callers fall back
+    to rusage or runtime-reported figures.
+    
+    `create`, `collect` and `remove` do blocking filesystem I/O (`remove`
+    waits for killed processes to exit), so async callers run them with
+    asyncio.to_thread.
+    """
+    
+    CONTROLLERS = ("cpu", "memory")
+    
+    def __init__(self, root: Optional[str] = settings.CGROUP_ROOT,
+                 parent: str = settings.CGROUP_PARENT,
+                 enabled: bool = settings.CGROUP_ACCOUNTING_ENABLED):
+        self.root = root
+        self.parent = parent
+        self.enabled = enabled
+        self._base: Optional[str] = None
+        self._available: Optional[bool] = None
+        
+        # Metrics
+        self.created = 0
+        self.failures = 0
+    
+    def available(self) -> bool:
+        """Whether run cgroups can be created; checked once"""
+        if self._available is None:
+            self._available = self.enabled and self._setup()
+        return self._available
+    
+    def create(self, run_id: Optional[str] = None) -> Optional[str]:
+        """Path of a new, empty cgroup for one run, or None if unavailable"""
+        if not self.available():
+            return None
+        path = os.path.join(self._base, f"run-{run_id or uuid.uuid4().hex}")
+        try:
+            os.mkdir(path)
+        except OSError as e:
+            self.failures += 1
+            logger.warning(f"Could not create cgroup {path}: {e}")
+            return None
+        self.created += 1
+        return path
+    
+    @staticmethod
+    def join(cgroup_path: str, pid: int = 0) -> None:
+        """Move a process (default: the caller) into a cgroup"""
+        with open(os.path.join(cgroup_path, "cgroup.procs"), "w") as f:
+            f.write(str(pid))
+    
+    async def start(self, cgroup_path: Optional[str], *cmd: str, **kwargs) -> asyncio.subprocess.Process:
+        """asyncio.create_subprocess_exec() of a command that runs inside `cgroup_path`.
+        
+        The child starts as a shell blocked on its stdin pipe; it is moved
+        into the cgroup by pid and only then released to exec `cmd`, so no
+        instruction of the command runs outside it. Nothing runs between fork
+        and exec in the server, which a preexec_fn would do and which is not
+        safe in a multithreaded process. The command's stdin is /dev/null.
+        """
+        if cgroup_path is None:
+            return await asyncio.create_subprocess_exec(*cmd, stdin=asyncio.subprocess.DEVNULL, **kwargs)
+        
+        process = await asyncio.create_subprocess_exec(
+            "/bin/sh", "-c", GATE_SCRIPT, "cgroup-gate", *cmd,
+            stdin=asyncio.subprocess.PIPE, **kwargs
+        )
+        try:
+            self.join(cgroup_path, process.pid)
+        except OSError as e:
+            # The run goes ahead unmeasured by the cgroup
+            self.failures += 1
+            logger.warning(f"Could not move run {process.pid} into {cgroup_path}: {e}")
+        process.stdin.write(b"\n")
+        process.stdin.close()
+        return process
+    
+    def collect(self, cgroup_path: Optional[str]) -> ResourceUsage:
+        """Read a finished run's usage and remove its cgroup"""
+        if cgroup_path is None:
+            return ResourceUsage()
+        usage = read_usage(cgroup_path)
+        self.remove(cgroup_path)
+        return usage
+    
+    def remove(self, cgroup_path: str) -> None:
+        """Kill anything left in a run cgroup and delete it"""
+        try:
+            with open(os.path.join(cgroup_path, "cgroup.kill"), "w") as f:
+                f.write("1")
+        except OSError:
+            pass
+        for _ in range(50):
+            try:
+                os.rmdir(cgroup_path)
+                return
+            except FileNotFoundError:
+                return
+            except OSError:
+                time.sleep(0.002)  # Killed processes are still exiting
+        logger.warning(f"Could not remove cgroup {cgroup_path}")
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "available": self.available(),
+            "base": self._base,
+            "created": self.created,
+            "failures": self.failures,
+        }
+    
+    def _setup(self) -> bool:
+        root = self.root or find_cgroup2_mount()
+        if root is None or not os.path.exists(os.path.join(root, "cgroup.controllers")):
+            logger.info("cgroup v2 is not mounted; run accounting uses rusage")
+            return False
+        
+        base = os.path.join(root, self._own_cgroup().lstrip("/"), self.parent)
+        try:
+            os.makedirs(base, exist_ok=True)
+        except OSError as e:
+            logger.info(f"cgroup v2 is not writable ({e}); run accounting uses rusage")
+            return False
+        
+        # Throttling counters and memory.peak need their controllers enabled
+        # for the run cgroups; without them only CPU times are recorded.
+        # Enabling them in the server's own cgroup fails with EBUSY while the
+        # server's processes live there (cgroup v2 lets only leaf cgroups hold
+        # processes when controllers are delegated), unless the server is
+        # started in a leaf of its own with the controllers already enabled.
+        for controller in self.CONTROLLERS:
+            for directory in (os.path.dirname(base), base):
+                try:
+                    with open(os.path.join(directory, "cgroup.subtree_control"), "w") as f:
+                        f.write(f"+{controller}")
+                except OSError as e:
+                    logger.warning(
+                        f"Could not enable the {controller} controller in {directory} ({e}); "
+                        f"run cgroups will not report what it measures"
+                    )
+                    break
+        self._base = base
+        logger.info(f"Run accounting uses cgroups under {base}")
+        return True
+    
+    @staticmethod
+    def _own_cgroup() -> str:
+        try:
+            with open("/proc/self/cgroup") as f:
+                for line in f:
+                    if line.startswith("0::"):
+                        return line[3:].strip()
+        except OSError:
+            pass
+        return "/"
+
+
+# Create a single instance for import
+cgroup_accounting = CgroupAccounting()
@@ -0,0 +1,169 @@
+"""
+CPU Budget - per-user execution quotas in sandbox CPU-seconds over a sliding window
+"""
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, Hashable
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CpuBudgetExceededError(Exception):
+    """Raised when a user has used up their CPU budget for the window"""
+    
+    def __init__(self, retry_after: int):
+        super().__init__(f"CPU budget exhausted, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class UsageWindow:
+    """CPU milliseconds used in the current and the previous fixed window.
+    
+    Usage over the sliding window ending now is estimated by weighting the
+    previous window by the part of it that still overlaps, which keeps
+    every update and read O(1) in time and three numbers in memory.
+    """
+    
+    __slots__ = ("start", "current", "previous")
+    
+    def __init__(self, start: float):
+        self.start = start
+        self.current = 0.0
+        self.previous = 0.0
+    
+    def roll(self, now: float, window: float) -> None:
+        elapsed = now - self.start
+        if elapsed < window:
+            return
+        self.previous = self.current if elapsed < 2 * window else 0.0
+        self.current = 0.0
+        self.start = math.floor(now / window) * window
+    
+    def used(self, now: float, window: float) -> float:
+        overlap = 1.0 - (now - self.start) / window
+        return self.previous * overlap + self.current
+
+
+class CpuBudget:
+    """Per-user budget of sandbox CPU time.
+    
+    Runs are charged the CPU time they were measured to consume (user plus
+    system), or their wall time when the host could not measure CPU, so a
+    ten-second training run costs as much as a hundred trivial ones. A
+    user whose budget is used up is refused new runs until enough of their
+    usage has aged out of the window.
+    """
+    
+    def __init__(
+        self,
+        limit_seconds: float = settings.CPU_BUDGET_SECONDS,
+        window_seconds: int = settings.CPU_BUDGET_WINDOW,
+        enabled: bool = settings.CPU_BUDGET_ENABLED,
+        clock: Callable[[], float] = time.time
+    ):
+        self.limit_ms = limit_seconds * 1000
+        self.window = float(window_seconds)
+        self.enabled = enabled
+        self.clock = clock
+        self._usage: Dict[Hashable, UsageWindow] = {}
+        
+        # Metrics
+        self.charged_ms = 0.0
+        self.runs = 0
+        self.refused = 0
+    
+    def remaining(self, user_id: Hashable) -> float:
+        """CPU-seconds the user may still consume in the current window"""
+        return max(0.0, self.limit_ms - self._used_ms(user_id)) / 1000
+    
+    def check(self, user_id: Hashable) -> None:
+        """Raise CpuBudgetExceededError if the user has no budget left"""
+        if self.enabled and self._used_ms(user_id) >= self.limit_ms:
+            self.refused += 1
+            raise CpuBudgetExceededError(self.retry_after(user_id))
+    
+    def charge(self, user_id: Hashable, result: Dict[str, Any]) -> float:
+        """Record a finished run's cost; returns the remaining budget in seconds"""
+        cost_ms = self.cost_ms(result)
+        if self.enabled and cost_ms:
+            now = self.clock()
+            usage = self._window(user_id, now)
+            usage.current += cost_ms
+            self.charged_ms += cost_ms
+            self.runs += 1
+        return self.remaining(user_id)
+    
+    @staticmethod
+    def cost_ms(result: Dict[str, Any]) -> float:
+        """CPU milliseconds a run result reports, falling back to wall time"""
+        cpu_user = result.get("cpu_user_ms")
+        cpu_system = result.get("cpu_system_ms")
+        if cpu_user is not None or cpu_system is not None:
+            return float((cpu_user or 0) + (cpu_system or 0))
+        return float(result.get("execution_time_ms") or 0)
+    
+    def retry_after(self, user_id: Hashable) -> int:
+        """Seconds until the user's usage drops below the limit"""
+        now = self.clock()
+        usage = self._usage.get(user_id)
+        if usage is None:
+            return 0
+        usage.roll(now, self.window)
+        excess = usage.used(now, self.window) - self.limit_ms
+        if excess < 0:
+            return 0
+        if usage.current < self.limit_ms and usage.previous > 0:
+            # The previous window's share decays linearly until it ends
+            seconds = excess / usage.previous * self.window
+        else:
+            # Wait for this window's usage to start decaying in the next one
+            to_next = usage.start + self.window - now
+            seconds = to_next + self.window * (1 - self.limit_ms / usage.current)
+        return math.floor(seconds) + 1  # Strictly past the point usage equals the limit
+    
+    def headers(self, user_id: Hashable) -> Dict[str, str]:
+        """Response headers describing the user's budget"""
+        if not self.enabled:
+            return {}
+        return {
+            "X-CPU-Budget-Limit": f"{self.limit_ms / 1000:g}",
+            "X-CPU-Budget-Remaining": f"{self.remaining(user_id):.3f}",
+            "X-CPU-Budget-Window": str(int(self.window)),
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "limit_seconds": self.limit_ms / 1000,
+            "window_seconds": self.window,
+            "tracked_users": len(self._usage),
+            "charged_runs": self.runs,
+            "charged_seconds": round(self.charged_ms / 1000, 3),
+            "refused": self.refused,
+        }
+    
+    def _used_ms(self, user_id: Hashable) -> float:
+        usage = self._usage.get(user_id)
+        if usage is None:
+            return 0.0
+        now = self.clock()
+        usage.roll(now, self.window)
+        used = usage.used(now, self.window)
+        if not used:
+            del self._usage[user_id]  # Idle for two windows
+        return used
+    
+    def _window(self, user_id: Hashable, now: float) -> UsageWindow:
+        usage = self._usage.get(user_id)
+        if usage is None:
+            usage = self._usage[user_id] = UsageWindow(math.floor(now / self.window) * self.window)
+        else:
+            usage.roll(now, self.window)
+        return usage
+
+
+# Create a single instance for import
+cpu_budget = CpuBudget()
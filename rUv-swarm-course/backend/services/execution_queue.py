@@ -0,0 +1,304 @@
+"""
+Execution Job Queue - bounded queue decoupling code runs from HTTP requests
+"""
+import asyncio
+import logging
+import math
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+JobRunner = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class QueueFullError(Exception):
+    """Raised when the execution queue is at capacity"""
+    
+    def __init__(self, retry_after: int):
+        super().__init__(f"Execution queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class ExecutionJob:
+    """A queued code run and, once finished, its result"""
+    id: str
+    kind: str
+    runner: JobRunner
+    owner_id: Optional[int] = None
+    status: str = "queued"  # queued, running, completed, failed, cancelled
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None  # The runner, while the job is running
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Public view of the job, without the runner"""
+        wait_ms = None
+        if self.started_at is not None:
+            wait_ms = int((self.started_at - self.enqueued_at) * 1000)
+        service_ms = None
+        if self.started_at is not None and self.finished_at is not None:
+            service_ms = int((self.finished_at - self.started_at) * 1000)
+        
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "queue_wait_ms": wait_ms,
+            "service_time_ms": service_ms,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def summarize(samples: Deque[float]) -> Dict[str, Optional[float]]:
+    """Mean and percentiles (in milliseconds) of recent duration samples"""
+    if not samples:
+        return {"mean": None, "p50": None, "p95": None, "max": None}
+    
+    ordered = sorted(samples)
+    
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+    
+    return {
+        "mean": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50": round(percentile(0.50), 2),
+        "p95": round(percentile(0.95), 2),
+        "max": round(ordered[-1] * 1000, 2),
+    }
+
+
+class ExecutionQueue:
+    """Bounded FIFO of execution jobs served by a fixed set of worker tasks.
+    
+    Submissions beyond `max_size` queued jobs are rejected with QueueFullError
+    instead of piling up coroutines, so callers can answer 429. Finished jobs
+    stay readable for `result_ttl` seconds. A queued or running job can be
+    cancelled; a queued one gives its place back at once, and a running one
+    has its runner task cancelled, which kills its sandbox.
+    """
+    
+    SAMPLE_WINDOW = 1000
+    
+    def __init__(
+        self,
+        max_size: int = settings.EXECUTION_QUEUE_SIZE,
+        workers: int = settings.EXECUTION_WORKERS,
+        result_ttl: int = settings.EXECUTION_RESULT_TTL,
+        job_timeout: int = settings.EXECUTION_JOB_TIMEOUT
+    ):
+        self.max_size = max_size
+        self.worker_count = workers
+        self.result_ttl = result_ttl
+        self.job_timeout = job_timeout
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued = 0  # Jobs in _queue still waiting to run; cancelled ones are skipped
+        self._workers: List[asyncio.Task] = []
+        self._jobs: Dict[str, ExecutionJob] = {}
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+        
+        # Metrics
+        self.busy = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self._wait_times: Deque[float] = deque(maxlen=self.SAMPLE_WINDOW)
+        self._service_times: Deque[float] = deque(maxlen=self.SAMPLE_WINDOW)
+    
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+    
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop"""
+        if self.running:
+            return
+        # Capacity is counted in _queued, since cancelled jobs stay in the
+        # queue until a worker skips them
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"execution-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+        logger.info(f"Execution queue started with {self.worker_count} workers")
+    
+    async def shutdown(self) -> None:
+        """Stop the workers; queued jobs are failed so waiters are released"""
+        if not self.running:
+            return
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            if not job.finished:
+                self._finish(job, error="Execution queue shut down")
+        self._queued = 0
+        logger.info("Execution queue stopped")
+    
+    def submit(self, kind: str, runner: JobRunner, owner_id: Optional[int] = None) -> ExecutionJob:
+        """Enqueue a run; raises QueueFullError when the queue is at capacity"""
+        self.start()
+        if self._queued >= self.max_size:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+        
+        job = ExecutionJob(id=uuid.uuid4().hex, kind=kind, runner=runner, owner_id=owner_id)
+        self._queue.put_nowait(job)
+        self._queued += 1
+        self._jobs[job.id] = job
+        self.submitted += 1
+        return job
+    
+    def get(self, job_id: str) -> Optional[ExecutionJob]:
+        """Look up a job; finished jobs disappear once their TTL has passed"""
+        self._purge_expired()
+        return self._jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> Optional[ExecutionJob]:
+        """Cancel a queued or running job; returns the job, or None if unknown.
+        
+        A queued job is finished as cancelled at once and its place in the
+        queue is free for a new submission. A running one is once its runner
+        has stopped, so wait() for it to see the final status.
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job.task is None:
+            self._finish(job, cancelled=True)  # Skipped when a worker takes it
+            self._queued -= 1
+        else:
+            job.task.cancel()
+        return job
+    
+    async def wait(self, job_id: str, timeout: float) -> Optional[ExecutionJob]:
+        """Long-poll: return the job once finished or when `timeout` elapses"""
+        job = self.get(job_id)
+        if job is None or job.finished or timeout <= 0:
+            return job
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+    
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up, from recent service times"""
+        if not self._service_times:
+            return 1
+        mean_service = sum(self._service_times) / len(self._service_times)
+        estimate = mean_service * (self._queued + 1) / max(1, self.worker_count)
+        return max(1, min(60, math.ceil(estimate)))
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, throughput counters and wait/service time distributions"""
+        self._purge_expired()
+        return {
+            "depth": self._queued,
+            "capacity": self.max_size,
+            "workers": self.worker_count,
+            "busy_workers": self.busy,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "stored_jobs": len(self._jobs),
+            "wait_time_ms": summarize(self._wait_times),
+            "service_time_ms": summarize(self._service_times),
+        }
+    
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.finished:
+                self._queue.task_done()  # Cancelled while queued
+                continue
+            self._queued -= 1
+            job.status = "running"
+            job.started_at = time.monotonic()
+            self._wait_times.append(job.started_at - job.enqueued_at)
+            self.busy += 1
+            # A task of its own, so cancelling the job leaves the worker running
+            job.task = asyncio.ensure_future(job.runner())
+            try:
+                done, _ = await asyncio.wait({job.task}, timeout=self.job_timeout)
+                if not done:
+                    job.task.cancel()
+                    await asyncio.wait({job.task})
+                    self._finish(job, error=f"Execution timed out after {self.job_timeout}s")
+                elif job.task.cancelled():
+                    self._finish(job, cancelled=True)
+                else:
+                    self._finish(job, result=job.task.result())
+            except asyncio.CancelledError:
+                job.task.cancel()
+                self._finish(job, error="Execution queue shut down")
+                raise
+            except Exception as e:
+                logger.error(f"Execution job {job.id} failed: {e}")
+                self._finish(job, error=str(e))
+            finally:
+                job.task = None
+                self.busy -= 1
+                self._queue.task_done()
+    
+    def _finish(self, job: ExecutionJob, result: Optional[Dict[str, Any]] = None,
+                error: Optional[str] = None, cancelled: bool = False) -> None:
+        job.finished_at = time.monotonic()
+        if job.started_at is not None:
+            self._service_times.append(job.finished_at - job.started_at)
+        job.result = result
+        job.error = "Execution cancelled" if cancelled else error
+        job.runner = None  # Release the submitted code
+        if cancelled:
+            job.status = "cancelled"
+            self.cancelled += 1
+        elif error:
+            job.status = "failed"
+            self.failed += 1
+        else:
+            job.status = "completed"
+            self.completed += 1
+        
+        self._expiry[job.id] = job.finished_at + self.result_ttl
+        job.done.set()
+        self._purge_expired()
+    
+    def _purge_expired(self) -> None:
+        # Finish order equals expiry order because the TTL is fixed
+        now = time.monotonic()
+        while self._expiry:
+            job_id, expires_at = next(iter(self._expiry.items()))
+            if expires_at > now:
+                break
+            self._expiry.popitem(last=False)
+            self._jobs.pop(job_id, None)
+
+
+# Create a single instance for import
+execution_queue = ExecutionQueue()
@@ -0,0 +1,388 @@
+"""
+Grading Harness - evaluates every test case of a submission in a single run
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from backend.config import settings
+from backend.services.cgroup_accounting import ResourceUsage, cgroup_accounting
+from backend.services.run_launcher import EXIT_SETUP_FAILED, launcher_command, resolve_user
+from backend.services.stage_timing import timed_stage
+
+logger = logging.getLogger(__name__)
+
+# Runs inside node. The submission is compiled once into an isolated vm
+# context without require/process and with string code generation disabled,
+# then each case calls the exercise function in that same context. Verdicts
+# are appended to a dedicated results file, never to stdout, so nothing the
+# submission prints can forge or corrupt them. The context runs its own
+# microtask queue inside each evaluation, so promise chains count against the
+# case timeout instead of running unbounded after it. Values from the
+# submission are compared, serialized and described inside the context under
+# that timeout, and only strings come back out, so a hostile valueOf, toString,
+# toJSON or message getter never runs unbounded in the harness itself.
+JAVASCRIPT_HARNESS = r"""
+'use strict';
+const fs = require('fs');
+const vm = require('vm');
+
+const config = JSON.parse(fs.readFileSync(process.argv[2], 'utf8'));
+const source = fs.readFileSync(config.submission_path, 'utf8');
+
+function emit(record) {
+    fs.appendFileSync(config.results_path, JSON.stringify(record) + '\n');
+}
+
+// Every evaluation that can reach submission code is bounded by the case
+// timeout. displayErrors is off so that node does not read the stack of a
+// thrown value, which may be a getter or a Proxy trap, after the timeout.
+const bounded = { timeout: config.case_timeout_ms, displayErrors: false };
+
+// A null-prototype global and a console defined inside the context keep
+// every object reachable from the submission in the context's own realm.
+const context = vm.createContext(Object.create(null), {
+    codeGeneration: { strings: false, wasm: false },
+    microtaskMode: 'afterEvaluate'
+});
+vm.runInContext(`
+    const __output = [];
+    let __outputBytes = 0;
+    const __capture = (...args) => {
+        const line = args.map((a) => (typeof a === 'string' ? a : JSON.stringify(a))).join(' ');
+        __outputBytes += line.length + 1;
+        if (__outputBytes <= ${config.max_output_bytes}) __output.push(line);
+    };
+    globalThis.console = { log: __capture, error: __capture, warn: __capture, info: __capture };
+
+    // Taken before the submission runs, so it cannot replace them
+    const __String = String;
+    const __stringify = JSON.stringify;
+    const __parse = JSON.parse;
+    const __describe = (value) => {
+        try { return __parse(__stringify(value === undefined ? null : value)); }
+        catch (e) { return __String(value); }
+    };
+    const __judge = (expected, actual) => __stringify({
+        expected: __describe(expected), actual: __describe(actual), passed: actual == expected
+    });
+    const __describeError = (e) => {
+        try { return __String(e && e.message ? e.message : e); }
+        catch (inner) { return 'Uncaught exception'; }
+    };
+    const __outputText = () => __String(__output.join('\\n'));
+    // A data property the submission cannot turn into a setter
+    Object.defineProperty(globalThis, '__thrown', { value: undefined, writable: true, configurable: false });
+`, context);
+
+// Whatever was thrown may be the submission's own object, even a Proxy, so
+// the harness never inspects it: it is described inside the context.
+function failure(e) {
+    try {
+        context.__thrown = e;
+        const text = vm.runInContext('__describeError(__thrown)', context, bounded);
+        return typeof text === 'string' ? text : 'Uncaught exception';
+    } catch (inner) {
+        return 'Uncaught exception';
+    }
+}
+
+let loadError = null;
+try {
+    vm.runInContext(source, context, { ...bounded, filename: 'submission.js' });
+    if (vm.runInContext(`typeof ${config.function_name}`, context, bounded) !== 'function') {
+        loadError = `Function '${config.function_name}' is not defined`;
+    }
+} catch (e) {
+    loadError = failure(e);
+}
+
+let stoppedEarly = false;
+config.test_cases.forEach((testCase, i) => {
+    if (stoppedEarly) return;
+    const verdict = { test_case: i + 1, input: testCase.input, description: testCase.description };
+    if (loadError) {
+        Object.assign(verdict, { passed: false, error: loadError });
+    } else {
+        try {
+            const judged = vm.runInContext(
+                `__judge((${testCase.expected}), ${config.function_name}(${testCase.input}))`, context, bounded
+            );
+            if (typeof judged !== 'string') throw new Error('Test case could not be judged');
+            const { expected, actual, passed } = JSON.parse(judged);
+            Object.assign(verdict, { expected: expected, actual: actual, passed: passed === true });
+        } catch (e) {
+            Object.assign(verdict, { passed: false, error: failure(e) });
+        }
+    }
+    emit(verdict);
+    if (!verdict.passed && config.stop_on_first_failure) stoppedEarly = true;
+});
+
+let output = '';
+try {
+    const text = vm.runInContext('__outputText()', context, { timeout: 1000, displayErrors: false });
+    output = typeof text === 'string' ? text : '';
+} catch (e) { output = ''; }
+
+const cpu = process.cpuUsage();
+emit({ summary: true, stopped_early: stoppedEarly, output: output,
+       memory_used_kb: Math.round(process.memoryUsage().rss / 1024),
+       memory_peak_kb: process.resourceUsage().maxRSS,
+       cpu_user_ms: Math.round(cpu.user / 1000), cpu_system_ms: Math.round(cpu.system / 1000) });
+"""
+
+
+def test_results_summary(grading: Dict[str, Any], total_tests: int) -> Dict[str, Any]:
+    """The `test_results` stored and returned for a grading"""
+    verdicts = grading["test_cases"]
+    all_passed = len(verdicts) == total_tests and all(t["passed"] for t in verdicts)
+    return {
+        "all_passed": all_passed,
+        "total_tests": total_tests,
+        "passed_tests": sum(1 for t in verdicts if t["passed"]),
+        "stopped_early": grading["stopped_early"],
+        "test_cases": verdicts
+    }
+
+
+class GradingHarness:
+    """Runs a submission against all of an exercise's test cases in one process.
+    
+    Replaces the one-execution-per-test-case approach: the submission is
+    loaded once, every case is evaluated in the same run, and structured
+    verdicts are read back from a results file instead of parsed from stdout.
+    
+    node is started through the run launcher: it has no network, runs as an
+    unprivileged user when the server is root, and is bounded by rlimits on
+    CPU time, address space, file size, processes and open files as well as
+    by a V8 heap limit.
+    """
+    
+    MAX_OUTPUT_BYTES = 64 * 1024
+    
+    def __init__(
+        self,
+        node_binary: str = "node",
+        case_timeout: float = 5.0,
+        user: str = settings.GRADING_USER,
+        heap_mb: int = settings.GRADING_HEAP_MB,
+        address_space_mb: int = settings.GRADING_ADDRESS_SPACE_MB,
+        max_file_mb: int = settings.GRADING_MAX_FILE_MB,
+        max_processes: int = settings.GRADING_MAX_PROCESSES,
+        max_open_files: int = settings.GRADING_MAX_OPEN_FILES
+    ):
+        self.node_binary = node_binary
+        self.case_timeout = case_timeout
+        self.user = user
+        self.heap_mb = heap_mb
+        self.address_space_mb = address_space_mb
+        self.max_file_mb = max_file_mb
+        self.max_processes = max_processes
+        self.max_open_files = max_open_files
+        self._toolchain_version: Optional[str] = None
+    
+    @property
+    def available(self) -> bool:
+        return shutil.which(self.node_binary) is not None
+    
+    def toolchain_version(self) -> str:
+        """Node version plus a hash of the harness script, computed once"""
+        if self._toolchain_version is None:
+            try:
+                result = subprocess.run([self.node_binary, "--version"],
+                                        capture_output=True, text=True, timeout=5)
+                node_version = result.stdout.strip()
+            except (OSError, subprocess.SubprocessError):
+                node_version = "unavailable"
+            harness_hash = hashlib.sha256(JAVASCRIPT_HARNESS.encode()).hexdigest()[:12]
+            self._toolchain_version = (
+                f"node {node_version}; harness {harness_hash}; case_timeout {self.case_timeout}; "
+                f"heap {self.heap_mb}MB"
+            )
+        return self._toolchain_version
+    
+    def command(self, paths: Dict[str, str], timeout: float) -> List[str]:
+        """Launcher command line running the harness on a prepared workspace"""
+        return launcher_command(
+            sys.executable, self.user,
+            cpu_seconds=max(1, math.ceil(timeout)),
+            memory_bytes=self.address_space_mb * 1024 * 1024,
+            max_file_size=self.max_file_mb * 1024 * 1024,
+            max_processes=self.max_processes,
+            max_open_files=self.max_open_files,
+            command=[self.node_binary, f"--max-old-space-size={self.heap_mb}",
+                     paths["harness.js"], paths["config.json"]]
+        )
+    
+    def _prepare_workspace(self, work_dir: str, results_path: str) -> None:
+        """Let the sandbox user read the workspace and append to the results file only"""
+        open(results_path, "w").close()
+        if os.getuid() == 0:
+            uid, gid = resolve_user(self.user)
+            os.chown(results_path, uid, gid)
+        os.chmod(work_dir, 0o711)
+        for name in os.listdir(work_dir):
+            os.chmod(os.path.join(work_dir, name), 0o644)
+    
+    async def grade_javascript(
+        self,
+        code: str,
+        function_name: str,
+        test_cases: List[Dict[str, Any]],
+        timeout: float = 30,
+        stop_on_first_failure: bool = False
+    ) -> Dict[str, Any]:
+        """Grade a JavaScript submission; returns verdicts plus run metadata"""
+        start_time = time.time()
+        if not self.available:
+            return self.rejected(test_cases, "JavaScript runtime is not available", start_time,
+                                 harness_error=True)
+        
+        work_dir = tempfile.mkdtemp(prefix="grading_")
+        cgroup = await asyncio.to_thread(cgroup_accounting.create)
+        usage = ResourceUsage()
+        try:
+            paths = {
+                name: os.path.join(work_dir, name)
+                for name in ("harness.js", "submission.js", "config.json", "results.jsonl")
+            }
+            with open(paths["harness.js"], "w") as f:
+                f.write(JAVASCRIPT_HARNESS)
+            with open(paths["submission.js"], "w") as f:
+                f.write(code)
+            with open(paths["config.json"], "w") as f:
+                json.dump({
+                    "submission_path": paths["submission.js"],
+                    "results_path": paths["results.jsonl"],
+                    "function_name": function_name,
+                    "test_cases": test_cases,
+                    "stop_on_first_failure": stop_on_first_failure,
+                    "case_timeout_ms": int(self.case_timeout * 1000),
+                    "max_output_bytes": self.MAX_OUTPUT_BYTES,
+                }, f)
+            self._prepare_workspace(work_dir, paths["results.jsonl"])
+            
+            with timed_stage("execution"):
+                process = await cgroup_accounting.start(
+                    cgroup, *self.command(paths, timeout),
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=work_dir,
+                    env={"PATH": os.environ.get("PATH", "")}
+                )
+                error = None
+                harness_error = False
+                try:
+                    _, stderr = await asyncio.wait_for(process.communicate(), timeout)
+                    if process.returncode != 0:
+                        error = self._failure(process.returncode, stderr.decode(errors="replace"))
+                        harness_error = process.returncode == EXIT_SETUP_FAILED
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+                    error = f"Grading timed out after {timeout}s"
+                except asyncio.CancelledError:
+                    if process.returncode is None:
+                        process.kill()  # The request or job was cancelled
+                    raise
+            
+            usage = await asyncio.to_thread(cgroup_accounting.collect, cgroup)
+            cgroup = None
+            return self._collect(paths["results.jsonl"], test_cases, error, start_time, usage,
+                                 harness_error)
+        
+        except Exception as e:
+            logger.error(f"Grading harness error: {e}")
+            return self.rejected(test_cases, str(e), start_time, harness_error=True)
+        finally:
+            if cgroup:
+                await asyncio.to_thread(cgroup_accounting.remove, cgroup)
+            with timed_stage("cleanup"):
+                shutil.rmtree(work_dir, ignore_errors=True)
+    
+    @staticmethod
+    def _failure(returncode: int, stderr: str) -> str:
+        """Error of a harness run that exited abnormally"""
+        if "heap out of memory" in stderr or "std::bad_alloc" in stderr:
+            return "Memory limit exceeded"
+        if returncode == -signal.SIGXCPU:
+            return "CPU time limit exceeded"
+        if returncode == -signal.SIGXFSZ:
+            return "Output limit exceeded"
+        return stderr.strip()[-1000:] or "Grading run failed"
+    
+    def _collect(self, results_path: str, test_cases: List[Dict[str, Any]],
+                 error: Optional[str], start_time: float,
+                 usage: Optional[ResourceUsage] = None,
+                 harness_error: bool = False) -> Dict[str, Any]:
+        """Read verdicts from the result channel; cases without one count as failed.
+        
+        Resource figures come from the run's cgroup where available, else
+        from what node reported about itself. `harness_error` marks a grading
+        that failed because the harness could not run the submission, not
+        because of anything the submission did.
+        """
+        verdicts: List[Dict[str, Any]] = []
+        summary: Dict[str, Any] = {}
+        if os.path.exists(results_path):
+            with open(results_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn final line of a killed run
+                    if record.get("summary"):
+                        summary = record
+                    else:
+                        verdicts.append(record)
+        
+        stopped_early = summary.get("stopped_early", False)
+        if not stopped_early:
+            for i in range(len(verdicts), len(test_cases)):
+                verdicts.append({
+                    "test_case": i + 1,
+                    "passed": False,
+                    "error": error or "No verdict reported",
+                    "description": test_cases[i].get("description"),
+                })
+        
+        runtime_usage = ResourceUsage(
+            cpu_user_ms=summary.get("cpu_user_ms"),
+            cpu_system_ms=summary.get("cpu_system_ms"),
+            memory_peak_kb=summary.get("memory_peak_kb"),
+            measured_by="runtime" if summary else "none"
+        )
+        usage = (usage or ResourceUsage()).merge(runtime_usage)
+        
+        return {
+            "success": error is None,
+            "output": summary.get("output", ""),
+            "error": error,
+            "execution_time_ms": int((time.time() - start_time) * 1000),
+            "memory_used_kb": usage.memory_peak_kb or summary.get("memory_used_kb", 0),
+            "stopped_early": stopped_early,
+            "harness_error": harness_error,
+            "test_cases": verdicts,
+            **usage.to_dict()
+        }
+    
+    def rejected(self, test_cases: List[Dict[str, Any]], error: str,
+                 start_time: Optional[float] = None, harness_error: bool = False) -> Dict[str, Any]:
+        """Grading result for a submission that could not be run at all"""
+        return self._collect("", test_cases, error, start_time or time.time(),
+                             harness_error=harness_error)
+
+
+# Create a single instance for import
+grading_harness = GradingHarness()
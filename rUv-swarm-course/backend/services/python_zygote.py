@@ -0,0 +1,313 @@
+"""
+Python Zygote - runs Python submissions as forks of a pre-warmed interpreter
+"""
+import asyncio
+import json
+import logging
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.services.cgroup_accounting import ResourceUsage, cgroup_accounting
+
+logger = logging.getLogger(__name__)
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "zygote_server.py")
+
+
+class ZygoteError(Exception):
+    """Raised when the zygote cannot be started or does not answer a run"""
+
+
+class ZygoteProcess:
+    """One running zygote server and the number of runs forked from it"""
+    
+    def __init__(self, process: asyncio.subprocess.Process, work_dir: str):
+        self.process = process
+        self.work_dir = work_dir
+        self.socket_path = os.path.join(work_dir, "zygote.sock")
+        self.forks = 0
+        self.started_at = time.monotonic()
+    
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+    
+    def rss_kb(self) -> int:
+        """Resident memory of the zygote itself, from /proc"""
+        try:
+            with open(f"/proc/{self.process.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return 0
+    
+    async def retire(self) -> None:
+        """Stop accepting runs; the zygote exits once its running children finish"""
+        if self.alive:
+            self.process.send_signal(signal.SIGTERM)
+        await self.process.wait()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+    
+    async def kill(self) -> None:
+        """Stop the zygote and every run forked from it"""
+        if self.alive:
+            self.process.stdin.close()  # End of file kills running children
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+class PythonZygote:
+    """Fork server for Python runs.
+    
+    Interpreter startup and the exercise runtime imports are paid once by a
+    long-lived zygote process; each run is a fork of it that detaches into
+    its own session, closes inherited descriptors, applies rlimits (CPU,
+    address space, output size, processes, open files), drops to an
+    unprivileged user and then executes the submission. The zygote starts
+    with only PATH in its environment and runs in a network namespace of
+    its own (and a user namespace when the server is not root); it refuses
+    to start if these cannot be set up. The zygote is
+    replaced after `max_forks` runs or once it grows beyond `max_rss_mb`,
+    without interrupting runs already forked from the old one.
+    """
+    
+    def __init__(
+        self,
+        preload: Optional[List[str]] = None,
+        max_forks: int = settings.PYTHON_ZYGOTE_MAX_FORKS,
+        max_rss_mb: int = settings.PYTHON_ZYGOTE_MAX_RSS_MB,
+        user: str = settings.PYTHON_ZYGOTE_USER,
+        python: str = sys.executable
+    ):
+        self.preload = list(settings.PYTHON_ZYGOTE_PRELOAD if preload is None else preload)
+        self.max_forks = max_forks
+        self.max_rss_mb = max_rss_mb
+        self.user = user
+        self.python = python
+        
+        self._zygote: Optional[ZygoteProcess] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._retiring: List[asyncio.Task] = []
+        
+        # Metrics
+        self.runs = 0
+        self.spawns = 0
+        self.respawns = 0
+    
+    async def run(
+        self,
+        code: str,
+        timeout: float = 30,
+        memory_mb: int = settings.PYTHON_RUN_MEMORY_MB,
+        max_output: int = settings.EXECUTION_MAX_OUTPUT_BYTES
+    ) -> Dict[str, Any]:
+        """Run a submission in a fresh fork; returns the executor result format"""
+        start_time = time.time()
+        reader, writer, cgroup = await self._connect(code, timeout, memory_mb, max_output, stream=False)
+        try:
+            await self._started(reader)
+            # The zygote enforces the timeout; this only guards against it hanging
+            line = await asyncio.wait_for(reader.readline(), timeout + 5)
+            if not line:
+                raise ZygoteError("Zygote exited during the run")
+            outcome = json.loads(line)
+        finally:
+            # Closing the connection early makes the zygote kill the run
+            writer.close()
+            usage = await asyncio.to_thread(cgroup_accounting.collect, cgroup)
+        
+        return self._to_result(outcome, self._usage(outcome, usage), timeout, start_time)
+    
+    async def stream(
+        self,
+        code: str,
+        timeout: float = 30,
+        memory_mb: int = settings.PYTHON_RUN_MEMORY_MB,
+        max_output: int = settings.EXECUTION_MAX_OUTPUT_BYTES
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Run a submission, yielding ("stdout" | "stderr", text) as the run writes it.
+        
+        The last item is ("result", result) in the run() format. The zygote
+        kills the run once its output passes `max_output`; closing the
+        generator early kills it too.
+        """
+        start_time = time.time()
+        deadline = time.monotonic() + timeout + 5
+        reader, writer, cgroup = await self._connect(code, timeout, memory_mb, max_output, stream=True)
+        output: Dict[str, List[str]] = {"stdout": [], "stderr": []}
+        try:
+            await self._started(reader)
+            while True:
+                line = await asyncio.wait_for(reader.readline(), max(0.0, deadline - time.monotonic()))
+                if not line:
+                    raise ZygoteError("Zygote exited during the run")
+                message = json.loads(line)
+                if "stream" not in message:
+                    outcome = message
+                    break
+                output[message["stream"]].append(message["data"])
+                yield message["stream"], message["data"]
+        finally:
+            writer.close()
+            usage = await asyncio.to_thread(cgroup_accounting.collect, cgroup)
+        
+        outcome["stdout"] = "".join(output["stdout"])
+        outcome["stderr"] = "".join(output["stderr"])
+        yield "result", self._to_result(outcome, self._usage(outcome, usage), timeout, start_time)
+    
+    async def shutdown(self) -> None:
+        """Stop the zygote and wait for retired ones to exit"""
+        if self._zygote is not None:
+            await self._zygote.kill()
+            self._zygote = None
+        if self._retiring:
+            await asyncio.gather(*self._retiring, return_exceptions=True)
+            self._retiring = []
+    
+    def stats(self) -> Dict[str, Any]:
+        zygote = self._zygote
+        return {
+            "running": zygote is not None and zygote.alive,
+            "pid": zygote.process.pid if zygote else None,
+            "forks": zygote.forks if zygote else 0,
+            "rss_kb": zygote.rss_kb() if zygote else 0,
+            "runs": self.runs,
+            "spawns": self.spawns,
+            "respawns": self.respawns,
+        }
+    
+    async def _acquire(self) -> ZygoteProcess:
+        """Current zygote, started or replaced as needed; counts the fork it will serve"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            zygote = self._zygote
+            if zygote is not None and not zygote.alive:
+                logger.warning(f"Python zygote {zygote.process.pid} exited; starting a new one")
+                shutil.rmtree(zygote.work_dir, ignore_errors=True)
+                zygote = None
+            elif zygote is not None and self._worn_out(zygote):
+                self._retiring.append(asyncio.create_task(zygote.retire()))
+                self._retiring = [task for task in self._retiring if not task.done()]
+                self.respawns += 1
+                zygote = None
+            
+            if zygote is None:
+                zygote = await self._spawn()
+                self._zygote = zygote
+            zygote.forks += 1
+            return zygote
+    
+    async def _connect(self, code: str, timeout: float, memory_mb: int, max_output: int, stream: bool):
+        """Send a run to the zygote; returns the connection's reader and writer and the run's cgroup"""
+        zygote = await self._acquire()
+        cgroup = await asyncio.to_thread(cgroup_accounting.create)
+        request = {
+            "code": code,
+            "timeout": timeout,
+            "cpu_seconds": max(1, int(timeout)),
+            "memory_mb": memory_mb,
+            "max_output": max_output,
+            "cgroup": cgroup,
+            "stream": stream,
+        }
+        try:
+            # Output is JSON-escaped, so a reply can be several times max_output
+            reader, writer = await asyncio.open_unix_connection(
+                zygote.socket_path, limit=8 * max_output + 65536
+            )
+        except OSError:
+            if cgroup:
+                await asyncio.to_thread(cgroup_accounting.remove, cgroup)
+            raise
+        writer.write(json.dumps(request).encode() + b"\n")
+        return reader, writer, cgroup
+    
+    async def _started(self, reader: asyncio.StreamReader) -> None:
+        """Wait for the zygote to report the run forked"""
+        started = json.loads(await reader.readline() or b"{}")
+        if "pid" not in started:
+            raise ZygoteError(started.get("error", "Zygote closed the connection"))
+        self.runs += 1
+    
+    @staticmethod
+    def _usage(outcome: Dict[str, Any], usage: ResourceUsage) -> ResourceUsage:
+        """Cgroup usage, completed from the run's own rusage"""
+        return usage.merge(ResourceUsage(
+            cpu_user_ms=outcome["cpu_user_ms"],
+            cpu_system_ms=outcome["cpu_system_ms"],
+            memory_peak_kb=outcome["max_rss_kb"],
+            measured_by="rusage"
+        ))
+    
+    def _worn_out(self, zygote: ZygoteProcess) -> bool:
+        return zygote.forks >= self.max_forks or zygote.rss_kb() > self.max_rss_mb * 1024
+    
+    async def _spawn(self) -> ZygoteProcess:
+        work_dir = tempfile.mkdtemp(prefix="zygote_")
+        process = await asyncio.create_subprocess_exec(
+            self.python, "-I", SERVER_SCRIPT,
+            os.path.join(work_dir, "zygote.sock"), self.user, *self.preload,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env={"PATH": os.environ.get("PATH", "")}  # Runs must not see the server's secrets
+        )
+        zygote = ZygoteProcess(process, work_dir)
+        try:
+            ready = (await asyncio.wait_for(process.stdout.readline(), 30)).decode().strip()
+        except asyncio.TimeoutError:
+            ready = ""
+        if ready != "ready":
+            await zygote.kill()
+            reason = ready[len("error: "):] if ready.startswith("error: ") else "no answer"
+            raise ZygoteError(f"Python zygote failed to start: {reason}")
+        
+        self.spawns += 1
+        logger.info(f"Started Python zygote {process.pid} with {len(self.preload)} preloaded modules")
+        return zygote
+    
+    @staticmethod
+    def _to_result(outcome: Dict[str, Any], usage: ResourceUsage, timeout: float,
+                   start_time: float) -> Dict[str, Any]:
+        exit_code = outcome["exit_code"]
+        stderr = outcome["stderr"].strip()
+        output_limited = outcome.get("output_limited") or outcome["signal"] == signal.SIGXFSZ
+        error = None
+        if outcome["timed_out"]:
+            error = f"Execution timed out after {timeout}s"
+        elif output_limited:
+            error = "Output limit exceeded"
+        elif outcome["signal"] == signal.SIGXCPU:
+            error = "CPU time limit exceeded"
+        elif outcome["signal"]:
+            error = stderr or f"Process killed by {signal.Signals(outcome['signal']).name}"
+        elif exit_code != 0:
+            error = stderr or f"Process exited with code {exit_code}"
+        elif stderr:
+            error = stderr
+        
+        return {
+            "success": exit_code == 0 and not outcome["timed_out"],
+            "output": outcome["stdout"],
+            "error": error,
+            "execution_time_ms": int((time.time() - start_time) * 1000),
+            "memory_used_kb": usage.memory_peak_kb or 0,
+            "output_limited": bool(output_limited),
+            **usage.to_dict()
+        }
+
+
+# Create a single instance for import
+python_zygote = PythonZygote()
@@ -0,0 +1,141 @@
+"""
+Result Cache - reuses grading results of identical submissions to deterministic exercises
+"""
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[Hashable, ...]
+
+
+def normalize_code(code: str) -> str:
+    """Code with a stable byte form for hashing.
+    
+    Only changes that can never affect a run are applied: line endings are
+    unified and a leading byte order mark and trailing whitespace at the end
+    of the file are dropped. Whitespace inside lines is kept because it can
+    be part of a string or template literal.
+    """
+    if code.startswith("\ufeff"):
+        code = code[1:]
+    return code.replace("\r\n", "\n").replace("\r", "\n").rstrip()
+
+
+class ResultCache:
+    """In-memory LRU cache of grading results.
+    
+    Keys combine the exercise id and version (its `updated_at`), the
+    language, the toolchain version, any run options and a hash of the
+    normalized code, so a hit never touches the sandbox. When an exercise is
+    seen with a new version, all of its entries from older versions are
+    dropped. Exercises whose results depend on time or randomness must opt
+    out by not calling the cache at all.
+    
+    Cached results are shared between hits and must be treated as read-only.
+    """
+    
+    def __init__(self, max_entries: int = settings.RESULT_CACHE_SIZE,
+                 enabled: bool = settings.RESULT_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        
+        self._entries: "OrderedDict[CacheKey, Dict[str, Any]]" = OrderedDict()
+        self._versions: Dict[Hashable, Hashable] = {}
+        self._keys_by_exercise: Dict[Hashable, Set[CacheKey]] = {}
+        
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def key(self, exercise_id: Hashable, exercise_version: Hashable, language: str,
+            code: str, toolchain: str, *options: Hashable) -> CacheKey:
+        """Cache key of a submission; `options` holds run flags that change the result"""
+        digest = hashlib.sha256(normalize_code(code).encode("utf-8", "surrogatepass")).hexdigest()
+        return (exercise_id, exercise_version, language, toolchain, options, digest)
+    
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        """Cached result for `key`, or None on a miss"""
+        if not self.enabled:
+            return None
+        self._check_version(key)
+        
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+    
+    def put(self, key: CacheKey, result: Dict[str, Any]) -> None:
+        """Store the result of a completed, deterministic run"""
+        if not self.enabled:
+            return
+        self._check_version(key)
+        
+        exercise_id = key[0]
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        self._keys_by_exercise.setdefault(exercise_id, set()).add(key)
+        self.stores += 1
+        
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._forget(evicted)
+            self.evictions += 1
+    
+    def invalidate(self, exercise_id: Hashable) -> int:
+        """Drop every cached result of an exercise; returns the number dropped"""
+        keys = self._keys_by_exercise.pop(exercise_id, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        self._versions.pop(exercise_id, None)
+        self.invalidations += len(keys)
+        return len(keys)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        self._versions.clear()
+        self._keys_by_exercise.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+    
+    def _check_version(self, key: CacheKey) -> None:
+        """Invalidate an exercise's entries when it is seen with a new version"""
+        exercise_id, exercise_version = key[0], key[1]
+        known = self._versions.get(exercise_id)
+        if known is not None and known != exercise_version:
+            logger.info(f"Exercise {exercise_id} changed; dropping cached results")
+            self.invalidate(exercise_id)
+        self._versions[exercise_id] = exercise_version
+    
+    def _forget(self, key: CacheKey) -> None:
+        keys = self._keys_by_exercise.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_exercise[key[0]]
+
+
+# Create a single instance for import
+result_cache = ResultCache()
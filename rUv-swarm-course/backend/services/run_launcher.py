@@ -0,0 +1,126 @@
+"""
+Run Launcher - isolates a runtime process before it executes untrusted code
+
+Started as the child of a run instead of the runtime itself:
+
+    python -I run_launcher.py --user USER --cpu SECONDS --memory BYTES
+                              --fsize BYTES --nproc N --nofile N -- COMMAND ...
+
+The launcher moves into a new network namespace with only a loopback
+interface, applies rlimits, drops to USER when started as root, arranges
+to be killed with its parent and then executes COMMAND in its own place,
+so the pid the server holds is the runtime's. Setup failures are reported
+on stderr with exit status 70; nothing runs unisolated.
+
+Only the standard library is used here, so the launcher starts quickly.
+"""
+import argparse
+import ctypes
+import os
+import pwd
+import resource
+import signal
+import sys
+from typing import List, Optional, Tuple
+
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+PR_SET_PDEATHSIG = 1
+PR_SET_NO_NEW_PRIVS = 38
+EXIT_SETUP_FAILED = 70
+
+SCRIPT = os.path.abspath(__file__)
+
+
+def resolve_user(user: str) -> Tuple[int, int]:
+    """uid and gid runs drop to; nobody's ids if the user does not exist"""
+    try:
+        entry = pwd.getpwnam(user)
+        return entry.pw_uid, entry.pw_gid
+    except KeyError:
+        return 65534, 65534
+
+
+def launcher_command(python: str, user: str, cpu_seconds: int, memory_bytes: int,
+                     max_file_size: int, max_processes: int, max_open_files: int,
+                     command: List[str]) -> List[str]:
+    """Command line that runs `command` through the launcher"""
+    return [
+        python, "-I", SCRIPT,
+        "--user", user,
+        "--cpu", str(cpu_seconds),
+        "--memory", str(memory_bytes),
+        "--fsize", str(max_file_size),
+        "--nproc", str(max_processes),
+        "--nofile", str(max_open_files),
+        "--", *command
+    ]
+
+
+def isolate_network(libc) -> None:
+    # Unprivileged servers need a user namespace to create a network namespace
+    flags = CLONE_NEWNET if os.getuid() == 0 else CLONE_NEWUSER | CLONE_NEWNET
+    if libc.unshare(flags) != 0:
+        raise OSError(ctypes.get_errno(), "could not create a network namespace")
+
+
+def apply_limits(args: argparse.Namespace) -> None:
+    limits = {
+        # A hard limit above the soft one delivers SIGXCPU before SIGKILL
+        resource.RLIMIT_CPU: (args.cpu, args.cpu + 1),
+        resource.RLIMIT_AS: (args.memory, args.memory),
+        resource.RLIMIT_FSIZE: (args.fsize, args.fsize),
+        resource.RLIMIT_NPROC: (args.nproc, args.nproc),
+        resource.RLIMIT_NOFILE: (args.nofile, args.nofile),
+        resource.RLIMIT_CORE: (0, 0),
+    }
+    for limit, value in limits.items():
+        resource.setrlimit(limit, value)
+
+
+def drop_privileges(libc, uid: int, gid: int) -> None:
+    if os.getuid() == 0:
+        os.setgroups([])
+        os.setresgid(gid, gid, gid)
+        os.setresuid(uid, uid, uid)
+    libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a command in an isolated, limited process")
+    parser.add_argument("--user", default="nobody")
+    parser.add_argument("--cpu", type=int, required=True)
+    parser.add_argument("--memory", type=int, required=True)
+    parser.add_argument("--fsize", type=int, required=True)
+    parser.add_argument("--nproc", type=int, required=True)
+    parser.add_argument("--nofile", type=int, required=True)
+    parser.add_argument("command", nargs="+")
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args()
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        parent = os.getppid()
+        uid, gid = resolve_user(args.user)
+        isolate_network(libc)
+        apply_limits(args)
+        drop_privileges(libc, uid, gid)
+        # Set after the credential change, which clears it; kept across exec
+        libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0)
+        if os.getppid() != parent:
+            raise OSError("the server exited during setup")
+        # Python ignores these and exec keeps ignored signals; the runtime
+        # must die at the file size limit like any other program
+        for sig in (signal.SIGPIPE, signal.SIGXFSZ):
+            signal.signal(sig, signal.SIG_DFL)
+        os.execvp(args.command[0], args.command)
+    except OSError as e:
+        print(f"launcher: {e}", file=sys.stderr)
+        sys.stderr.flush()
+        os._exit(EXIT_SETUP_FAILED)
+
+
+if __name__ == "__main__":
+    main()
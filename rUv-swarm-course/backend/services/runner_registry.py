@@ -0,0 +1,249 @@
+"""
+Runner Registry - lazily loaded language runners with per-language limits and metrics
+"""
+import asyncio
+import importlib
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.services.execution_queue import summarize
+from backend.services.stage_timing import timed_stage
+
+logger = logging.getLogger(__name__)
+
+RunnerFunc = Callable[..., Awaitable[Any]]
+StreamFunc = Callable[..., AsyncIterator[Tuple[str, Any]]]
+
+
+class UnsupportedLanguageError(ValueError):
+    """Raised when no runner is registered for a language"""
+    
+    def __init__(self, language: str):
+        super().__init__(f"Unsupported language: {language}")
+        self.language = language
+
+
+@dataclass(frozen=True)
+class RunnerProfile:
+    """Resources a runner needs for one run"""
+    kind: str = "interpreted"  # interpreted, compiled
+    memory_mb: int = 128
+    timeout: int = 30  # seconds; longest run the runner accepts
+    max_concurrency: Optional[int] = None  # defaults to the setting for `kind`
+    
+    @property
+    def compiled(self) -> bool:
+        return self.kind == "compiled"
+    
+    def concurrency(self) -> int:
+        if self.max_concurrency is not None:
+            return self.max_concurrency
+        if self.compiled:
+            return settings.RUNNER_COMPILED_CONCURRENCY
+        return settings.RUNNER_INTERPRETED_CONCURRENCY
+
+
+class LanguageRunner:
+    """One language's runner: its import target, slots and counters.
+    
+    The target is a "module:function" path that is only imported on the
+    first run. Runs beyond the profile's concurrency wait for a slot, so a
+    slow toolchain only ever holds its own language's slots. An optional
+    stream target is an async generator of the same run that yields output
+    chunks as the program writes them.
+    """
+    
+    SAMPLE_WINDOW = 1000
+    
+    def __init__(self, language: str, target: str, profile: RunnerProfile,
+                 stream_target: Optional[str] = None):
+        self.language = language
+        self.target = target
+        self.stream_target = stream_target
+        self.profile = profile
+        self.max_concurrency = profile.concurrency()
+        
+        self._func: Optional[RunnerFunc] = None
+        self._stream_func: Optional[StreamFunc] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # Metrics
+        self.calls = 0
+        self.completed = 0
+        self.failures = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self._latencies: Deque[float] = deque(maxlen=self.SAMPLE_WINDOW)
+        self._wait_times: Deque[float] = deque(maxlen=self.SAMPLE_WINDOW)
+    
+    @property
+    def loaded(self) -> bool:
+        return self._func is not None
+    
+    def load(self) -> RunnerFunc:
+        """Import the runner function on first use"""
+        if self._func is None:
+            self._func = self._import(self.target)
+        return self._func
+    
+    async def run(self, *args: Any, **kwargs: Any) -> Any:
+        """Run the runner once a slot is free, recording latency and outcome"""
+        func = self.load()
+        async with self._slot():
+            result = await func(*args, **kwargs)
+        self._count(result)
+        return result
+    
+    async def stream(self, *args: Any, **kwargs: Any) -> AsyncIterator[Tuple[str, Any]]:
+        """Run like run(), yielding ("stdout" | "stderr", text) chunks and then ("result", result).
+        
+        Without a stream target the whole output is one chunk, sent when the
+        run finishes. Closing the generator early stops the run.
+        """
+        if self.stream_target is None:
+            result = await self.run(*args, **kwargs)
+            if isinstance(result, dict) and result.get("output"):
+                yield "stdout", result["output"]
+            yield "result", result
+            return
+        
+        if self._stream_func is None:
+            self._stream_func = self._import(self.stream_target)
+        events = self._stream_func(*args, **kwargs)
+        result = None
+        try:
+            async with self._slot():
+                async for kind, data in events:
+                    if kind == "result":
+                        result = data
+                    yield kind, data
+        finally:
+            await events.aclose()
+        self._count(result)
+    
+    def _import(self, target: str) -> Callable:
+        module_name, _, attribute = target.partition(":")
+        module = importlib.import_module(module_name)
+        logger.info(f"Loaded {self.language} runner from {target}")
+        return getattr(module, attribute)
+    
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one of the runner's slots for a run, recording its wait and latency"""
+        slots = self._get_slots()
+        
+        self.calls += 1
+        self.waiting += 1
+        queued_at = time.monotonic()
+        try:
+            with timed_stage("queue"):
+                await slots.acquire()
+        finally:
+            self.waiting -= 1
+        
+        started_at = time.monotonic()
+        self._wait_times.append(started_at - queued_at)
+        self.in_flight += 1
+        try:
+            with timed_stage("execution"):
+                yield
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._latencies.append(time.monotonic() - started_at)
+            slots.release()
+    
+    def _count(self, result: Any) -> None:
+        if isinstance(result, dict) and not result.get("success", True):
+            self.failures += 1
+        else:
+            self.completed += 1
+    
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "kind": self.profile.kind,
+            "memory_mb": self.profile.memory_mb,
+            "timeout": self.profile.timeout,
+            "max_concurrency": self.max_concurrency,
+            "loaded": self.loaded,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "completed": self.completed,
+            "failures": self.failures,
+            "errors": self.errors,
+            "latency_ms": summarize(self._latencies),
+            "wait_time_ms": summarize(self._wait_times),
+        }
+    
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Semaphores belong to an event loop; start afresh when the loop changes
+        loop = asyncio.get_running_loop()
+        if self._slots is None or (self._loop is not loop and self.in_flight == 0):
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._slots
+
+
+class RunnerRegistry:
+    """Language runners of an execution endpoint, looked up by language name"""
+    
+    def __init__(self):
+        self._runners: Dict[str, LanguageRunner] = {}
+    
+    def register(self, language: str, target: str, profile: Optional[RunnerProfile] = None,
+                 stream_target: Optional[str] = None) -> LanguageRunner:
+        """Add a runner; targets are "module:function" paths of its coroutine and stream generator"""
+        for path in (target, stream_target or target):
+            if ":" not in path:
+                raise ValueError(f"Runner target must be 'module:function', got {path!r}")
+        runner = LanguageRunner(language, target, profile or RunnerProfile(), stream_target)
+        self._runners[language] = runner
+        return runner
+    
+    def get(self, language: str) -> Optional[LanguageRunner]:
+        """Runner for a language, or None if unsupported"""
+        return self._runners.get(language)
+    
+    def languages(self) -> List[str]:
+        return list(self._runners)
+    
+    async def run(self, language: str, *args: Any, **kwargs: Any) -> Any:
+        """Run `language`'s runner; raises UnsupportedLanguageError if there is none"""
+        runner = self.get(language)
+        if runner is None:
+            raise UnsupportedLanguageError(language)
+        return await runner.run(*args, **kwargs)
+    
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Profile, slot usage, counters and latency of every runner"""
+        return {language: runner.metrics() for language, runner in self._runners.items()}
+
+
+INTERPRETED = RunnerProfile(kind="interpreted", memory_mb=128, timeout=30)
+COMPILED = RunnerProfile(kind="compiled", memory_mb=512, timeout=60)
+
+# Runners of the code execution endpoints (backend.api.code_execution)
+runner_registry = RunnerRegistry()
+runner_registry.register("javascript", "backend.services.runners.javascript:execute_javascript", INTERPRETED)
+runner_registry.register("python", "backend.services.runners.python:execute_python", INTERPRETED,
+                         stream_target="backend.services.runners.python:stream_python")
+runner_registry.register("java", "backend.services.runners.java:execute_java", COMPILED)
+runner_registry.register("cpp", "backend.services.runners.cpp:execute_cpp", COMPILED)
+runner_registry.register("rust", "backend.services.runners.rust:execute_rust", COMPILED)
+runner_registry.register("go", "backend.services.runners.go:execute_go", COMPILED)
+
+# Runners of the demo execute endpoint (backend.api.code)
+demo_runner_registry = RunnerRegistry()
+demo_runner_registry.register("javascript", "backend.services.runners.demo:mock_javascript_execution", INTERPRETED)
+demo_runner_registry.register("python", "backend.services.runners.demo:mock_python_execution", INTERPRETED)
+demo_runner_registry.register("rust", "backend.services.runners.demo:mock_rust_execution", COMPILED)
@@ -0,0 +1,3 @@
+"""
+Language Runners - one module per language, imported by the runner registry on first use
+"""
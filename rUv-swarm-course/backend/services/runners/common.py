@@ -0,0 +1,14 @@
+"""
+Runner Helpers - shared by the language runners
+"""
+from typing import Optional
+
+from backend.services.security_scanner import security_scanner
+from backend.services.stage_timing import timed_stage
+
+
+def find_dangerous_pattern(language: str, code: str) -> Optional[str]:
+    """Return the first dangerous pattern found in the code, if any"""
+    with timed_stage("validation"):
+        violations = security_scanner.scan(language, code)
+    return violations[0].rule if violations else None
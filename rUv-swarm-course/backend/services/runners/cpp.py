@@ -0,0 +1,71 @@
+"""
+C++ Runner - simulated C++ execution for the code execution endpoints
+"""
+import re
+import time
+from typing import Any, Dict
+
+from backend.services.runners.common import find_dangerous_pattern
+
+
+async def execute_cpp(code: str, timeout: int = 30) -> Dict[str, Any]:
+    """Execute C++ code in a simulated environment for demonstration"""
+    start_time = time.time()
+    
+    try:
+        # Check for dangerous patterns
+        violation = find_dangerous_pattern("cpp", code)
+        if violation:
+            return {
+                "success": False,
+                "output": "",
+                "error": f"Security violation: Dangerous pattern detected - {violation}",
+                "execution_time_ms": int((time.time() - start_time) * 1000),
+                "memory_used_kb": 0
+            }
+        
+        output_lines = []
+        
+        # Extract cout statements
+        cout_statements = re.findall(r'cout\s*<<\s*([^;]+)', code)
+        for cout_stmt in cout_statements:
+            if '"' in cout_stmt:
+                # Extract string literals
+                strings = re.findall(r'"([^"]+)"', cout_stmt)
+                output_lines.extend(strings)
+            else:
+                output_lines.append(f"[C++ output: {cout_stmt.strip()}]")
+        
+        # Extract printf statements
+        printf_statements = re.findall(r'printf\s*\(([^)]+)\)', code)
+        for printf_stmt in printf_statements:
+            if printf_stmt.strip().startswith('"'):
+                # Simple string extraction
+                string_match = re.match(r'"([^"]+)"', printf_stmt.strip())
+                if string_match:
+                    output_lines.append(string_match.group(1))
+        
+        # Simulate swarm execution
+        if 'swarm' in code.lower() or 'agent' in code.lower():
+            output_lines.append("[rUv-Swarm C++ Simulation]")
+            output_lines.append("High-performance swarm algorithms initialized")
+            output_lines.append("Memory-efficient agent processing completed")
+        
+        if not output_lines:
+            output_lines.append("C++ code compiled and executed successfully (simulated)")
+        
+        return {
+            "success": True,
+            "output": "\n".join(output_lines),
+            "execution_time_ms": int((time.time() - start_time) * 1000),
+            "memory_used_kb": 3072
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "output": "",
+            "error": f"C++ simulation error: {str(e)}",
+            "execution_time_ms": int((time.time() - start_time) * 1000),
+            "memory_used_kb": 0
+        }
@@ -0,0 +1,106 @@
+"""
+Demo Runners - canned output for the demo execute endpoint (backend.api.code)
+"""
+import asyncio
+
+
+async def mock_javascript_execution(code: str) -> str:
+    """Mock JavaScript code execution"""
+    await asyncio.sleep(1)  # Simulate execution time
+    
+    # Check for rUv-Swarm specific patterns
+    if "SwarmCoordinator" in code:
+        return """🚀 rUv-Swarm Demo Execution Results
+=====================================
+
+✓ Swarm initialized with 5 agents
+✓ Topology: mesh (fully connected)
+✓ Coordination strategy: adaptive
+
+Agent Distribution:
+├── Agent-1: Processing chunks [1, 2]
+├── Agent-2: Processing chunks [3, 4]  
+├── Agent-3: Processing chunks [5, 6]
+├── Agent-4: Processing chunks [7, 8]
+└── Agent-5: Processing chunks [9, 10]
+
+Coordination Results:
+├── Sum: 55
+├── Average: 5.5
+├── Max: 10
+├── Min: 1
+├── Processing time: 245ms
+└── Coordination efficiency: 94.2%
+
+🎉 Task completed successfully!
+All agents synchronized and results aggregated."""
+    
+    # Basic JavaScript execution simulation
+    output_lines = []
+    
+    # Handle console.log statements
+    if "console.log" in code:
+        lines = code.split('\n')
+        for line in lines:
+            if 'console.log' in line:
+                # Extract content between parentheses
+                start = line.find('(') + 1
+                end = line.rfind(')')
+                if start > 0 and end > start:
+                    content = line[start:end].strip('\'"')
+                    output_lines.append(content)
+    
+    # Handle return statements (simulate as output)
+    if "return" in code:
+        lines = code.split('\n')
+        for line in lines:
+            line = line.strip()
+            if line.startswith('return '):
+                # Extract return value
+                return_value = line[7:].strip().rstrip(';').strip('\'"')
+                output_lines.append(f"Returned: {return_value}")
+    
+    # Handle simple expressions (like 2+2, etc.)
+    if not output_lines and any(op in code for op in ['+', '-', '*', '/', '=']):
+        # Simple expression evaluation simulation
+        if '2+2' in code:
+            output_lines.append("4")
+        elif '5*5' in code:
+            output_lines.append("25")
+        else:
+            output_lines.append("Expression evaluated successfully")
+    
+    if output_lines:
+        return '\n'.join(output_lines)
+    
+    return "Code executed successfully (no output)"
+
+
+async def mock_python_execution(code: str) -> str:
+    """Mock Python code execution"""
+    await asyncio.sleep(1)  # Simulate execution time
+    
+    if "print" in code:
+        lines = code.split('\n')
+        output = []
+        for line in lines:
+            if 'print(' in line:
+                # Extract content between parentheses
+                start = line.find('(') + 1
+                end = line.rfind(')')
+                if start > 0 and end > start:
+                    content = line[start:end].strip('\'"')
+                    output.append(content)
+        return '\n'.join(output)
+    
+    return "Python code executed successfully"
+
+
+async def mock_rust_execution(code: str) -> str:
+    """Mock Rust code execution"""
+    await asyncio.sleep(2)  # Simulate compilation + execution time
+    
+    if "println!" in code:
+        return "Hello from Rust!\nCompiled and executed successfully."
+    
+    return "Rust code compiled and executed successfully"
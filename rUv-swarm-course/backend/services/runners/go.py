@@ -0,0 +1,72 @@
+"""
+Go Runner - simulated Go execution for the code execution endpoints
+"""
+import re
+import time
+from typing import Any, Dict
+
+from backend.services.runners.common import find_dangerous_pattern
+
+
+async def execute_go(code: str, timeout: int = 30) -> Dict[str, Any]:
+    """Execute Go code in a simulated environment for demonstration"""
+    start_time = time.time()
+    
+    try:
+        # Check for dangerous patterns
+        violation = find_dangerous_pattern("go", code)
+        if violation:
+            return {
+                "success": False,
+                "output": "",
+                "error": f"Security violation: Dangerous pattern detected - {violation}",
+                "execution_time_ms": int((time.time() - start_time) * 1000),
+                "memory_used_kb": 0
+            }
+        
+        output_lines = []
+        
+        # Extract fmt.Println statements
+        println_statements = re.findall(r'fmt\.Println\s*\(([^)]+)\)', code)
+        for println_stmt in println_statements:
+            if println_stmt.strip().startswith('"') and println_stmt.strip().endswith('"'):
+                output_lines.append(println_stmt.strip()[1:-1])
+            else:
+                output_lines.append(f"[Go output: {println_stmt.strip()}]")
+        
+        # Extract fmt.Printf statements
+        printf_statements = re.findall(r'fmt\.Printf\s*\(([^)]+)\)', code)
+        for printf_stmt in printf_statements:
+            if '"' in printf_stmt:
+                string_match = re.search(r'"([^"]+)"', printf_stmt)
+                if string_match:
+                    output_lines.append(string_match.group(1))
+        
+        # Simulate swarm execution
+        if 'swarm' in code.lower() or 'agent' in code.lower():
+            output_lines.append("[rUv-Swarm Go Simulation]")
+            output_lines.append("Concurrent swarm processing with goroutines")
+            output_lines.append("Channel-based agent communication established")
+        
+        # Check for goroutines
+        if 'go ' in code or 'goroutine' in code.lower():
+            output_lines.append("Goroutine execution simulated")
+        
+        if not output_lines:
+            output_lines.append("Go code compiled and executed successfully (simulated)")
+        
+        return {
+            "success": True,
+            "output": "\n".join(output_lines),
+            "execution_time_ms": int((time.time() - start_time) * 1000),
+            "memory_used_kb": 2048
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "output": "",
+            "error": f"Go simulation error: {str(e)}",
+            "execution_time_ms": int((time.time() - start_time) * 1000),
+            "memory_used_kb": 0
+        }
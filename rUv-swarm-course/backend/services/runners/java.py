@@ -0,0 +1,65 @@
+"""
+Java Runner - simulated Java execution for the code execution endpoints
+"""
+import re
+import time
+from typing import Any, Dict
+
+from backend.services.runners.common import find_dangerous_pattern
+
+
+async def execute_java(code: str, timeout: int = 30) -> Dict[str, Any]:
+    """Execute Java code in a simulated environment for demonstration"""
+    start_time = time.time()
+    
+    try:
+        # Check for dangerous patterns
+        violation = find_dangerous_pattern("java", code)
+        if violation:
+            return {
+                "success": False,
+                "output": "",
+                "error": f"Security violation: Dangerous pattern detected - {violation}",
+                "execution_time_ms": int((time.time() - start_time) * 1000),
+                "memory_used_kb": 0
+            }
+        
+        output_lines = []
+        
+        # Extract System.out.println statements
+        print_statements = re.findall(r'System\.out\.println\s*\(([^)]+)\)', code)
+        for print_stmt in print_statements:
+            if print_stmt.strip().startswith('"') and print_stmt.strip().endswith('"'):
+                output_lines.append(print_stmt.strip()[1:-1])
+            else:
+                output_lines.append(f"[Java output: {print_stmt.strip()}]")
+        
+        # Simulate swarm execution
+        if 'swarm' in code.lower() or 'agent' in code.lower():
+            output_lines.append("[rUv-Swarm Java Simulation]")
+            output_lines.append("Swarm initialized with agent objects")
+            output_lines.append("Agent behaviors executed")
+        
+        # Check for class definitions
+        classes = re.findall(r'class\s+(\w+)', code)
+        for cls in classes:
+            output_lines.append(f"Java class '{cls}' compiled and loaded")
+        
+        if not output_lines:
+            output_lines.append("Java code executed successfully (simulated)")
+        
+        return {
+            "success": True,
+            "output": "\n".join(output_lines),
+            "execution_time_ms": int((time.time() - start_time) * 1000),
+            "memory_used_kb": 4096
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "output": "",
+            "error": f"Java simulation error: {str(e)}",
+            "execution_time_ms": int((time.time() - start_time) * 1000),
+            "memory_used_kb": 0
+        }
@@ -0,0 +1,89 @@
+"""
+JavaScript Runner - simulated JavaScript execution for the code execution endpoints
+"""
+import re
+import time
+from typing import Any, Dict
+
+from backend.services.runners.common import find_dangerous_pattern
+
+
+async def execute_javascript(code: str, timeout: int = 30) -> Dict[str, Any]:
+    """Execute JavaScript code in a simulated safe environment for demonstration"""
+    start_time = time.time()
+    
+    try:
+        # Simulate execution with pattern matching for demonstration
+        output_lines = []
+        
+        # Check for dangerous patterns (basic security simulation)
+        violation = find_dangerous_pattern("javascript", code)
+        if violation:
+            return {
+                "success": False,
+                "output": "",
+                "error": f"Security violation: Dangerous pattern detected - {violation}",
+                "execution_time_ms": int((time.time() - start_time) * 1000),
+                "memory_used_kb": 0
+            }
+        
+        # Extract console.log statements for simulation
+        console_logs = re.findall(r'console\.log\s*\(([^)]+)\)', code)
+        for log in console_logs:
+            # Simple evaluation of basic expressions
+            try:
+                # Handle string literals
+                if log.strip().startswith('"') and log.strip().endswith('"'):
+                    output_lines.append(log.strip()[1:-1])
+                elif log.strip().startswith("'") and log.strip().endswith("'"):
+                    output_lines.append(log.strip()[1:-1])
+                else:
+                    # Handle variables and expressions
+                    output_lines.append(f"[Simulated output for: {log.strip()}]")
+            except:
+                output_lines.append(f"[Output: {log.strip()}]")
+        
+        # Simulate swarm algorithm execution
+        if 'swarm' in code.lower() or 'agent' in code.lower():
+            output_lines.append("[rUv-Swarm Simulation]")
+            output_lines.append("Swarm initialized with 5 agents")
+            output_lines.append("Agent positions updated")
+            output_lines.append("Swarm behavior: Flocking patterns detected")
+        
+        # Simulate mathematical calculations
+        math_operations = re.findall(r'Math\.(\w+)\s*\([^)]*\)', code)
+        for op in math_operations:
+            output_lines.append(f"Math.{op} calculated successfully")
+        
+        # Check for function definitions and calls
+        functions = re.findall(r'function\s+(\w+)\s*\(', code)
+        for func in functions:
+            output_lines.append(f"Function '{func}' defined")
+        
+        # Check for return statements
+        returns = re.findall(r'return\s+([^;\n]+)', code)
+        for ret in returns:
+            output_lines.append(f"Returned: {ret.strip()}")
+        
+        # If no specific patterns found, provide generic success message
+        if not output_lines:
+            output_lines.append("Code executed successfully (simulated)")
+            output_lines.append("No console output detected")
+        
+        execution_time = int((time.time() - start_time) * 1000)
+        
+        return {
+            "success": True,
+            "output": "\n".join(output_lines),
+            "execution_time_ms": execution_time,
+            "memory_used_kb": 1024  # Mock memory usage
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "output": "",
+            "error": f"Simulation error: {str(e)}",
+            "execution_time_ms": int((time.time() - start_time) * 1000),
+            "memory_used_kb": 0
+        }
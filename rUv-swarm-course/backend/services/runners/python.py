@@ -0,0 +1,128 @@
+"""
+Python Runner - Python submissions through the fork server, simulated when it is off
+"""
+import logging
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Tuple
+
+from backend.config import settings
+from backend.services.python_zygote import ZygoteError, python_zygote
+from backend.services.runners.common import find_dangerous_pattern
+
+logger = logging.getLogger(__name__)
+
+
+async def execute_python(code: str, timeout: int = 30) -> Dict[str, Any]:
+    """Execute Python code in a simulated safe environment for demonstration"""
+    start_time = time.time()
+    
+    try:
+        # Check for dangerous patterns (basic security simulation)
+        violation = find_dangerous_pattern("python", code)
+        if violation:
+            return {
+                "success": False,
+                "output": "",
+                "error": f"Security violation: Dangerous pattern detected - {violation}",
+                "execution_time_ms": int((time.time() - start_time) * 1000),
+                "memory_used_kb": 0
+            }
+        
+        # Real runs go through the fork server when it is enabled
+        if settings.PYTHON_ZYGOTE_ENABLED:
+            try:
+                return await python_zygote.run(code, timeout)
+            except ZygoteError as e:
+                return _runtime_unavailable(e, start_time)
+        
+        output_lines = []
+        
+        # Extract print statements for simulation
+        print_statements = re.findall(r'print\s*\(([^)]+)\)', code)
+        for print_stmt in print_statements:
+            # Simple evaluation of basic expressions
+            try:
+                # Handle string literals
+                if print_stmt.strip().startswith('"') and print_stmt.strip().endswith('"'):
+                    output_lines.append(print_stmt.strip()[1:-1])
+                elif print_stmt.strip().startswith("'") and print_stmt.strip().endswith("'"):
+                    output_lines.append(print_stmt.strip()[1:-1])
+                else:
+                    # Handle variables and expressions
+                    output_lines.append(f"[Simulated output for: {print_stmt.strip()}]")
+            except:
+                output_lines.append(f"[Output: {print_stmt.strip()}]")
+        
+        # Simulate swarm algorithm execution
+        if 'swarm' in code.lower() or 'agent' in code.lower():
+            output_lines.append("[rUv-Swarm Python Simulation]")
+            output_lines.append("Swarm class initialized")
+            output_lines.append("Agents created and positioned")
+            output_lines.append("Swarm update cycle completed")
+        
+        # Check for class definitions
+        classes = re.findall(r'class\s+(\w+)', code)
+        for cls in classes:
+            output_lines.append(f"Class '{cls}' defined")
+        
+        # Check for function definitions
+        functions = re.findall(r'def\s+(\w+)\s*\(', code)
+        for func in functions:
+            output_lines.append(f"Function '{func}' defined")
+        
+        # Simulate mathematical operations
+        if 'math.' in code or 'random.' in code or 'numpy.' in code:
+            output_lines.append("Mathematical operations completed")
+        
+        # Check for loops
+        if 'for ' in code or 'while ' in code:
+            output_lines.append("Loop execution simulated")
+        
+        # If no specific patterns found, provide generic success message
+        if not output_lines:
+            output_lines.append("Python code executed successfully (simulated)")
+            output_lines.append("No print output detected")
+        
+        execution_time = int((time.time() - start_time) * 1000)
+        
+        return {
+            "success": True,
+            "output": "\n".join(output_lines),
+            "execution_time_ms": execution_time,
+            "memory_used_kb": 2048  # Mock memory usage
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "output": "",
+            "error": f"Simulation error: {str(e)}",
+            "execution_time_ms": int((time.time() - start_time) * 1000),
+            "memory_used_kb": 0
+        }
+
+
+async def stream_python(code: str, timeout: int = 30) -> AsyncIterator[Tuple[str, Any]]:
+    """Like execute_python, yielding output chunks as the fork server reports them"""
+    if not settings.PYTHON_ZYGOTE_ENABLED or find_dangerous_pattern("python", code):
+        yield "result", await execute_python(code, timeout)
+        return
+    
+    start_time = time.time()
+    try:
+        async for event in python_zygote.stream(code, timeout):
+            yield event
+    except ZygoteError as e:
+        yield "result", _runtime_unavailable(e, start_time)
+
+
+def _runtime_unavailable(error: ZygoteError, start_time: float) -> Dict[str, Any]:
+    logger.error(f"Python zygote error: {error}")
+    return {
+        "success": False,
+        "output": "",
+        "error": f"Python runtime unavailable: {error}",
+        "execution_time_ms": int((time.time() - start_time) * 1000),
+        "memory_used_kb": 0
+    }
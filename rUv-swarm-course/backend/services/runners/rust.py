@@ -0,0 +1,65 @@
+"""
+Rust Runner - simulated Rust execution for the code execution endpoints
+"""
+import re
+import time
+from typing import Any, Dict
+
+from backend.services.runners.common import find_dangerous_pattern
+
+
+async def execute_rust(code: str, timeout: int = 30) -> Dict[str, Any]:
+    """Execute Rust code in a simulated environment for demonstration"""
+    start_time = time.time()
+    
+    try:
+        # Check for dangerous patterns
+        violation = find_dangerous_pattern("rust", code)
+        if violation:
+            return {
+                "success": False,
+                "output": "",
+                "error": f"Security violation: Dangerous pattern detected - {violation}",
+                "execution_time_ms": int((time.time() - start_time) * 1000),
+                "memory_used_kb": 0
+            }
+        
+        output_lines = []
+        
+        # Extract println! statements
+        println_statements = re.findall(r'println!\s*\(([^)]+)\)', code)
+        for println_stmt in println_statements:
+            if println_stmt.strip().startswith('"') and println_stmt.strip().endswith('"'):
+                output_lines.append(println_stmt.strip()[1:-1])
+            else:
+                output_lines.append(f"[Rust output: {println_stmt.strip()}]")
+        
+        # Simulate swarm execution
+        if 'swarm' in code.lower() or 'agent' in code.lower():
+            output_lines.append("[rUv-Swarm Rust Simulation]")
+            output_lines.append("Memory-safe swarm algorithms compiled")
+            output_lines.append("Zero-cost abstractions for agent systems")
+        
+        # Check for struct definitions  
+        structs = re.findall(r'struct\s+(\w+)', code)
+        for struct in structs:
+            output_lines.append(f"Rust struct '{struct}' defined")
+        
+        if not output_lines:
+            output_lines.append("Rust code compiled and executed successfully (simulated)")
+        
+        return {
+            "success": True,
+            "output": "\n".join(output_lines),
+            "execution_time_ms": int((time.time() - start_time) * 1000),
+            "memory_used_kb": 2560
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "output": "",
+            "error": f"Rust simulation error: {str(e)}",
+            "execution_time_ms": int((time.time() - start_time) * 1000),
+            "memory_used_kb": 0
+        }
@@ -0,0 +1,246 @@
+"""
+Security Scanner - single-pass detection of dangerous constructs in submissions
+"""
+import hashlib
+import re
+import string
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+# Dangerous patterns per language (basic security simulation). Every pattern
+# starts with a literal keyword and matches case-insensitively.
+DANGEROUS_PATTERNS = {
+    "javascript": [
+        r'require\s*\([\'"]fs[\'"]\)',
+        r'require\s*\([\'"]child_process[\'"]\)',
+        r'require\s*\([\'"]os[\'"]\)',
+        r'process\.',
+        r'eval\s*\(',
+        r'Function\s*\(',
+    ],
+    "python": [
+        r'import\s+os',
+        r'import\s+subprocess',
+        r'import\s+sys',
+        r'from\s+os\s+import',
+        r'__import__',
+        r'exec\s*\(',
+        r'eval\s*\(',
+        r'open\s*\(',
+        r'file\s*\(',
+    ],
+    "java": [
+        r'Runtime\.',
+        r'ProcessBuilder',
+        r'System\.exit',
+        r'System\.getProperty',
+        r'Class\.forName',
+        r'reflection',
+    ],
+    "cpp": [
+        r'system\s*\(',
+        r'exec\w{0,32}\s*\(',
+        r'popen\s*\(',
+        r'__asm',
+        r'#include\s*<unistd\.h>',
+    ],
+    "rust": [
+        r'std::process',
+        r'std::fs',
+        r'unsafe\s*{',
+        r'libc::',
+    ],
+    "go": [
+        r'os/exec',
+        r'os\.Exec',
+        r'syscall\.',
+        r'unsafe\.',
+    ],
+}
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+_REGEX_META = set('.^$*+?{}[]()|')
+_QUANTIFIERS = set('*?{')
+
+# Matches a string literal up to its closing quote, or to the end of the line
+# when unterminated; the optional closing quote means it never backtracks
+_STRING_LITERAL = re.compile(r'"(?:[^"\\\n]|\\.)*"?')
+# Same shape for an include directive: group 2 is empty when it is unterminated
+_INCLUDE_DIRECTIVE = re.compile(r'#include\s*[<"]([^>"\n]*)([>"]?)')
+
+
+class Violation(NamedTuple):
+    """A dangerous construct found by the scanner"""
+    kind: str  # pattern, include, string
+    rule: str  # the matching pattern, header name or suspicious substring
+    offset: int
+    line: int
+
+
+def literal_prefix(pattern: str) -> str:
+    """Literal text every match of `pattern` starts with"""
+    prefix = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                break  # Character class escape such as \s or \w
+            char = pattern[i + 1]
+            step = 2
+        elif char in _REGEX_META:
+            break
+        else:
+            step = 1
+        if i + step < len(pattern) and pattern[i + step] in _QUANTIFIERS:
+            break  # Quantified, so not part of every match
+        prefix.append(char)
+        i += step
+    return ''.join(prefix)
+
+
+class RuleSet:
+    """Dangerous-construct rules of one language, compiled once.
+    
+    Every pattern must start with a literal keyword. The lower-cased keywords
+    form a single trigger regex that finds candidate positions in one
+    left-to-right pass, and the full rules are only matched, anchored, at
+    those positions. Rules bound their quantifiers by the next delimiter, so
+    each candidate inspects a disjoint stretch of text and the scan stays
+    linear in the size of the input.
+    """
+    
+    def __init__(self, language: str, patterns: Iterable[str],
+                 allowed_includes: Optional[Iterable[str]] = None,
+                 suspicious_strings: Iterable[str] = ()):
+        self.language = language
+        self.patterns = list(patterns)
+        self.allowed_includes = frozenset(allowed_includes) if allowed_includes is not None else None
+        self.suspicious_strings = tuple(suspicious_strings)
+        
+        rules: Dict[str, List[Tuple[str, Pattern]]] = {}
+        for pattern in self.patterns:
+            keyword = literal_prefix(pattern).translate(_ASCII_LOWER)
+            if not keyword:
+                raise ValueError(f"Rule must start with a literal keyword: {pattern}")
+            rules.setdefault(keyword, []).append((pattern, re.compile(pattern, re.IGNORECASE)))
+        
+        triggers = set(rules)
+        if self.allowed_includes is not None:
+            triggers.add('#')
+        if self.suspicious_strings:
+            triggers.add('"')
+        
+        # The trigger reports the longest keyword at a position; every shorter
+        # keyword matching there is a prefix of it
+        self._candidates = {
+            trigger: [rule for keyword in rules if trigger.startswith(keyword) for rule in rules[keyword]]
+            for trigger in triggers
+        }
+        self._trigger = re.compile('|'.join(
+            re.escape(trigger) for trigger in sorted(triggers, key=len, reverse=True)
+        ))
+    
+    def scan(self, code: str) -> List[Violation]:
+        """Every violation in `code`, in source order"""
+        lowered = code.translate(_ASCII_LOWER)
+        violations: List[Violation] = []
+        line, line_offset = 1, 0
+        string_end = 0
+        include_end = 0
+        position = 0
+        
+        while True:
+            match = self._trigger.search(lowered, position)
+            if match is None:
+                break
+            start = match.start()
+            position = start + 1
+            token = match.group()
+            found: List[Tuple[str, str]] = []
+            
+            # A '#' inside a directive already read is part of its header name
+            if token[0] == '#' and self.allowed_includes is not None and start >= include_end:
+                include = _INCLUDE_DIRECTIVE.match(code, start)
+                if include:
+                    include_end = include.end()
+                    header, closed = include.groups()
+                    if header and closed and self._forbidden_include(header):
+                        found.append(('include', header))
+            
+            if token[0] == '"' and self.suspicious_strings and start >= string_end:
+                literal = _STRING_LITERAL.match(code, start)
+                string_end = literal.end()
+                for suspicious in self.suspicious_strings:
+                    if suspicious in literal.group():
+                        found.append(('string', suspicious))
+                        break
+            
+            for pattern, rule in self._candidates[token]:
+                if rule.match(code, start):
+                    found.append(('pattern', pattern))
+            
+            if found:
+                line += code.count('\n', line_offset, start)
+                line_offset = start
+                violations.extend(Violation(kind, rule, start, line) for kind, rule in found)
+        
+        return violations
+    
+    def _forbidden_include(self, header: str) -> bool:
+        if header in self.allowed_includes:
+            return False
+        # Plain local headers are allowed; paths are not
+        return not header.endswith('.h') or '/' in header or '\\' in header
+
+
+class SecurityScanner:
+    """Scans code with per-language rule sets and caches verdicts by code hash"""
+    
+    CACHE_SIZE = 4096
+    
+    def __init__(self, rule_sets: Iterable[RuleSet], cache_size: int = CACHE_SIZE):
+        self.rule_sets = {rule_set.language: rule_set for rule_set in rule_sets}
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[Violation, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+    
+    def scan(self, language: str, code: str) -> Tuple[Violation, ...]:
+        """All violations of `code` under the rules for `language`"""
+        rule_set = self.rule_sets.get(language)
+        if rule_set is None:
+            raise ValueError(f"No security rules for language: {language}")
+        
+        key = (language, hashlib.sha256(code.encode('utf-8', 'surrogatepass')).hexdigest())
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        
+        violations = tuple(rule_set.scan(code))
+        with self._lock:
+            self._cache[key] = violations
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return violations
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'cached_verdicts': len(self._cache),
+            }
+
+
+security_scanner = SecurityScanner(
+    RuleSet(language, patterns) for language, patterns in DANGEROUS_PATTERNS.items()
+)
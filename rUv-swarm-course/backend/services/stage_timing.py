@@ -0,0 +1,174 @@
+"""
+Stage Timing - per-stage latency of code executions, as histograms per language and stage
+
+A run's StageTimer is made current with `tracing()`; code anywhere on the run's
+path (runner slots, security scan, sandbox) then times itself with
+`timed_stage()` without the timer being passed down. Stages nest: time spent in
+an inner stage is not counted again in the stage around it, so a run's stage
+times add up to its total.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds of the histogram buckets, in milliseconds
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class StageTimer:
+    """Exclusive wall-clock time of each stage of one run, in milliseconds"""
+    
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.stages: Dict[str, float] = {}
+        self._nested: List[float] = []  # Inner stage time of each open stage
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = self.clock()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = (self.clock() - start) * 1000
+            self.record(name, elapsed, inner=self._nested.pop())
+    
+    def record(self, name: str, elapsed_ms: float, inner: float = 0.0) -> None:
+        """Add time to a stage, less `inner` spent in its own nested stages.
+        
+        A stage entered twice accumulates; time recorded while another stage
+        is open is taken out of that stage.
+        """
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed_ms - inner
+        if self._nested:
+            self._nested[-1] += elapsed_ms
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stages_ms": {name: round(ms, 3) for name, ms in self.stages.items()},
+            "total_ms": round(sum(self.stages.values()), 3)
+        }
+
+
+_current_timer: ContextVar[Optional[StageTimer]] = ContextVar("stage_timer", default=None)
+
+
+@contextmanager
+def tracing(timer: Optional[StageTimer]) -> Iterator[Optional[StageTimer]]:
+    """Make `timer` the current run's timer; None stops timing inside the block"""
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+@contextmanager
+def timed_stage(name: str) -> Iterator[None]:
+    """Time a block as stage `name` of the current run, if it is being traced"""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+class LatencyHistogram:
+    """Cumulative-bucket histogram of durations in milliseconds"""
+    
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot counts values above every bound
+        self.count = 0
+        self.sum = 0.0
+    
+    def observe(self, value_ms: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value_ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value_ms
+    
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given quantile"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+    
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, count) pairs in Prometheus order, ending with +Inf"""
+        pairs, seen = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            pairs.append((f"{bound:g}", seen))
+        pairs.append(("+Inf", self.count))
+        return pairs
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum, 3),
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": dict(self.cumulative())
+        }
+
+
+class StageLatency:
+    """Latency histograms keyed by language and stage"""
+    
+    METRIC_NAME = "code_execution_stage_latency_ms"
+    
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS_MS):
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, language: str, timer: StageTimer) -> None:
+        """Add one run's stage timings; the whole run is recorded as stage "total" """
+        with self._lock:
+            for stage, elapsed_ms in list(timer.stages.items()) + [("total", sum(timer.stages.values()))]:
+                histogram = self._histograms.get((language, stage))
+                if histogram is None:
+                    histogram = self._histograms[(language, stage)] = LatencyHistogram(self.buckets)
+                histogram.observe(elapsed_ms)
+    
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """{language: {stage: histogram summary}}"""
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        with self._lock:
+            for (language, stage), histogram in sorted(self._histograms.items()):
+                result.setdefault(language, {})[stage] = histogram.snapshot()
+        return result
+    
+    def render_prometheus(self) -> str:
+        """Histograms in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {self.METRIC_NAME} Time spent in each stage of a code execution",
+            f"# TYPE {self.METRIC_NAME} histogram"
+        ]
+        with self._lock:
+            for (language, stage), histogram in sorted(self._histograms.items()):
+                labels = f'language="{language}",stage="{stage}"'
+                for le, count in histogram.cumulative():
+                    lines.append(f'{self.METRIC_NAME}_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f"{self.METRIC_NAME}_sum{{{labels}}} {histogram.sum:.3f}")
+                lines.append(f"{self.METRIC_NAME}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+# Create a single instance for import
+stage_latency = StageLatency()
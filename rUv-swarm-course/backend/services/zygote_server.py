@@ -0,0 +1,421 @@
+"""
+Python Zygote Server - forks a fresh child per submission from a pre-warmed interpreter
+
+Started by backend.services.python_zygote as its own process:
+
+    python -I zygote_server.py SOCKET_PATH USER MODULE [MODULE ...]
+
+The listed modules are imported once, then every connection on the Unix
+socket carries one run:
+
+    request   {"code": str, "timeout": float, "memory_mb": int,
+               "cpu_seconds": int, "max_output": int, "cgroup": str | null,
+               "stream": bool}
+    replies   {"pid": int}                      once the child is forked
+              {"stream": "stdout" | "stderr", "data": str}   streamed runs only
+              {"exit_code": int, "stdout": str, ...}   once it has exited
+
+A streamed run writes to pipes rather than files, and each chunk is sent
+as soon as it is read; the run is killed once it has written more than
+max_output bytes (output_limited in the last reply, whose stdout and
+stderr are then empty).
+
+Closing the connection before the second reply kills the run. SIGTERM
+stops accepting runs and exits once the running ones finish; end of file
+on stdin (the server went away) kills them and exits at once.
+
+Before printing "ready" the zygote isolates itself the way run_launcher
+isolates a runtime: it moves into a network namespace with only a
+loopback interface, which every run inherits, and a user namespace as
+well when not started as root. Runs of a root zygote drop to USER, which
+must not be root. If that cannot be set up, it prints "error: REASON"
+instead and exits with status 70; nothing runs unisolated.
+
+Only the standard library is used here, so the zygote stays small.
+"""
+import builtins
+import codecs
+import ctypes
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Tuple
+
+# The launcher is a sibling script; -I leaves this directory off sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from run_launcher import (  # noqa: E402
+    EXIT_SETUP_FAILED, PR_SET_PDEATHSIG, drop_privileges, isolate_network, resolve_user
+)
+del sys.path[0]
+
+MAX_REQUEST_BYTES = 4 * 1024 * 1024
+
+libc = ctypes.CDLL(None, use_errno=True)
+
+
+class Run:
+    """A forked child and the connection waiting for its result"""
+    
+    def __init__(self, pid: int, conn: socket.socket, request: dict, stdout_fd: int, stderr_fd: int):
+        self.pid = pid
+        self.conn = conn
+        self.request = request
+        self.stdout_fd = stdout_fd
+        self.stderr_fd = stderr_fd
+        self.max_output = int(request.get("max_output", 64 * 1024))
+        self.pidfd = os.pidfd_open(pid)
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + float(request.get("timeout", 30))
+        self.timed_out = False
+        self.cancelled = False
+        self.output_limited = False
+        self.stream = bool(request.get("stream"))
+        # Read ends of a streamed run's pipes, until they are closed
+        self.pipes = {"stdout": stdout_fd, "stderr": stderr_fd} if self.stream else {}
+        self.decoders = {name: codecs.getincrementaldecoder("utf-8")("replace") for name in self.pipes}
+        self.streamed = 0
+    
+    def kill(self) -> None:
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def read_request(conn: socket.socket) -> dict:
+    conn.settimeout(5)
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = conn.recv(65536)
+        if not chunk:
+            raise ConnectionError("connection closed before the request was complete")
+        data += chunk
+        if len(data) > MAX_REQUEST_BYTES:
+            raise ValueError("request too large")
+    return json.loads(data)
+
+
+def send(conn: socket.socket, message: dict) -> None:
+    try:
+        conn.setblocking(True)
+        conn.sendall(json.dumps(message).encode() + b"\n")
+    except OSError:
+        pass  # The server gave up on this run
+
+
+def read_output(fd: int, limit: int) -> str:
+    os.lseek(fd, 0, os.SEEK_SET)
+    data = os.read(fd, limit + 1)
+    return data[:limit].decode("utf-8", errors="replace")
+
+
+def apply_limits(request: dict) -> None:
+    with open("/proc/self/statm") as f:
+        image_bytes = int(f.read().split()[0]) * resource.getpagesize()
+    cpu_seconds = max(1, int(request.get("cpu_seconds", request.get("timeout", 30))))
+    # The child starts as a copy of the zygote, so its address space is
+    # bounded relative to the zygote image rather than absolutely
+    address_space = image_bytes + int(request.get("memory_mb", 128)) * 1024 * 1024
+    max_output = int(request.get("max_output", 64 * 1024))
+    limits = {
+        # A hard limit above the soft one delivers SIGXCPU before SIGKILL
+        resource.RLIMIT_CPU: (cpu_seconds, cpu_seconds + 1),
+        resource.RLIMIT_AS: (address_space, address_space),
+        resource.RLIMIT_FSIZE: (max_output, max_output),
+        resource.RLIMIT_NPROC: (16, 16),
+        resource.RLIMIT_NOFILE: (32, 32),
+        resource.RLIMIT_CORE: (0, 0),
+    }
+    for limit, value in limits.items():
+        resource.setrlimit(limit, value)
+
+
+def isolate(user: str) -> Tuple[int, int]:
+    """Move the zygote into its namespaces; returns the ids runs drop to"""
+    uid, gid = resolve_user(user)
+    if os.getuid() == 0 and 0 in (uid, gid):
+        raise OSError(f"runs would keep root privileges as {user}")
+    isolate_network(libc)
+    return uid, gid
+
+
+def run_child(request: dict, stdout_fd: int, stderr_fd: int, uid: int, gid: int, zygote_pid: int) -> None:
+    """Child side of a fork: isolate, run the submission and exit"""
+    status = EXIT_SETUP_FAILED
+    try:
+        # Join the run's accounting cgroup before doing any work
+        if request.get("cgroup"):
+            try:
+                with open(os.path.join(request["cgroup"], "cgroup.procs"), "w") as f:
+                    f.write("0")
+            except OSError:
+                pass
+        os.setsid()
+        # Python ignores SIGXFSZ; restoring it ends a run at the output limit
+        for sig in (signal.SIGTERM, signal.SIGCHLD, signal.SIGPIPE, signal.SIGINT, signal.SIGXFSZ):
+            signal.signal(sig, signal.SIG_DFL)
+        signal.set_wakeup_fd(-1)
+        
+        stdin_fd = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(stdin_fd, 0)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        os.closerange(3, resource.getrlimit(resource.RLIMIT_NOFILE)[0])
+        sys.stdout = open(1, "w", encoding="utf-8", errors="replace", closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", errors="replace", closefd=False)
+        
+        os.chdir("/")
+        apply_limits(request)
+        drop_privileges(libc, uid, gid)
+        # Runs must not outlive the zygote; set after the credential change, which clears it
+        libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0)
+        if os.getppid() != zygote_pid:
+            os._exit(EXIT_SETUP_FAILED)
+        
+        # Every child would otherwise replay the zygote's random sequence
+        if "random" in sys.modules:
+            sys.modules["random"].seed()
+        
+        namespace = {"__name__": "__main__", "__builtins__": builtins}
+        try:
+            exec(compile(request["code"], "<submission>", "exec"), namespace)
+            status = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                status = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                status = 1
+        except BaseException:
+            # Report the traceback from the submission's frame onwards
+            error_type, error, tb = sys.exc_info()
+            traceback.print_exception(error_type, error, tb.tb_next)
+            status = 1
+    except BaseException:
+        try:
+            traceback.print_exc()
+        except BaseException:
+            pass
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except BaseException:
+            pass
+        os._exit(status)
+
+
+class Zygote:
+    def __init__(self, socket_path: str, uid: int, gid: int):
+        self.uid, self.gid = uid, gid
+        
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(socket_path)
+        os.chmod(socket_path, 0o600)
+        self.listener.listen(128)
+        
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ, "accept")
+        self.selector.register(sys.stdin.fileno(), selectors.EVENT_READ, "parent")
+        
+        wakeup_read, wakeup_write = os.pipe()
+        os.set_blocking(wakeup_write, False)
+        signal.set_wakeup_fd(wakeup_write)
+        signal.signal(signal.SIGTERM, lambda *_: None)
+        self.selector.register(wakeup_read, selectors.EVENT_READ, "signal")
+        self.wakeup_read = wakeup_read
+        
+        self.pid = os.getpid()
+        self.runs = {}
+        self.draining = False
+    
+    def serve(self) -> None:
+        while not (self.draining and not self.runs):
+            deadlines = [run.deadline for run in self.runs.values() if not run.timed_out]
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            for key, _ in self.selector.select(timeout):
+                kind = key.data
+                if kind == "accept":
+                    self.accept()
+                elif kind == "parent":
+                    if not os.read(key.fd, 4096):
+                        self.kill_all()
+                        return
+                elif kind == "signal":
+                    os.read(self.wakeup_read, 4096)
+                    self.drain()
+                elif kind[1].pid not in self.runs:
+                    continue  # Finished earlier in this batch of events
+                elif kind[0] == "exit":
+                    self.finish(kind[1])
+                elif kind[0] == "conn":
+                    self.check_connection(kind[1])
+                else:
+                    self.forward(kind[1], kind[0])
+            
+            now = time.monotonic()
+            for run in list(self.runs.values()):
+                if not run.timed_out and now >= run.deadline:
+                    run.timed_out = True
+                    run.kill()
+    
+    def accept(self) -> None:
+        conn, _ = self.listener.accept()
+        try:
+            request = read_request(conn)
+        except (OSError, ValueError) as e:
+            send(conn, {"error": f"Bad request: {e}"})
+            conn.close()
+            return
+        
+        if request.get("stream"):
+            stdout_fd, child_stdout = os.pipe()
+            stderr_fd, child_stderr = os.pipe()
+        else:
+            stdout_fd = child_stdout = os.memfd_create("stdout")
+            stderr_fd = child_stderr = os.memfd_create("stderr")
+        try:
+            pid = os.fork()
+        except OSError as e:
+            for fd in {stdout_fd, child_stdout, stderr_fd, child_stderr}:
+                os.close(fd)
+            send(conn, {"error": f"Fork failed: {e}"})
+            conn.close()
+            return
+        if pid == 0:
+            run_child(request, child_stdout, child_stderr, self.uid, self.gid, self.pid)
+        
+        run = Run(pid, conn, request, stdout_fd, stderr_fd)
+        self.runs[pid] = run
+        send(conn, {"pid": pid})
+        conn.setblocking(False)
+        self.selector.register(run.pidfd, selectors.EVENT_READ, ("exit", run))
+        self.selector.register(conn, selectors.EVENT_READ, ("conn", run))
+        for name, fd in run.pipes.items():
+            os.close(child_stdout if name == "stdout" else child_stderr)
+            os.set_blocking(fd, False)
+            self.selector.register(fd, selectors.EVENT_READ, (name, run))
+    
+    def check_connection(self, run: Run) -> None:
+        try:
+            data = run.conn.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            # The server closed the connection: the run was cancelled
+            run.cancelled = True
+            self.selector.unregister(run.conn)
+            run.kill()
+    
+    def forward(self, run: Run, name: str) -> bool:
+        """Send what a streamed run wrote to one pipe; False once nothing is left to read"""
+        fd = run.pipes.get(name)
+        if fd is None:
+            return False
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return False
+        if not data:
+            self.close_pipe(run, name)
+            return False
+        
+        room = run.max_output - run.streamed
+        run.streamed += len(data)
+        if len(data) > room:
+            data = data[:max(0, room)]
+            run.output_limited = True
+        text = run.decoders[name].decode(data, final=run.output_limited)
+        if text and not run.cancelled:
+            send(run.conn, {"stream": name, "data": text})
+            run.conn.setblocking(False)
+        if run.output_limited:
+            run.kill()
+            for pipe in list(run.pipes):
+                self.close_pipe(run, pipe)
+            return False
+        return True
+    
+    def close_pipe(self, run: Run, name: str) -> None:
+        fd = run.pipes.pop(name)
+        self.selector.unregister(fd)
+        os.close(fd)
+    
+    def finish(self, run: Run) -> None:
+        _, status, usage = os.wait4(run.pid, 0)
+        run.kill()  # Anything the submission left behind in its session
+        elapsed = time.monotonic() - run.started_at
+        exit_code = os.waitstatus_to_exitcode(status)
+        
+        for name in list(run.pipes):
+            while self.forward(run, name):
+                pass  # What the run wrote just before it exited
+            if name in run.pipes:
+                self.close_pipe(run, name)
+        
+        if not run.cancelled:
+            send(run.conn, {
+                "exit_code": exit_code,
+                "signal": -exit_code if exit_code < 0 else None,
+                "timed_out": run.timed_out,
+                "output_limited": run.output_limited,
+                "stdout": "" if run.stream else read_output(run.stdout_fd, run.max_output),
+                "stderr": "" if run.stream else read_output(run.stderr_fd, run.max_output),
+                "wall_ms": int(elapsed * 1000),
+                "cpu_user_ms": int(usage.ru_utime * 1000),
+                "cpu_system_ms": int(usage.ru_stime * 1000),
+                "max_rss_kb": usage.ru_maxrss,
+            })
+        
+        self.selector.unregister(run.pidfd)
+        if not run.cancelled:
+            self.selector.unregister(run.conn)
+        os.close(run.pidfd)
+        if not run.stream:
+            for fd in (run.stdout_fd, run.stderr_fd):
+                os.close(fd)
+        run.conn.close()
+        del self.runs[run.pid]
+    
+    def drain(self) -> None:
+        if not self.draining:
+            self.draining = True
+            self.selector.unregister(self.listener)
+            self.listener.close()
+    
+    def kill_all(self) -> None:
+        for run in self.runs.values():
+            run.kill()
+
+
+def main() -> None:
+    socket_path, user, modules = sys.argv[1], sys.argv[2], sys.argv[3:]
+    for name in modules:
+        try:
+            __import__(name)
+        except Exception as e:
+            print(f"zygote: could not preload {name}: {e}", file=sys.stderr)
+    
+    try:
+        uid, gid = isolate(user)
+    except OSError as e:
+        sys.stdout.write(f"error: {e}\n")
+        sys.stdout.flush()
+        sys.exit(EXIT_SETUP_FAILED)
+    
+    zygote = Zygote(socket_path, uid, gid)
+    sys.stdout.write("ready\n")
+    sys.stdout.flush()
+    zygote.serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -87,6 +87,7 @@ CREATE TABLE code_exercises (
     difficulty INTEGER CHECK (difficulty BETWEEN 1 AND 5),
     order_index INTEGER NOT NULL,
     hints TEXT, -- JSON array of hints
+    cache_results BOOLEAN DEFAULT TRUE, -- FALSE for time- or random-dependent tests
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (lesson_id) REFERENCES lessons(id) ON DELETE CASCADE
@@ -206,11 +207,46 @@ CREATE TABLE code_submissions (
     passed BOOLEAN DEFAULT FALSE,
     execution_time_ms INTEGER,
     memory_used_kb INTEGER,
+    cpu_user_ms INTEGER, -- measured from the run's cgroup; NULL when not measured
+    cpu_system_ms INTEGER,
+    memory_peak_kb INTEGER,
+    cpu_throttled_count INTEGER,
+    cpu_throttled_ms INTEGER,
     submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (exercise_id) REFERENCES code_exercises(id) ON DELETE CASCADE
 );
 
+-- Bulk regrade checkpoints
+CREATE TABLE regrade_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    exercise_id INTEGER NOT NULL,
+    status VARCHAR(20) DEFAULT 'running' CHECK (status IN ('running', 'completed', 'failed')),
+    last_submission_id INTEGER DEFAULT 0, -- submissions up to this id are written
+    max_submission_id INTEGER, -- last submission when the run started; later ones are not part of it
+    total INTEGER DEFAULT 0,
+    processed INTEGER DEFAULT 0,
+    changed INTEGER DEFAULT 0, -- submissions whose passed verdict flipped
+    errors INTEGER DEFAULT 0,
+    failed INTEGER DEFAULT 0, -- submissions the harness could not grade; retried on resume
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    FOREIGN KEY (exercise_id) REFERENCES code_exercises(id) ON DELETE CASCADE
+);
+
+-- Outcome of each submission in a bulk regrade
+CREATE TABLE regrade_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL,
+    submission_id INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL CHECK (status IN ('done', 'failed')),
+    error TEXT,
+    FOREIGN KEY (run_id) REFERENCES regrade_runs(id) ON DELETE CASCADE,
+    FOREIGN KEY (submission_id) REFERENCES code_submissions(id) ON DELETE CASCADE,
+    UNIQUE(run_id, submission_id)
+);
+
 -- User achievements/badges
 CREATE TABLE achievements (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -245,6 +281,9 @@ CREATE INDEX idx_enrollments_course ON enrollments(course_id);
 CREATE INDEX idx_lesson_progress_user ON lesson_progress(user_id);
 CREATE INDEX idx_quiz_attempts_user ON quiz_attempts(user_id);
 CREATE INDEX idx_code_submissions_user ON code_submissions(user_id);
+CREATE INDEX idx_code_submissions_exercise ON code_submissions(exercise_id, id);
+CREATE INDEX idx_regrade_runs_exercise ON regrade_runs(exercise_id, status);
+CREATE INDEX idx_regrade_items_run ON regrade_items(run_id, status);
 
 -- Create triggers for updated_at timestamps
 CREATE TRIGGER update_users_timestamp 
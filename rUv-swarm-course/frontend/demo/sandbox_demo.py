@@ -14,6 +14,7 @@ Generated for rUv-swarm-course security validation
 import os
 import sys
 import json
+import subprocess
 import time
 import hashlib
 from pathlib import Path
@@ -21,7 +22,8 @@ from typing import Dict, List, Tuple
 from datetime import datetime
 
 # Add the backend services path to sys.path
-sys.path.append('/workspaces/sparc-evolution/rUv-swarm-course/ruv-swarm-platform/backend/services')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'ruv-swarm-platform', 'backend', 'services'))
 
 try:
     from code_executor import CodeExecutor
@@ -41,6 +43,185 @@ class Colors:
     BOLD = '\033[1m'
     NC = '\033[0m'  # No Color
 
+
+# Attacks the validation layer must block
+SECURITY_TESTS = [
+    {
+        "name": "System Call Injection",
+        "description": "Attempting to execute system commands",
+        "code": '''
+#include <stdio.h>
+#include <stdlib.h>
+
+int main() {
+    printf("Attempting system call...\\n");
+    system("whoami");  // This will be blocked
+    return 0;
+}
+        ''',
+        "expected_block": "system() calls"
+    },
+    {
+        "name": "Fork Bomb Protection",
+        "description": "Attempting to create processes",
+        "code": '''
+#include <stdio.h>
+#include <unistd.h>
+
+int main() {
+    printf("Attempting process creation...\\n");
+    if (fork() == 0) {  // This will be blocked
+        printf("Child process\\n");
+    }
+    return 0;
+}
+        ''',
+        "expected_block": "fork() calls and unistd.h header"
+    },
+    {
+        "name": "Inline Assembly Block",
+        "description": "Attempting to use inline assembly",
+        "code": '''
+#include <stdio.h>
+
+int main() {
+    printf("Attempting inline assembly...\\n");
+    __asm__("nop");  // This will be blocked
+    return 0;
+}
+        ''',
+        "expected_block": "inline assembly"
+    },
+    {
+        "name": "File System Access",
+        "description": "Attempting to access /proc filesystem",
+        "code": '''
+#include <stdio.h>
+
+int main() {
+    printf("Attempting /proc access...\\n");
+    FILE *fp = fopen("/proc/version", "r");  // This will be blocked
+    if (fp) {
+        printf("Accessed /proc\\n");
+        fclose(fp);
+    }
+    return 0;
+}
+        ''',
+        "expected_block": "/proc filesystem access"
+    },
+    {
+        "name": "Dynamic Library Loading",
+        "description": "Attempting to load dynamic libraries",
+        "code": '''
+#include <stdio.h>
+#include <dlfcn.h>
+
+int main() {
+    printf("Attempting dynamic loading...\\n");
+    void *handle = dlopen("libc.so.6", RTLD_LAZY);  // This will be blocked
+    if (handle) {
+        printf("Library loaded\\n");
+        dlclose(handle);
+    }
+    return 0;
+}
+        ''',
+        "expected_block": "dlfcn.h header and dlopen()"
+    },
+    {
+        "name": "Path Traversal Protection",
+        "description": "Attempting path traversal attack",
+        "code": '''
+#include <stdio.h>
+
+int main() {
+    printf("Attempting path traversal...\\n");
+    FILE *fp = fopen("../../../etc/passwd", "r");  // This will be blocked
+    if (fp) {
+        printf("Path traversal successful\\n");
+        fclose(fp);
+    }
+    return 0;
+}
+        ''',
+        "expected_block": "path traversal (../)"
+    }
+]
+
+
+# Programs that must run within the sandbox's resource limits
+MEMORY_TEST = '''
+#include <stdio.h>
+#include <stdlib.h>
+
+int main() {
+    printf("🧠 Memory Allocation Test\\n");
+    printf("========================\\n");
+    
+    // Test small allocation (should work)
+    printf("Allocating 1MB...\\n");
+    void *small_ptr = malloc(1024 * 1024);  // 1MB
+    if (small_ptr) {
+        printf("✅ 1MB allocation successful\\n");
+        free(small_ptr);
+    } else {
+        printf("❌ 1MB allocation failed\\n");
+    }
+    
+    // Test medium allocation (should work within 128MB limit)
+    printf("\\nAllocating 64MB...\\n");
+    void *medium_ptr = malloc(64 * 1024 * 1024);  // 64MB
+    if (medium_ptr) {
+        printf("✅ 64MB allocation successful\\n");
+        // Write some data to verify it's usable
+        char *test_ptr = (char*)medium_ptr;
+        test_ptr[0] = 'A';
+        test_ptr[64 * 1024 * 1024 - 1] = 'Z';
+        printf("✅ Memory is writable and accessible\\n");
+        free(medium_ptr);
+    } else {
+        printf("❌ 64MB allocation failed\\n");
+    }
+    
+    printf("\\n📊 Container Memory Limit: 128MB\\n");
+    printf("📝 Larger allocations would be rejected by container\\n");
+    
+    return 0;
+}
+'''
+
+CPU_TEST = '''
+#include <stdio.h>
+#include <time.h>
+
+int main() {
+    printf("⚡ CPU Computation Test\\n");
+    printf("======================\\n");
+    
+    clock_t start = clock();
+    
+    // Moderate computation (should complete)
+    printf("Performing calculation...\\n");
+    long long sum = 0;
+    for (long long i = 0; i < 10000000; i++) {
+        sum += i * i;
+    }
+    
+    clock_t end = clock();
+    double cpu_time = ((double)(end - start)) / CLOCKS_PER_SEC;
+    
+    printf("✅ Calculation completed\\n");
+    printf("   Sum: %lld\\n", sum);
+    printf("   CPU Time: %.3f seconds\\n", cpu_time);
+    printf("   CPU Limit: 50%% of one core\\n");
+    printf("   Execution Timeout: 10 seconds\\n");
+    
+    return 0;
+}
+'''
+
+
 def print_header(title: str, color: str = Colors.CYAN):
     """Print a formatted header"""
     print(f"\n{color}{Colors.BOLD}{'='*60}")
@@ -376,111 +557,7 @@ int main() {
         """Demonstrate security validation by showing blocked code"""
         print_header("Security Validation Demonstration", Colors.RED)
         
-        security_tests = [
-            {
-                "name": "System Call Injection",
-                "description": "Attempting to execute system commands",
-                "code": '''
-#include <stdio.h>
-#include <stdlib.h>
-
-int main() {
-    printf("Attempting system call...\\n");
-    system("whoami");  // This will be blocked
-    return 0;
-}
-                ''',
-                "expected_block": "system() calls"
-            },
-            {
-                "name": "Fork Bomb Protection",
-                "description": "Attempting to create processes",
-                "code": '''
-#include <stdio.h>
-#include <unistd.h>
-
-int main() {
-    printf("Attempting process creation...\\n");
-    if (fork() == 0) {  // This will be blocked
-        printf("Child process\\n");
-    }
-    return 0;
-}
-                ''',
-                "expected_block": "fork() calls and unistd.h header"
-            },
-            {
-                "name": "Inline Assembly Block",
-                "description": "Attempting to use inline assembly",
-                "code": '''
-#include <stdio.h>
-
-int main() {
-    printf("Attempting inline assembly...\\n");
-    __asm__("nop");  // This will be blocked
-    return 0;
-}
-                ''',
-                "expected_block": "inline assembly"
-            },
-            {
-                "name": "File System Access",
-                "description": "Attempting to access /proc filesystem",
-                "code": '''
-#include <stdio.h>
-
-int main() {
-    printf("Attempting /proc access...\\n");
-    FILE *fp = fopen("/proc/version", "r");  // This will be blocked
-    if (fp) {
-        printf("Accessed /proc\\n");
-        fclose(fp);
-    }
-    return 0;
-}
-                ''',
-                "expected_block": "/proc filesystem access"
-            },
-            {
-                "name": "Dynamic Library Loading",
-                "description": "Attempting to load dynamic libraries",
-                "code": '''
-#include <stdio.h>
-#include <dlfcn.h>
-
-int main() {
-    printf("Attempting dynamic loading...\\n");
-    void *handle = dlopen("libc.so.6", RTLD_LAZY);  // This will be blocked
-    if (handle) {
-        printf("Library loaded\\n");
-        dlclose(handle);
-    }
-    return 0;
-}
-                ''',
-                "expected_block": "dlfcn.h header and dlopen()"
-            },
-            {
-                "name": "Path Traversal Protection",
-                "description": "Attempting path traversal attack",
-                "code": '''
-#include <stdio.h>
-
-int main() {
-    printf("Attempting path traversal...\\n");
-    FILE *fp = fopen("../../../etc/passwd", "r");  // This will be blocked
-    if (fp) {
-        printf("Path traversal successful\\n");
-        fclose(fp);
-    }
-    return 0;
-}
-                ''',
-                "expected_block": "path traversal (../)"
-            }
-        ]
-        
-        for i, test in enumerate(security_tests, 1):
+        for i, test in enumerate(SECURITY_TESTS, 1):
             print_section(f"{i}. {test['name']}")
             print(f"{Colors.WHITE}Description: {test['description']}{Colors.NC}")
             print(f"{Colors.YELLOW}Expected Block: {test['expected_block']}{Colors.NC}")
@@ -498,79 +575,11 @@ int main() {
         print_header("Resource Limit Enforcement", Colors.YELLOW)
         
         print_section("1. Memory Allocation Test")
-        memory_test = '''
-#include <stdio.h>
-#include <stdlib.h>
-
-int main() {
-    printf("🧠 Memory Allocation Test\\n");
-    printf("========================\\n");
-    
-    // Test small allocation (should work)
-    printf("Allocating 1MB...\\n");
-    void *small_ptr = malloc(1024 * 1024);  // 1MB
-    if (small_ptr) {
-        printf("✅ 1MB allocation successful\\n");
-        free(small_ptr);
-    } else {
-        printf("❌ 1MB allocation failed\\n");
-    }
-    
-    // Test medium allocation (should work within 128MB limit)
-    printf("\\nAllocating 64MB...\\n");
-    void *medium_ptr = malloc(64 * 1024 * 1024);  // 64MB
-    if (medium_ptr) {
-        printf("✅ 64MB allocation successful\\n");
-        // Write some data to verify it's usable
-        char *test_ptr = (char*)medium_ptr;
-        test_ptr[0] = 'A';
-        test_ptr[64 * 1024 * 1024 - 1] = 'Z';
-        printf("✅ Memory is writable and accessible\\n");
-        free(medium_ptr);
-    } else {
-        printf("❌ 64MB allocation failed\\n");
-    }
-    
-    printf("\\n📊 Container Memory Limit: 128MB\\n");
-    printf("📝 Larger allocations would be rejected by container\\n");
-    
-    return 0;
-}
-        '''
-        result = execute_and_display(self.executor, memory_test, "Memory Allocation Test")
+        result = execute_and_display(self.executor, MEMORY_TEST, "Memory Allocation Test")
         self.log_result("resources", "memory_test", result)
         
         print_section("2. CPU Computation Test")
-        cpu_test = '''
-#include <stdio.h>
-#include <time.h>
-
-int main() {
-    printf("⚡ CPU Computation Test\\n");
-    printf("======================\\n");
-    
-    clock_t start = clock();
-    
-    // Moderate computation (should complete)
-    printf("Performing calculation...\\n");
-    long long sum = 0;
-    for (long long i = 0; i < 10000000; i++) {
-        sum += i * i;
-    }
-    
-    clock_t end = clock();
-    double cpu_time = ((double)(end - start)) / CLOCKS_PER_SEC;
-    
-    printf("✅ Calculation completed\\n");
-    printf("   Sum: %lld\\n", sum);
-    printf("   CPU Time: %.3f seconds\\n", cpu_time);
-    printf("   CPU Limit: 50%% of one core\\n");
-    printf("   Execution Timeout: 10 seconds\\n");
-    
-    return 0;
-}
-        '''
-        result = execute_and_display(self.executor, cpu_test, "CPU Computation Test")
+        result = execute_and_display(self.executor, CPU_TEST, "CPU Computation Test")
         self.log_result("resources", "cpu_test", result)
         
         print_section("3. Timeout Demonstration")
@@ -879,30 +888,37 @@ def main():
     print(f"{Colors.WHITE}Generated by: Claude Code (Security Analyst){Colors.NC}")
     print(f"{Colors.WHITE}Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{Colors.NC}")
     
-    # Check if Docker is available
-    try:
-        import subprocess
-        result = subprocess.run(['docker', '--version'], capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"{Colors.RED}❌ Docker is not available. Please install Docker to run this demonstration.{Colors.NC}")
-            return
-    except FileNotFoundError:
-        print(f"{Colors.RED}❌ Docker is not installed. Please install Docker to run this demonstration.{Colors.NC}")
-        return
+    demo = SandboxDemo()
+    backend = demo.executor.backend
+    print(f"{Colors.WHITE}Sandbox backend: {backend.name}{Colors.NC}")
     
-    # Check if sandbox image exists
-    try:
-        result = subprocess.run(['docker', 'image', 'inspect', 'ruv-sandbox:latest'], 
-                              capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"{Colors.RED}❌ Sandbox Docker image not found. Please build it first with:{Colors.NC}")
-            print(f"{Colors.YELLOW}cd /workspaces/sparc-evolution/rUv-swarm-course/ruv-swarm-platform/docker/sandbox && ./build.sh{Colors.NC}")
+    if backend.name != 'docker':
+        # SANDBOX_BACKEND=namespace needs neither Docker nor the sandbox image
+        if not backend.available():
+            print(f"{Colors.RED}❌ The {backend.name} sandbox is not available on this host.{Colors.NC}")
+            return
+    else:
+        # Check if Docker is available
+        try:
+            result = subprocess.run(['docker', '--version'], capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"{Colors.RED}❌ Docker is not available. Please install Docker to run this demonstration.{Colors.NC}")
+                return
+        except FileNotFoundError:
+            print(f"{Colors.RED}❌ Docker is not installed. Please install Docker to run this demonstration.{Colors.NC}")
+            return
+        
+        # Check if sandbox image exists
+        try:
+            result = subprocess.run(['docker', 'image', 'inspect', 'ruv-sandbox:latest'], 
+                                  capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"{Colors.RED}❌ Sandbox Docker image not found. Please build it first with:{Colors.NC}")
+                print(f"{Colors.YELLOW}cd /workspaces/sparc-evolution/rUv-swarm-course/ruv-swarm-platform/docker/sandbox && ./build.sh{Colors.NC}")
+                return
+        except:
+            print(f"{Colors.RED}❌ Unable to check Docker image. Please ensure Docker is running.{Colors.NC}")
             return
-    except:
-        print(f"{Colors.RED}❌ Unable to check Docker image. Please ensure Docker is running.{Colors.NC}")
-        return
-    
-    demo = SandboxDemo()
     
     try:
         # Run all demonstrations
@@ -10,12 +10,14 @@ security patterns are correctly identified and blocked.
 Security Analyst: Claude Code
 """
 
+import os
 import sys
 import re
 from datetime import datetime
 
 # Add the backend services path
-sys.path.append('/workspaces/sparc-evolution/rUv-swarm-course/ruv-swarm-platform/backend/services')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'ruv-swarm-platform', 'backend', 'services'))
 
 try:
     from code_executor import CodeExecutor
@@ -34,112 +36,112 @@ class Colors:
     BOLD = '\033[1m'
     NC = '\033[0m'
 
-def test_security_validation():
-    """Test security validation patterns directly"""
-    print(f"{Colors.CYAN}{Colors.BOLD}{'='*60}")
-    print(f"  Security Validation Pattern Testing")
-    print(f"{'='*60}{Colors.NC}\n")
-    
-    executor = CodeExecutor()
-    
-    # Security test cases
-    security_tests = [
-        {
-            "name": "System Call Injection",
-            "code": '''
+# Attacks the validation layer must block
+SECURITY_TESTS = [
+    {
+        "name": "System Call Injection",
+        "code": '''
 #include <stdio.h>
 #include <stdlib.h>
 int main() {
     system("whoami");
     return 0;
 }
-            ''',
-            "expected_pattern": "system\\s*\\("
-        },
-        {
-            "name": "Process Fork Attack",
-            "code": '''
+        ''',
+        "expected_pattern": "system\\s*\\("
+    },
+    {
+        "name": "Process Fork Attack",
+        "code": '''
 #include <stdio.h>
 #include <unistd.h>
 int main() {
     fork();
     return 0;
 }
-            ''',
-            "expected_pattern": "fork\\s*\\("
-        },
-        {
-            "name": "Inline Assembly",
-            "code": '''
+        ''',
+        "expected_pattern": "fork\\s*\\("
+    },
+    {
+        "name": "Inline Assembly",
+        "code": '''
 #include <stdio.h>
 int main() {
     __asm__("nop");
     return 0;
 }
-            ''',
-            "expected_pattern": "__asm__"
-        },
-        {
-            "name": "Dangerous Header",
-            "code": '''
+        ''',
+        "expected_pattern": "__asm__"
+    },
+    {
+        "name": "Dangerous Header",
+        "code": '''
 #include <stdio.h>
 #include <unistd.h>
 int main() {
     return 0;
 }
-            ''',
-            "expected_pattern": "#include\\s*<\\s*(unistd|sys\\/socket|netinet|arpa|sys\\/ptrace|dlfcn)\\.h\\s*>"
-        },
-        {
-            "name": "File System Access",
-            "code": '''
+        ''',
+        "expected_pattern": "#include\\s*<\\s*(unistd|sys\\/socket|netinet|arpa|sys\\/ptrace|dlfcn)\\.h\\s*>"
+    },
+    {
+        "name": "File System Access",
+        "code": '''
 #include <stdio.h>
 int main() {
     FILE *fp = fopen("/proc/version", "r");
     return 0;
 }
-            ''',
-            "expected_pattern": "fopen\\s*\\([^)]*[\"']\\/proc"
-        },
-        {
-            "name": "Path Traversal",
-            "code": '''
+        ''',
+        "expected_pattern": "fopen\\s*\\([^)]*[\"']\\/proc"
+    },
+    {
+        "name": "Path Traversal",
+        "code": '''
 #include <stdio.h>
 int main() {
     FILE *fp = fopen("../../../etc/passwd", "r");
     return 0;
 }
-            ''',
-            "expected_pattern": "\\.\\.\/"
-        },
-        {
-            "name": "Memory Mapping",
-            "code": '''
+        ''',
+        "expected_pattern": "\\.\\.\/"
+    },
+    {
+        "name": "Memory Mapping",
+        "code": '''
 #include <stdio.h>
 int main() {
     mmap(NULL, 4096, PROT_READ, MAP_PRIVATE, -1, 0);
     return 0;
 }
-            ''',
-            "expected_pattern": "mmap\\s*\\("
-        },
-        {
-            "name": "Dynamic Loading",
-            "code": '''
+        ''',
+        "expected_pattern": "mmap\\s*\\("
+    },
+    {
+        "name": "Dynamic Loading",
+        "code": '''
 #include <stdio.h>
 #include <dlfcn.h>
 int main() {
     dlopen("libc.so", RTLD_LAZY);
     return 0;
 }
-            ''',
-            "expected_pattern": "dlopen\\s*\\("
-        }
-    ]
+        ''',
+        "expected_pattern": "dlopen\\s*\\("
+    }
+]
+
+def test_security_validation():
+    """Test security validation patterns directly"""
+    print(f"{Colors.CYAN}{Colors.BOLD}{'='*60}")
+    print(f"  Security Validation Pattern Testing")
+    print(f"{'='*60}{Colors.NC}\n")
+    
+    executor = CodeExecutor()
     
     # Test each security pattern
     blocked_count = 0
-    for i, test in enumerate(security_tests, 1):
+    for i, test in enumerate(SECURITY_TESTS, 1):
         print(f"{Colors.YELLOW}{Colors.BOLD}🔍 Test {i}: {test['name']}{Colors.NC}")
         print(f"{Colors.BLUE}Expected Pattern: {test['expected_pattern']}{Colors.NC}")
         
@@ -189,9 +191,9 @@ int main() {
     print(f"{'='*60}{Colors.NC}")
     
     print(f"\n{Colors.BOLD}📊 Test Results:{Colors.NC}")
-    print(f"   Total Security Tests: {len(security_tests)}")
-    print(f"   Threats Blocked: {Colors.GREEN}{blocked_count}/{len(security_tests)}{Colors.NC}")
-    print(f"   Block Rate: {Colors.GREEN}{(blocked_count/len(security_tests)*100):.1f}%{Colors.NC}")
+    print(f"   Total Security Tests: {len(SECURITY_TESTS)}")
+    print(f"   Threats Blocked: {Colors.GREEN}{blocked_count}/{len(SECURITY_TESTS)}{Colors.NC}")
+    print(f"   Block Rate: {Colors.GREEN}{(blocked_count/len(SECURITY_TESTS)*100):.1f}%{Colors.NC}")
     
     print(f"\n{Colors.BOLD}🛡️  Security Patterns Active:{Colors.NC}")
     for i, pattern in enumerate(executor.FORBIDDEN_PATTERNS, 1):
@@ -209,7 +211,7 @@ int main() {
     print(f"   Memory Limit: {executor.MAX_MEMORY}")
     print(f"   CPU Limit: {executor.MAX_CPU}")
     
-    if blocked_count == len(security_tests):
+    if blocked_count == len(SECURITY_TESTS):
         print(f"\n{Colors.GREEN}{Colors.BOLD}✅ ALL SECURITY TESTS PASSED!{Colors.NC}")
         print(f"{Colors.GREEN}The sandbox security validation is working correctly.{Colors.NC}")
     else:
@@ -257,6 +259,19 @@ def test_docker_availability():
         
     return False
 
+def test_sandbox_availability():
+    """Test if the configured sandbox backend (SANDBOX_BACKEND) can run programs"""
+    backend = CodeExecutor().backend
+    if backend.name == 'docker':
+        return test_docker_availability()
+    
+    print(f"{Colors.CYAN}{Colors.BOLD}🧱 {backend.name.capitalize()} Sandbox Availability Test{Colors.NC}")
+    if backend.available():
+        print(f"{Colors.GREEN}✅ The {backend.name} sandbox runs programs on this host{Colors.NC}")
+        return True
+    print(f"{Colors.RED}❌ The {backend.name} sandbox is not available on this host{Colors.NC}")
+    return False
+
 def main():
     """Main test function"""
     print(f"{Colors.BOLD}rUv-Swarm Security Validation Test Suite{Colors.NC}")
@@ -268,8 +283,8 @@ def main():
     
     print(f"\n{Colors.CYAN}{'='*60}{Colors.NC}")
     
-    # Test Docker availability
-    docker_available = test_docker_availability()
+    # Test sandbox availability
+    sandbox_available = test_sandbox_availability()
     
     print(f"\n{Colors.BOLD}🎯 Overall Assessment:{Colors.NC}")
     print(f"   Security Validation: {Colors.GREEN}WORKING{Colors.NC}")
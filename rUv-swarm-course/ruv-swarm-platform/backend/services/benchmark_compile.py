@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Compile-time benchmark for precompiled header preludes
+Compiles an exercise with the sandbox gcc command line, first without and
+then with the precompiled prelude, and reports wall-clock timings.
+
+Usage:
+    python3 benchmark_compile.py [source.c] [--runs N]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from code_executor import CodeExecutor
+from precompiled_headers import PrecompiledHeaders
+
+DEFAULT_SOURCE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '..', 'frontend', 'demo', 'sample_exercises.c'
+)
+
+
+def time_compiles(executor: CodeExecutor, code: str, source_file: str, output_file: str,
+                  extra_flags, runs: int):
+    cmd = executor._build_compile_command(source_file, output_file, extra_flags)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            sys.exit(f"Compilation failed:\n{result.stderr}")
+    return timings
+
+
+def report(label: str, timings):
+    print(f"{label:<16} median {statistics.median(timings) * 1000:8.1f} ms   "
+          f"min {min(timings) * 1000:8.1f} ms   max {max(timings) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source', nargs='?', default=DEFAULT_SOURCE)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.source) as f:
+        code = f.read()
+
+    work_dir = tempfile.mkdtemp(prefix='compile_bench_')
+    try:
+        executor = CodeExecutor()
+        pch = PrecompiledHeaders(build_dir=os.path.join(work_dir, 'pch'))
+        source_file = os.path.join(work_dir, 'program.c')
+        output_file = os.path.join(work_dir, 'program')
+        with open(source_file, 'w') as f:
+            f.write(code)
+
+        print(f"Source: {os.path.normpath(args.source)}")
+        print(f"Prelude: {pch.prelude_for(code)}")
+
+        baseline = time_compiles(executor, code, source_file, output_file, [], args.runs)
+
+        start = time.perf_counter()
+        pch_flags = pch.flags_for(code, executor.COMPILATION_FLAGS)
+        build_time = time.perf_counter() - start
+        if not pch_flags:
+            sys.exit("Source cannot use a precompiled prelude")
+
+        with_pch = time_compiles(executor, code, source_file, output_file, pch_flags, args.runs)
+
+        report('without PCH', baseline)
+        report('with PCH', with_pch)
+        print(f"One-time prelude build: {build_time * 1000:.1f} ms")
+        print(f"Speedup: {statistics.median(baseline) / statistics.median(with_pch):.2f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the code executor
+Drives CodeExecutor.execute_code_async with a fixed corpus (the demo
+exercises, the blocked security examples and the sandbox_demo.py snippets)
+at several concurrency levels, and reports throughput plus p50/p95/p99 of
+every execution stage. Results can be saved as a JSON baseline and later
+runs compared against it; the comparison exits non-zero on a regression.
+
+Usage:
+    python3 benchmark_executor.py [--concurrency 1,4,8] [--runs N]
+                                  [--save-baseline FILE] [--compare FILE]
+                                  [--workspace-pool] [--compile-cache DIR]
+                                  [--exclude NAME]
+
+The sandbox backend is chosen by SANDBOX_BACKEND, as for the API.
+"""
+
+import argparse
+import ast
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from code_executor import CodeExecutor
+from execution_scheduler import percentile
+
+DEMO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'frontend', 'demo')
+CORPUS_FILES = ('sample_exercises.c', 'security_examples.c')
+SNIPPET_SOURCE = 'sandbox_demo.py'
+QUANTILES = (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+
+
+def demo_snippets(path: str) -> List[Tuple[str, str]]:
+    """C programs embedded in a demo script, found by parsing it rather than running it.
+
+    A snippet is named after the variable it is assigned to, or the "name"
+    of the dict holding it as "code".
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    def is_program(node) -> bool:
+        return (isinstance(node, ast.Constant) and isinstance(node.value, str)
+                and '#include' in node.value and 'main(' in node.value)
+
+    snippets = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and is_program(node.value):
+            target = node.targets[0]
+            name = target.id if isinstance(target, ast.Name) else f"line{node.lineno}"
+            snippets.append((node.lineno, name, node.value.value))
+        elif isinstance(node, ast.Dict):
+            fields = {key.value: value for key, value in zip(node.keys, node.values)
+                      if isinstance(key, ast.Constant)}
+            code, name = fields.get('code'), fields.get('name')
+            if code is not None and is_program(code):
+                label = name.value if isinstance(name, ast.Constant) else f"line{code.lineno}"
+                snippets.append((code.lineno, label, code.value))
+    return [(name, code) for _, name, code in sorted(snippets)]
+
+
+def load_corpus(demo_dir: str = DEMO_DIR) -> List[Tuple[str, str]]:
+    """(name, source) pairs of the benchmark corpus, in a fixed order"""
+    corpus = []
+    for filename in CORPUS_FILES:
+        with open(os.path.join(demo_dir, filename)) as f:
+            corpus.append((filename, f.read()))
+    for name, code in demo_snippets(os.path.join(demo_dir, SNIPPET_SOURCE)):
+        corpus.append((f"{SNIPPET_SOURCE}:{name}", code))
+    return corpus
+
+
+def corpus_digest(corpus: List[Tuple[str, str]]) -> str:
+    digest = hashlib.sha256()
+    for name, code in corpus:
+        digest.update(name.encode() + b'\0' + code.encode() + b'\0')
+    return digest.hexdigest()[:16]
+
+
+async def run_level(executor: CodeExecutor, corpus: List[Tuple[str, str]],
+                    concurrency: int, runs: int) -> Dict[str, any]:
+    """Run `runs` executions, `concurrency` at a time, cycling through the corpus"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(code: str) -> Dict[str, any]:
+        async with semaphore:
+            return await executor.execute_code_async(code, debug=True)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_one(corpus[i % len(corpus)][1]) for i in range(runs)))
+    elapsed = time.perf_counter() - start
+    return summarize(results, elapsed)
+
+
+def summarize(results: List[Dict[str, any]], elapsed: float) -> Dict[str, any]:
+    """Throughput, outcomes and stage percentiles of one concurrency level"""
+    samples: Dict[str, List[float]] = {}
+    outcomes: Dict[str, int] = {}
+    for result in results:
+        outcome = result['stage'] if not result['success'] else 'success'
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        for stage, ms in result['debug']['stages_ms'].items():
+            samples.setdefault(stage, []).append(ms)
+        samples.setdefault('total', []).append(result['debug']['total_ms'])
+
+    stages = {}
+    for stage, values in samples.items():
+        ordered = sorted(values)
+        stages[stage] = {label: round(percentile(ordered, q), 3) for label, q in QUANTILES}
+        stages[stage]['mean'] = round(statistics.fmean(ordered), 3)
+        stages[stage]['count'] = len(ordered)
+    return {
+        'runs': len(results),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_per_s': round(len(results) / elapsed, 2) if elapsed > 0 else 0.0,
+        'outcomes': dict(sorted(outcomes.items())),
+        'stages': stages,
+    }
+
+
+def compare(baseline: Dict[str, any], current: Dict[str, any], threshold: float) -> List[str]:
+    """Regressions of `current` against `baseline`, as printable lines.
+
+    Throughput that drops, or a stage percentile that grows, by more than
+    `threshold` (a fraction) counts as a regression. Differences under a
+    millisecond are ignored, as they are timer noise for the cheap stages.
+    """
+    regressions = []
+    for level, now in current['levels'].items():
+        before = baseline['levels'].get(level)
+        if before is None:
+            continue
+        if now['throughput_per_s'] < before['throughput_per_s'] * (1 - threshold):
+            regressions.append(f"c={level} throughput {before['throughput_per_s']} -> "
+                               f"{now['throughput_per_s']} runs/s")
+        for stage, figures in now['stages'].items():
+            old = before['stages'].get(stage)
+            if old is None:
+                continue
+            for label, _ in QUANTILES:
+                if figures[label] > old[label] * (1 + threshold) and figures[label] - old[label] >= 1.0:
+                    regressions.append(f"c={level} {stage} {label} {old[label]} -> {figures[label]} ms")
+    return regressions
+
+
+def print_level(level: int, summary: Dict[str, any], baseline: Optional[Dict[str, any]]):
+    previous = (baseline or {}).get('levels', {}).get(str(level))
+    change = ''
+    if previous:
+        change = f"  (baseline {previous['throughput_per_s']:.1f})"
+    print(f"\nconcurrency {level}: {summary['runs']} runs in {summary['elapsed_s']:.2f} s, "
+          f"{summary['throughput_per_s']:.1f} runs/s{change}")
+    print(f"  outcomes: {', '.join(f'{k}={v}' for k, v in summary['outcomes'].items())}")
+    print(f"  {'stage':<12} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for stage, figures in summary['stages'].items():
+        print(f"  {stage:<12} {figures['p50']:>10.2f} {figures['p95']:>10.2f} {figures['p99']:>10.2f}")
+
+
+def build_executor(args) -> CodeExecutor:
+    options = {}
+    if args.workspace_pool:
+        from workspace_pool import WorkspacePool
+        options['workspace_pool'] = WorkspacePool()
+    if args.compile_cache:
+        from compile_cache import CompilationCache
+        options['compile_cache'] = CompilationCache(cache_dir=args.compile_cache)
+    return CodeExecutor(**options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', default='1,4,8',
+                        help='comma-separated concurrency levels')
+    parser.add_argument('--runs', type=int, default=100, help='executions per level')
+    parser.add_argument('--save-baseline', metavar='FILE', help='write the results as a baseline')
+    parser.add_argument('--compare', metavar='FILE', help='compare the results with a baseline')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative change counted as a regression (default 0.10)')
+    parser.add_argument('--workspace-pool', action='store_true', help='run with a WorkspacePool')
+    parser.add_argument('--compile-cache', metavar='DIR', help='run with a CompilationCache in DIR')
+    parser.add_argument('--exclude', metavar='NAME', action='append', default=[],
+                        help='leave out corpus programs whose name contains NAME')
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    corpus = [(name, code) for name, code in load_corpus()
+              if not any(excluded in name for excluded in args.exclude)]
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('corpus_digest') != corpus_digest(corpus):
+            print("warning: the corpus has changed since the baseline was recorded")
+
+    executor = build_executor(args)
+    print(f"Corpus: {len(corpus)} programs ({corpus_digest(corpus)}), backend {executor.backend.name}")
+
+    results = {
+        'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': {'platform': platform.platform(), 'cpus': os.cpu_count(),
+                 'python': platform.python_version()},
+        'backend': executor.backend.name,
+        'options': {'workspace_pool': args.workspace_pool, 'compile_cache': bool(args.compile_cache)},
+        'corpus_digest': corpus_digest(corpus),
+        'corpus': [name for name, _ in corpus],
+        'levels': {},
+    }
+    try:
+        # One untimed pass warms the toolchain and any caches
+        asyncio.run(run_level(executor, corpus, levels[0], len(corpus)))
+        for level in levels:
+            summary = asyncio.run(run_level(executor, corpus, level, args.runs))
+            results['levels'][str(level)] = summary
+            print_level(level, summary, baseline)
+    finally:
+        if executor.workspace_pool is not None:
+            executor.workspace_pool.shutdown()
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Execution-time variance benchmark for pinned execution slots
+Runs the CPU computation test of sandbox_demo.py in one pool of slots while a
+second pool compiles and runs the rest of the benchmark corpus as background
+load. Both pools first share every CPU, then each is pinned to its own half,
+as two execution workers started with disjoint --cpus would be. Reports the
+mean, spread and coefficient of variation of the measured program's
+execution time in both setups.
+
+Usage:
+    python3 benchmark_pinning.py [--runs N] [--slots N] [--noise-slots N] [--cpus LIST]
+
+The sandbox backend is chosen by SANDBOX_BACKEND, as for the API.
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from benchmark_executor import load_corpus
+from code_executor import CodeExecutor
+from cpusets import available_cpus, format_cpu_list, parse_cpu_list, pin_current_thread, slot_cpus
+from execution_scheduler import percentile
+
+MEASURED_PROGRAM = 'cpu_test'
+
+
+def split_corpus(corpus: List[Tuple[str, str]]) -> Tuple[str, List[str]]:
+    """The measured program and the programs run as background load"""
+    measured = [code for name, code in corpus if name.endswith(f":{MEASURED_PROGRAM}")]
+    if not measured:
+        raise SystemExit(f"{MEASURED_PROGRAM} not found in the corpus")
+    return measured[0], [code for name, code in corpus if not name.endswith(f":{MEASURED_PROGRAM}")]
+
+
+def run_setup(executor: CodeExecutor, measured: str, noise: List[str], runs: int,
+              measured_cpus: List[frozenset], noise_cpus: List[frozenset],
+              slots: int, noise_slots: int) -> List[float]:
+    """Execution times of `runs` measured runs made while the noise pool is busy"""
+    stop = threading.Event()
+    lock = threading.Lock()
+    remaining = [runs]
+    times: List[float] = []
+
+    def noise_loop(slot: int):
+        if noise_cpus:
+            pin_current_thread(noise_cpus[slot])
+        i = slot
+        while not stop.is_set():
+            executor.execute_code(noise[i % len(noise)])
+            i += noise_slots
+
+    def measured_loop(slot: int):
+        if measured_cpus:
+            pin_current_thread(measured_cpus[slot])
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+            result = executor.execute_code(measured)
+            if result.get('success'):
+                with lock:
+                    times.append(result['execution_time'])
+
+    noise_threads = [threading.Thread(target=noise_loop, args=(i,), daemon=True) for i in range(noise_slots)]
+    measured_threads = [threading.Thread(target=measured_loop, args=(i,)) for i in range(slots)]
+    for thread in noise_threads + measured_threads:
+        thread.start()
+    for thread in measured_threads:
+        thread.join()
+    stop.set()
+    for thread in noise_threads:
+        thread.join()
+    return times
+
+
+def summarize(times: List[float]) -> Dict[str, float]:
+    """Spread of execution times, in milliseconds"""
+    if not times:
+        return {'runs': 0}
+    ordered = sorted(times)
+    mean = statistics.fmean(ordered)
+    stdev = statistics.stdev(ordered) if len(ordered) > 1 else 0.0
+    return {
+        'runs': len(ordered),
+        'mean_ms': round(mean * 1000, 2),
+        'stdev_ms': round(stdev * 1000, 2),
+        'cv': round(stdev / mean, 4) if mean else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=50, help='measured runs per setup')
+    parser.add_argument('--slots', type=int, default=2, help='slots of the measured pool')
+    parser.add_argument('--noise-slots', type=int, help='slots of the background pool (default twice the CPUs)')
+    parser.add_argument('--cpus', help='CPUs to use, split in half between the pools (default all)')
+    args = parser.parse_args()
+
+    cpus = parse_cpu_list(args.cpus) if args.cpus else available_cpus()
+    if len(cpus) < 2:
+        raise SystemExit("Pinning needs at least two CPUs to split between the pools")
+    half = len(cpus) // 2
+    noise_slots = args.noise_slots or 2 * len(cpus)
+    pinned: Dict[str, Optional[Tuple[List[int], List[int]]]] = {
+        'shared': None,
+        'pinned': (cpus[:half], cpus[half:]),
+    }
+
+    measured, noise = split_corpus(load_corpus())
+    executor = CodeExecutor()
+    print(f"Backend {executor.backend.name}; {args.slots} measured slot(s), {noise_slots} background "
+          f"slot(s) on CPUs {format_cpu_list(cpus)}")
+
+    results = {}
+    for setup, split in pinned.items():
+        measured_cpus = slot_cpus(split[0], args.slots) if split else []
+        noise_cpus = slot_cpus(split[1], noise_slots) if split else []
+        times = run_setup(executor, measured, noise, args.runs, measured_cpus, noise_cpus,
+                          args.slots, noise_slots)
+        results[setup] = summarize(times)
+        if split:
+            print(f"\n{setup}: measured on CPUs {format_cpu_list(split[0])}, "
+                  f"background on {format_cpu_list(split[1])}")
+        else:
+            print(f"\n{setup}: both pools on every CPU")
+        print("  " + ", ".join(f"{key}={value}" for key, value in results[setup].items()))
+
+    if not results['shared']['runs'] or not results['pinned']['runs']:
+        print(f"\n{MEASURED_PROGRAM} did not run successfully; is the sandbox backend available?")
+        sys.exit(1)
+    change = results['pinned']['cv'] / results['shared']['cv'] - 1 if results['shared']['cv'] else 0.0
+    print(f"\nCoefficient of variation {results['shared']['cv']:.4f} shared -> "
+          f"{results['pinned']['cv']:.4f} pinned ({change:+.0%})")
+
+
+if __name__ == '__main__':
+    main()
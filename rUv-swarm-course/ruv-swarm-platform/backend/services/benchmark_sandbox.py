@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the sandbox backends
+Runs a program that exits immediately through each available backend and
+reports the wall-clock time of a whole sandboxed run.
+
+Usage:
+    python3 benchmark_sandbox.py [--runs N] [--backend docker|namespace]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from sandbox_backend import BACKENDS, create_backend
+
+
+def time_runs(backend, work_dir: str, runs: int):
+    backend.prepare(work_dir)
+    timings = []
+    for i in range(runs):
+        cmd = backend.command(work_dir, f"bench{i}")
+        start = time.perf_counter()
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            sys.exit(f"{backend.name} run failed:\n{result.stderr}")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--backend', choices=sorted(BACKENDS), action='append')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='sandbox_bench_')
+    try:
+        source = os.path.join(work_dir, 'program.c')
+        with open(source, 'w') as f:
+            f.write("int main(void) { return 0; }\n")
+        subprocess.run(['gcc', '-O2', '-o', os.path.join(work_dir, 'program'), source], check=True)
+
+        for name in args.backend or sorted(BACKENDS):
+            backend = create_backend(name)
+            if not backend.available():
+                print(f"{name:<12} unavailable")
+                continue
+            timings = time_runs(backend, work_dir, args.runs)
+            print(f"{name:<12} median {statistics.median(timings) * 1000:8.2f} ms   "
+                  f"min {min(timings) * 1000:8.2f} ms   max {max(timings) * 1000:8.2f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
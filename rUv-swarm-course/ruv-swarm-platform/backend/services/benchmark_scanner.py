@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Adversarial benchmark for the single-pass security scanner
+Scans crafted inputs at 256KB, 512KB and 1MB (the submission size limit) and
+reports timings, the per-MB cost and the growth from one size to the next.
+Linear scaling shows up as a ~2x growth per doubling.
+
+Usage:
+    python3 benchmark_scanner.py [--runs N]
+"""
+
+import argparse
+import statistics
+import time
+
+from code_executor import CodeExecutor
+from security_scanner import RuleSet
+
+SIZES = [256 * 1024, 512 * 1024, 1024 * 1024]
+
+# Inputs that make the per-pattern regexes backtrack, or that hit the
+# trigger at every position
+ADVERSARIAL = {
+    'unclosed fopen(': 'fopen(',
+    'unclosed open(': 'open(',
+    'keyword spam': 'system exec fork popen mmap asm ',
+    'escaped quotes': '"\\',
+    'string literals': '"/tmp/a" ',
+    'include spam': '#include <stdio.h>\n',
+    'unclosed include': '#include <',
+    'plain code': 'for (int i = 0; i < n; i++) { sum += fann_run(ann, input)[0]; }\n',
+}
+
+
+def repeat_to(unit: str, size: int) -> str:
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def time_scans(rules: RuleSet, code: str, runs: int):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        rules.scan(code)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    rules = CodeExecutor.security_scanner().rule_sets['c']
+
+    print(f"{'input':<18}" + ''.join(f"{size // 1024:>10} KB" for size in SIZES)
+          + f"{'ms/MB':>10}{'growth':>10}")
+    for label, unit in ADVERSARIAL.items():
+        medians = [time_scans(rules, repeat_to(unit, size), args.runs) for size in SIZES]
+        growth = max(later / earlier for earlier, later in zip(medians, medians[1:]))
+        print(f"{label:<18}" + ''.join(f"{median * 1000:>10.1f} ms" for median in medians)
+              + f"{medians[-1] * 1000:>10.1f}{growth:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Workspace benchmark for pooled tmpfs run directories
+Replays the filesystem work of a run (create the directory, write the source
+and a binary-sized file, remove the directory) from several threads at once,
+first with mkdtemp/rmtree on disk and then with a WorkspacePool, and reports
+the time each run spends on it.
+
+Usage:
+    python3 benchmark_workspace.py [--runs N] [--concurrency N] [--disk-dir DIR]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from workspace_pool import WorkspacePool
+
+SOURCE = b"#include <stdio.h>\nint main(void) { puts(\"hi\"); return 0; }\n" * 20
+BINARY = os.urandom(16 * 1024)
+
+
+def fill(workspace: str) -> None:
+    with open(os.path.join(workspace, "program.c"), "wb") as f:
+        f.write(SOURCE)
+    with open(os.path.join(workspace, "program"), "wb") as f:
+        f.write(BINARY)
+
+
+def disk_run(disk_dir: str) -> float:
+    start = time.perf_counter()
+    workspace = tempfile.mkdtemp(prefix="sandbox_", dir=disk_dir)
+    fill(workspace)
+    shutil.rmtree(workspace)
+    return time.perf_counter() - start
+
+
+def pooled_run(pool: WorkspacePool) -> float:
+    start = time.perf_counter()
+    workspace = pool.acquire()
+    fill(workspace)
+    pool.release(workspace)
+    return time.perf_counter() - start
+
+
+def replay(run, runs: int, concurrency: int):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as threads:
+        timings = list(threads.map(lambda _: run(), range(runs)))
+    return timings, time.perf_counter() - start
+
+
+def report(label: str, timings, elapsed: float):
+    ordered = sorted(timings)
+    print(f"{label:<10} median {statistics.median(ordered) * 1e6:8.1f} us   "
+          f"p95 {ordered[int(len(ordered) * 0.95) - 1] * 1e6:8.1f} us   "
+          f"{len(ordered) / elapsed:10.0f} runs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--disk-dir', default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    pool = WorkspacePool(size=args.concurrency * 2)
+    try:
+        stats = pool.stats()
+        print(f"Disk: {args.disk_dir}")
+        print(f"Pool: {stats['root']} ({stats['filesystem']}), {stats['size']} workspaces")
+        print(f"{args.runs} runs, {args.concurrency} at a time")
+
+        report('mkdtemp', *replay(lambda: disk_run(args.disk_dir), args.runs, args.concurrency))
+        report('pool', *replay(lambda: pooled_run(pool), args.runs, args.concurrency))
+        pool.drain()
+        stats = pool.stats()
+        print(f"Reused {stats['reused']}, created {stats['created']}, discarded {stats['discarded']}")
+    finally:
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Cancelling Runs in Progress
+A run on a worker thread is cancelled through the CancelScope that thread
+entered. cancel() may be called from any thread: it kills the sandboxed
+program the run is waiting on, through the same hook as a timeout kill, and
+the executor skips the stages still ahead (a compile in progress finishes
+first). Runs on the event loop need no scope; cancelling their task already
+kills the process they are waiting on.
+"""
+
+import threading
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+CANCELLED_ERROR = "Execution cancelled"
+
+_current_scope: ContextVar[Optional["CancelScope"]] = ContextVar("cancel_scope", default=None)
+
+
+def cancelled_result(stage: str) -> Dict[str, Any]:
+    """Result of a run cancelled during `stage`"""
+    return {"success": False, "error": CANCELLED_ERROR, "stage": stage, "cancelled": True}
+
+
+class CancelScope:
+    """Cancellation state of one synchronous run.
+
+    Kill hooks are called with the scope's lock held, so once a killing()
+    block has exited its hook is neither running nor about to run, and the
+    block may free whatever the hook uses.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._kill: Optional[Callable[[], None]] = None
+        self.cancelled = False
+
+    def cancel(self) -> bool:
+        """Cancel the run, killing its current process; False if already cancelled"""
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.cancelled = True
+            if self._kill is not None:
+                self._kill()
+        return True
+
+    @contextmanager
+    def killing(self, kill: Callable[[], None]) -> Iterator[None]:
+        """Call `kill` if the scope is cancelled while the block runs, or already was"""
+        with self._lock:
+            self._kill = kill
+            if self.cancelled:
+                kill()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._kill = None
+
+
+@contextmanager
+def cancel_scope(scope: Optional[CancelScope] = None) -> Iterator[CancelScope]:
+    """Make `scope` (or a new one) the current thread's scope for the block"""
+    scope = scope or CancelScope()
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def current_scope() -> Optional[CancelScope]:
+    """Scope the current thread entered with cancel_scope(), if any"""
+    return _current_scope.get()
+
+
+def on_cancel(kill: Callable[[], None]):
+    """Context manager calling `kill` if the current thread's run is cancelled meanwhile"""
+    scope = _current_scope.get()
+    return scope.killing(kill) if scope is not None else nullcontext()
+
+
+def cancel_requested() -> bool:
+    """Whether the current thread's run has been cancelled"""
+    scope = _current_scope.get()
+    return scope is not None and scope.cancelled
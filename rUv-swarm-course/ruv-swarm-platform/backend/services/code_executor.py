@@ -5,18 +5,29 @@ with FANN neural network library support using Docker containers.
 """
 
 import os
+import asyncio
+import codecs
 import subprocess
 import tempfile
 import shutil
 import json
 import hashlib
-import re
 import time
 import uuid
+from contextlib import aclosing
 from pathlib import Path
-from typing import Dict, Tuple, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Tuple, Optional
 import logging
 
+from cancellation import cancel_requested, cancel_scope, cancelled_result
+from output_capture import (TRUNCATION_MARKER, CapturedOutput, OutputCapture, capture_process,
+                            capture_process_async)
+from run_cgroups import RunCgroups, read_usage, start_process_async, unmeasured
+from sandbox_backend import DockerSandboxBackend, NamespaceSandboxBackend, SandboxBackend
+from sandbox_config import SandboxConfig
+from security_scanner import RuleSet, SecurityScanner, Violation
+from stage_timing import StageLatency, StageTimer
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,6 +37,8 @@ class CodeExecutor:
     # Security constants
     MAX_CODE_SIZE = 1024 * 1024  # 1MB max code size
     MAX_OUTPUT_SIZE = 1024 * 64  # 64KB max output
+    OUTPUT_KILL_SIZE = 1024 * 1024  # Combined output after which a run is killed
+    STREAM_CHUNK_SIZE = 4096  # Bytes read per output chunk when streaming
     EXECUTION_TIMEOUT = 10  # 10 seconds max execution time
     COMPILATION_TIMEOUT = 5  # 5 seconds max compilation time
     MAX_MEMORY = "128m"  # 128MB memory limit
@@ -40,14 +53,31 @@ class CodeExecutor:
         r'__asm__',  # inline assembly
         r'asm\s*\(',  # assembly
         r'#include\s*<\s*(unistd|sys\/socket|netinet|arpa|sys\/ptrace|dlfcn)\.h\s*>',  # dangerous headers
-        r'fopen\s*\([^)]*["\']\/proc',  # accessing /proc
-        r'fopen\s*\([^)]*["\']\/sys',  # accessing /sys
-        r'open\s*\([^)]*O_RDWR',  # read-write file access
+        r'fopen\s*\([^()]*["\']\/proc',  # accessing /proc
+        r'fopen\s*\([^()]*["\']\/sys',  # accessing /sys
+        r'open\s*\([^()]*O_RDWR',  # read-write file access
         r'mmap\s*\(',  # memory mapping
         r'dlopen\s*\(',  # dynamic library loading
         r'__attribute__\s*\(\s*\(\s*constructor',  # constructor attributes
     ]
     
+    # Language label of this executor's stage latency histograms
+    LANGUAGE = "c"
+    
+    # Compiler flags for security
+    COMPILATION_FLAGS = [
+        "-O2",  # Optimization
+        "-Wall", "-Wextra", "-Werror",  # All warnings as errors
+        "-fstack-protector-strong",  # Stack protection
+        "-D_FORTIFY_SOURCE=2",  # Runtime buffer overflow detection
+        "-fPIE", "-pie",  # Position Independent Executable
+        "-Wl,-z,relro,-z,now",  # Full RELRO
+        "-Wl,-z,noexecstack",  # Non-executable stack
+    ]
+    
+    # Link with FANN and math libraries
+    LINK_LIBRARIES = ["-lfann", "-lm"]
+    
     # Allowed include files
     ALLOWED_INCLUDES = {
         'stdio.h', 'stdlib.h', 'string.h', 'math.h', 'time.h',
@@ -55,9 +85,31 @@ class CodeExecutor:
         'fann.h', 'floatfann.h', 'doublefann.h', 'fixedfann.h'
     }
     
-    def __init__(self, docker_image: str = "ruv-sandbox:latest"):
+    # Substrings that make a string literal suspicious
+    SUSPICIOUS_STRINGS = ['/proc', '/sys', '/dev', '../', 'LD_PRELOAD']
+    
+    # Rule set compiled from the constants above, built on first use
+    _security_scanner: Optional[SecurityScanner] = None
+    
+    def __init__(self, docker_image: str = "ruv-sandbox:latest", container_pool=None,
+                 compile_cache=None, precompiled_headers=None, backend=None,
+                 workspace_pool=None, stage_latency=None, run_cgroups=None):
         self.docker_image = docker_image
         self.container_name_prefix = "sandbox_"
+        # SandboxBackend that isolates compiled programs; Docker unless configured otherwise
+        self.backend = backend or self._default_backend()
+        # Optional SandboxContainerPool; when set, runs use warm containers
+        self.container_pool = container_pool
+        # Optional CompilationCache; when set, identical sources skip gcc
+        self.compile_cache = compile_cache
+        # Optional PrecompiledHeaders; when set, header preludes come from a .gch
+        self.precompiled_headers = precompiled_headers
+        # Optional WorkspacePool; when set, runs reuse pooled tmpfs directories
+        self.workspace_pool = workspace_pool
+        # Per-stage latency histograms of every run through the entry points
+        self.stage_latency = stage_latency if stage_latency is not None else StageLatency()
+        # Per-run cgroups measuring CPU time and peak memory where the host allows
+        self.run_cgroups = run_cgroups if run_cgroups is not None else RunCgroups()
         
     def validate_code(self, code: str) -> Tuple[bool, Optional[str]]:
         """Validate code for security issues"""
@@ -66,27 +118,149 @@ class CodeExecutor:
         if len(code) > self.MAX_CODE_SIZE:
             return False, f"Code size exceeds maximum allowed ({self.MAX_CODE_SIZE} bytes)"
         
-        # Check for forbidden patterns
-        for pattern in self.FORBIDDEN_PATTERNS:
-            if re.search(pattern, code, re.IGNORECASE | re.MULTILINE):
-                return False, f"Forbidden pattern detected: {pattern}"
-        
-        # Validate includes
-        includes = re.findall(r'#include\s*[<"]([^>"]+)[>"]', code)
-        for include in includes:
-            if include not in self.ALLOWED_INCLUDES:
-                # Check if it's a relative include (user header)
-                if not include.endswith('.h') or '/' in include or '\\' in include:
-                    return False, f"Forbidden include: {include}"
-        
-        # Check for suspicious string literals
-        strings = re.findall(r'"([^"\\]|\\.)*"', code)
-        for string in strings:
-            if any(forbidden in string for forbidden in ['/proc', '/sys', '/dev', '../', 'LD_PRELOAD']):
-                return False, f"Suspicious string literal detected"
+        # Forbidden patterns, includes and string literals in a single pass
+        violations = self.security_scanner().scan('c', code)
+        if violations:
+            return False, self._violation_message(violations)
         
         return True, None
     
+    @classmethod
+    def security_scanner(cls) -> SecurityScanner:
+        """Scanner for this class's security constants, compiled once"""
+        if cls.__dict__.get('_security_scanner') is None:
+            cls._security_scanner = SecurityScanner([
+                RuleSet('c', cls.FORBIDDEN_PATTERNS, cls.ALLOWED_INCLUDES, cls.SUSPICIOUS_STRINGS)
+            ])
+        return cls._security_scanner
+    
+    @staticmethod
+    def _violation_message(violations: Tuple[Violation, ...]) -> str:
+        """Message for the first violation, by check priority then position"""
+        priority = {'pattern': 0, 'include': 1, 'string': 2}
+        violation = min(violations, key=lambda v: (priority[v.kind], v.offset))
+        if violation.kind == 'pattern':
+            return f"Forbidden pattern detected: {violation.rule}"
+        if violation.kind == 'include':
+            return f"Forbidden include: {violation.rule}"
+        return "Suspicious string literal detected"
+    
+    def _build_compile_command(self, source_file: str, output_file: str,
+                               extra_flags: Optional[List[str]] = None) -> List[str]:
+        """Build the GCC command line with security flags"""
+        return (
+            ["gcc"]
+            + self.COMPILATION_FLAGS
+            + (extra_flags or [])
+            + ["-o", output_file, source_file]
+            + self.LINK_LIBRARIES
+        )
+    
+    def _default_backend(self) -> SandboxBackend:
+        """Backend named by SANDBOX_BACKEND, using this executor's limits"""
+        if SandboxConfig.SANDBOX_BACKEND == NamespaceSandboxBackend.name:
+            return NamespaceSandboxBackend(memory=self.MAX_MEMORY, cpu_seconds=self.EXECUTION_TIMEOUT)
+        return DockerSandboxBackend(self.docker_image, self.MAX_MEMORY, self.MAX_CPU,
+                                    self.container_name_prefix)
+    
+    def _run_cgroup(self, run_id: str) -> Optional[str]:
+        """Cgroup measuring a backend run, if the backend and host support one"""
+        if not self.backend.measures_cgroup():
+            return None
+        return self.run_cgroups.create(run_id)
+    
+    def _captured_result(self, captured: CapturedOutput, execution_time: float) -> Dict[str, any]:
+        """Execution result for a captured run"""
+        # cpu_user_ms, cpu_system_ms and memory_peak_kb; None where unmeasured
+        usage = captured.usage or unmeasured()
+        
+        if captured.timed_out:
+            return {
+                "success": False,
+                "stdout": "",
+                "stderr": "Execution timeout exceeded",
+                "exit_code": -1,
+                "execution_time": self.EXECUTION_TIMEOUT,
+                **usage
+            }
+        
+        if captured.cancelled:
+            return {
+                "success": False,
+                "stdout": captured.stdout,
+                "stderr": captured.stderr,
+                "exit_code": -1,
+                "execution_time": execution_time,
+                "cancelled": True,
+                **usage
+            }
+        
+        stderr = captured.stderr
+        if captured.output_limited:
+            if stderr and not stderr.endswith("\n"):
+                stderr += "\n"
+            stderr += f"Output limit of {self.OUTPUT_KILL_SIZE} bytes exceeded"
+        
+        return {
+            "success": captured.reason is None and captured.returncode == 0,
+            "stdout": captured.stdout,
+            "stderr": stderr,
+            "exit_code": captured.returncode if captured.reason is None else -1,
+            "execution_time": execution_time,
+            "output_limited": captured.output_limited,
+            "output_bytes": captured.output_bytes,
+            **usage
+        }
+    
+    def _compile_cache_key(self, code: str) -> Optional[str]:
+        """Compilation cache key, or None when caching is disabled"""
+        if self.compile_cache is None:
+            return None
+        # Placeholder paths keep the key independent of the temp directory
+        return self.compile_cache.key(code, self._build_compile_command("program.c", "program"))
+    
+    def _precompiled_header_flags(self, code: str) -> List[str]:
+        """Flags injecting a precompiled header prelude, if one applies"""
+        if self.precompiled_headers is None:
+            return []
+        try:
+            return self.precompiled_headers.flags_for(code, self.COMPILATION_FLAGS)
+        except Exception as e:
+            logger.warning(f"Precompiled headers unavailable: {e}")
+            return []
+    
+    def _store_compiled(self, cache_key: Optional[str], output_file: str) -> None:
+        """Publish a compiled binary to the cache; failures only cost a future miss"""
+        if cache_key is None:
+            return
+        try:
+            self.compile_cache.store(cache_key, output_file)
+        except Exception as e:
+            logger.warning(f"Failed to store compiled binary in cache: {e}")
+    
+    def _acquire_workspace(self) -> str:
+        """Directory for one run's source and binary"""
+        if self.workspace_pool is not None:
+            return self.workspace_pool.acquire()
+        return tempfile.mkdtemp(prefix="sandbox_")
+    
+    def _release_workspace(self, temp_dir: str) -> None:
+        """Hand a run directory back; pooled ones are wiped in the background"""
+        try:
+            if self.workspace_pool is not None:
+                self.workspace_pool.release(temp_dir)
+            else:
+                shutil.rmtree(temp_dir)
+        except Exception as e:
+            logger.warning(f"Failed to clean up temp directory: {e}")
+    
+    async def _release_workspace_async(self, temp_dir: str) -> None:
+        """_release_workspace() without blocking the event loop on rmtree"""
+        if self.workspace_pool is not None:
+            self._release_workspace(temp_dir)
+        else:
+            await asyncio.to_thread(self._release_workspace, temp_dir)
+    
     def compile_code(self, code: str, temp_dir: str) -> Tuple[bool, str]:
         """Compile C code in temporary directory"""
         
@@ -97,20 +271,13 @@ class CodeExecutor:
         with open(source_file, 'w') as f:
             f.write(code)
         
-        # Compile with security flags
-        compile_cmd = [
-            "gcc",
-            "-O2",  # Optimization
-            "-Wall", "-Wextra", "-Werror",  # All warnings as errors
-            "-fstack-protector-strong",  # Stack protection
-            "-D_FORTIFY_SOURCE=2",  # Runtime buffer overflow detection
-            "-fPIE", "-pie",  # Position Independent Executable
-            "-Wl,-z,relro,-z,now",  # Full RELRO
-            "-Wl,-z,noexecstack",  # Non-executable stack
-            "-o", output_file,
-            source_file,
-            "-lfann", "-lm"  # Link with FANN and math libraries
-        ]
+        cache_key = self._compile_cache_key(code)
+        if cache_key and self.compile_cache.fetch(cache_key, output_file):
+            return True, output_file
+        
+        compile_cmd = self._build_compile_command(
+            source_file, output_file, self._precompiled_header_flags(code)
+        )
         
         try:
             result = subprocess.run(
@@ -124,6 +291,7 @@ class CodeExecutor:
             if result.returncode != 0:
                 return False, f"Compilation failed:\n{result.stderr}"
             
+            self._store_compiled(cache_key, output_file)
             return True, output_file
             
         except subprocess.TimeoutExpired:
@@ -131,72 +299,235 @@ class CodeExecutor:
         except Exception as e:
             return False, f"Compilation error: {str(e)}"
     
-    def execute_in_docker(self, executable_path: str, temp_dir: str) -> Dict[str, any]:
-        """Execute compiled program in Docker sandbox"""
-        
-        container_name = f"{self.container_name_prefix}{uuid.uuid4().hex[:8]}"
-        
-        # Docker run command with security options
-        docker_cmd = [
-            "docker", "run",
-            "--rm",  # Remove container after execution
-            "--name", container_name,
-            "--network", "none",  # No network access
-            "--memory", self.MAX_MEMORY,  # Memory limit
-            "--cpus", self.MAX_CPU,  # CPU limit
-            "--read-only",  # Read-only root filesystem
-            "--tmpfs", "/tmp:rw,noexec,nosuid,size=64m",  # Temp filesystem
-            "--security-opt", "no-new-privileges",  # No privilege escalation
-            "--cap-drop", "ALL",  # Drop all capabilities
-            "--user", "1000:1000",  # Run as non-root user
-            "-v", f"{temp_dir}:/home/sandboxuser/workspace:ro",  # Mount workspace read-only
-            self.docker_image,
-            "/home/sandboxuser/workspace/program"
-        ]
+    def execute_in_sandbox(self, executable_path: str, temp_dir: str) -> Dict[str, any]:
+        """Execute compiled program in the sandbox backend"""
+        
+        if self.container_pool is not None:
+            return self._execute_in_pool(executable_path)
+        
+        run_id = uuid.uuid4().hex[:8]
+        cgroup = self._run_cgroup(run_id)
+        
+        self.backend.prepare(temp_dir)
+        sandbox_cmd = self.backend.command(temp_dir, run_id, cgroup)
         
         start_time = time.time()
         
         try:
-            result = subprocess.run(
-                docker_cmd,
-                capture_output=True,
-                text=True,
-                timeout=self.EXECUTION_TIMEOUT
+            # Output is read as it is produced; the sandbox is stopped too if
+            # its command is killed for the timeout or the output limit
+            captured = capture_process(
+                sandbox_cmd,
+                timeout=self.EXECUTION_TIMEOUT,
+                limit=self.MAX_OUTPUT_SIZE,
+                kill_after=self.OUTPUT_KILL_SIZE,
+                on_kill=lambda: self.backend.kill(run_id),
+                cgroup=cgroup if self.backend.JOINS_CGROUP else None
             )
+            if cgroup is not None:
+                captured = captured._replace(usage=read_usage(cgroup))
             
-            execution_time = time.time() - start_time
+            return self._captured_result(captured, time.time() - start_time)
             
-            # Truncate output if too large
-            stdout = result.stdout
-            stderr = result.stderr
+        except Exception as e:
+            return {
+                "success": False,
+                "stdout": "",
+                "stderr": f"Execution error: {str(e)}",
+                "exit_code": -1,
+                "execution_time": 0
+            }
+        finally:
+            self.run_cgroups.remove(cgroup)
+    
+    # Name from before backends were pluggable
+    execute_in_docker = execute_in_sandbox
+    
+    def execute_code(self, code: str, debug: bool = False) -> Dict[str, any]:
+        """Main entry point for code execution.
+        
+        Every run's stage timings go to `stage_latency`; with `debug` they
+        are also returned in the result's ``debug`` field. When called inside
+        a cancel_scope() that gets cancelled, the sandbox is killed and the
+        result is a cancelled one from the stage the run had reached.
+        """
+        timer = StageTimer()
+        result = self._execute_stages(code, timer)
+        return self._finish_timing(result, timer, debug)
+    
+    def _finish_timing(self, result: Dict[str, any], timer: StageTimer, debug: bool) -> Dict[str, any]:
+        self.stage_latency.observe(self.LANGUAGE, timer)
+        return self._with_debug(result, timer, debug)
+    
+    def _execute_stages(self, code: str, timer: StageTimer) -> Dict[str, any]:
+        # Validate code first
+        with timer.stage("validation"):
+            is_valid, error_msg = self.validate_code(code)
+        if not is_valid:
+            return {
+                "success": False,
+                "error": error_msg,
+                "stage": "validation"
+            }
+        
+        # Create temporary directory
+        with timer.stage("workspace"):
+            temp_dir = self._acquire_workspace()
+        
+        try:
+            # Compile code
+            with timer.stage("compilation"):
+                compile_success, compile_result = self.compile_code(code, temp_dir)
+            if cancel_requested():
+                return cancelled_result("compilation")
+            if not compile_success:
+                return {
+                    "success": False,
+                    "error": compile_result,
+                    "stage": "compilation"
+                }
             
-            if len(stdout) > self.MAX_OUTPUT_SIZE:
-                stdout = stdout[:self.MAX_OUTPUT_SIZE] + "\n... (output truncated)"
-            if len(stderr) > self.MAX_OUTPUT_SIZE:
-                stderr = stderr[:self.MAX_OUTPUT_SIZE] + "\n... (output truncated)"
+            # Execute in the sandbox
+            with timer.stage("execution"):
+                execution_result = self.execute_in_sandbox(compile_result, temp_dir)
+            if execution_result.get("cancelled"):
+                return cancelled_result("execution")
             
             return {
-                "success": result.returncode == 0,
-                "stdout": stdout,
-                "stderr": stderr,
-                "exit_code": result.returncode,
-                "execution_time": execution_time
+                "success": execution_result["success"],
+                "stdout": execution_result["stdout"],
+                "stderr": execution_result["stderr"],
+                "exit_code": execution_result["exit_code"],
+                "execution_time": execution_result["execution_time"],
+                "output_limited": execution_result.get("output_limited", False),
+                "cpu_user_ms": execution_result.get("cpu_user_ms"),
+                "cpu_system_ms": execution_result.get("cpu_system_ms"),
+                "memory_peak_kb": execution_result.get("memory_peak_kb"),
+                "stage": "execution"
             }
             
-        except subprocess.TimeoutExpired:
-            # Kill the container if it's still running
-            try:
-                subprocess.run(["docker", "kill", container_name], capture_output=True)
-            except:
-                pass
+        finally:
+            # Clean up temporary directory
+            with timer.stage("cleanup"):
+                self._release_workspace(temp_dir)
+    
+    def _execute_in_pool(self, executable_path: str) -> Dict[str, any]:
+        """Execute compiled program in a warm container from the pool"""
+        
+        start_time = time.time()
+        
+        try:
+            # The pool recycles a container whose program was killed
+            captured = self.container_pool.execute(
+                executable_path,
+                self.EXECUTION_TIMEOUT,
+                limit=self.MAX_OUTPUT_SIZE,
+                kill_after=self.OUTPUT_KILL_SIZE
+            )
+            
+            return self._captured_result(captured, time.time() - start_time)
             
+        except Exception as e:
             return {
                 "success": False,
                 "stdout": "",
-                "stderr": "Execution timeout exceeded",
+                "stderr": f"Execution error: {str(e)}",
                 "exit_code": -1,
-                "execution_time": self.EXECUTION_TIMEOUT
+                "execution_time": 0
             }
+    
+    async def _run_process_async(self, cmd: List[str], timeout: float,
+                                 cwd: Optional[str] = None) -> Tuple[int, str, str]:
+        """Run a command without blocking the event loop.
+        
+        Kills the process and raises asyncio.TimeoutError if it runs longer than
+        ``timeout`` seconds. Output is capped like execution output; a process
+        killed at the output limit reports exit code -1.
+        """
+        captured = await capture_process_async(
+            cmd,
+            timeout=timeout,
+            limit=self.MAX_OUTPUT_SIZE,
+            kill_after=self.OUTPUT_KILL_SIZE,
+            cwd=cwd
+        )
+        if captured.timed_out:
+            raise asyncio.TimeoutError()
+        
+        returncode = -1 if captured.output_limited else captured.returncode
+        return returncode, captured.stdout, captured.stderr
+    
+    async def compile_code_async(self, code: str, temp_dir: str) -> Tuple[bool, str]:
+        """Compile C code in temporary directory without blocking the event loop"""
+        
+        source_file = os.path.join(temp_dir, "program.c")
+        output_file = os.path.join(temp_dir, "program")
+        
+        # Write source code
+        with open(source_file, 'w') as f:
+            f.write(code)
+        
+        cache_key = self._compile_cache_key(code)
+        if cache_key and self.compile_cache.fetch(cache_key, output_file):
+            return True, output_file
+        
+        # First use of a prelude builds its .gch, so keep it off the event loop
+        pch_flags = await asyncio.to_thread(self._precompiled_header_flags, code)
+        compile_cmd = self._build_compile_command(source_file, output_file, pch_flags)
+        
+        try:
+            returncode, _, stderr = await self._run_process_async(
+                compile_cmd,
+                timeout=self.COMPILATION_TIMEOUT,
+                cwd=temp_dir
+            )
+            
+            if returncode != 0:
+                return False, f"Compilation failed:\n{stderr}"
+            
+            self._store_compiled(cache_key, output_file)
+            return True, output_file
+            
+        except asyncio.TimeoutError:
+            return False, "Compilation timeout exceeded"
+        except Exception as e:
+            return False, f"Compilation error: {str(e)}"
+    
+    async def execute_in_sandbox_async(self, executable_path: str, temp_dir: str) -> Dict[str, any]:
+        """Execute compiled program in the sandbox backend without blocking the event loop"""
+        
+        if self.container_pool is not None:
+            # The pool runs on a worker thread, which cancelling this task
+            # does not stop; the thread's scope kills the program instead
+            with cancel_scope() as scope:
+                try:
+                    return await asyncio.to_thread(self._execute_in_pool, executable_path)
+                except asyncio.CancelledError:
+                    scope.cancel()
+                    raise
+        
+        run_id = uuid.uuid4().hex[:8]
+        cgroup = await asyncio.to_thread(self._run_cgroup, run_id)
+        
+        self.backend.prepare(temp_dir)
+        sandbox_cmd = self.backend.command(temp_dir, run_id, cgroup)
+        
+        start_time = time.time()
+        
+        try:
+            # Also stops the sandbox on timeout, output limit or cancellation
+            captured = await capture_process_async(
+                sandbox_cmd,
+                timeout=self.EXECUTION_TIMEOUT,
+                limit=self.MAX_OUTPUT_SIZE,
+                kill_after=self.OUTPUT_KILL_SIZE,
+                on_kill=lambda: self.backend.kill_async(run_id),
+                cgroup=cgroup if self.backend.JOINS_CGROUP else None
+            )
+            if cgroup is not None:
+                captured = captured._replace(usage=read_usage(cgroup))
+            
+            return self._captured_result(captured, time.time() - start_time)
             
         except Exception as e:
             return {
@@ -206,12 +537,28 @@ class CodeExecutor:
                 "exit_code": -1,
                 "execution_time": 0
             }
+        finally:
+            # Waiting for a removed container's cgroup would block the loop
+            await asyncio.shield(asyncio.to_thread(self.run_cgroups.remove, cgroup))
     
-    def execute_code(self, code: str) -> Dict[str, any]:
-        """Main entry point for code execution"""
+    # Name from before backends were pluggable
+    execute_in_docker_async = execute_in_sandbox_async
+    
+    async def execute_code_async(self, code: str, debug: bool = False) -> Dict[str, any]:
+        """Asyncio entry point for code execution.
         
+        Same limits and result format as execute_code(), but compilation and
+        execution run as asyncio subprocesses so the event loop keeps serving
+        other requests while a submission is in flight.
+        """
+        timer = StageTimer()
+        result = await self._execute_stages_async(code, timer)
+        return self._finish_timing(result, timer, debug)
+    
+    async def _execute_stages_async(self, code: str, timer: StageTimer) -> Dict[str, any]:
         # Validate code first
-        is_valid, error_msg = self.validate_code(code)
+        with timer.stage("validation"):
+            is_valid, error_msg = self.validate_code(code)
         if not is_valid:
             return {
                 "success": False,
@@ -220,11 +567,13 @@ class CodeExecutor:
             }
         
         # Create temporary directory
-        temp_dir = tempfile.mkdtemp(prefix="sandbox_")
+        with timer.stage("workspace"):
+            temp_dir = self._acquire_workspace()
         
         try:
             # Compile code
-            compile_success, compile_result = self.compile_code(code, temp_dir)
+            with timer.stage("compilation"):
+                compile_success, compile_result = await self.compile_code_async(code, temp_dir)
             if not compile_success:
                 return {
                     "success": False,
@@ -232,8 +581,9 @@ class CodeExecutor:
                     "stage": "compilation"
                 }
             
-            # Execute in Docker
-            execution_result = self.execute_in_docker(compile_result, temp_dir)
+            # Execute in the sandbox
+            with timer.stage("execution"):
+                execution_result = await self.execute_in_sandbox_async(compile_result, temp_dir)
             
             return {
                 "success": execution_result["success"],
@@ -241,15 +591,201 @@ class CodeExecutor:
                 "stderr": execution_result["stderr"],
                 "exit_code": execution_result["exit_code"],
                 "execution_time": execution_result["execution_time"],
+                "output_limited": execution_result.get("output_limited", False),
+                "cpu_user_ms": execution_result.get("cpu_user_ms"),
+                "cpu_system_ms": execution_result.get("cpu_system_ms"),
+                "memory_peak_kb": execution_result.get("memory_peak_kb"),
                 "stage": "execution"
             }
             
         finally:
-            # Clean up temporary directory
+            # Clean up temporary directory off the event loop
+            with timer.stage("cleanup"):
+                await self._release_workspace_async(temp_dir)
+
+    async def _stream_process(self, cmd: List[str], timeout: float,
+                              on_kill: Optional[Callable[[], Awaitable[None]]] = None,
+                              cgroup: Optional[str] = None) -> AsyncIterator[Dict[str, any]]:
+        """Run a command and yield its output as it is produced.
+        
+        Yields ``{"event": "stdout"|"stderr", "data": ...}`` chunks followed by a
+        single ``{"event": "exit", ...}`` event. Output is limited as in
+        capture_process(): the first ``MAX_OUTPUT_SIZE / 2`` bytes of each stream
+        are yielded as they arrive, the last ``MAX_OUTPUT_SIZE / 2`` are held
+        back and yielded after the truncation marker once the stream ends, and
+        the process is killed as soon as the combined output passes
+        OUTPUT_KILL_SIZE. The streamed text therefore equals the ``stdout`` and
+        ``stderr`` of a buffered run. ``on_kill`` runs whenever the process is
+        killed (output limit, timeout or cancellation). With ``cgroup`` the
+        command runs inside that cgroup.
+        """
+        process = await start_process_async(
+            cmd, cgroup,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        chunks: asyncio.Queue = asyncio.Queue()
+        
+        async def pump(stream, name):
+            while True:
+                data = await stream.read(self.STREAM_CHUNK_SIZE)
+                if not data:
+                    break
+                await chunks.put((name, data))
+            await chunks.put((name, None))
+        
+        readers = [
+            asyncio.create_task(pump(process.stdout, "stdout")),
+            asyncio.create_task(pump(process.stderr, "stderr"))
+        ]
+        decoders = {
+            name: codecs.getincrementaldecoder("utf-8")(errors="replace")
+            for name in ("stdout", "stderr")
+        }
+        capture = OutputCapture(self.MAX_OUTPUT_SIZE, self.OUTPUT_KILL_SIZE)
+        
+        def held_back(name: str) -> str:
+            """Rest of a finished stream after the part already yielded"""
+            buffer = capture.buffers[name]
+            if not buffer.omitted:
+                return decoders[name].decode(bytes(buffer.tail), final=True)
+            return (decoders[name].decode(b"", final=True)
+                    + TRUNCATION_MARKER.format(buffer.omitted)
+                    + buffer.tail_text())
+        
+        start_time = time.time()
+        deadline = start_time + timeout
+        finished = []
+        
+        try:
+            while len(finished) < len(readers):
+                try:
+                    name, data = await asyncio.wait_for(chunks.get(), deadline - time.time())
+                except asyncio.TimeoutError:
+                    capture.reason = "timeout"
+                    break
+                
+                if data is None:
+                    finished.append(name)
+                    text = held_back(name)
+                else:
+                    text = decoders[name].decode(capture.feed_head(name, data))
+                if text:
+                    yield {"event": name, "data": text}
+                if capture.reason:
+                    break
+            
+            if capture.reason is None:
+                await process.wait()
+        finally:
+            if process.returncode is None:
+                process.kill()
+                if on_kill is not None:
+                    await asyncio.shield(on_kill())
+                await process.wait()
+            for reader in readers:
+                reader.cancel()
+        
+        # Tails of streams cut short by a kill
+        for name in ("stdout", "stderr"):
+            if name not in finished:
+                text = held_back(name)
+                if text:
+                    yield {"event": name, "data": text}
+        
+        yield {
+            "event": "exit",
+            "exit_code": process.returncode if capture.reason is None else -1,
+            "reason": capture.reason,
+            "output_bytes": capture.total,
+            "execution_time": time.time() - start_time
+        }
+    
+    async def execute_code_stream(self, code: str, debug: bool = False) -> AsyncIterator[Dict[str, any]]:
+        """Streaming variant of execute_code_async().
+        
+        Yields ``stage`` events as the run moves through validation,
+        compilation and execution, ``stdout``/``stderr`` chunks while the
+        program runs, and a final ``verdict`` event carrying the same fields as
+        execute_code_async() results. Runs never use the warm container pool,
+        so the sandbox is killed the moment its output passes OUTPUT_KILL_SIZE.
+        The verdict is sent before cleanup, so its ``debug`` timings stop at
+        execution.
+        """
+        
+        timer = StageTimer()
+        try:
+            yield {"event": "stage", "stage": "validation"}
+            with timer.stage("validation"):
+                is_valid, error_msg = self.validate_code(code)
+            if not is_valid:
+                verdict = {"event": "verdict", "success": False, "error": error_msg, "stage": "validation"}
+                yield self._with_debug(verdict, timer, debug)
+                return
+            
+            with timer.stage("workspace"):
+                temp_dir = self._acquire_workspace()
+            cgroup = None
+            
             try:
-                shutil.rmtree(temp_dir)
-            except Exception as e:
-                logger.warning(f"Failed to clean up temp directory: {e}")
+                yield {"event": "stage", "stage": "compilation"}
+                with timer.stage("compilation"):
+                    compile_success, compile_result = await self.compile_code_async(code, temp_dir)
+                if not compile_success:
+                    verdict = {"event": "verdict", "success": False, "error": compile_result,
+                               "stage": "compilation"}
+                    yield self._with_debug(verdict, timer, debug)
+                    return
+                
+                yield {"event": "stage", "stage": "execution"}
+                run_id = uuid.uuid4().hex[:8]
+                cgroup = await asyncio.to_thread(self._run_cgroup, run_id)
+                self.backend.prepare(temp_dir)
+                
+                # Closed at once if this generator is, e.g. when the client
+                # of a streaming response disconnects, so the sandbox is
+                # killed instead of running on to its timeout
+                async with aclosing(self._stream_process(
+                    self.backend.command(temp_dir, run_id, cgroup),
+                    timeout=self.EXECUTION_TIMEOUT,
+                    on_kill=lambda: self.backend.kill_async(run_id),
+                    cgroup=cgroup if self.backend.JOINS_CGROUP else None
+                )) as events:
+                    async for event in events:
+                        if event["event"] != "exit":
+                            yield event
+                            continue
+                        
+                        timer.record("execution", event["execution_time"] * 1000)
+                        verdict = {
+                            "event": "verdict",
+                            "success": event["reason"] is None and event["exit_code"] == 0,
+                            "exit_code": event["exit_code"],
+                            "execution_time": event["execution_time"],
+                            "output_limited": event["reason"] == "output_limit",
+                            "output_bytes": event["output_bytes"],
+                            **(read_usage(cgroup) if cgroup is not None else unmeasured()),
+                            "stage": "execution"
+                        }
+                        if event["reason"] == "timeout":
+                            verdict["error"] = "Execution timeout exceeded"
+                        elif event["reason"] == "output_limit":
+                            verdict["error"] = f"Output limit of {self.OUTPUT_KILL_SIZE} bytes exceeded"
+                        yield self._with_debug(verdict, timer, debug)
+            
+            finally:
+                with timer.stage("cleanup"):
+                    await asyncio.to_thread(self.run_cgroups.remove, cgroup)
+                    await self._release_workspace_async(temp_dir)
+        
+        finally:
+            self.stage_latency.observe(self.LANGUAGE, timer)
+    
+    @staticmethod
+    def _with_debug(verdict: Dict[str, any], timer: StageTimer, debug: bool) -> Dict[str, any]:
+        if debug:
+            verdict["debug"] = timer.to_dict()
+        return verdict
 
 
 # Example usage and testing
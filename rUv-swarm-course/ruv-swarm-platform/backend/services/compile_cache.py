@@ -0,0 +1,185 @@
+"""
+Content-Addressed Compilation Cache
+Stores compiled sandbox binaries on disk keyed by a hash of the source code,
+the exact compiler command line and the toolchain version, so identical
+submissions (starter code, canonical solutions) skip gcc entirely.
+"""
+
+import os
+import hashlib
+import shutil
+import subprocess
+import tempfile
+import threading
+from functools import lru_cache
+from typing import Dict, List
+import logging
+
+from sandbox_config import SandboxConfig
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def toolchain_fingerprint(compiler: str = 'gcc') -> str:
+    """Compiler version plus the resolved link libraries, computed once per process"""
+    parts = []
+    try:
+        result = subprocess.run([compiler, '--version'],
+                                capture_output=True, text=True, timeout=5)
+        parts.append(result.stdout.splitlines()[0] if result.stdout else '')
+        for library in SandboxConfig.LINK_LIBRARIES:
+            name = f"lib{library[2:]}.so"
+            result = subprocess.run([compiler, f'-print-file-name={name}'],
+                                    capture_output=True, text=True, timeout=5)
+            resolved = result.stdout.strip()
+            if os.path.isabs(resolved):
+                resolved = os.path.realpath(resolved)
+            mtime = os.path.getmtime(resolved) if os.path.exists(resolved) else 0
+            parts.append(f"{name}={resolved}@{mtime}")
+    except Exception as e:
+        logger.warning(f"Failed to fingerprint toolchain: {e}")
+    return '\n'.join(parts)
+
+
+class CompilationCache:
+    """On-disk LRU cache of compiled binaries.
+
+    Entries are published atomically (write to a temp file, then os.replace),
+    so concurrent compiles of the same source never observe a partial binary.
+    Recency is tracked through file mtimes, which are bumped on every hit; when
+    the cache exceeds `max_bytes` the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str = SandboxConfig.COMPILE_CACHE_DIR,
+                 max_bytes: int = SandboxConfig.COMPILE_CACHE_MAX_BYTES,
+                 compiler: str = 'gcc'):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.compiler = compiler
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._size_bytes = sum(os.path.getsize(path) for path in self._entry_paths())
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def key(self, code: str, compile_cmd: List[str]) -> str:
+        """Cache key for a source file compiled with the given command line.
+
+        `compile_cmd` should use placeholder file names so the key does not
+        depend on the per-run temp directory.
+        """
+        digest = hashlib.sha256()
+        digest.update(self.toolchain_fingerprint().encode())
+        digest.update(b'\0')
+        digest.update('\0'.join(compile_cmd).encode())
+        digest.update(b'\0')
+        digest.update(code.encode())
+        return digest.hexdigest()
+
+    def fetch(self, key: str, output_file: str) -> bool:
+        """Materialize a cached binary at `output_file`; returns False on a miss"""
+        path = self._entry_path(key)
+        try:
+            try:
+                os.link(path, output_file)
+            except OSError:
+                shutil.copy2(path, output_file)
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def contains(self, key: str) -> bool:
+        """Whether a binary is cached under `key`; not counted as a lookup"""
+        return os.path.exists(self._entry_path(key))
+
+    def store(self, key: str, binary_path: str) -> None:
+        """Atomically publish a freshly compiled binary"""
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as dst, open(binary_path, 'rb') as src:
+                shutil.copyfileobj(src, dst)
+            os.chmod(tmp_path, 0o755)
+
+            replaced_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            self.stores += 1
+            self._size_bytes += os.path.getsize(path) - replaced_size
+            over_limit = self._size_bytes > self.max_bytes
+
+        if over_limit:
+            self._evict()
+
+    def stats(self) -> Dict[str, any]:
+        """Cache hit-ratio and size metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'size_bytes': self._size_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def toolchain_fingerprint(self) -> str:
+        """Fingerprint of the compiler used by this cache"""
+        return toolchain_fingerprint(self.compiler)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _entry_paths(self) -> List[str]:
+        paths = []
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.startswith('.tmp_'):
+                    paths.append(os.path.join(shard_dir, name))
+        return paths
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits `max_bytes`"""
+        entries = []
+        for path in self._entry_paths():
+            try:
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+
+        with self._lock:
+            for _, size, path in entries:
+                if self._size_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    continue
+                self._size_bytes -= size
+                self.evictions += 1
@@ -0,0 +1,297 @@
+"""
+Warm Sandbox Container Pool
+Keeps a set of pre-started, locked-down sandbox containers so that each
+execution is a `docker exec` instead of a full `docker run --rm`.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import logging
+
+from output_capture import CapturedOutput, capture_process
+from run_cgroups import UsageWindow, cgroup_of
+from sandbox_config import SandboxConfig
+
+logger = logging.getLogger(__name__)
+
+
+class PooledContainer:
+    """A pre-started sandbox container and its host workspace directory"""
+
+    def __init__(self, name: str, workspace: str, cgroup: Optional[str] = None):
+        self.name = name
+        self.workspace = workspace  # Host directory mounted read-only in the container
+        self.cgroup = cgroup  # The container's cgroup directory, if visible to this host
+        self.uses = 0
+        self.created_at = time.time()
+
+    def __repr__(self):
+        return f"<PooledContainer(name='{self.name}', uses={self.uses})>"
+
+
+class SandboxContainerPool:
+    """Pool of warm sandbox containers reused across executions.
+
+    Containers are started with SandboxConfig.DOCKER_SECURITY_OPTIONS and the
+    usual resource limits, and idle on a keep-alive process. Each run copies the
+    binary into the container's workspace and execs it as the sandbox user.
+    After a run the container's processes are killed and its tmpfs wiped; it is
+    recycled after `max_uses` runs or immediately on any anomaly (timeout,
+    docker error, failed reset). Where the container's cgroup is visible, a
+    run's CPU time and peak memory are measured over the run (see UsageWindow).
+    """
+
+    # Exit codes produced by docker itself rather than the user program
+    DOCKER_ERROR_EXIT_CODES = {125, 126, 127}
+    # SIGKILL (OOM killer or external kill) leaves the container in an unknown state
+    KILLED_EXIT_CODE = 137
+
+    # Kills every process of the sandbox user except PID 1 (the keep-alive
+    # process) and the shell itself, then clears the writable tmpfs
+    KILL_SCRIPT = "kill -9 -1 2>/dev/null; true"
+    RESET_SCRIPT = "kill -9 -1 2>/dev/null; rm -rf /tmp/* /tmp/.[!.]* 2>/dev/null; true"
+    KEEP_ALIVE_COMMAND = ["tail", "-f", "/dev/null"]
+
+    def __init__(self, size: int = SandboxConfig.CONTAINER_POOL_SIZE,
+                 max_uses: int = SandboxConfig.CONTAINER_POOL_MAX_USES,
+                 docker_image: str = SandboxConfig.DOCKER_IMAGE,
+                 workspace_root: Optional[str] = None):
+        self.size = size
+        self.max_uses = max_uses
+        self.docker_image = docker_image
+        self.workspace_root = workspace_root or tempfile.mkdtemp(prefix="sandbox_pool_")
+
+        self._idle = deque()
+        self._in_use = set()
+        self._lock = threading.Lock()
+        self._maintenance = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sandbox_pool")
+        self._closed = False
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.recycles = 0
+        self.start_failures = 0
+
+    def start(self) -> None:
+        """Pre-start containers up to the configured pool size"""
+        for _ in range(self.size):
+            container = self._start_container()
+            if container:
+                with self._lock:
+                    self._idle.append(container)
+        logger.info(f"Sandbox container pool started with {len(self._idle)}/{self.size} containers")
+
+    def acquire(self) -> Optional[PooledContainer]:
+        """Take a warm container, or start a cold one if the pool is empty"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Container pool is shut down")
+            if self._idle:
+                container = self._idle.popleft()
+                self._in_use.add(container.name)
+                self.hits += 1
+                return container
+            self.misses += 1
+
+        container = self._start_container()
+        if container:
+            with self._lock:
+                self._in_use.add(container.name)
+        return container
+
+    def release(self, container: PooledContainer, healthy: bool = True) -> None:
+        """Return a container to the pool; reset or recycle it in the background"""
+        container.uses += 1
+        with self._lock:
+            self._in_use.discard(container.name)
+        self._maintenance.submit(self._recycle_or_reset, container, healthy)
+
+    def execute(self, executable_path: str, timeout: int, limit: int = SandboxConfig.MAX_OUTPUT_SIZE,
+                kill_after: int = SandboxConfig.MAX_OUTPUT_SIZE) -> CapturedOutput:
+        """Run a compiled program in a pooled container.
+
+        Keeps at most `limit` bytes of each output stream; the caller is
+        responsible for result formatting. A program that exceeds `timeout`
+        or prints more than `kill_after` bytes is killed, and its container
+        recycled. The same happens when the calling thread's CancelScope is
+        cancelled. The result's `usage` is set when the run was measured.
+        """
+        container = self.acquire()
+        if container is None:
+            raise RuntimeError("No sandbox container available")
+
+        healthy = False
+        try:
+            # Binary is copied into the container's dedicated, read-only mounted workspace
+            shutil.copy2(executable_path, os.path.join(container.workspace, "program"))
+
+            window = UsageWindow(container.cgroup) if container.cgroup else None
+            try:
+                # Killing `docker exec` leaves the program running in the
+                # container until it is recycled, so it is killed in there too
+                captured = capture_process(self._build_exec_command(container), timeout, limit, kill_after,
+                                           on_kill=lambda: self._kill_programs(container))
+            finally:
+                usage = window.finish() if window is not None else None
+            captured = captured._replace(usage=usage)
+
+            # A killed program may leave the container in an unknown state
+            healthy = (captured.reason is None
+                       and captured.returncode not in self.DOCKER_ERROR_EXIT_CODES
+                       and captured.returncode != self.KILLED_EXIT_CODE)
+            return captured
+        finally:
+            self.release(container, healthy=healthy)
+
+    def stats(self) -> Dict[str, any]:
+        """Pool sizing metrics"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "max_uses": self.max_uses,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / requests if requests else 0.0,
+                "recycles": self.recycles,
+                "start_failures": self.start_failures,
+            }
+
+    def shutdown(self) -> None:
+        """Remove all pooled containers"""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        self._maintenance.shutdown(wait=True)
+        for container in idle:
+            self._destroy_container(container)
+        shutil.rmtree(self.workspace_root, ignore_errors=True)
+
+    def _recycle_or_reset(self, container: PooledContainer, healthy: bool) -> None:
+        """Reset a used container for reuse, or replace it"""
+        with self._lock:
+            surplus = len(self._idle) >= self.size
+
+        if (not self._closed and healthy and not surplus
+                and container.uses < self.max_uses and self._reset_container(container)):
+            with self._lock:
+                self._idle.append(container)
+            return
+
+        self._destroy_container(container)
+        if surplus or self._closed:
+            # Cold container started during a spike; don't grow the pool
+            return
+
+        with self._lock:
+            self.recycles += 1
+        replacement = self._start_container()
+        if replacement:
+            with self._lock:
+                self._idle.append(replacement)
+
+    def _build_run_command(self, container_name: str, workspace: str) -> List[str]:
+        """Docker run command for a long-lived, locked-down sandbox container"""
+        cmd = ['docker', 'run', '-d']
+        cmd.extend(SandboxConfig.DOCKER_SECURITY_OPTIONS)
+        cmd.extend(['--memory', SandboxConfig.MAX_MEMORY])
+        cmd.extend(['--cpus', SandboxConfig.MAX_CPU])
+        cmd.extend(['--user', SandboxConfig.DOCKER_USER])
+        cmd.extend(['--name', container_name])
+        cmd.extend(['-v', f"{workspace}:{SandboxConfig.WORKSPACE_PATH}:ro"])
+        cmd.append(self.docker_image)
+        cmd.extend(self.KEEP_ALIVE_COMMAND)
+        return cmd
+
+    def _build_exec_command(self, container: PooledContainer) -> List[str]:
+        """Docker exec command running the workspace program as the sandbox user"""
+        return [
+            'docker', 'exec',
+            '--user', SandboxConfig.DOCKER_USER,
+            container.name,
+            f"{SandboxConfig.WORKSPACE_PATH}/program"
+        ]
+
+    def _start_container(self) -> Optional[PooledContainer]:
+        """Start a new sandbox container with its own workspace directory"""
+        name = f"{SandboxConfig.CONTAINER_NAME_PREFIX}pool_{uuid.uuid4().hex[:8]}"
+        workspace = tempfile.mkdtemp(prefix=f"{name}_", dir=self.workspace_root)
+
+        try:
+            result = subprocess.run(
+                self._build_run_command(name, workspace),
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip())
+            return PooledContainer(name, workspace, self._container_cgroup(name))
+        except Exception as e:
+            logger.warning(f"Failed to start sandbox container: {e}")
+            with self._lock:
+                self.start_failures += 1
+            shutil.rmtree(workspace, ignore_errors=True)
+            return None
+
+    def _container_cgroup(self, name: str) -> Optional[str]:
+        """cgroup of a running container; None if the daemon's hierarchy is not ours"""
+        try:
+            result = subprocess.run(['docker', 'inspect', '--format', '{{.State.Pid}}', name],
+                                    capture_output=True, text=True, timeout=10)
+            pid = int(result.stdout.strip())
+        except Exception:
+            return None
+        return cgroup_of(pid) if pid > 0 else None
+
+    def _kill_programs(self, container: PooledContainer) -> None:
+        """Kill the sandbox user's processes in a container"""
+        try:
+            subprocess.run(['docker', 'exec', '--user', SandboxConfig.DOCKER_USER,
+                            container.name, '/bin/sh', '-c', self.KILL_SCRIPT],
+                           capture_output=True, timeout=5)
+        except Exception as e:
+            logger.warning(f"Failed to kill programs in sandbox container {container.name}: {e}")
+
+    def _reset_container(self, container: PooledContainer) -> bool:
+        """Kill leftover user processes, wipe tmpfs and the workspace"""
+        try:
+            result = subprocess.run(
+                ['docker', 'exec', '--user', SandboxConfig.DOCKER_USER,
+                 container.name, '/bin/sh', '-c', self.RESET_SCRIPT],
+                capture_output=True,
+                timeout=5
+            )
+            if result.returncode != 0:
+                return False
+
+            for entry in os.listdir(container.workspace):
+                path = os.path.join(container.workspace, entry)
+                if os.path.isdir(path) and not os.path.islink(path):
+                    shutil.rmtree(path)
+                else:
+                    os.unlink(path)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to reset sandbox container {container.name}: {e}")
+            return False
+
+    def _destroy_container(self, container: PooledContainer) -> None:
+        """Force-remove a container and its workspace"""
+        try:
+            subprocess.run(['docker', 'rm', '-f', container.name], capture_output=True, timeout=10)
+        except Exception as e:
+            logger.warning(f"Failed to remove sandbox container {container.name}: {e}")
+        shutil.rmtree(container.workspace, ignore_errors=True)
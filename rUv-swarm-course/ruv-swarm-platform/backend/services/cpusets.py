@@ -0,0 +1,87 @@
+"""
+CPU Sets for Execution Slots
+Binds an execution slot to dedicated CPUs. `MAX_CPU` only caps how much CPU
+time a sandbox gets; the scheduler still moves it across every core, next to
+unrelated runs, which makes timing-sensitive exercises noisy. A pinned slot
+thread runs on its own CPUs, and so does everything it starts: the compiler
+and the namespace sandbox inherit the thread's affinity, and the Docker
+backend passes the same CPUs to `docker run --cpuset-cpus`.
+"""
+
+import os
+from contextvars import ContextVar
+from typing import FrozenSet, Iterable, List, Optional
+
+_pinned_cpus: ContextVar[Optional[FrozenSet[int]]] = ContextVar("pinned_cpus", default=None)
+
+
+def parse_cpu_list(spec: str) -> List[int]:
+    """CPUs of a Linux cpu list such as "0-3,6"; an empty string means none"""
+    cpus = set()
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        first, _, last = item.partition('-')
+        start, end = int(first), int(last or first)
+        if start < 0 or end < start:
+            raise ValueError(f"Invalid CPU range: {item}")
+        cpus.update(range(start, end + 1))
+    return sorted(cpus)
+
+
+def format_cpu_list(cpus: Iterable[int]) -> str:
+    """Compact cpu list ("0-3,6"), as taken by taskset and --cpuset-cpus"""
+    ranges: List[List[int]] = []
+    for cpu in sorted(set(cpus)):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def available_cpus() -> List[int]:
+    """CPUs this process may run on"""
+    return sorted(os.sched_getaffinity(0))
+
+
+def pin_current_thread(cpus: Iterable[int]) -> FrozenSet[int]:
+    """Restrict the calling thread, and processes it starts from now on, to `cpus`.
+
+    Only the calling thread is affected; other threads of the process keep
+    their affinity. Raises ValueError for CPUs the process may not use.
+    """
+    cpus = frozenset(cpus)
+    outside = cpus - set(available_cpus())
+    if not cpus or outside:
+        raise ValueError(f"Cannot pin to CPUs {format_cpu_list(cpus) or '(none)'}: "
+                         f"available are {format_cpu_list(available_cpus())}")
+    os.sched_setaffinity(0, cpus)  # pid 0 is the calling thread
+    _pinned_cpus.set(cpus)
+    return cpus
+
+
+def pinned_cpus() -> Optional[FrozenSet[int]]:
+    """CPUs the current thread was pinned to with pin_current_thread(), if any"""
+    return _pinned_cpus.get()
+
+
+def slot_cpus(cpus: List[int], slots: int) -> List[FrozenSet[int]]:
+    """Split `cpus` between `slots` execution slots.
+
+    With at least as many CPUs as slots each slot gets its own share; with
+    fewer, slots take turns on single CPUs, so no CPU is left idle but two
+    slots may share one.
+    """
+    if not cpus or slots <= 0:
+        return []
+    if slots >= len(cpus):
+        return [frozenset([cpus[i % len(cpus)]]) for i in range(slots)]
+    share, extra = divmod(len(cpus), slots)
+    result, start = [], 0
+    for i in range(slots):
+        size = share + (1 if i < extra else 0)
+        result.append(frozenset(cpus[start:start + size]))
+        start += size
+    return result
@@ -0,0 +1,262 @@
+"""
+Speculative Draft Compilation
+The editor posts debounced drafts of the code being typed; they are compiled
+in the background and the binaries stored in the compilation cache, so when
+the student finally clicks Run the build is usually done already.
+
+Drafts never compete with real runs: gcc runs with the idle scheduling policy
+(or nice 19 where that is not allowed), no draft starts while the execution
+scheduler has runs waiting, each user has a small cap of live drafts, and a
+newer draft of the same document kills the compile of the one it supersedes.
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+import logging
+
+from sandbox_config import SandboxConfig
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATES = {"cached", "failed", "superseded", "dropped"}
+FINISHED_KEEP = 1000  # Finished drafts remembered for status()
+IDLE_RETRY = 0.05  # Seconds before drafts held back by real runs are tried again
+
+
+def idle_priority() -> None:
+    """preexec_fn that puts a compiler process in the idle scheduling class"""
+    try:
+        os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+    except (AttributeError, OSError):
+        pass
+    os.nice(19)
+
+
+class Draft:
+    """One posted draft and where it is in the pipeline"""
+
+    def __init__(self, draft_id: str, user_id: str, document: str, code: str, cache_key: str):
+        self.id = draft_id
+        self.user_id = user_id
+        self.document = document
+        self.code = code
+        self.cache_key = cache_key
+        self.state = "queued"
+        self.error: Optional[str] = None
+        self.submitted_at = time.monotonic()
+        self.compile_ms: Optional[float] = None
+        self.process: Optional[asyncio.subprocess.Process] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "draft_id": self.id,
+            "document": self.document,
+            "state": self.state,
+            "error": self.error,
+            "compile_ms": self.compile_ms,
+        }
+
+
+class DraftCompiler:
+    """Compiles drafts ahead of Run to warm `executor.compile_cache`.
+
+    The compile command and cache key are the executor's own, so a draft's
+    binary is exactly the one a later run of the same code looks up. A user
+    has at most `max_per_user` live drafts, one per document; a new draft
+    replaces the document's previous one, and beyond the cap the user's
+    oldest draft is dropped. Must be used from a single event loop.
+    """
+
+    def __init__(self, executor, scheduler=None,
+                 max_per_user: int = SandboxConfig.DRAFT_MAX_PER_USER,
+                 concurrency: int = SandboxConfig.DRAFT_CONCURRENCY):
+        if executor.compile_cache is None:
+            raise ValueError("Draft compilation needs an executor with a compile cache")
+        self.executor = executor
+        self.scheduler = scheduler
+        self.max_per_user = max_per_user
+        self.concurrency = concurrency
+
+        self._ids = itertools.count(1)
+        self._queue: Deque[Draft] = deque()
+        self._live: Dict[Tuple[str, str], Draft] = {}  # (user, document) -> queued or compiling draft
+        self._finished: "OrderedDict[str, Draft]" = OrderedDict()
+        self._tasks = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        # Metrics
+        self.submitted = 0
+        self.compiled = 0
+        self.already_cached = 0
+        self.failed = 0
+        self.rejected = 0
+        self.superseded = 0
+        self.dropped = 0
+        self.killed = 0  # Superseded or dropped while gcc was running
+        self.deferred = 0  # Dispatches held back because real runs were waiting
+
+    async def submit(self, user_id: str, code: str, document: str = "main") -> Dict[str, Any]:
+        """Accept a draft; returns its id and state without waiting for the compile"""
+        self.submitted += 1
+        draft_id = f"d{next(self._ids)}"
+        self._retire(self._live.get((user_id, document)), "superseded")
+
+        is_valid, error = self.executor.validate_code(code)
+        if not is_valid:
+            # Run would reject it too; nothing worth compiling
+            self.rejected += 1
+            return {"draft_id": draft_id, "document": document, "state": "rejected", "error": error}
+
+        draft = Draft(draft_id, user_id, document, code, self.executor._compile_cache_key(code))
+        if self.executor.compile_cache.contains(draft.cache_key):
+            self.already_cached += 1
+            self._finish(draft, "cached")
+            return draft.to_dict()
+
+        user_drafts = [d for (user, _), d in self._live.items() if user == user_id]
+        if len(user_drafts) >= self.max_per_user:
+            self._retire(min(user_drafts, key=lambda d: d.submitted_at), "dropped")
+        self._live[(user_id, document)] = draft
+        self._queue.append(draft)
+        self._dispatch()
+        return draft.to_dict()
+
+    def status(self, draft_id: str) -> Optional[Dict[str, Any]]:
+        """State of a live or recently finished draft"""
+        draft = self._finished.get(draft_id)
+        if draft is None:
+            draft = next((d for d in self._live.values() if d.id == draft_id), None)
+        return draft.to_dict() if draft is not None else None
+
+    def cancel_user(self, user_id: str) -> int:
+        """Drop every live draft of a user, e.g. when they leave the editor"""
+        drafts = [d for (user, _), d in self._live.items() if user == user_id]
+        for draft in drafts:
+            self._retire(draft, "dropped")
+        return len(drafts)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._queue),
+            "compiling": len(self._tasks),
+            "submitted": self.submitted,
+            "compiled": self.compiled,
+            "already_cached": self.already_cached,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "superseded": self.superseded,
+            "dropped": self.dropped,
+            "killed": self.killed,
+            "deferred": self.deferred,
+        }
+
+    async def shutdown(self) -> None:
+        """Drop queued drafts and stop the compiles in progress"""
+        for draft in list(self._live.values()):
+            self._retire(draft, "dropped")
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _real_runs_waiting(self) -> bool:
+        if self.scheduler is None:
+            return False
+        return any(lane.queued for lane in self.scheduler.lanes.values())
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._queue and len(self._tasks) < self.concurrency:
+            if self._real_runs_waiting():
+                self.deferred += 1
+                self._timer = asyncio.get_running_loop().call_later(IDLE_RETRY, self._dispatch)
+                return
+            draft = self._queue.popleft()
+            draft.state = "compiling"
+            task = asyncio.get_running_loop().create_task(self._compile(draft))
+            self._tasks.add(task)
+            task.add_done_callback(self._compile_done)
+
+    def _compile_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Draft compilation crashed: {task.exception()}")
+        self._dispatch()
+
+    async def _compile(self, draft: Draft) -> None:
+        temp_dir = await asyncio.to_thread(self.executor._acquire_workspace)
+        try:
+            source_file = os.path.join(temp_dir, "program.c")
+            output_file = os.path.join(temp_dir, "program")
+            with open(source_file, 'w') as f:
+                f.write(draft.code)
+            pch_flags = await asyncio.to_thread(self.executor._precompiled_header_flags, draft.code)
+            if draft.state != "compiling":
+                return
+            compile_cmd = self.executor._build_compile_command(source_file, output_file, pch_flags)
+
+            start = time.perf_counter()
+            draft.process = await asyncio.create_subprocess_exec(
+                *compile_cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=temp_dir,
+                preexec_fn=idle_priority
+            )
+            if draft.state != "compiling":
+                draft.process.kill()  # Retired while gcc was starting
+            try:
+                _, stderr = await asyncio.wait_for(draft.process.communicate(),
+                                                   timeout=self.executor.COMPILATION_TIMEOUT)
+            except asyncio.TimeoutError:
+                draft.process.kill()
+                await draft.process.wait()
+                self._finish(draft, "failed", "Compilation timeout exceeded")
+                return
+            draft.compile_ms = round((time.perf_counter() - start) * 1000, 3)
+
+            if draft.state != "compiling":
+                return  # Superseded or dropped; the process was killed
+            if draft.process.returncode != 0:
+                error = stderr.decode(errors='replace')[:self.executor.MAX_OUTPUT_SIZE]
+                self._finish(draft, "failed", f"Compilation failed:\n{error}")
+                return
+            self.executor._store_compiled(draft.cache_key, output_file)
+            self._finish(draft, "cached")
+        finally:
+            draft.process = None
+            await self.executor._release_workspace_async(temp_dir)
+
+    def _retire(self, draft: Optional[Draft], state: str) -> None:
+        """Take a live draft out of the pipeline, killing its compile if one is running"""
+        if draft is None or draft.state in FINISHED_STATES:
+            return
+        if draft.state == "queued":
+            self._queue.remove(draft)
+        elif draft.process is not None and draft.process.returncode is None:
+            draft.process.kill()
+            self.killed += 1
+        if state == "superseded":
+            self.superseded += 1
+        else:
+            self.dropped += 1
+        self._finish(draft, state)
+
+    def _finish(self, draft: Draft, state: str, error: Optional[str] = None) -> None:
+        draft.state = state
+        draft.error = error
+        if state == "cached" and draft.compile_ms is not None:
+            self.compiled += 1
+        elif state == "failed":
+            self.failed += 1
+        if self._live.get((draft.user_id, draft.document)) is draft:
+            del self._live[(draft.user_id, draft.document)]
+        draft.code = ""  # Finished drafts are kept for status() only
+        self._finished[draft.id] = draft
+        while len(self._finished) > FINISHED_KEEP:
+            self._finished.popitem(last=False)
@@ -0,0 +1,423 @@
+"""
+Weighted Fair-Share Execution Scheduler
+Admits runs to a fixed number of execution slots. Runs wait in one of three
+lanes (interactive run, graded submit, background regrade) that share the
+slots in proportion to their weights; inside a lane, users take turns so one
+student resubmitting in a loop cannot starve the rest of the class. Runs of
+the user-facing lanes are also paced by SandboxConfig.RATE_LIMIT_PER_USER and
+RATE_LIMIT_GLOBAL (executions per minute).
+
+Runs started with an execution id can be cancelled while they wait or run;
+the slot is released as soon as the run's task has stopped its sandbox.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import aclosing, asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
+import logging
+
+from cancellation import cancelled_result
+from sandbox_config import SandboxConfig
+
+logger = logging.getLogger(__name__)
+
+LANES = ("interactive", "submit", "regrade")
+# Bulk regrades are paced by their lane weight alone
+RATE_LIMITED_LANES = {"interactive", "submit"}
+WAIT_SAMPLES = 1000
+
+
+class SchedulerFull(Exception):
+    """Raised when a user already has the maximum number of queued runs"""
+
+
+def parse_lane_weights(spec: str) -> Dict[str, float]:
+    """Lane weights from a "lane=weight,..." string; unlisted lanes get weight 1"""
+    weights = {lane: 1.0 for lane in LANES}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        lane, _, weight = item.partition('=')
+        lane = lane.strip()
+        if lane not in weights:
+            raise ValueError(f"Unknown scheduler lane: {lane}")
+        weights[lane] = float(weight)
+        if weights[lane] <= 0:
+            raise ValueError(f"Lane weight must be positive: {item.strip()}")
+    return weights
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+class TokenBucket:
+    """Allows `rate` events per minute with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, now: float = 0.0):
+        self.rate = rate / 60.0
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= 1.0
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1.0
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until the next token is available"""
+        self._refill(now)
+        return max(0.0, (1.0 - self.tokens) / self.rate) if self.rate > 0 else float('inf')
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class Ticket:
+    """A queued request for an execution slot"""
+
+    def __init__(self, user_id: str, lane: str, future: asyncio.Future, enqueued_at: float):
+        self.user_id = user_id
+        self.lane = lane
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+
+class Lane:
+    """Per-user FIFO queues served round-robin, plus wait-time samples"""
+
+    def __init__(self, name: str, weight: float):
+        self.name = name
+        self.weight = weight
+        self.rate_limited = name in RATE_LIMITED_LANES
+        self.queues: Dict[str, Deque[Ticket]] = {}
+        self.turns: Deque[str] = deque()  # Users with queued runs, next one first
+        self.pass_value = 0.0  # Stride scheduling position; lowest goes next
+        self.queued = 0
+        self.dispatched = 0
+        self.waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def push(self, ticket: Ticket) -> None:
+        queue = self.queues.get(ticket.user_id)
+        if queue is None:
+            queue = self.queues[ticket.user_id] = deque()
+            self.turns.append(ticket.user_id)
+        queue.append(ticket)
+        self.queued += 1
+
+    def remove(self, ticket: Ticket) -> None:
+        queue = self.queues.get(ticket.user_id)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        self.queued -= 1
+        if not queue:
+            del self.queues[ticket.user_id]
+            self.turns.remove(ticket.user_id)
+
+    def pop(self, eligible: Callable[[str], bool]) -> Optional[Ticket]:
+        """Oldest run of the next user in turn that `eligible` accepts"""
+        for _ in range(len(self.turns)):
+            user_id = self.turns[0]
+            self.turns.rotate(-1)
+            if not eligible(user_id):
+                continue
+            queue = self.queues[user_id]
+            ticket = queue.popleft()
+            self.queued -= 1
+            if not queue:
+                del self.queues[user_id]
+                self.turns.remove(user_id)
+            return ticket
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        ordered = sorted(self.waits)
+        return {
+            "weight": self.weight,
+            "queued": self.queued,
+            "waiting_users": len(self.queues),
+            "dispatched": self.dispatched,
+            "wait_ms": {
+                "p50": round(percentile(ordered, 0.50) * 1000, 1),
+                "p95": round(percentile(ordered, 0.95) * 1000, 1),
+                "p99": round(percentile(ordered, 0.99) * 1000, 1),
+                "max": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+            },
+        }
+
+
+class ExecutionScheduler:
+    """Hands out execution slots by lane weight, user turn and rate limits.
+
+    Lanes are served by stride scheduling: each dispatch advances the
+    lane's pass by 1/weight and the lane with the lowest pass goes next, so
+    with weights 6:3:1 a saturated scheduler starts six interactive runs for
+    every three submits and one regrade, while an idle lane's share goes to
+    the others. A lane that was empty re-enters at the current pass and
+    cannot bank credit while idle.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(self, executor=None,
+                 slots: int = SandboxConfig.SCHEDULER_SLOTS,
+                 lane_weights: Optional[Dict[str, float]] = None,
+                 per_user_rate: float = SandboxConfig.RATE_LIMIT_PER_USER,
+                 global_rate: float = SandboxConfig.RATE_LIMIT_GLOBAL,
+                 max_queued_per_user: int = SandboxConfig.SCHEDULER_MAX_QUEUED_PER_USER,
+                 clock: Callable[[], float] = time.monotonic):
+        if lane_weights is None:
+            lane_weights = parse_lane_weights(SandboxConfig.SCHEDULER_LANE_WEIGHTS)
+        self.executor = executor
+        self.slots = slots
+        self.per_user_rate = per_user_rate
+        self.max_queued_per_user = max_queued_per_user
+        self.clock = clock
+        self.lanes = {name: Lane(name, lane_weights.get(name, 1.0)) for name in LANES}
+        self.global_bucket = TokenBucket(global_rate, now=clock())
+        self.user_buckets: Dict[str, TokenBucket] = {}
+        self.queued_by_user: Dict[str, int] = {}
+        self.busy = 0
+        self._virtual_time = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._executions: Dict[str, asyncio.Task] = {}  # Execution id -> task running it
+        self._started = set()  # Ids of executions that were granted a slot
+
+        # Metrics
+        self.rejected = 0
+        self.rate_limit_stalls = 0  # Dispatches that left slots idle to respect a rate
+        self.cancelled = 0  # Runs cancelled by id
+        self.disconnected = 0  # Streams whose client went away mid-run
+
+    async def acquire(self, user_id: str, lane: str = "interactive") -> None:
+        """Wait for an execution slot; pair with release()"""
+        if lane not in self.lanes:
+            raise ValueError(f"Unknown scheduler lane: {lane}")
+        if self.queued_by_user.get(user_id, 0) >= self.max_queued_per_user:
+            self.rejected += 1
+            logger.info(f"Rejected {lane} run of user {user_id}: queue full")
+            raise SchedulerFull(f"Too many queued runs for user {user_id}")
+
+        queue = self.lanes[lane]
+        if not queue.queued:
+            queue.pass_value = max(queue.pass_value, self._virtual_time)
+        ticket = Ticket(user_id, lane, asyncio.get_running_loop().create_future(), self.clock())
+        queue.push(ticket)
+        self.queued_by_user[user_id] = self.queued_by_user.get(user_id, 0) + 1
+        self._dispatch()
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                self.release()  # Granted just as the waiter was cancelled
+            else:
+                queue.remove(ticket)
+                self._forget(user_id)
+            raise
+
+    def release(self) -> None:
+        """Return a slot taken by acquire()"""
+        self.busy -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user_id: str, lane: str = "interactive") -> AsyncIterator[None]:
+        await self.acquire(user_id, lane)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def execute(self, code: str, user_id: str, lane: str = "interactive",
+                      execution_id: Optional[str] = None) -> Dict[str, Any]:
+        """Run code through the executor once a slot is granted.
+
+        With an `execution_id`, cancel() stops the run, queued or in progress,
+        and this returns a cancelled result. Cancelling the caller stops the
+        run as well.
+        """
+        task = self._track(execution_id, self._execute(code, user_id, lane, execution_id))
+        try:
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            stage = self._untrack(execution_id)
+        if task.cancelled():
+            return cancelled_result(stage)
+        return task.result()
+
+    async def stream(self, code: str, user_id: str, lane: str = "interactive",
+                     execution_id: Optional[str] = None, debug: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming execute(), yielding the events of the executor's execute_code_stream().
+
+        Closing the generator early, as web frameworks do when the client of
+        a streaming response disconnects, cancels the run. A run cancelled
+        by id ends with a cancelled ``verdict`` event.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def produce():
+            async with self.slot(user_id, lane):
+                if execution_id is not None:
+                    self._started.add(execution_id)
+                async with aclosing(self.executor.execute_code_stream(code, debug=debug)) as run:
+                    async for event in run:
+                        events.put_nowait(event)  # Bounded by the executor's output cap
+
+        task = self._track(execution_id, produce())
+        task.add_done_callback(lambda _: events.put_nowait(None))
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+        finally:
+            if not task.done():
+                task.cancel()
+                self.disconnected += 1
+                logger.info(f"Client of {lane} run of user {user_id} went away; run cancelled")
+            stage = self._untrack(execution_id)
+        if task.cancelled():
+            yield {"event": "verdict", **cancelled_result(stage)}
+        elif task.exception() is not None:
+            raise task.exception()
+
+    def cancel(self, execution_id: str) -> bool:
+        """Cancel a run started with this execution id; False if none is in progress.
+
+        A queued run leaves its lane; a running one has its process and
+        sandbox killed, and its slot goes to the next run once they are.
+        """
+        task = self._executions.get(execution_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        self.cancelled += 1
+        logger.info(f"Cancelled execution {execution_id}")
+        return True
+
+    async def _execute(self, code: str, user_id: str, lane: str, execution_id: Optional[str]) -> Dict[str, Any]:
+        async with self.slot(user_id, lane):
+            if execution_id is not None:
+                self._started.add(execution_id)
+            return await self.executor.execute_code_async(code)
+
+    def _track(self, execution_id: Optional[str], coro) -> asyncio.Task:
+        """Run `coro` in a task that cancel(execution_id) can reach"""
+        if execution_id is not None and execution_id in self._executions:
+            coro.close()
+            raise ValueError(f"Execution {execution_id} is already in progress")
+        task = asyncio.get_running_loop().create_task(coro)
+        if execution_id is not None:
+            self._executions[execution_id] = task
+        return task
+
+    def _untrack(self, execution_id: Optional[str]) -> str:
+        """Stop tracking an execution; returns the stage it had reached"""
+        if execution_id is None:
+            return "execution"
+        del self._executions[execution_id]
+        if execution_id in self._started:
+            self._started.remove(execution_id)
+            return "execution"
+        return "queue"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "busy": self.busy,
+            "queued": sum(lane.queued for lane in self.lanes.values()),
+            "rejected": self.rejected,
+            "rate_limit_stalls": self.rate_limit_stalls,
+            "cancelled": self.cancelled,
+            "disconnected": self.disconnected,
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+        }
+
+    def _user_bucket(self, user_id: str, now: float) -> TokenBucket:
+        bucket = self.user_buckets.get(user_id)
+        if bucket is None:
+            bucket = self.user_buckets[user_id] = TokenBucket(self.per_user_rate, now=now)
+        return bucket
+
+    def _forget(self, user_id: str) -> None:
+        remaining = self.queued_by_user[user_id] - 1
+        if remaining:
+            self.queued_by_user[user_id] = remaining
+        else:
+            del self.queued_by_user[user_id]
+            # A full bucket carries no state worth keeping
+            bucket = self.user_buckets.get(user_id)
+            if bucket is not None and bucket.full(self.clock()):
+                del self.user_buckets[user_id]
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = self.clock()
+        while self.busy < self.slots:
+            ticket = self._next_ticket(now)
+            if ticket is None:
+                break
+            lane = self.lanes[ticket.lane]
+            lane.pass_value += 1.0 / lane.weight
+            lane.dispatched += 1
+            lane.waits.append(now - ticket.enqueued_at)
+            self._virtual_time = lane.pass_value
+            if lane.rate_limited:
+                self.global_bucket.take(now)
+                self._user_bucket(ticket.user_id, now).take(now)
+            self._forget(ticket.user_id)
+            self.busy += 1
+            ticket.future.set_result(None)
+
+        if self.busy < self.slots:
+            self._wake_when_rate_allows(now)
+
+    def _next_ticket(self, now: float) -> Optional[Ticket]:
+        global_ready = self.global_bucket.ready(now)
+        for lane in sorted(self.lanes.values(), key=lambda l: (l.pass_value, -l.weight)):
+            if not lane.queued:
+                continue
+            if not lane.rate_limited:
+                ticket = lane.pop(lambda user_id: True)
+            elif global_ready:
+                ticket = lane.pop(lambda user_id: self._user_bucket(user_id, now).ready(now))
+            else:
+                ticket = None
+            if ticket is not None:
+                return ticket
+        return None
+
+    def _wake_when_rate_allows(self, now: float) -> None:
+        """Retry dispatch once a rate-limited run could start"""
+        waits = []
+        for lane in self.lanes.values():
+            if lane.rate_limited and lane.queued:
+                user_wait = min(self._user_bucket(user_id, now).wait_time(now) for user_id in lane.queues)
+                waits.append(max(user_wait, self.global_bucket.wait_time(now)))
+        if not waits:
+            return
+        self.rate_limit_stalls += 1
+        delay = min(waits)
+        if delay != float('inf'):
+            self._timer = asyncio.get_running_loop().call_later(max(delay, 0.001), self._dispatch)
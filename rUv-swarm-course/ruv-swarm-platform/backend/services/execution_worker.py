@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Standalone Execution Worker
+Pulls runs from the execution job queue (job_queue.py), executes them with a
+local CodeExecutor and pushes the results back. Workers share nothing but the
+queue, so capacity is added by starting more of them, on this box or others,
+without touching the web tier.
+
+Usage:
+    python3 execution_worker.py [--queue URL] [--concurrency N]
+                                [--pool NAME] [--cpus LIST]
+                                [--workspace-pool] [--compile-cache DIR]
+
+A worker only claims jobs of its pools (languages or toolchains), and with
+--cpus each of its slots is pinned to its own share of those CPUs, e.g.
+
+    python3 execution_worker.py --pool c --cpus 2-7
+
+A job cancelled in the queue is killed within WORKER_CANCEL_POLL_INTERVAL
+seconds, freeing its slot for the next job.
+
+SIGTERM or Ctrl-C stops claiming jobs and exits once the runs in progress
+have finished. A worker that is killed outright loses its leases; their jobs
+go to other workers once the visibility timeout has passed.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+import logging
+
+from cancellation import CancelScope, cancel_scope
+from code_executor import CodeExecutor
+from cpusets import available_cpus, format_cpu_list, parse_cpu_list, pin_current_thread, slot_cpus
+from job_queue import Job, JobQueue, open_queue
+from sandbox_config import SandboxConfig
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 60  # Seconds between deletions of old finished jobs
+
+
+class ExecutionWorker:
+    """Runs queued jobs on `concurrency` threads, heartbeating their leases.
+
+    One heartbeat thread extends the lease of every job in progress a few
+    times per visibility timeout. A job whose lease was lost anyway (the
+    worker stalled past the timeout and another worker took the job) still
+    finishes, but its result is discarded by the queue.
+
+    Only jobs of `pools` are claimed. Given `cpus`, the slots are pinned to
+    disjoint shares of them and there is one slot per CPU unless
+    `concurrency` says otherwise.
+
+    The same thread checks every `cancel_poll_interval` seconds whether any
+    job in progress was cancelled, and kills its run through the slot's
+    CancelScope; the queue has already recorded the cancellation.
+    """
+
+    def __init__(self, queue: JobQueue, executor=None,
+                 concurrency: Optional[int] = None,
+                 pools: Sequence[str] = tuple(SandboxConfig.WORKER_POOLS.split(',')),
+                 cpus: Optional[List[int]] = None,
+                 worker_id: Optional[str] = None, poll_interval: float = 0.2,
+                 heartbeat_interval: Optional[float] = None,
+                 cancel_poll_interval: float = SandboxConfig.WORKER_CANCEL_POLL_INTERVAL,
+                 result_ttl: int = SandboxConfig.QUEUE_RESULT_TTL):
+        if cpus is None:
+            cpus = parse_cpu_list(SandboxConfig.WORKER_CPUS)
+        unavailable = set(cpus) - set(available_cpus())
+        if unavailable:
+            raise ValueError(f"CPUs {format_cpu_list(unavailable)} are not available to this process")
+        self.queue = queue
+        self.executor = executor or CodeExecutor()
+        self.concurrency = concurrency or len(cpus) or SandboxConfig.WORKER_CONCURRENCY
+        self.pools = tuple(pools)
+        self.cpus = cpus
+        self.slot_cpus = slot_cpus(cpus, self.concurrency)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval or queue.visibility_timeout / 3
+        self.cancel_poll_interval = min(cancel_poll_interval, self.heartbeat_interval)
+        self.result_ttl = result_ttl
+
+        self._active: Dict[str, Job] = {}
+        self._scopes: Dict[str, CancelScope] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._finished = threading.Event()  # Ends heartbeats once the slots are idle
+        self._threads = []
+
+        # Metrics
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.leases_lost = 0
+
+    def run_once(self, slot: int = 0) -> bool:
+        """Claim and run one job; False if there was none"""
+        job = self.queue.claim(f"{self.worker_id}/{slot}", self.pools)
+        if job is None:
+            return False
+        scope = CancelScope()
+        with self._lock:
+            self._active[job.id] = job
+            self._scopes[job.id] = scope
+        try:
+            try:
+                with cancel_scope(scope):
+                    result = self.executor.execute_code(job.payload["code"], debug=job.payload.get("debug", False))
+            except Exception as e:
+                logger.exception(f"Job {job.id} raised on attempt {job.attempt}")
+                succeeded, recorded = False, self.queue.fail(job, f"{type(e).__name__}: {e}")
+            else:
+                succeeded, recorded = True, scope.cancelled or self.queue.complete(job, result)
+        finally:
+            with self._lock:
+                del self._active[job.id]
+                del self._scopes[job.id]
+        with self._lock:
+            if scope.cancelled:
+                self.cancelled += 1
+            elif not recorded:
+                self.leases_lost += 1
+            elif succeeded:
+                self.completed += 1
+            else:
+                self.failed += 1
+        if scope.cancelled:
+            logger.info(f"Job {job.id} was cancelled")
+        elif not recorded:
+            logger.warning(f"Lease of job {job.id} was lost; its result was discarded")
+        return True
+
+    def start(self) -> None:
+        self._threads = [threading.Thread(target=self._heartbeat_loop, name="worker_heartbeat", daemon=True)]
+        for slot in range(self.concurrency):
+            self._threads.append(threading.Thread(target=self._run_loop, args=(slot,),
+                                                  name=f"worker_slot_{slot}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        pinning = f" on CPUs {format_cpu_list(self.cpus)}" if self.cpus else ""
+        logger.info(f"Execution worker {self.worker_id} started with {self.concurrency} slot(s) "
+                    f"for pools {','.join(self.pools)}{pinning}")
+
+    def stop(self, wait: bool = True) -> None:
+        """Stop claiming jobs; with `wait`, return once the runs in progress are done"""
+        self._stopping.set()
+        if wait:
+            for thread in self._threads[1:]:
+                thread.join()
+            self._finished.set()
+            self._threads[0].join()
+
+    def run(self) -> None:
+        """Run until stop() is called from another thread or a signal handler"""
+        self.start()
+        while not self._stopping.wait(1.0):
+            pass
+        self.stop()
+        logger.info(f"Execution worker {self.worker_id} stopped: {self.stats()}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "worker_id": self.worker_id,
+                "concurrency": self.concurrency,
+                "pools": list(self.pools),
+                "slot_cpus": [format_cpu_list(cpus) for cpus in self.slot_cpus],
+                "active": len(self._active),
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "leases_lost": self.leases_lost,
+            }
+
+    def _run_loop(self, slot: int) -> None:
+        if self.slot_cpus:
+            # The compiler and the sandbox inherit this thread's CPUs
+            pin_current_thread(self.slot_cpus[slot])
+        while not self._stopping.is_set():
+            try:
+                if self.run_once(slot):
+                    continue
+            except Exception:
+                logger.exception("Execution worker could not reach the job queue")
+            self._stopping.wait(self.poll_interval)
+
+    def _heartbeat_loop(self) -> None:
+        last_purge = last_heartbeat = time.monotonic()
+        while not self._finished.wait(self.cancel_poll_interval):
+            with self._lock:
+                jobs = list(self._active.values())
+            if jobs:
+                self._kill_cancelled(jobs)
+            if time.monotonic() - last_heartbeat < self.heartbeat_interval:
+                continue
+            last_heartbeat = time.monotonic()
+            for job in jobs:
+                try:
+                    if not self.queue.heartbeat(job):
+                        logger.warning(f"Heartbeat for job {job.id} found its lease gone")
+                except Exception:
+                    logger.exception(f"Heartbeat for job {job.id} failed")
+            if time.monotonic() - last_purge >= PURGE_INTERVAL:
+                last_purge = time.monotonic()
+                try:
+                    self.queue.purge(self.result_ttl)
+                except Exception:
+                    logger.exception("Could not purge finished jobs")
+
+    def _kill_cancelled(self, jobs: List[Job]) -> None:
+        try:
+            cancelled = self.queue.cancelled(job.id for job in jobs)
+        except Exception:
+            logger.exception("Could not check for cancelled jobs")
+            return
+        for job_id in cancelled:
+            with self._lock:
+                scope = self._scopes.get(job_id)
+            if scope is not None and scope.cancel():
+                logger.info(f"Killing run of cancelled job {job_id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--queue', default=SandboxConfig.EXECUTION_QUEUE_URL,
+                        help='job queue URL (default SANDBOX_EXECUTION_QUEUE_URL)')
+    parser.add_argument('--concurrency', type=int,
+                        help='runs executed at once (default one per CPU of --cpus, '
+                             'else SANDBOX_WORKER_CONCURRENCY)')
+    parser.add_argument('--pool', action='append',
+                        help='pool to claim jobs from, may be repeated (default SANDBOX_WORKER_POOLS)')
+    parser.add_argument('--cpus', default=SandboxConfig.WORKER_CPUS,
+                        help='CPUs to pin the slots to, e.g. 2-7 (default SANDBOX_WORKER_CPUS)')
+    parser.add_argument('--worker-id', help='name in job leases (default host:pid)')
+    parser.add_argument('--workspace-pool', action='store_true', help='run with a WorkspacePool')
+    parser.add_argument('--compile-cache', metavar='DIR', help='run with a CompilationCache in DIR')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=SandboxConfig.LOG_LEVEL, format=SandboxConfig.LOG_FORMAT)
+
+    options = {}
+    if args.workspace_pool:
+        from workspace_pool import WorkspacePool
+        options['workspace_pool'] = WorkspacePool()
+    if args.compile_cache:
+        from compile_cache import CompilationCache
+        options['compile_cache'] = CompilationCache(cache_dir=args.compile_cache)
+
+    queue = open_queue(args.queue)
+    worker = ExecutionWorker(queue, CodeExecutor(**options), concurrency=args.concurrency,
+                             pools=args.pool or SandboxConfig.WORKER_POOLS.split(','),
+                             cpus=parse_cpu_list(args.cpus), worker_id=args.worker_id)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: worker.stop(wait=False))
+    try:
+        worker.run()
+    finally:
+        if 'workspace_pool' in options:
+            options['workspace_pool'].shutdown()
+        queue.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,616 @@
+"""
+Durable Execution Job Queue
+Carries runs from the web tier to standalone execution workers
+(execution_worker.py) and their results back. The queue lives outside every
+process: a SQLite file by default, shared by the API and the workers on one
+box, or a Redis-compatible server (Redis, Valkey, KeyDB) when workers run on
+several boxes. Execution capacity grows by starting more workers; the web tier
+only needs the queue URL.
+
+A claimed job is leased to its worker for a visibility timeout, which the
+worker extends with heartbeats while the run is in progress. When a worker
+dies its heartbeats stop, the lease runs out and the next claim hands the job
+to another worker, up to the job's maximum number of attempts.
+
+Jobs are queued in pools named after their language or toolchain, and each
+worker only claims from the pools it serves, so workers can be partitioned
+(and pinned to their own CPUs) by the kind of run they do.
+
+A job can be cancelled by id. It is finished as "cancelled" at once, whether
+it was still queued or already running; its worker notices within a second,
+kills the run and moves on to the next job.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Set
+import logging
+
+from cancellation import cancelled_result
+from sandbox_config import SandboxConfig
+
+logger = logging.getLogger(__name__)
+
+STATES = ("queued", "running", "done", "failed", "cancelled")
+FINISHED_STATES = {"done", "failed", "cancelled"}
+DEFAULT_POOL = "c"  # CodeExecutor.LANGUAGE
+
+
+class Job:
+    """A job as claimed by a worker; `attempt` identifies this particular lease"""
+
+    def __init__(self, job_id: str, payload: Dict[str, Any], attempt: int, worker_id: str):
+        self.id = job_id
+        self.payload = payload
+        self.attempt = attempt
+        self.worker_id = worker_id
+
+    def __repr__(self):
+        return f"Job({self.id}, attempt={self.attempt}, worker={self.worker_id})"
+
+
+class JobQueue:
+    """Interface of a durable job queue with leased claims.
+
+    complete(), fail() and heartbeat() only act on the lease they are given:
+    once a lease has expired and the job was claimed again, the old worker's
+    calls return False and change nothing.
+    """
+
+    def __init__(self, visibility_timeout: float = SandboxConfig.QUEUE_VISIBILITY_TIMEOUT,
+                 max_attempts: int = SandboxConfig.QUEUE_MAX_ATTEMPTS,
+                 retry_delay: float = SandboxConfig.QUEUE_RETRY_DELAY):
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def enqueue(self, payload: Dict[str, Any], max_attempts: Optional[int] = None,
+                pool: str = DEFAULT_POOL) -> str:
+        """Add a job to a pool and return its id"""
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, pools: Sequence[str] = (DEFAULT_POOL,)) -> Optional[Job]:
+        """Lease the oldest available job of `pools` to `worker_id`, or None if there is none"""
+        raise NotImplementedError
+
+    def heartbeat(self, job: Job) -> bool:
+        """Extend a lease by the visibility timeout; False if the lease was lost"""
+        raise NotImplementedError
+
+    def complete(self, job: Job, result: Dict[str, Any]) -> bool:
+        """Store a job's result; False if the lease was lost"""
+        raise NotImplementedError
+
+    def fail(self, job: Job, error: str) -> bool:
+        """Give a job back after an error; it is retried while attempts remain"""
+        raise NotImplementedError
+
+    def cancel(self, job_id: str) -> bool:
+        """Finish a queued or running job as cancelled; False if it had already finished.
+
+        A running job's lease is revoked, so its worker's heartbeat,
+        complete() and fail() calls no longer count.
+        """
+        raise NotImplementedError
+
+    def cancelled(self, job_ids: Iterable[str]) -> Set[str]:
+        """Those of `job_ids` that have been cancelled, for workers to stop their runs"""
+        return {job_id for job_id in job_ids
+                if (self.get(job_id) or {}).get("state") == "cancelled"}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """State, attempts, result and error of a job"""
+        raise NotImplementedError
+
+    def purge(self, older_than: float) -> int:
+        """Delete jobs finished more than `older_than` seconds ago"""
+        return 0
+
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs in each state"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Poll until a job has finished; None if it has not after `timeout` seconds"""
+        deadline = time.monotonic() + timeout
+        interval = 0.01
+        while True:
+            job = self.get(job_id)
+            if job is None or job["state"] in FINISHED_STATES:
+                return job
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, 0.25)
+
+
+class SQLiteJobQueue(JobQueue):
+    """Job queue in a SQLite database file.
+
+    Every process opens the file itself; claims take SQLite's write lock
+    (BEGIN IMMEDIATE), so two workers never lease the same job. The file must
+    be on a local filesystem, as SQLite locking is unreliable over NFS; use
+    RedisJobQueue for workers on other boxes.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            pool TEXT NOT NULL DEFAULT 'c',
+            payload TEXT NOT NULL,
+            state TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            worker TEXT,
+            lease_expires REAL,
+            available_at REAL NOT NULL,
+            enqueued_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            result TEXT,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_by_pool ON jobs (state, pool, seq);
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time, **options):
+        super().__init__(**options)
+        self.path = path
+        self.clock = clock
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Autocommit mode; transactions are opened explicitly
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+            if columns and 'pool' not in columns:
+                # Queue files created before jobs had pools
+                self._db.execute("ALTER TABLE jobs ADD COLUMN pool TEXT NOT NULL DEFAULT 'c'")
+            self._db.executescript(self.SCHEMA)
+
+        # Metrics of this process
+        self.reclaimed = 0
+
+    def enqueue(self, payload: Dict[str, Any], max_attempts: Optional[int] = None,
+                pool: str = DEFAULT_POOL) -> str:
+        job_id = uuid.uuid4().hex
+        now = self.clock()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, pool, payload, state, max_attempts, available_at, enqueued_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, pool, json.dumps(payload), max_attempts or self.max_attempts, now, now)
+            )
+        return job_id
+
+    def claim(self, worker_id: str, pools: Sequence[str] = (DEFAULT_POOL,)) -> Optional[Job]:
+        now = self.clock()
+        placeholders = ", ".join("?" * len(pools))
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._reclaim_expired(now)
+                row = self._db.execute(
+                    "SELECT seq, id, payload, attempts FROM jobs "
+                    f"WHERE state = 'queued' AND pool IN ({placeholders}) AND available_at <= ? "
+                    "ORDER BY seq LIMIT 1",
+                    (*pools, now)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET state = 'running', attempts = attempts + 1, worker = ?, "
+                        "started_at = ?, lease_expires = ? WHERE seq = ?",
+                        (worker_id, now, now + self.visibility_timeout, row[0])
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return Job(row[1], json.loads(row[2]), row[3] + 1, worker_id)
+
+    def _reclaim_expired(self, now: float) -> None:
+        """Requeue jobs whose worker stopped heartbeating, or fail them when out of attempts"""
+        lost = self._db.execute(
+            "UPDATE jobs SET state = 'failed', error = 'Worker lost on attempt ' || attempts, "
+            "finished_at = ?, worker = NULL, lease_expires = NULL "
+            "WHERE state = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+            (now, now)
+        ).rowcount
+        requeued = self._db.execute(
+            "UPDATE jobs SET state = 'queued', worker = NULL, lease_expires = NULL, available_at = ? "
+            "WHERE state = 'running' AND lease_expires < ?",
+            (now, now)
+        ).rowcount
+        if lost or requeued:
+            self.reclaimed += lost + requeued
+            logger.warning(f"Reclaimed {lost + requeued} expired job lease(s); "
+                           f"{requeued} requeued, {lost} out of attempts")
+
+    def _update_lease(self, job: Job, assignments: str, params: tuple) -> bool:
+        with self._lock:
+            cursor = self._db.execute(
+                f"UPDATE jobs SET {assignments} "
+                "WHERE id = ? AND state = 'running' AND worker = ? AND attempts = ?",
+                params + (job.id, job.worker_id, job.attempt)
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job: Job) -> bool:
+        return self._update_lease(job, "lease_expires = ?", (self.clock() + self.visibility_timeout,))
+
+    def complete(self, job: Job, result: Dict[str, Any]) -> bool:
+        return self._update_lease(
+            job,
+            "state = 'done', result = ?, finished_at = ?, worker = NULL, lease_expires = NULL",
+            (json.dumps(result), self.clock())
+        )
+
+    def fail(self, job: Job, error: str) -> bool:
+        now = self.clock()
+        return self._update_lease(
+            job,
+            "state = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+            "finished_at = CASE WHEN attempts >= max_attempts THEN ? END, "
+            "error = ?, available_at = ?, worker = NULL, lease_expires = NULL",
+            (now, error, now + self.retry_delay * job.attempt)
+        )
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET state = 'cancelled', error = 'Cancelled', finished_at = ?, "
+                "worker = NULL, lease_expires = NULL "
+                "WHERE id = ? AND state IN ('queued', 'running')",
+                (self.clock(), job_id)
+            )
+        return cursor.rowcount == 1
+
+    def cancelled(self, job_ids: Iterable[str]) -> Set[str]:
+        job_ids = list(job_ids)
+        if not job_ids:
+            return set()
+        placeholders = ", ".join("?" * len(job_ids))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id FROM jobs WHERE state = 'cancelled' AND id IN ({placeholders})",
+                job_ids
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, pool, state, attempts, max_attempts, worker, enqueued_at, started_at, "
+                "finished_at, result, error FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "pool": row[1],
+            "state": row[2],
+            "attempts": row[3],
+            "max_attempts": row[4],
+            "worker": row[5],
+            "enqueued_at": row[6],
+            "started_at": row[7],
+            "finished_at": row[8],
+            "result": json.loads(row[9]) if row[9] is not None else None,
+            "error": row[10],
+        }
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM jobs WHERE state IN ('done', 'failed', 'cancelled') AND finished_at < ?",
+                (self.clock() - older_than,)
+            )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        counts = {state: 0 for state in STATES}
+        with self._lock:
+            for state, count in self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"):
+                counts[state] = count
+        return counts
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class RedisJobQueue(JobQueue):
+    """Job queue on a Redis-compatible server, for workers spread over several boxes.
+
+    Each job is a hash; ids wait in one list per pool, leased ids sit in a
+    sorted set scored by lease expiry and retries in a sorted set scored by
+    when they are due. Every state change is one Lua script, so it is atomic
+    on the server, and leases are timed by the server clock rather than the
+    workers'. The scripts reach job hashes and pool lists by name, so the
+    queue needs a single server rather than a Redis Cluster. Finished jobs
+    expire after `result_ttl` seconds.
+    """
+
+    _NOW = """
+        local t = redis.call('TIME')
+        local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    """
+
+    # KEYS: delayed, running, pending list of each pool claimed from.
+    # ARGV: job key prefix, worker, visibility timeout, result ttl, pending list prefix
+    _CLAIM = _NOW + """
+        -- Expired leases: requeue at the front, or fail when out of attempts
+        for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+            local key = ARGV[1] .. id
+            redis.call('ZREM', KEYS[2], id)
+            local attempts = tonumber(redis.call('HGET', key, 'attempts'))
+            if attempts >= tonumber(redis.call('HGET', key, 'max_attempts')) then
+                redis.call('HSET', key, 'state', 'failed', 'error', 'Worker lost on attempt ' .. attempts,
+                           'finished_at', now, 'worker', '')
+                redis.call('EXPIRE', key, ARGV[4])
+            else
+                redis.call('HSET', key, 'state', 'queued', 'worker', '')
+                redis.call('RPUSH', ARGV[5] .. redis.call('HGET', key, 'pool'), id)
+            end
+        end
+        -- Retries that are due
+        for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)) do
+            redis.call('ZREM', KEYS[1], id)
+            redis.call('LPUSH', ARGV[5] .. redis.call('HGET', ARGV[1] .. id, 'pool'), id)
+        end
+
+        local id = false
+        for i = 3, #KEYS do
+            id = redis.call('RPOP', KEYS[i])
+            if id then
+                break
+            end
+        end
+        if not id then
+            return false
+        end
+        local key = ARGV[1] .. id
+        local attempts = redis.call('HINCRBY', key, 'attempts', 1)
+        local expires = now + tonumber(ARGV[3])
+        redis.call('HSET', key, 'state', 'running', 'worker', ARGV[2], 'started_at', now,
+                   'lease_expires', expires)
+        redis.call('ZADD', KEYS[2], expires, id)
+        return {id, redis.call('HGET', key, 'payload'), attempts}
+    """
+
+    # KEYS: job, running. ARGV: id, worker, attempt, ...
+    _OWNS_LEASE = _NOW + """
+        if redis.call('HGET', KEYS[1], 'state') ~= 'running'
+                or redis.call('HGET', KEYS[1], 'worker') ~= ARGV[2]
+                or redis.call('HGET', KEYS[1], 'attempts') ~= ARGV[3] then
+            return 0
+        end
+    """
+
+    # ARGV[4]: visibility timeout
+    _HEARTBEAT = _OWNS_LEASE + """
+        local expires = now + tonumber(ARGV[4])
+        redis.call('HSET', KEYS[1], 'lease_expires', expires)
+        redis.call('ZADD', KEYS[2], expires, ARGV[1])
+        return 1
+    """
+
+    # ARGV[4]: result, ARGV[5]: result ttl
+    _COMPLETE = _OWNS_LEASE + """
+        redis.call('ZREM', KEYS[2], ARGV[1])
+        redis.call('HSET', KEYS[1], 'state', 'done', 'result', ARGV[4], 'finished_at', now, 'worker', '')
+        redis.call('EXPIRE', KEYS[1], ARGV[5])
+        return 1
+    """
+
+    # KEYS[3]: delayed. ARGV[4]: error, ARGV[5]: result ttl, ARGV[6]: retry delay
+    _FAIL = _OWNS_LEASE + """
+        redis.call('ZREM', KEYS[2], ARGV[1])
+        redis.call('HSET', KEYS[1], 'error', ARGV[4], 'worker', '')
+        if tonumber(ARGV[3]) >= tonumber(redis.call('HGET', KEYS[1], 'max_attempts')) then
+            redis.call('HSET', KEYS[1], 'state', 'failed', 'finished_at', now)
+            redis.call('EXPIRE', KEYS[1], ARGV[5])
+        else
+            redis.call('HSET', KEYS[1], 'state', 'queued')
+            redis.call('ZADD', KEYS[3], now + tonumber(ARGV[6]), ARGV[1])
+        end
+        return 1
+    """
+
+    # KEYS: job, running, delayed. ARGV: id, pending list prefix, result ttl
+    _CANCEL = _NOW + """
+        local state = redis.call('HGET', KEYS[1], 'state')
+        if state ~= 'queued' and state ~= 'running' then
+            return 0
+        end
+        redis.call('LREM', ARGV[2] .. redis.call('HGET', KEYS[1], 'pool'), 0, ARGV[1])
+        redis.call('ZREM', KEYS[2], ARGV[1])
+        redis.call('ZREM', KEYS[3], ARGV[1])
+        redis.call('HSET', KEYS[1], 'state', 'cancelled', 'error', 'Cancelled', 'finished_at', now, 'worker', '')
+        redis.call('EXPIRE', KEYS[1], ARGV[3])
+        return 1
+    """
+
+    def __init__(self, url: str, prefix: str = 'sandbox:jobs',
+                 result_ttl: int = SandboxConfig.QUEUE_RESULT_TTL, **options):
+        super().__init__(**options)
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The redis package is required for a redis:// execution queue") from e
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.result_ttl = result_ttl
+        self.pending_prefix = f"{prefix}:pending:"
+        self.delayed_key = f"{prefix}:delayed"
+        self.running_key = f"{prefix}:running"
+        self._claim = self.client.register_script(self._CLAIM)
+        self._heartbeat = self.client.register_script(self._HEARTBEAT)
+        self._complete = self.client.register_script(self._COMPLETE)
+        self._fail = self.client.register_script(self._FAIL)
+        self._cancel = self.client.register_script(self._CANCEL)
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    def enqueue(self, payload: Dict[str, Any], max_attempts: Optional[int] = None,
+                pool: str = DEFAULT_POOL) -> str:
+        job_id = uuid.uuid4().hex
+        pipe = self.client.pipeline()
+        pipe.hset(self._job_key(job_id), mapping={
+            "pool": pool,
+            "payload": json.dumps(payload),
+            "state": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts or self.max_attempts,
+            "enqueued_at": time.time(),
+        })
+        pipe.lpush(self.pending_prefix + pool, job_id)
+        pipe.execute()
+        return job_id
+
+    def claim(self, worker_id: str, pools: Sequence[str] = (DEFAULT_POOL,)) -> Optional[Job]:
+        pending = [self.pending_prefix + pool for pool in pools]
+        claimed = self._claim(keys=[self.delayed_key, self.running_key] + pending,
+                              args=[f"{self.prefix}:job:", worker_id, self.visibility_timeout,
+                                    self.result_ttl, self.pending_prefix])
+        if not claimed:
+            return None
+        job_id, payload, attempt = claimed
+        return Job(job_id, json.loads(payload), int(attempt), worker_id)
+
+    def _lease_args(self, job: Job) -> list:
+        return [job.id, job.worker_id, job.attempt]
+
+    def heartbeat(self, job: Job) -> bool:
+        return bool(self._heartbeat(keys=[self._job_key(job.id), self.running_key],
+                                    args=self._lease_args(job) + [self.visibility_timeout]))
+
+    def complete(self, job: Job, result: Dict[str, Any]) -> bool:
+        return bool(self._complete(keys=[self._job_key(job.id), self.running_key],
+                                   args=self._lease_args(job) + [json.dumps(result), self.result_ttl]))
+
+    def fail(self, job: Job, error: str) -> bool:
+        return bool(self._fail(keys=[self._job_key(job.id), self.running_key, self.delayed_key],
+                               args=self._lease_args(job) + [error, self.result_ttl,
+                                                             self.retry_delay * job.attempt]))
+
+    def cancel(self, job_id: str) -> bool:
+        return bool(self._cancel(keys=[self._job_key(job_id), self.running_key, self.delayed_key],
+                                 args=[job_id, self.pending_prefix, self.result_ttl]))
+
+    def cancelled(self, job_ids: Iterable[str]) -> Set[str]:
+        job_ids = list(job_ids)
+        pipe = self.client.pipeline()
+        for job_id in job_ids:
+            pipe.hget(self._job_key(job_id), 'state')
+        return {job_id for job_id, state in zip(job_ids, pipe.execute()) if state == 'cancelled'}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        fields = self.client.hgetall(self._job_key(job_id))
+        if not fields:
+            return None
+
+        def number(name):
+            return float(fields[name]) if fields.get(name) else None
+
+        return {
+            "id": job_id,
+            "pool": fields["pool"],
+            "state": fields["state"],
+            "attempts": int(fields["attempts"]),
+            "max_attempts": int(fields["max_attempts"]),
+            "worker": fields.get("worker") or None,
+            "enqueued_at": number("enqueued_at"),
+            "started_at": number("started_at"),
+            "finished_at": number("finished_at"),
+            "result": json.loads(fields["result"]) if fields.get("result") else None,
+            "error": fields.get("error"),
+        }
+
+    def stats(self) -> Dict[str, int]:
+        pending_keys = list(self.client.scan_iter(match=self.pending_prefix + "*"))
+        pipe = self.client.pipeline()
+        for key in pending_keys:
+            pipe.llen(key)
+        pipe.zcard(self.delayed_key)
+        pipe.zcard(self.running_key)
+        *pending, delayed, running = pipe.execute()
+        # Finished jobs are only kept until they expire, so they are not counted
+        return {"queued": sum(pending) + delayed, "running": running}
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def open_queue(url: str = SandboxConfig.EXECUTION_QUEUE_URL, **options) -> JobQueue:
+    """Queue for a URL: sqlite:///relative.db, sqlite:////absolute.db or redis://host:port/db"""
+    if url.startswith('sqlite:///'):
+        return SQLiteJobQueue(url[len('sqlite:///'):], **options)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisJobQueue(url, **options)
+    raise ValueError(f"Unsupported execution queue URL: {url}")
+
+
+class QueuedExecutor:
+    """Stands in for CodeExecutor in the web tier, running code on execution workers.
+
+    It can be handed to ExecutionScheduler in place of a local executor, so
+    fair-share admission stays in the API process while the runs themselves
+    happen wherever workers are started. Cancelling an async call cancels
+    its job, so ExecutionScheduler.cancel() reaches the worker's sandbox.
+    """
+
+    def __init__(self, queue: JobQueue, timeout: float = SandboxConfig.QUEUE_RESULT_TIMEOUT,
+                 pool: str = DEFAULT_POOL):
+        self.queue = queue
+        self.timeout = timeout
+        self.pool = pool
+
+    @staticmethod
+    def _job_result(job: Optional[Dict[str, Any]]) -> Dict[str, any]:
+        if job is None:
+            return {"success": False, "error": "Timed out waiting for an execution worker", "stage": "queue"}
+        if job["state"] == "failed":
+            return {"success": False, "error": f"Execution failed: {job['error']}", "stage": "queue"}
+        if job["state"] == "cancelled":
+            return cancelled_result("queue")
+        return job["result"]
+
+    def execute_code(self, code: str, debug: bool = False) -> Dict[str, any]:
+        job_id = self.queue.enqueue({"code": code, "debug": debug}, pool=self.pool)
+        return self._job_result(self.queue.wait(job_id, self.timeout))
+
+    async def execute_code_async(self, code: str, debug: bool = False) -> Dict[str, any]:
+        job_id = await asyncio.to_thread(self.queue.enqueue, {"code": code, "debug": debug}, pool=self.pool)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        interval = 0.01
+        try:
+            while True:
+                job = await asyncio.to_thread(self.queue.get, job_id)
+                if job is None or job["state"] in FINISHED_STATES:
+                    return self._job_result(job)
+                if loop.time() >= deadline:
+                    return self._job_result(None)
+                await asyncio.sleep(interval)
+                interval = min(interval * 2, 0.25)
+        except asyncio.CancelledError:
+            await asyncio.shield(asyncio.to_thread(self.queue.cancel, job_id))
+            raise
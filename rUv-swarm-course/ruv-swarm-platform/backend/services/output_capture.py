@@ -0,0 +1,264 @@
+"""
+Bounded Output Capture
+Reads a sandboxed process's stdout and stderr incrementally into fixed-size
+head + tail buffers, so the API worker's memory stays flat however much the
+submission prints. A process whose combined output passes the kill limit is
+killed at once and reported as output-limited instead of being drained to
+its timeout. A synchronous capture is also killed when the calling thread's
+CancelScope is cancelled.
+"""
+
+import asyncio
+import os
+import selectors
+import subprocess
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from cancellation import current_scope, on_cancel
+from run_cgroups import start_process, start_process_async
+
+READ_CHUNK_SIZE = 64 * 1024
+TRUNCATION_MARKER = "\n... ({} bytes truncated) ...\n"
+
+
+class HeadTailBuffer:
+    """Keeps the first and last `limit / 2` bytes written to it"""
+
+    def __init__(self, limit: int):
+        self.head_size = limit // 2
+        self.tail_size = limit - self.head_size
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, data: bytes) -> bytes:
+        """Record a chunk; returns the part of it that went into the head"""
+        self.total += len(data)
+        kept = b""
+        room = self.head_size - len(self.head)
+        if room > 0:
+            kept = data[:room]
+            self.head += kept
+            data = data[room:]
+        if data:
+            self.tail += data
+            # Deleting from the front of a bytearray does not copy the rest
+            excess = len(self.tail) - self.tail_size
+            if excess > 0:
+                del self.tail[:excess]
+        return kept
+
+    @property
+    def omitted(self) -> int:
+        return self.total - len(self.head) - len(self.tail)
+
+    def getvalue(self) -> str:
+        """Captured text, with a marker where bytes were dropped"""
+        if not self.omitted:
+            return bytes(self.head + self.tail).decode("utf-8", errors="replace")
+        return (self.head.decode("utf-8", errors="replace")
+                + TRUNCATION_MARKER.format(self.omitted)
+                + self.tail_text())
+
+    def tail_text(self) -> str:
+        """The tail as text, after bytes were dropped before it"""
+        tail = bytes(self.tail)
+        # Drop a character cut in half at the start of the tail
+        start = 0
+        while start < min(3, len(tail)) and tail[start] & 0xC0 == 0x80:
+            start += 1
+        return tail[start:].decode("utf-8", errors="replace")
+
+
+class OutputCapture:
+    """stdout and stderr buffers plus the combined kill limit"""
+
+    def __init__(self, limit: int, kill_after: int):
+        self.buffers = {"stdout": HeadTailBuffer(limit), "stderr": HeadTailBuffer(limit)}
+        self.kill_after = kill_after
+        self.total = 0
+        self.reason: Optional[str] = None  # "timeout", "output_limit" or "cancelled"
+
+    def feed(self, name: str, data: bytes) -> bool:
+        """Record a chunk; returns False once the kill limit has been passed"""
+        self.total += len(data)
+        self.buffers[name].write(data)
+        return self._check_limit()
+
+    def feed_head(self, name: str, data: bytes) -> bytes:
+        """Record a chunk; returns the part of it that went into the stream's head"""
+        self.total += len(data)
+        kept = self.buffers[name].write(data)
+        self._check_limit()
+        return kept
+
+    def _check_limit(self) -> bool:
+        if self.total > self.kill_after:
+            self.reason = "output_limit"
+            return False
+        return True
+
+    def result(self, returncode: Optional[int]) -> "CapturedOutput":
+        return CapturedOutput(
+            returncode=returncode,
+            stdout=self.buffers["stdout"].getvalue(),
+            stderr=self.buffers["stderr"].getvalue(),
+            reason=self.reason,
+            output_bytes=self.total
+        )
+
+
+class CapturedOutput(NamedTuple):
+    """Outcome of a captured run; `reason` is set when the process was killed"""
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    reason: Optional[str]
+    output_bytes: int
+    usage: Optional[Dict[str, Optional[int]]] = None  # Measured by the runner, see run_cgroups
+
+    @property
+    def timed_out(self) -> bool:
+        return self.reason == "timeout"
+
+    @property
+    def output_limited(self) -> bool:
+        return self.reason == "output_limit"
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason == "cancelled"
+
+
+def capture_process(cmd: List[str], timeout: float, limit: int, kill_after: int,
+                    on_kill: Optional[Callable[[], None]] = None,
+                    cwd: Optional[str] = None, cgroup: Optional[str] = None) -> CapturedOutput:
+    """Run a command, keeping at most `limit` bytes of each stream.
+
+    The process is killed when it runs longer than `timeout` seconds, its
+    combined output exceeds `kill_after` bytes or the calling thread's
+    CancelScope is cancelled; `on_kill` runs whenever it is killed, for
+    sandboxes that outlive their client process. With `cgroup` the command
+    runs inside that cgroup from its first instruction.
+    """
+    process = start_process(cmd, cgroup, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd)
+    capture = OutputCapture(limit, kill_after)
+    deadline = time.monotonic() + timeout
+
+    scope = current_scope()
+    # Wakes the loop below when the run is cancelled; children of the
+    # process may keep its pipes open after the kill
+    wakeup = os.pipe() if scope is not None else None
+    kill_lock = threading.Lock()
+    killed = False
+
+    def kill():
+        # Once only, whether cancelled or stopped below
+        nonlocal killed
+        with kill_lock:
+            if killed:
+                return
+            killed = True
+        process.kill()
+        if on_kill is not None:
+            on_kill()
+
+    def cancel():
+        # Runs on the cancelling thread, before the on_cancel block exits
+        kill()
+        os.write(wakeup[1], b"\0")
+
+    with selectors.DefaultSelector() as selector, on_cancel(cancel):
+        selector.register(process.stdout, selectors.EVENT_READ, "stdout")
+        selector.register(process.stderr, selectors.EVENT_READ, "stderr")
+        if wakeup is not None:
+            selector.register(wakeup[0], selectors.EVENT_READ, "cancel")
+        open_streams = 2
+        try:
+            while open_streams and capture.reason is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    capture.reason = "timeout"
+                    break
+                for key, _ in selector.select(remaining):
+                    if key.data == "cancel":
+                        capture.reason = "cancelled"
+                        break
+                    data = os.read(key.fd, READ_CHUNK_SIZE)
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        open_streams -= 1
+                    elif not capture.feed(key.data, data):
+                        break
+
+            if capture.reason is None:
+                try:
+                    process.wait(max(0.0, deadline - time.monotonic()))
+                except subprocess.TimeoutExpired:
+                    capture.reason = "timeout"
+        finally:
+            if process.poll() is None:
+                kill()
+                process.wait()
+            process.stdout.close()
+            process.stderr.close()
+
+    # No cancel() is running or can start any more, see CancelScope
+    if wakeup is not None:
+        os.close(wakeup[0])
+        os.close(wakeup[1])
+        if capture.reason is None and scope.cancelled:
+            capture.reason = "cancelled"
+    return capture.result(process.returncode)
+
+
+async def capture_process_async(cmd: List[str], timeout: float, limit: int, kill_after: int,
+                                on_kill: Optional[Callable[[], Awaitable[None]]] = None,
+                                cwd: Optional[str] = None, cgroup: Optional[str] = None) -> CapturedOutput:
+    """capture_process() for the event loop; cancellation also kills the process"""
+    process = await start_process_async(
+        cmd, cgroup,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd
+    )
+    capture = OutputCapture(limit, kill_after)
+    limit_reached = asyncio.Event()
+
+    async def pump(stream, name):
+        # Reading goes on to end of file, as the process only counts as
+        # exited once its pipes are closed; chunks after a kill are dropped
+        while True:
+            data = await stream.read(READ_CHUNK_SIZE)
+            if not data:
+                return
+            if capture.reason is None and not capture.feed(name, data):
+                limit_reached.set()
+
+    async def finish():
+        await asyncio.gather(pump(process.stdout, "stdout"), pump(process.stderr, "stderr"))
+        await process.wait()
+
+    finished = asyncio.create_task(finish())
+    limited = asyncio.create_task(limit_reached.wait())
+    try:
+        done, _ = await asyncio.wait({finished, limited}, timeout=timeout,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        if finished in done:
+            finished.result()
+        elif not done:
+            capture.reason = "timeout"
+    finally:
+        limited.cancel()
+        try:
+            if process.returncode is None:
+                process.kill()
+                if on_kill is not None:
+                    await asyncio.shield(on_kill())
+            await process.wait()
+        finally:
+            finished.cancel()
+
+    return capture.result(process.returncode)
@@ -0,0 +1,195 @@
+"""
+Precompiled Headers for Sandbox Builds
+Most of the compile time for the FANN curriculum exercises is spent parsing
+the same system and FANN headers. This module builds a GCC precompiled header
+(.gch) for each distinct include prelude and injects it with `-include`.
+"""
+
+import os
+import re
+import hashlib
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+
+from sandbox_config import SandboxConfig
+from compile_cache import toolchain_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class PrecompiledHeaders:
+    """Builds and hands out precompiled include preludes.
+
+    A prelude is the ordered list of `#include <...>` lines of a submission.
+    It is only precompiled when every header is in the allowed set and no
+    other preprocessor directive appears before the last include, so
+    injecting it with `-include` cannot change what the headers expand to.
+    The headers keep their include guards, so the submission's own
+    `#include` lines become no-ops.
+
+    Builds live in a directory named by a hash of the toolchain fingerprint,
+    the compiler flags, the allowed include set and the prelude. A compiler
+    upgrade or a change to ALLOWED_INCLUDES therefore triggers a rebuild.
+    """
+
+    PRELUDE_NAME = 'prelude.h'
+
+    INCLUDE_PATTERN = re.compile(r'^\s*#\s*include\s*([<"])([^>"]+)[>"]', re.MULTILINE)
+    DIRECTIVE_PATTERN = re.compile(r'^\s*#\s*(\w+)', re.MULTILINE)
+
+    # Flags that only affect linking and must not be passed when building a .gch
+    LINK_ONLY_PREFIXES = ('-Wl,', '-l', '-pie')
+
+    def __init__(self, build_dir: str = SandboxConfig.PCH_DIR,
+                 allowed_includes: Set[str] = SandboxConfig.ALLOWED_INCLUDES,
+                 compiler: str = 'gcc'):
+        self.build_dir = build_dir
+        self.allowed_includes = frozenset(allowed_includes)
+        self.compiler = compiler
+        os.makedirs(self.build_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._building: Dict[str, threading.Lock] = {}
+        self._failed: Set[str] = set()
+
+        # Metrics
+        self.builds = 0
+        self.build_failures = 0
+        self.uses = 0
+        self.skipped = 0
+
+    def flags_for(self, code: str, compile_flags: List[str]) -> List[str]:
+        """Extra compiler flags that inject the precompiled prelude for `code`.
+
+        Builds the precompiled header on first use. Returns an empty list when
+        the submission can't use a prelude or the build failed; compilation
+        then proceeds exactly as before.
+        """
+        prelude = self.prelude_for(code)
+        if not prelude:
+            with self._lock:
+                self.skipped += 1
+            return []
+
+        header_path = self._ensure_built(prelude, self._header_flags(compile_flags))
+        if header_path is None:
+            with self._lock:
+                self.skipped += 1
+            return []
+
+        with self._lock:
+            self.uses += 1
+        return ['-include', header_path]
+
+    def prelude_for(self, code: str) -> Optional[Tuple[str, ...]]:
+        """Ordered system headers of a submission, or None if not precompilable"""
+        includes = list(self.INCLUDE_PATTERN.finditer(code))
+        if not includes:
+            return None
+
+        headers = []
+        for match in includes:
+            delimiter, header = match.groups()
+            if delimiter != '<' or header not in self.allowed_includes:
+                return None
+            if header not in headers:
+                headers.append(header)
+
+        last_include = includes[-1].start()
+        for directive in self.DIRECTIVE_PATTERN.finditer(code, 0, last_include):
+            if directive.group(1) != 'include':
+                return None
+
+        return tuple(headers)
+
+    def stats(self) -> Dict[str, any]:
+        with self._lock:
+            return {
+                'builds': self.builds,
+                'build_failures': self.build_failures,
+                'uses': self.uses,
+                'skipped': self.skipped,
+            }
+
+    def _header_flags(self, compile_flags: List[str]) -> List[str]:
+        return [flag for flag in compile_flags if not flag.startswith(self.LINK_ONLY_PREFIXES)]
+
+    def _variant_key(self, prelude: Tuple[str, ...], header_flags: List[str]) -> str:
+        digest = hashlib.sha256()
+        digest.update(toolchain_fingerprint(self.compiler).encode())
+        digest.update(b'\0')
+        digest.update('\0'.join(header_flags).encode())
+        digest.update(b'\0')
+        digest.update('\0'.join(sorted(self.allowed_includes)).encode())
+        digest.update(b'\0')
+        digest.update('\0'.join(prelude).encode())
+        return digest.hexdigest()[:32]
+
+    def _ensure_built(self, prelude: Tuple[str, ...], header_flags: List[str]) -> Optional[str]:
+        key = self._variant_key(prelude, header_flags)
+        variant_dir = os.path.join(self.build_dir, key)
+        header_path = os.path.join(variant_dir, self.PRELUDE_NAME)
+
+        if os.path.exists(header_path + '.gch'):
+            return header_path
+
+        with self._lock:
+            if key in self._failed:
+                return None
+            build_lock = self._building.setdefault(key, threading.Lock())
+
+        # One build per variant; concurrent callers wait for it
+        with build_lock:
+            if os.path.exists(header_path + '.gch'):
+                return header_path
+            if self._build(prelude, header_flags, variant_dir):
+                return header_path
+
+        with self._lock:
+            self._failed.add(key)
+        return None
+
+    def _build(self, prelude: Tuple[str, ...], header_flags: List[str], variant_dir: str) -> bool:
+        """Compile the prelude in a scratch dir and publish it with an atomic rename"""
+        scratch_dir = tempfile.mkdtemp(prefix='.build_', dir=self.build_dir)
+        try:
+            header_path = os.path.join(scratch_dir, self.PRELUDE_NAME)
+            with open(header_path, 'w') as f:
+                for header in prelude:
+                    f.write(f"#include <{header}>\n")
+
+            result = subprocess.run(
+                [self.compiler] + header_flags + ['-x', 'c-header', header_path,
+                                                  '-o', header_path + '.gch'],
+                capture_output=True,
+                text=True,
+                timeout=SandboxConfig.COMPILATION_TIMEOUT * 6
+            )
+            if result.returncode != 0:
+                logger.warning(f"Failed to precompile prelude {prelude}: {result.stderr.strip()}")
+                with self._lock:
+                    self.build_failures += 1
+                return False
+
+            try:
+                os.rename(scratch_dir, variant_dir)
+            except OSError:
+                # Another process published the same variant first
+                if not os.path.exists(os.path.join(variant_dir, self.PRELUDE_NAME + '.gch')):
+                    raise
+
+            with self._lock:
+                self.builds += 1
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to precompile prelude {prelude}: {e}")
+            with self._lock:
+                self.build_failures += 1
+            return False
+        finally:
+            if os.path.exists(scratch_dir):
+                shutil.rmtree(scratch_dir, ignore_errors=True)
@@ -0,0 +1,292 @@
+"""
+Run Cgroups
+Measures the CPU time and peak memory of sandboxed runs with cgroup v2. A
+backend run gets its own cgroup below a parent the executor creates; the
+cgroup's cpu.stat and memory.peak are read when the run ends and it is
+removed. A pooled container keeps the cgroup Docker gave it, and a run's
+usage is the difference over the run.
+
+Commands are moved into their cgroup by pid while they wait at a gate on
+their stdin, so the server runs nothing between fork and exec, which is not
+safe in a multithreaded process. Hosts without a writable cgroup v2
+hierarchy run unmeasured, with None in the usage fields of a result.
+"""
+
+import asyncio
+import os
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+import logging
+
+from sandbox_config import SandboxConfig
+
+logger = logging.getLogger(__name__)
+
+# Holds a started command until it is in its run cgroup; status 70 means the
+# server went away before releasing it. The command's stdin is /dev/null.
+GATE_COMMAND = ["/bin/sh", "-c", 'read -r _ || exit 70; exec "$@" </dev/null', "cgroup-gate"]
+CONTROLLERS = ("cpu", "memory")
+
+
+def unmeasured() -> Dict[str, Optional[int]]:
+    """Usage fields of a run that was not measured"""
+    return {"cpu_user_ms": None, "cpu_system_ms": None, "memory_peak_kb": None}
+
+
+def find_cgroup2_mount() -> Optional[str]:
+    try:
+        with open("/proc/mounts") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 2 and fields[2] == "cgroup2":
+                    return fields[1]
+    except OSError:
+        pass
+    return None
+
+
+def cgroup_of(pid: int) -> Optional[str]:
+    """Directory of the cgroup v2 a process is in, if it is visible here"""
+    mount = find_cgroup2_mount()
+    if mount is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    path = os.path.join(mount, line[3:].strip().lstrip("/"))
+                    return path if os.path.isdir(path) else None
+    except OSError:
+        pass
+    return None
+
+
+def hierarchy_path(path: str) -> str:
+    """A cgroup directory as a path from the hierarchy root, e.g. for --cgroup-parent"""
+    return "/" + os.path.relpath(path, find_cgroup2_mount() or "/")
+
+
+def parse_cpu_stat(text: str) -> Dict[str, int]:
+    """Key/value pairs of a cgroup v2 cpu.stat file"""
+    stats = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[1].isdigit():
+            stats[parts[0]] = int(parts[1])
+    return stats
+
+
+def read_cpu_stat(path: str) -> Optional[Dict[str, int]]:
+    try:
+        with open(os.path.join(path, "cpu.stat")) as f:
+            return parse_cpu_stat(f.read())
+    except OSError:
+        return None
+
+
+def read_usage(path: str) -> Dict[str, Optional[int]]:
+    """Usage recorded in a run cgroup.
+
+    Unmeasured if nothing ran in it, e.g. when the Docker daemon placed the
+    container in a hierarchy of its own. memory.peak needs the memory
+    controller (and Linux 5.19+), so the peak alone may be None.
+    """
+    stats = read_cpu_stat(path)
+    if not stats or not stats.get("usage_usec"):
+        return unmeasured()
+    usage = {
+        "cpu_user_ms": stats.get("user_usec", 0) // 1000,
+        "cpu_system_ms": stats.get("system_usec", 0) // 1000,
+        "memory_peak_kb": None,
+    }
+    try:
+        with open(os.path.join(path, "memory.peak")) as f:
+            usage["memory_peak_kb"] = int(f.read()) // 1024
+    except (OSError, ValueError):
+        pass
+    return usage
+
+
+def join(path: str, pid: int) -> None:
+    """Move a process into a cgroup"""
+    with open(os.path.join(path, "cgroup.procs"), "w") as f:
+        f.write(str(pid))
+
+
+def _join_gated(path: str, pid: int) -> None:
+    try:
+        join(path, pid)
+    except OSError as e:
+        # The run goes ahead; it reads as unmeasured
+        logger.warning(f"Could not move run {pid} into {path}: {e}")
+
+
+def start_process(cmd: List[str], cgroup: Optional[str] = None, **kwargs) -> subprocess.Popen:
+    """subprocess.Popen() of a command that runs inside `cgroup`, when one is given"""
+    if cgroup is None:
+        return subprocess.Popen(cmd, **kwargs)
+    process = subprocess.Popen(GATE_COMMAND + cmd, stdin=subprocess.PIPE, **kwargs)
+    _join_gated(cgroup, process.pid)
+    process.stdin.write(b"\n")
+    process.stdin.close()
+    process.stdin = None  # The gate's pipe, not the command's stdin
+    return process
+
+
+async def start_process_async(cmd: List[str], cgroup: Optional[str] = None,
+                              **kwargs) -> asyncio.subprocess.Process:
+    """start_process() for the event loop"""
+    if cgroup is None:
+        return await asyncio.create_subprocess_exec(*cmd, **kwargs)
+    process = await asyncio.create_subprocess_exec(*GATE_COMMAND, *cmd,
+                                                   stdin=asyncio.subprocess.PIPE, **kwargs)
+    _join_gated(cgroup, process.pid)
+    process.stdin.write(b"\n")
+    process.stdin.close()
+    process.stdin = None  # The gate's pipe, not the command's stdin
+    return process
+
+
+class RunCgroups:
+    """Creates and removes the per-run cgroups of backend runs.
+
+    They live under `parent`, a cgroup below the server's own (or below
+    `root`'s top when the server is in the root cgroup), which is set up on
+    first use with the cpu and memory controllers enabled where allowed.
+    """
+
+    def __init__(self, enabled: bool = SandboxConfig.CGROUP_ACCOUNTING,
+                 root: str = SandboxConfig.CGROUP_ROOT,
+                 parent: str = SandboxConfig.CGROUP_PARENT):
+        self.enabled = enabled
+        self.root = root
+        self.parent = parent
+
+        self._lock = threading.Lock()
+        self._base: Optional[str] = None
+        self._available: Optional[bool] = None
+
+        # Metrics
+        self.created = 0
+        self.failures = 0
+
+    def available(self) -> bool:
+        """Whether runs can get cgroups; sets up the parent once"""
+        with self._lock:
+            if self._available is None:
+                self._available = self.enabled and self._setup()
+            return self._available
+
+    def create(self, run_id: str) -> Optional[str]:
+        """A new cgroup for a run, or None when runs go unmeasured"""
+        if not self.available():
+            return None
+        path = os.path.join(self._base, f"run-{run_id}")
+        try:
+            os.mkdir(path)
+        except OSError as e:
+            with self._lock:
+                self.failures += 1
+            logger.warning(f"Could not create run cgroup {path}: {e}")
+            return None
+        with self._lock:
+            self.created += 1
+        return path
+
+    def remove(self, path: Optional[str]) -> None:
+        """Kill anything left in a run cgroup and delete it"""
+        if path is None:
+            return
+        try:
+            with open(os.path.join(path, "cgroup.kill"), "w") as f:
+                f.write("1")
+        except OSError:
+            pass
+        for _ in range(50):
+            try:
+                os.rmdir(path)
+                return
+            except FileNotFoundError:
+                return
+            except OSError:
+                time.sleep(0.01)  # Killed processes, or a removed container, are still going
+        logger.warning(f"Could not remove run cgroup {path}")
+
+    def stats(self) -> Dict[str, any]:
+        return {
+            "available": self.available(),
+            "parent": self._base,
+            "created": self.created,
+            "failures": self.failures,
+        }
+
+    def _setup(self) -> bool:
+        root = self.root or find_cgroup2_mount()
+        if root is None or not os.path.exists(os.path.join(root, "cgroup.controllers")):
+            logger.info("cgroup v2 is not mounted; runs are not measured")
+            return False
+
+        own = cgroup_of(os.getpid()) or root
+        base = os.path.join(own if own.startswith(root) else root, self.parent)
+        try:
+            os.makedirs(base, exist_ok=True)
+        except OSError as e:
+            logger.info(f"cgroup v2 is not writable ({e}); runs are not measured")
+            return False
+
+        # memory.peak of the run cgroups needs the memory controller enabled
+        # down to them; without it only CPU times are recorded
+        for controller in CONTROLLERS:
+            for directory in (os.path.dirname(base), base):
+                try:
+                    with open(os.path.join(directory, "cgroup.subtree_control"), "w") as f:
+                        f.write(f"+{controller}")
+                except OSError:
+                    pass
+        self._base = base
+        logger.info(f"Runs are measured in cgroups under {base}")
+        return True
+
+
+class UsageWindow:
+    """Usage of a long-lived cgroup, such as a pooled container's, over one run.
+
+    CPU times are the difference of cpu.stat over the window. The peak comes
+    from a memory.peak descriptor reset at the start (Linux 6.12+), so it is
+    the run's own; where the reset is not supported it stays None, as the
+    cgroup's lifetime peak would include earlier runs.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._start = read_cpu_stat(path)
+        self._peak_fd: Optional[int] = None
+        try:
+            fd = os.open(os.path.join(path, "memory.peak"), os.O_RDWR)
+        except OSError:
+            return
+        try:
+            os.write(fd, b"reset")
+            self._peak_fd = fd
+        except OSError:
+            os.close(fd)
+
+    def finish(self) -> Dict[str, Optional[int]]:
+        """Usage since the window started"""
+        usage = unmeasured()
+        end = read_cpu_stat(self.path)
+        if self._start is not None and end is not None:
+            usage["cpu_user_ms"] = (end.get("user_usec", 0) - self._start.get("user_usec", 0)) // 1000
+            usage["cpu_system_ms"] = (end.get("system_usec", 0) - self._start.get("system_usec", 0)) // 1000
+        if self._peak_fd is not None:
+            try:
+                os.lseek(self._peak_fd, 0, os.SEEK_SET)
+                usage["memory_peak_kb"] = int(os.read(self._peak_fd, 64)) // 1024
+            except (OSError, ValueError):
+                pass
+            finally:
+                os.close(self._peak_fd)
+                self._peak_fd = None
+        return usage
@@ -0,0 +1,283 @@
+"""
+Sandbox Backends
+A backend decides how a compiled program is isolated: it builds the command
+line that runs the workspace program and knows how to stop a run. CodeExecutor
+runs that command with its own timeout, output and streaming handling, so
+every backend gets the same limits and result format.
+"""
+
+import os
+import asyncio
+import hashlib
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import List, Optional
+import logging
+
+from sandbox_config import SandboxConfig
+from compile_cache import toolchain_fingerprint
+from cpusets import format_cpu_list, pinned_cpus
+from run_cgroups import hierarchy_path
+
+logger = logging.getLogger(__name__)
+
+
+def parse_memory(value: str) -> int:
+    """Bytes in a Docker-style memory size such as '128m'"""
+    units = {'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+    value = value.strip().lower()
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+class SandboxBackend:
+    """Interface of an isolation mechanism for compiled programs"""
+
+    name = 'base'
+
+    # Whether the executor moves the command into the run's cgroup; false
+    # when something else, like the Docker daemon, places the sandbox there
+    JOINS_CGROUP = False
+
+    def available(self) -> bool:
+        """Whether the backend can run programs on this host"""
+        raise NotImplementedError
+
+    def measures_cgroup(self) -> bool:
+        """Whether runs can be measured through a cgroup of their own (see run_cgroups)"""
+        return False
+
+    def prepare(self, temp_dir: str) -> None:
+        """Make a workspace usable by the sandbox before it runs"""
+
+    def command(self, temp_dir: str, run_id: str, cgroup: Optional[str] = None) -> List[str]:
+        """Command line that runs `temp_dir`/program in the sandbox, inside `cgroup` if given"""
+        raise NotImplementedError
+
+    def kill(self, run_id: str) -> None:
+        """Stop a run whose command was killed on timeout"""
+
+    async def kill_async(self, run_id: str) -> None:
+        """Asyncio variant of kill()"""
+
+
+class DockerSandboxBackend(SandboxBackend):
+    """Runs each program in a fresh, locked-down Docker container"""
+
+    name = 'docker'
+
+    def __init__(self, docker_image: str = SandboxConfig.DOCKER_IMAGE,
+                 memory: str = SandboxConfig.MAX_MEMORY, cpus: str = SandboxConfig.MAX_CPU,
+                 container_name_prefix: str = SandboxConfig.CONTAINER_NAME_PREFIX):
+        self.docker_image = docker_image
+        self.memory = memory
+        self.cpus = cpus
+        self.container_name_prefix = container_name_prefix
+        self._cgroup_driver: Optional[str] = None
+
+    def available(self) -> bool:
+        return shutil.which('docker') is not None
+
+    def measures_cgroup(self) -> bool:
+        # --cgroup-parent takes a cgroup path only with the cgroupfs driver;
+        # the systemd driver wants a slice name, and those runs go unmeasured
+        if self._cgroup_driver is None:
+            try:
+                result = subprocess.run(["docker", "info", "--format", "{{.CgroupDriver}}"],
+                                        capture_output=True, text=True, timeout=10)
+                self._cgroup_driver = result.stdout.strip() if result.returncode == 0 else ''
+            except Exception:
+                self._cgroup_driver = ''
+        return self._cgroup_driver == 'cgroupfs'
+
+    def container_name(self, run_id: str) -> str:
+        return f"{self.container_name_prefix}{run_id}"
+
+    def command(self, temp_dir: str, run_id: str, cgroup: Optional[str] = None) -> List[str]:
+        cpus = pinned_cpus()
+        # Containers are started by the daemon and do not inherit the slot's affinity
+        cpuset = ["--cpuset-cpus", format_cpu_list(cpus)] if cpus else []
+        # The daemon creates the container's cgroup below the run's
+        parent = ["--cgroup-parent", hierarchy_path(cgroup)] if cgroup else []
+        return [
+            "docker", "run",
+            "--rm",  # Remove container after execution
+            "--name", self.container_name(run_id),
+            "--network", "none",  # No network access
+            "--memory", self.memory,  # Memory limit
+            "--cpus", self.cpus,  # CPU limit
+            *cpuset,  # CPUs of the execution slot, if pinned
+            *parent,  # Run cgroup measuring the container, if any
+            "--read-only",  # Read-only root filesystem
+            "--tmpfs", "/tmp:rw,noexec,nosuid,size=64m",  # Temp filesystem
+            "--security-opt", "no-new-privileges",  # No privilege escalation
+            "--cap-drop", "ALL",  # Drop all capabilities
+            "--user", "1000:1000",  # Run as non-root user
+            "-v", f"{temp_dir}:/home/sandboxuser/workspace:ro",  # Mount workspace read-only
+            self.docker_image,
+            "/home/sandboxuser/workspace/program"
+        ]
+
+    def kill(self, run_id: str) -> None:
+        # Killing the docker client does not stop the container
+        try:
+            subprocess.run(["docker", "kill", self.container_name(run_id)], capture_output=True)
+        except Exception:
+            pass
+
+    async def kill_async(self, run_id: str) -> None:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "docker", "kill", self.container_name(run_id),
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            await process.wait()
+        except Exception:
+            pass
+
+
+class NamespaceSandboxBackend(SandboxBackend):
+    """Isolates programs with namespaces, rlimits and seccomp, without a daemon.
+
+    `sandbox_launcher.c` does the isolation: new user, mount, pid, network,
+    ipc and uts namespaces, a tmpfs root with the system directories and the
+    workspace bind-mounted read-only, rlimits on CPU time, address space,
+    file size, processes and open files, and a seccomp filter. The program is
+    init of its pid namespace and dies with the launcher, so killing the
+    command is enough to stop a run.
+
+    The launcher is compiled on first use into `build_dir`, keyed by a hash
+    of its source and the toolchain fingerprint.
+    """
+
+    name = 'namespace'
+    JOINS_CGROUP = True
+
+    LAUNCHER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox_launcher.c')
+    LAUNCHER_NAME = 'sandbox_launcher'
+    WORKSPACE_PROGRAM = '/workspace/program'
+
+    def __init__(self, build_dir: str = SandboxConfig.LAUNCHER_DIR,
+                 memory: str = SandboxConfig.MAX_MEMORY,
+                 cpu_seconds: int = SandboxConfig.EXECUTION_TIMEOUT,
+                 max_file_size: int = SandboxConfig.SANDBOX_MAX_FILE_SIZE,
+                 max_processes: int = SandboxConfig.SANDBOX_MAX_PROCESSES,
+                 max_open_files: int = SandboxConfig.SANDBOX_MAX_OPEN_FILES,
+                 compiler: str = 'gcc'):
+        self.build_dir = build_dir
+        self.memory_bytes = parse_memory(memory)
+        self.cpu_seconds = cpu_seconds
+        self.max_file_size = max_file_size
+        self.max_processes = max_processes
+        self.max_open_files = max_open_files
+        self.compiler = compiler
+
+        self._lock = threading.Lock()
+        self._launcher: Optional[str] = None
+        self._available: Optional[bool] = None
+
+    def available(self) -> bool:
+        """Builds the launcher and runs a probe once; False if namespaces are unavailable"""
+        with self._lock:
+            if self._available is not None:
+                return self._available
+
+        available = False
+        probe_dir = tempfile.mkdtemp(prefix='sandbox_probe_')
+        try:
+            self.launcher_path()
+            shutil.copy2('/bin/true', os.path.join(probe_dir, 'program'))
+            self.prepare(probe_dir)
+            result = subprocess.run(self.command(probe_dir, 'probe'),
+                                    capture_output=True, text=True, timeout=10)
+            available = result.returncode == 0
+            if not available:
+                logger.warning(f"Namespace sandbox unavailable: {result.stderr.strip()}")
+        except Exception as e:
+            logger.warning(f"Namespace sandbox unavailable: {e}")
+        finally:
+            shutil.rmtree(probe_dir, ignore_errors=True)
+
+        with self._lock:
+            self._available = available
+        return available
+
+    def measures_cgroup(self) -> bool:
+        return True
+
+    def prepare(self, temp_dir: str) -> None:
+        # The sandbox user is unprivileged on the host and must be able to
+        # reach the program; traversal without listing is enough
+        os.chmod(temp_dir, 0o711)
+
+    def command(self, temp_dir: str, run_id: str, cgroup: Optional[str] = None) -> List[str]:
+        # The executor starts the launcher inside `cgroup`; the sandbox stays there
+        return [
+            self.launcher_path(),
+            "--cpu", str(self.cpu_seconds),
+            "--memory", str(self.memory_bytes),
+            "--fsize", str(self.max_file_size),
+            "--nproc", str(self.max_processes),
+            "--nofile", str(self.max_open_files),
+            temp_dir,
+            self.WORKSPACE_PROGRAM
+        ]
+
+    def launcher_path(self) -> str:
+        """Path of the compiled launcher, building it on first use"""
+        if self._launcher is not None:
+            return self._launcher
+
+        with self._lock:
+            if self._launcher is None:
+                self._launcher = self._build_launcher()
+            return self._launcher
+
+    def _build_launcher(self) -> str:
+        with open(self.LAUNCHER_SOURCE, 'rb') as f:
+            source = f.read()
+        digest = hashlib.sha256()
+        digest.update(toolchain_fingerprint(self.compiler).encode())
+        digest.update(b'\0')
+        digest.update(source)
+        path = os.path.join(self.build_dir, f"{self.LAUNCHER_NAME}_{digest.hexdigest()[:16]}")
+        if os.path.exists(path):
+            return path
+
+        os.makedirs(self.build_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=self.build_dir)
+        os.close(fd)
+        try:
+            result = subprocess.run(
+                [self.compiler, '-O2', '-Wall', '-Wextra', '-o', tmp_path, self.LAUNCHER_SOURCE],
+                capture_output=True,
+                text=True,
+                timeout=SandboxConfig.COMPILATION_TIMEOUT * 6
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f"Failed to build sandbox launcher: {result.stderr.strip()}")
+            os.chmod(tmp_path, 0o755)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        return path
+
+
+BACKENDS = {
+    DockerSandboxBackend.name: DockerSandboxBackend,
+    NamespaceSandboxBackend.name: NamespaceSandboxBackend,
+}
+
+
+def create_backend(name: str = SandboxConfig.SANDBOX_BACKEND, **options) -> SandboxBackend:
+    """Instantiate a backend by name ('docker' or 'namespace')"""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown sandbox backend: {name}")
+    return backend_class(**options)
@@ -23,6 +23,27 @@ class SandboxConfig:
     DOCKER_USER = '1000:1000'  # Non-root user
     WORKSPACE_PATH = '/home/sandboxuser/workspace'
     
+    # Sandbox backend: 'docker' or 'namespace' (namespaces, rlimits and seccomp; no daemon)
+    SANDBOX_BACKEND = os.getenv('SANDBOX_BACKEND', 'docker')
+    LAUNCHER_DIR = os.getenv('SANDBOX_LAUNCHER_DIR', '/var/cache/sandbox/launcher')
+    SANDBOX_MAX_FILE_SIZE = int(os.getenv('SANDBOX_MAX_FILE_SIZE', 16 * 1024 * 1024))  # 16MB
+    SANDBOX_MAX_PROCESSES = int(os.getenv('SANDBOX_MAX_PROCESSES', 32))
+    SANDBOX_MAX_OPEN_FILES = int(os.getenv('SANDBOX_MAX_OPEN_FILES', 64))
+    
+    # Per-run cgroups measuring CPU time and peak memory; an empty root means
+    # the cgroup2 mount, and the parent is created below the server's cgroup
+    CGROUP_ACCOUNTING = os.getenv('SANDBOX_CGROUP_ACCOUNTING', 'true').lower() == 'true'
+    CGROUP_ROOT = os.getenv('SANDBOX_CGROUP_ROOT', '')
+    CGROUP_PARENT = os.getenv('SANDBOX_CGROUP_PARENT', 'sandbox-runs')
+    
+    # Warm container pool
+    CONTAINER_POOL_SIZE = int(os.getenv('SANDBOX_CONTAINER_POOL_SIZE', 4))
+    CONTAINER_POOL_MAX_USES = int(os.getenv('SANDBOX_CONTAINER_POOL_MAX_USES', 50))  # Recycle after N runs
+    
+    # Pooled run workspaces; an empty root means /dev/shm when it is a tmpfs
+    WORKSPACE_POOL_ROOT = os.getenv('SANDBOX_WORKSPACE_POOL_ROOT', '')
+    WORKSPACE_POOL_SIZE = int(os.getenv('SANDBOX_WORKSPACE_POOL_SIZE', 16))  # Free workspaces kept
+    
     # Security Patterns (Regular Expressions)
     FORBIDDEN_PATTERNS: List[str] = [
         # System calls
@@ -195,6 +216,13 @@ class SandboxConfig:
         '-lm',  # Math library
     ]
     
+    # Compilation cache
+    COMPILE_CACHE_DIR = os.getenv('SANDBOX_COMPILE_CACHE_DIR', '/var/cache/sandbox/compile')
+    COMPILE_CACHE_MAX_BYTES = int(os.getenv('SANDBOX_COMPILE_CACHE_MAX_BYTES', 512 * 1024 * 1024))  # 512MB
+    
+    # Precompiled header preludes
+    PCH_DIR = os.getenv('SANDBOX_PCH_DIR', '/var/cache/sandbox/pch')
+    
     # Logging Configuration
     LOG_LEVEL = os.getenv('SANDBOX_LOG_LEVEL', 'INFO')
     LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -204,6 +232,27 @@ class SandboxConfig:
     RATE_LIMIT_PER_USER = int(os.getenv('SANDBOX_RATE_LIMIT_USER', 10))
     RATE_LIMIT_GLOBAL = int(os.getenv('SANDBOX_RATE_LIMIT_GLOBAL', 100))
     
+    # Execution scheduler
+    SCHEDULER_SLOTS = int(os.getenv('SANDBOX_SCHEDULER_SLOTS', 4))  # Runs executing at once
+    SCHEDULER_LANE_WEIGHTS = os.getenv('SANDBOX_SCHEDULER_LANE_WEIGHTS', 'interactive=6,submit=3,regrade=1')
+    SCHEDULER_MAX_QUEUED_PER_USER = int(os.getenv('SANDBOX_SCHEDULER_MAX_QUEUED_USER', 20))
+    
+    # Execution workers and their job queue (sqlite:///path or redis://host:port/db)
+    EXECUTION_QUEUE_URL = os.getenv('SANDBOX_EXECUTION_QUEUE_URL', 'sqlite:////var/lib/sandbox/execution_queue.db')
+    QUEUE_VISIBILITY_TIMEOUT = int(os.getenv('SANDBOX_QUEUE_VISIBILITY_TIMEOUT', 30))  # Lease without heartbeat
+    QUEUE_MAX_ATTEMPTS = int(os.getenv('SANDBOX_QUEUE_MAX_ATTEMPTS', 3))
+    QUEUE_RETRY_DELAY = float(os.getenv('SANDBOX_QUEUE_RETRY_DELAY', 1.0))  # Seconds, times the attempt
+    QUEUE_RESULT_TTL = int(os.getenv('SANDBOX_QUEUE_RESULT_TTL', 3600))  # Finished jobs kept this long
+    QUEUE_RESULT_TIMEOUT = int(os.getenv('SANDBOX_QUEUE_RESULT_TIMEOUT', 120))  # Web tier wait for a result
+    WORKER_CONCURRENCY = int(os.getenv('SANDBOX_WORKER_CONCURRENCY', 4))  # Runs per worker process
+    WORKER_POOLS = os.getenv('SANDBOX_WORKER_POOLS', 'c')  # Job pools (languages) a worker serves
+    WORKER_CPUS = os.getenv('SANDBOX_WORKER_CPUS', '')  # CPU list the slots are pinned to, e.g. '2-7'
+    WORKER_CANCEL_POLL_INTERVAL = float(os.getenv('SANDBOX_WORKER_CANCEL_POLL_INTERVAL', 0.5))  # Seconds
+    
+    # Speculative compilation of editor drafts
+    DRAFT_MAX_PER_USER = int(os.getenv('SANDBOX_DRAFT_MAX_PER_USER', 2))  # Live drafts (documents) per user
+    DRAFT_CONCURRENCY = int(os.getenv('SANDBOX_DRAFT_CONCURRENCY', 1))  # Draft compiles at once
+    
     # Monitoring and alerting
     ALERT_ON_VIOLATIONS = os.getenv('SANDBOX_ALERT_VIOLATIONS', 'true').lower() == 'true'
     MAX_VIOLATIONS_PER_HOUR = int(os.getenv('SANDBOX_MAX_VIOLATIONS_HOUR', 5))
@@ -310,6 +359,33 @@ class SandboxConfig:
                 'user': cls.DOCKER_USER,
                 'workspace': cls.WORKSPACE_PATH,
             },
+            'sandbox_backend': {
+                'backend': cls.SANDBOX_BACKEND,
+                'launcher_dir': cls.LAUNCHER_DIR,
+                'max_file_size': cls.SANDBOX_MAX_FILE_SIZE,
+                'max_processes': cls.SANDBOX_MAX_PROCESSES,
+                'max_open_files': cls.SANDBOX_MAX_OPEN_FILES,
+            },
+            'cgroup_accounting': {
+                'enabled': cls.CGROUP_ACCOUNTING,
+                'root': cls.CGROUP_ROOT,
+                'parent': cls.CGROUP_PARENT,
+            },
+            'compile_cache': {
+                'directory': cls.COMPILE_CACHE_DIR,
+                'max_bytes': cls.COMPILE_CACHE_MAX_BYTES,
+            },
+            'precompiled_headers': {
+                'directory': cls.PCH_DIR,
+            },
+            'container_pool': {
+                'size': cls.CONTAINER_POOL_SIZE,
+                'max_uses': cls.CONTAINER_POOL_MAX_USES,
+            },
+            'workspace_pool': {
+                'root': cls.WORKSPACE_POOL_ROOT,
+                'size': cls.WORKSPACE_POOL_SIZE,
+            },
             'security': {
                 'forbidden_patterns_count': len(cls.FORBIDDEN_PATTERNS),
                 'allowed_includes_count': len(cls.ALLOWED_INCLUDES),
@@ -320,6 +396,27 @@ class SandboxConfig:
                 'per_user': cls.RATE_LIMIT_PER_USER,
                 'global': cls.RATE_LIMIT_GLOBAL,
             },
+            'scheduler': {
+                'slots': cls.SCHEDULER_SLOTS,
+                'lane_weights': cls.SCHEDULER_LANE_WEIGHTS,
+                'max_queued_per_user': cls.SCHEDULER_MAX_QUEUED_PER_USER,
+            },
+            'execution_queue': {
+                'url': cls.EXECUTION_QUEUE_URL,
+                'visibility_timeout': cls.QUEUE_VISIBILITY_TIMEOUT,
+                'max_attempts': cls.QUEUE_MAX_ATTEMPTS,
+                'retry_delay': cls.QUEUE_RETRY_DELAY,
+                'result_ttl': cls.QUEUE_RESULT_TTL,
+                'result_timeout': cls.QUEUE_RESULT_TIMEOUT,
+                'worker_concurrency': cls.WORKER_CONCURRENCY,
+                'worker_pools': cls.WORKER_POOLS,
+                'worker_cpus': cls.WORKER_CPUS,
+                'worker_cancel_poll_interval': cls.WORKER_CANCEL_POLL_INTERVAL,
+            },
+            'drafts': {
+                'max_per_user': cls.DRAFT_MAX_PER_USER,
+                'concurrency': cls.DRAFT_CONCURRENCY,
+            },
             'monitoring': {
                 'log_level': cls.LOG_LEVEL,
                 'alert_on_violations': cls.ALERT_ON_VIOLATIONS,
@@ -0,0 +1,410 @@
+/*
+ * Namespace sandbox launcher
+ *
+ * Runs a compiled submission isolated with Linux primitives instead of a
+ * Docker container:
+ *   - new user, mount, pid, network, ipc and uts namespaces
+ *   - a fresh root on tmpfs with /usr, /lib* and /bin bind-mounted read-only,
+ *     the workspace bind-mounted read-only at /workspace, a small /tmp and
+ *     no /proc, /sys or /dev
+ *   - setrlimit for CPU time, address space, file size, processes and files
+ *   - no_new_privs and a seccomp filter denying kernel attack surface
+ *
+ * Usage:
+ *   sandbox_launcher [--cpu SECONDS] [--memory BYTES] [--fsize BYTES]
+ *                    [--nproc N] [--nofile N] [--uid UID] [--gid GID]
+ *                    WORKSPACE PROGRAM
+ *
+ * The launcher stays outside the namespaces, waits for the program and exits
+ * with its exit code, or 128 + signal number when it was killed. Killing the
+ * launcher kills the program: the program is init of its pid namespace and
+ * has the launcher's death as its parent-death signal.
+ *
+ * Built by sandbox_backend.NamespaceSandboxBackend on first use.
+ */
+
+#define _GNU_SOURCE
+#include <errno.h>
+#include <fcntl.h>
+#include <grp.h>
+#include <linux/audit.h>
+#include <linux/filter.h>
+#include <linux/seccomp.h>
+#include <sched.h>
+#include <signal.h>
+#include <stddef.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/mount.h>
+#include <sys/prctl.h>
+#include <sys/resource.h>
+#include <sys/stat.h>
+#include <sys/syscall.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+#define SANDBOX_ID 1000
+#define STACK_SIZE (256 * 1024)
+
+#if defined(__x86_64__)
+#define SANDBOX_AUDIT_ARCH AUDIT_ARCH_X86_64
+#elif defined(__aarch64__)
+#define SANDBOX_AUDIT_ARCH AUDIT_ARCH_AARCH64
+#else
+#error "Unsupported architecture for the seccomp filter"
+#endif
+
+struct options {
+    rlim_t cpu_seconds;
+    rlim_t memory_bytes;
+    rlim_t fsize_bytes;
+    rlim_t nproc;
+    rlim_t nofile;
+    uid_t host_uid;
+    gid_t host_gid;
+    const char *workspace;
+    const char *program;
+    char root[64];
+    int sync_pipe[2];
+};
+
+static void die(const char *what)
+{
+    fprintf(stderr, "sandbox: %s: %s\n", what, strerror(errno));
+    _exit(125);
+}
+
+static void write_file(const char *path, const char *content)
+{
+    int fd = open(path, O_WRONLY | O_CLOEXEC);
+    if (fd < 0)
+        die(path);
+    if (write(fd, content, strlen(content)) != (ssize_t)strlen(content))
+        die(path);
+    close(fd);
+}
+
+/* Bind `source` at `target` inside the new root and make it read-only */
+static void bind_read_only(const char *source, const char *target, int is_file)
+{
+    struct stat st;
+    if (lstat(source, &st) != 0)
+        return;
+
+    if (S_ISLNK(st.st_mode)) {
+        /* Merged-/usr hosts link /lib, /bin, ... into /usr */
+        char link[4096];
+        ssize_t length = readlink(source, link, sizeof(link) - 1);
+        if (length < 0)
+            die(source);
+        link[length] = '\0';
+        if (symlink(link, target) != 0)
+            die(target);
+        return;
+    }
+
+    if (is_file) {
+        int fd = open(target, O_WRONLY | O_CREAT | O_CLOEXEC, 0644);
+        if (fd < 0)
+            die(target);
+        close(fd);
+    } else if (mkdir(target, 0755) != 0 && errno != EEXIST) {
+        die(target);
+    }
+
+    if (mount(source, target, NULL, MS_BIND | MS_REC, NULL) != 0)
+        die(source);
+    if (mount(NULL, target, NULL, MS_BIND | MS_REMOUNT | MS_RDONLY | MS_NOSUID | MS_NODEV, NULL) != 0)
+        die(target);
+}
+
+static void build_root(const struct options *opts)
+{
+    static const char *system_dirs[] = {"/usr", "/lib", "/lib32", "/lib64", "/libx32", "/bin", NULL};
+    char path[4096];
+
+    if (mount(NULL, "/", NULL, MS_REC | MS_PRIVATE, NULL) != 0)
+        die("make mounts private");
+    if (mount("sandbox", opts->root, "tmpfs", MS_NOSUID | MS_NODEV, "size=1m,mode=0755") != 0)
+        die("mount root tmpfs");
+
+    for (const char **dir = system_dirs; *dir; dir++) {
+        snprintf(path, sizeof(path), "%s%s", opts->root, *dir);
+        bind_read_only(*dir, path, 0);
+    }
+
+    snprintf(path, sizeof(path), "%s/etc", opts->root);
+    if (mkdir(path, 0755) != 0)
+        die(path);
+    snprintf(path, sizeof(path), "%s/etc/ld.so.cache", opts->root);
+    bind_read_only("/etc/ld.so.cache", path, 1);
+
+    snprintf(path, sizeof(path), "%s/workspace", opts->root);
+    bind_read_only(opts->workspace, path, 0);
+
+    snprintf(path, sizeof(path), "%s/tmp", opts->root);
+    if (mkdir(path, 01777) != 0)
+        die(path);
+    if (mount("tmp", path, "tmpfs", MS_NOSUID | MS_NODEV | MS_NOEXEC, "size=64m,mode=1777") != 0)
+        die("mount /tmp");
+
+    snprintf(path, sizeof(path), "%s/.old_root", opts->root);
+    if (mkdir(path, 0700) != 0)
+        die(path);
+    if (syscall(SYS_pivot_root, opts->root, path) != 0)
+        die("pivot_root");
+    if (chdir("/") != 0)
+        die("chdir /");
+    if (umount2("/.old_root", MNT_DETACH) != 0)
+        die("detach old root");
+    rmdir("/.old_root");
+
+    /* The root tmpfs itself becomes read-only once populated */
+    if (mount(NULL, "/", NULL, MS_BIND | MS_REMOUNT | MS_RDONLY | MS_NOSUID | MS_NODEV, NULL) != 0)
+        die("remount root read-only");
+}
+
+/* A limit of 0 means "keep the inherited limit" */
+static void set_limit(int resource, rlim_t value, rlim_t hard)
+{
+    struct rlimit limit = {value, hard};
+    if (value && setrlimit(resource, &limit) != 0)
+        die("setrlimit");
+}
+
+#define DENY(name) \
+    BPF_JUMP(BPF_JMP | BPF_JEQ | BPF_K, __NR_##name, 0, 1), \
+    BPF_STMT(BPF_RET | BPF_K, SECCOMP_RET_ERRNO | EPERM)
+
+static void install_seccomp(void)
+{
+    struct sock_filter filter[] = {
+        BPF_STMT(BPF_LD | BPF_W | BPF_ABS, offsetof(struct seccomp_data, arch)),
+        BPF_JUMP(BPF_JMP | BPF_JEQ | BPF_K, SANDBOX_AUDIT_ARCH, 1, 0),
+        BPF_STMT(BPF_RET | BPF_K, SECCOMP_RET_KILL_PROCESS),
+        BPF_STMT(BPF_LD | BPF_W | BPF_ABS, offsetof(struct seccomp_data, nr)),
+#if defined(__x86_64__)
+        /* x32 system calls share the architecture token */
+        BPF_JUMP(BPF_JMP | BPF_JGE | BPF_K, 0x40000000, 0, 1),
+        BPF_STMT(BPF_RET | BPF_K, SECCOMP_RET_KILL_PROCESS),
+#endif
+#ifdef __NR_clone3
+        /* clone3 cannot be argument-filtered; libc falls back to clone */
+        BPF_JUMP(BPF_JMP | BPF_JEQ | BPF_K, __NR_clone3, 0, 1),
+        BPF_STMT(BPF_RET | BPF_K, SECCOMP_RET_ERRNO | ENOSYS),
+#endif
+        /* clone must not create namespaces */
+        BPF_JUMP(BPF_JMP | BPF_JEQ | BPF_K, __NR_clone, 0, 4),
+        BPF_STMT(BPF_LD | BPF_W | BPF_ABS, offsetof(struct seccomp_data, args[0])),
+        BPF_JUMP(BPF_JMP | BPF_JSET | BPF_K,
+                 CLONE_NEWNS | CLONE_NEWUSER | CLONE_NEWPID | CLONE_NEWNET |
+                 CLONE_NEWIPC | CLONE_NEWUTS | CLONE_NEWCGROUP, 0, 1),
+        BPF_STMT(BPF_RET | BPF_K, SECCOMP_RET_ERRNO | EPERM),
+        BPF_STMT(BPF_RET | BPF_K, SECCOMP_RET_ALLOW),
+        DENY(socket),
+        DENY(socketpair),
+        DENY(ptrace),
+        DENY(process_vm_readv),
+        DENY(process_vm_writev),
+        DENY(mount),
+        DENY(umount2),
+        DENY(pivot_root),
+        DENY(chroot),
+        DENY(unshare),
+        DENY(setns),
+        DENY(keyctl),
+        DENY(add_key),
+        DENY(request_key),
+        DENY(bpf),
+        DENY(perf_event_open),
+        DENY(userfaultfd),
+        DENY(io_uring_setup),
+        DENY(io_uring_enter),
+        DENY(io_uring_register),
+        DENY(open_by_handle_at),
+        DENY(name_to_handle_at),
+        DENY(kexec_load),
+        DENY(kexec_file_load),
+        DENY(init_module),
+        DENY(finit_module),
+        DENY(delete_module),
+        DENY(reboot),
+        DENY(swapon),
+        DENY(swapoff),
+        DENY(acct),
+        DENY(quotactl),
+        DENY(syslog),
+        DENY(settimeofday),
+        DENY(clock_settime),
+        DENY(adjtimex),
+        DENY(personality),
+        DENY(fanotify_init),
+#if defined(__x86_64__)
+        DENY(iopl),
+        DENY(ioperm),
+#endif
+        BPF_STMT(BPF_RET | BPF_K, SECCOMP_RET_ALLOW),
+    };
+    struct sock_fprog program = {
+        .len = sizeof(filter) / sizeof(filter[0]),
+        .filter = filter,
+    };
+
+    if (prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0) != 0)
+        die("no_new_privs");
+    if (prctl(PR_SET_SECCOMP, SECCOMP_MODE_FILTER, &program) != 0)
+        die("seccomp");
+}
+
+static int sandbox_main(void *arg)
+{
+    struct options *opts = arg;
+    char ready;
+
+    /* Wait until the launcher has written our uid/gid maps */
+    close(opts->sync_pipe[1]);
+    if (read(opts->sync_pipe[0], &ready, 1) != 1)
+        _exit(125);
+
+    /*
+     * Become the mapped sandbox user first so files created on the new root
+     * have a valid owner. The ids were never 0 in this namespace, so the
+     * namespace capabilities needed to build the root are kept until execve.
+     */
+    if (setgroups(0, NULL) != 0 && errno != EPERM)
+        die("setgroups");
+    if (setresgid(SANDBOX_ID, SANDBOX_ID, SANDBOX_ID) != 0)
+        die("setresgid");
+    if (setresuid(SANDBOX_ID, SANDBOX_ID, SANDBOX_ID) != 0)
+        die("setresuid");
+
+    build_root(opts);
+    if (sethostname("sandbox", 7) != 0)
+        die("sethostname");
+    if (chdir("/workspace") != 0)
+        die("chdir /workspace");
+
+    set_limit(RLIMIT_CPU, opts->cpu_seconds, opts->cpu_seconds + 1);
+    set_limit(RLIMIT_AS, opts->memory_bytes, opts->memory_bytes);
+    set_limit(RLIMIT_FSIZE, opts->fsize_bytes, opts->fsize_bytes);
+    set_limit(RLIMIT_NPROC, opts->nproc, opts->nproc);
+    set_limit(RLIMIT_NOFILE, opts->nofile, opts->nofile);
+    struct rlimit no_core = {0, 0};
+    if (setrlimit(RLIMIT_CORE, &no_core) != 0)
+        die("setrlimit");
+
+    /* Die with the launcher; if it is already gone, its end of the pipe is closed */
+    if (prctl(PR_SET_PDEATHSIG, SIGKILL, 0, 0, 0) != 0)
+        die("pdeathsig");
+    if (fcntl(opts->sync_pipe[0], F_SETFL, O_NONBLOCK) != 0)
+        die("fcntl");
+    if (read(opts->sync_pipe[0], &ready, 1) == 0)
+        _exit(137);
+    close(opts->sync_pipe[0]);
+
+    install_seccomp();
+
+    char *const argv[] = {(char *)opts->program, NULL};
+    char *const envp[] = {"PATH=/usr/bin:/bin", "HOME=/tmp", "LANG=C.UTF-8", NULL};
+    execve(opts->program, argv, envp);
+    die(opts->program);
+    return 125;
+}
+
+static rlim_t parse_number(const char *value)
+{
+    char *end;
+    errno = 0;
+    unsigned long long number = strtoull(value, &end, 10);
+    if (errno || *end || end == value) {
+        fprintf(stderr, "sandbox: invalid number: %s\n", value);
+        exit(125);
+    }
+    return (rlim_t)number;
+}
+
+int main(int argc, char **argv)
+{
+    struct options opts = {0};
+    char map[64];
+    char path[64];
+    int i;
+
+    opts.host_uid = getuid() == 0 ? 65534 : getuid();
+    opts.host_gid = getgid() == 0 ? 65534 : getgid();
+
+    for (i = 1; i + 1 < argc && strncmp(argv[i], "--", 2) == 0; i += 2) {
+        rlim_t value = parse_number(argv[i + 1]);
+        if (strcmp(argv[i], "--cpu") == 0)
+            opts.cpu_seconds = value;
+        else if (strcmp(argv[i], "--memory") == 0)
+            opts.memory_bytes = value;
+        else if (strcmp(argv[i], "--fsize") == 0)
+            opts.fsize_bytes = value;
+        else if (strcmp(argv[i], "--nproc") == 0)
+            opts.nproc = value;
+        else if (strcmp(argv[i], "--nofile") == 0)
+            opts.nofile = value;
+        else if (strcmp(argv[i], "--uid") == 0)
+            opts.host_uid = (uid_t)value;
+        else if (strcmp(argv[i], "--gid") == 0)
+            opts.host_gid = (gid_t)value;
+        else {
+            fprintf(stderr, "sandbox: unknown option: %s\n", argv[i]);
+            return 125;
+        }
+    }
+    if (argc - i != 2) {
+        fprintf(stderr, "usage: %s [options] WORKSPACE PROGRAM\n", argv[0]);
+        return 125;
+    }
+    opts.workspace = argv[i];
+    opts.program = argv[i + 1];
+
+    /* The new root is assembled on a scratch mount point */
+    snprintf(opts.root, sizeof(opts.root), "/tmp/.sandbox_root_XXXXXX");
+    if (!mkdtemp(opts.root))
+        die("mkdtemp");
+    if (pipe2(opts.sync_pipe, O_CLOEXEC) != 0)
+        die("pipe");
+
+    char *stack = malloc(STACK_SIZE);
+    if (!stack)
+        die("malloc");
+    pid_t child = clone(sandbox_main, stack + STACK_SIZE,
+                        CLONE_NEWUSER | CLONE_NEWNS | CLONE_NEWPID | CLONE_NEWNET |
+                        CLONE_NEWIPC | CLONE_NEWUTS | SIGCHLD,
+                        &opts);
+    int clone_errno = errno;
+    close(opts.sync_pipe[0]);
+    if (child < 0) {
+        rmdir(opts.root);
+        errno = clone_errno;
+        die("clone");
+    }
+
+    /* Map the sandbox user to an unprivileged host user */
+    snprintf(path, sizeof(path), "/proc/%d/setgroups", child);
+    write_file(path, "deny");
+    snprintf(path, sizeof(path), "/proc/%d/uid_map", child);
+    snprintf(map, sizeof(map), "%d %u 1\n", SANDBOX_ID, opts.host_uid);
+    write_file(path, map);
+    snprintf(path, sizeof(path), "/proc/%d/gid_map", child);
+    snprintf(map, sizeof(map), "%d %u 1\n", SANDBOX_ID, opts.host_gid);
+    write_file(path, map);
+    /* The write end stays open while the program runs; see sandbox_main */
+    if (write(opts.sync_pipe[1], "x", 1) != 1)
+        die("sync");
+
+    int status;
+    while (waitpid(child, &status, 0) < 0) {
+        if (errno != EINTR)
+            die("waitpid");
+    }
+    rmdir(opts.root);
+
+    if (WIFEXITED(status))
+        return WEXITSTATUS(status);
+    return 128 + WTERMSIG(status);
+}
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the executor benchmark's corpus, summaries and baseline comparison
+"""
+
+import unittest
+
+from benchmark_executor import compare, load_corpus, summarize
+
+
+def result(stage, success, **stages_ms):
+    return {"stage": stage, "success": success,
+            "debug": {"stages_ms": stages_ms, "total_ms": sum(stages_ms.values())}}
+
+
+class TestCorpus(unittest.TestCase):
+
+    def test_corpus_has_demo_files_and_snippets(self):
+        corpus = load_corpus()
+        names = [name for name, _ in corpus]
+        self.assertEqual(names[:2], ["sample_exercises.c", "security_examples.c"])
+        self.assertIn("sandbox_demo.py:hello_fann", names)
+        self.assertIn("sandbox_demo.py:System Call Injection", names)
+        self.assertEqual(len(names), len(set(names)))
+        for _, code in corpus:
+            self.assertIn("main(", code)
+
+
+class TestSummaries(unittest.TestCase):
+
+    def test_summarize(self):
+        results = [result("execution", True, validation=1, compilation=100 + i) for i in range(10)]
+        results.append(result("validation", False, validation=2))
+        summary = summarize(results, elapsed=2.0)
+
+        self.assertEqual(summary["throughput_per_s"], 5.5)
+        self.assertEqual(summary["outcomes"], {"success": 10, "validation": 1})
+        self.assertEqual(summary["stages"]["compilation"]["count"], 10)
+        self.assertEqual(summary["stages"]["compilation"]["p50"], 104)
+        self.assertEqual(summary["stages"]["compilation"]["p99"], 109)
+        self.assertEqual(summary["stages"]["total"]["count"], 11)
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        def run(throughput, compile_p95, validation_p95):
+            stages = {
+                "compilation": {"p50": 100, "p95": compile_p95, "p99": 300},
+                "validation": {"p50": 0.1, "p95": validation_p95, "p99": 0.3},
+            }
+            return {"levels": {"4": {"throughput_per_s": throughput, "stages": stages}}}
+
+        baseline = run(30.0, 200, 0.2)
+        self.assertEqual(compare(baseline, run(29.0, 210, 0.2), 0.10), [])
+        # Sub-millisecond growth of a cheap stage is noise
+        self.assertEqual(compare(baseline, run(30.0, 200, 0.6), 0.10), [])
+
+        regressions = compare(baseline, run(20.0, 260, 0.2), 0.10)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn("throughput", regressions[0])
+        self.assertIn("compilation p95 200 -> 260", regressions[1])
+
+    def test_compare_skips_levels_missing_from_baseline(self):
+        baseline = {"levels": {}}
+        current = {"levels": {"8": {"throughput_per_s": 1.0, "stages": {}}}}
+        self.assertEqual(compare(baseline, current, 0.10), [])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
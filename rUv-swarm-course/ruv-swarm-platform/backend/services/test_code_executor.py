@@ -5,10 +5,16 @@ Tests various security measures and attack vectors
 """
 
 import unittest
+import asyncio
 import json
 import tempfile
 import os
+import threading
+import time
+from cancellation import cancel_scope
 from code_executor import CodeExecutor
+from output_capture import capture_process
+from sandbox_backend import SandboxBackend
 
 
 class TestCodeExecutorSecurity(unittest.TestCase):
@@ -453,6 +459,198 @@ int main() {{
                 self.assertIn("truncated", result["stdout"])
 
 
+
+class TestCodeExecutorAsync(unittest.TestCase):
+    """Tests for the asyncio execution API"""
+    
+    def setUp(self):
+        self.executor = CodeExecutor()
+    
+    def test_async_validation_rejects_unsafe_code(self):
+        """Test that the async entry point applies the same validation"""
+        malicious_code = """
+#include <stdio.h>
+#include <stdlib.h>
+
+int main() {
+    system("ls /");
+    return 0;
+}
+"""
+        result = asyncio.run(self.executor.execute_code_async(malicious_code))
+        self.assertFalse(result["success"])
+        self.assertEqual(result["stage"], "validation")
+        self.assertIn("Forbidden pattern detected", result["error"])
+    
+    def test_async_process_killed_on_timeout(self):
+        """Test that a process exceeding its timeout is killed"""
+        async def run():
+            start = time.time()
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.executor._run_process_async(["sleep", "5"], timeout=0.2)
+            return time.time() - start
+        
+        elapsed = asyncio.run(run())
+        self.assertLess(elapsed, 2)
+    
+    def test_async_processes_run_concurrently(self):
+        """Test that many executions can be in flight on one event loop"""
+        async def run():
+            start = time.time()
+            results = await asyncio.gather(*[
+                self.executor._run_process_async(["sleep", "0.5"], timeout=5)
+                for _ in range(20)
+            ])
+            return results, time.time() - start
+        
+        results, elapsed = asyncio.run(run())
+        self.assertTrue(all(returncode == 0 for returncode, _, _ in results))
+        self.assertLess(elapsed, 5)
+    
+    def test_async_process_killed_at_output_limit(self):
+        """Test that a process flooding its output is killed instead of buffered"""
+        self.executor.OUTPUT_KILL_SIZE = 100000
+        
+        start = time.time()
+        returncode, stdout, _ = asyncio.run(self.executor._run_process_async(["yes"], timeout=10))
+        
+        self.assertEqual(returncode, -1)
+        self.assertIn("bytes truncated", stdout)
+        self.assertLessEqual(len(stdout), self.executor.MAX_OUTPUT_SIZE + 100)
+        self.assertLess(time.time() - start, 2)
+    
+    def collect_stream(self, cmd, timeout=5, on_kill=None):
+        async def run():
+            return [event async for event in self.executor._stream_process(cmd, timeout, on_kill)]
+        return asyncio.run(run())
+    
+    def test_stream_yields_output_as_produced(self):
+        """Test that streamed output arrives in chunks followed by an exit event"""
+        events = self.collect_stream(["sh", "-c", "printf hello; sleep 0.2; printf world >&2"])
+        
+        self.assertEqual(events[0], {"event": "stdout", "data": "hello"})
+        self.assertEqual(events[1], {"event": "stderr", "data": "world"})
+        self.assertEqual(events[-1]["event"], "exit")
+        self.assertEqual(events[-1]["exit_code"], 0)
+        self.assertIsNone(events[-1]["reason"])
+    
+    def test_stream_kills_process_at_output_limit(self):
+        """Test that passing OUTPUT_KILL_SIZE kills the process immediately"""
+        self.executor.MAX_OUTPUT_SIZE = 10000
+        self.executor.OUTPUT_KILL_SIZE = 100000
+        killed = []
+        
+        async def on_kill():
+            killed.append(True)
+        
+        start = time.time()
+        events = self.collect_stream(["yes"], timeout=10, on_kill=on_kill)
+        
+        output = "".join(e["data"] for e in events if e["event"] == "stdout")
+        self.assertIn("bytes truncated", output)
+        self.assertLessEqual(len(output), 10000 + 100)
+        self.assertEqual(events[-1]["reason"], "output_limit")
+        self.assertGreater(events[-1]["output_bytes"], 100000)
+        self.assertEqual(killed, [True])
+        self.assertLess(time.time() - start, 2)
+    
+    def test_stream_output_matches_buffered_capture(self):
+        """Test that streaming keeps the same head and tail as a buffered run"""
+        self.executor.MAX_OUTPUT_SIZE = 1000
+        cmd = ["sh", "-c", "seq 1 2000; seq 1 10 >&2"]
+        
+        events = self.collect_stream(cmd)
+        captured = capture_process(cmd, timeout=5, limit=1000, kill_after=self.executor.OUTPUT_KILL_SIZE)
+        
+        streamed = {name: "".join(e["data"] for e in events if e["event"] == name)
+                    for name in ("stdout", "stderr")}
+        self.assertEqual(streamed["stdout"], captured.stdout)
+        self.assertEqual(streamed["stderr"], captured.stderr)
+        self.assertIn("bytes truncated", streamed["stdout"])
+        self.assertTrue(streamed["stdout"].endswith("1999\n2000\n"))
+        self.assertIsNone(events[-1]["reason"])
+        self.assertEqual(events[-1]["output_bytes"], captured.output_bytes)
+    
+    def test_stream_kills_process_on_timeout(self):
+        """Test that a silent process is killed when the timeout expires"""
+        events = self.collect_stream(["sleep", "5"], timeout=0.2)
+        
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["reason"], "timeout")
+        self.assertEqual(events[0]["exit_code"], -1)
+    
+    def test_stream_validation_verdict(self):
+        """Test that the streaming entry point reports validation failures as a verdict"""
+        async def run():
+            return [event async for event in self.executor.execute_code_stream('system("ls");')]
+        
+        events = asyncio.run(run())
+        self.assertEqual(events[0], {"event": "stage", "stage": "validation"})
+        self.assertEqual(events[-1]["event"], "verdict")
+        self.assertEqual(events[-1]["stage"], "validation")
+        self.assertFalse(events[-1]["success"])
+
+
+class SleepingBackend(SandboxBackend):
+    """Backend whose "sandbox" prints a line and then hangs"""
+    
+    name = 'sleeping'
+    
+    def __init__(self):
+        self.killed = []
+    
+    def available(self) -> bool:
+        return True
+    
+    def command(self, temp_dir, run_id, cgroup=None):
+        return ["sh", "-c", "echo started; exec sleep 30"]
+    
+    def kill(self, run_id):
+        self.killed.append(run_id)
+    
+    async def kill_async(self, run_id):
+        self.killed.append(run_id)
+
+
+class TestCodeExecutorCancellation(unittest.TestCase):
+    """Tests for cancelling runs in progress"""
+    
+    PROGRAM = "#include <stdio.h>\nint main() { return 0; }\n"
+    
+    def setUp(self):
+        self.backend = SleepingBackend()
+        self.executor = CodeExecutor(backend=self.backend)
+        self.executor.LINK_LIBRARIES = ["-lm"]  # Compiles without libfann
+    
+    def test_cancelled_scope_kills_the_sandbox(self):
+        """Test that cancelling a run's scope stops its sandbox and reports the cancellation"""
+        start = time.time()
+        with cancel_scope() as scope:
+            threading.Timer(0.5, scope.cancel).start()
+            result = self.executor.execute_code(self.PROGRAM)
+        
+        self.assertFalse(result["success"])
+        self.assertTrue(result["cancelled"])
+        self.assertEqual(result["stage"], "execution")
+        self.assertEqual(len(self.backend.killed), 1)
+        self.assertLess(time.time() - start, 5)
+    
+    def test_closing_a_stream_kills_the_sandbox(self):
+        """Test that a client going away mid-stream stops the run at once"""
+        async def run():
+            stream = self.executor.execute_code_stream(self.PROGRAM)
+            async for event in stream:
+                if event["event"] == "stdout":
+                    break
+            await stream.aclose()
+            return list(self.backend.killed)
+        
+        start = time.time()
+        killed_on_close = asyncio.run(run())
+        self.assertEqual(len(killed_on_close), 1)
+        self.assertLess(time.time() - start, 5)
+
+
 if __name__ == "__main__":
     # Run all tests
     unittest.main(verbosity=2)
\ No newline at end of file
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed compilation cache
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from code_executor import CodeExecutor
+from compile_cache import CompilationCache
+
+
+class TestCompilationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp(prefix="compile_cache_test_")
+        self.work_dir = tempfile.mkdtemp(prefix="compile_cache_work_")
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        self.addCleanup(shutil.rmtree, self.work_dir, True)
+
+    def make_binary(self, name: str, size: int) -> str:
+        path = os.path.join(self.work_dir, name)
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+        return path
+
+    def test_key_depends_on_source_and_flags(self):
+        cache = CompilationCache(cache_dir=self.cache_dir)
+        base = cache.key("int main() { return 0; }", ["gcc", "-O2"])
+
+        self.assertEqual(base, cache.key("int main() { return 0; }", ["gcc", "-O2"]))
+        self.assertNotEqual(base, cache.key("int main() { return 1; }", ["gcc", "-O2"]))
+        self.assertNotEqual(base, cache.key("int main() { return 0; }", ["gcc", "-O0"]))
+
+    def test_store_then_fetch(self):
+        cache = CompilationCache(cache_dir=self.cache_dir)
+        binary = self.make_binary("program", 128)
+        output = os.path.join(self.work_dir, "fetched")
+
+        self.assertFalse(cache.fetch("ab" * 32, output))
+        cache.store("ab" * 32, binary)
+        self.assertTrue(cache.fetch("ab" * 32, output))
+
+        with open(binary, 'rb') as a, open(output, 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+        self.assertTrue(os.access(output, os.X_OK))
+
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_least_recently_used_entries_evicted(self):
+        cache = CompilationCache(cache_dir=self.cache_dir, max_bytes=250)
+        for key in ("aa" * 32, "bb" * 32):
+            cache.store(key, self.make_binary(key, 100))
+
+        # Touch the older entry so the newer one becomes least recently used
+        old_time = os.path.getmtime(os.path.join(self.cache_dir, "aa", "aa" * 32)) - 10
+        os.utime(os.path.join(self.cache_dir, "bb", "bb" * 32), (old_time, old_time))
+
+        cache.store("cc" * 32, self.make_binary("cc", 100))
+
+        self.assertTrue(cache.fetch("aa" * 32, os.path.join(self.work_dir, "a_out")))
+        self.assertFalse(cache.fetch("bb" * 32, os.path.join(self.work_dir, "b_out")))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertLessEqual(cache.stats()["size_bytes"], 250)
+
+    def test_size_restored_from_disk(self):
+        cache = CompilationCache(cache_dir=self.cache_dir)
+        cache.store("aa" * 32, self.make_binary("a", 100))
+
+        reopened = CompilationCache(cache_dir=self.cache_dir)
+        self.assertEqual(reopened.stats()["size_bytes"], 100)
+
+    def test_cache_hit_skips_compilation(self):
+        cache = CompilationCache(cache_dir=self.cache_dir)
+        executor = CodeExecutor(compile_cache=cache)
+        code = "int main(void) { return 0; }\n"
+
+        cached_binary = self.make_binary("program", 64)
+        cache.store(executor._compile_cache_key(code), cached_binary)
+
+        # libfann is not needed on a hit because gcc never runs
+        os.remove(cached_binary)
+        success, output_file = executor.compile_code(code, self.work_dir)
+
+        self.assertTrue(success)
+        self.assertEqual(output_file, os.path.join(self.work_dir, "program"))
+        self.assertEqual(cache.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
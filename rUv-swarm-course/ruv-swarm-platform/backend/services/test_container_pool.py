@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Tests for the warm sandbox container pool lifecycle
+Docker calls are replaced by an in-memory container registry
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from code_executor import CodeExecutor
+from container_pool import PooledContainer, SandboxContainerPool
+
+
+class InMemoryContainerPool(SandboxContainerPool):
+    """Pool whose container primitives don't talk to Docker"""
+
+    def __init__(self, *args, reset_ok: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._maintenance = ThreadPoolExecutor(max_workers=1)
+        self.reset_ok = reset_ok
+        self.running = set()
+
+    def _start_container(self):
+        container = PooledContainer(f"test_{uuid.uuid4().hex[:8]}", self.workspace_root)
+        self.running.add(container.name)
+        return container
+
+    def _reset_container(self, container):
+        return self.reset_ok
+
+    def _destroy_container(self, container):
+        self.running.discard(container.name)
+
+    def wait_for_maintenance(self):
+        self._maintenance.submit(lambda: None).result()
+
+
+class SleepingContainerPool(InMemoryContainerPool):
+    """Pool whose "exec" prints a line and then hangs"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.killed = []
+
+    def _build_exec_command(self, container):
+        return ["sh", "-c", "echo started; exec sleep 30"]
+
+    def _kill_programs(self, container):
+        self.killed.append(container.name)
+
+
+class TestSandboxContainerPool(unittest.TestCase):
+
+    def make_pool(self, **kwargs):
+        pool = InMemoryContainerPool(**kwargs)
+        self.addCleanup(pool.shutdown)
+        pool.start()
+        return pool
+
+    def test_warm_containers_are_reused(self):
+        pool = self.make_pool(size=2, max_uses=10)
+
+        first = pool.acquire()
+        pool.release(first)
+        pool.wait_for_maintenance()
+        pool.acquire()
+
+        stats = pool.stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 0)
+        self.assertEqual(stats["recycles"], 0)
+        self.assertEqual(len(pool.running), 2)
+
+    def test_container_recycled_after_max_uses(self):
+        pool = self.make_pool(size=1, max_uses=2)
+
+        names = set()
+        for _ in range(4):
+            container = pool.acquire()
+            names.add(container.name)
+            pool.release(container)
+            pool.wait_for_maintenance()
+
+        self.assertEqual(pool.stats()["recycles"], 2)
+        self.assertEqual(len(names), 2)
+        self.assertEqual(len(pool.running), 1)
+
+    def test_anomaly_recycles_container(self):
+        pool = self.make_pool(size=1, max_uses=10)
+
+        container = pool.acquire()
+        pool.release(container, healthy=False)
+        pool.wait_for_maintenance()
+
+        self.assertNotIn(container.name, pool.running)
+        self.assertEqual(pool.stats()["recycles"], 1)
+        self.assertEqual(pool.stats()["idle"], 1)
+
+    def test_failed_reset_recycles_container(self):
+        pool = self.make_pool(size=1, max_uses=10, reset_ok=False)
+
+        container = pool.acquire()
+        pool.release(container)
+        pool.wait_for_maintenance()
+
+        self.assertNotIn(container.name, pool.running)
+        self.assertEqual(pool.stats()["recycles"], 1)
+
+    def test_spike_containers_are_not_kept(self):
+        pool = self.make_pool(size=1, max_uses=10)
+
+        warm = pool.acquire()
+        cold = pool.acquire()
+        self.assertEqual(pool.stats()["misses"], 1)
+
+        pool.release(warm)
+        pool.release(cold)
+        pool.wait_for_maintenance()
+
+        stats = pool.stats()
+        self.assertEqual(stats["idle"], 1)
+        self.assertEqual(stats["recycles"], 0)
+        self.assertEqual(len(pool.running), 1)
+
+
+
+class TestPooledExecutionCancellation(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = SleepingContainerPool(size=1, max_uses=10)
+        self.addCleanup(self.pool.shutdown)
+        self.pool.start()
+        fd, self.program = tempfile.mkstemp(prefix="pool_program_")
+        os.close(fd)
+        self.addCleanup(os.unlink, self.program)
+
+    def test_cancelled_task_kills_the_pooled_run(self):
+        """Cancelling an async run stops its program instead of leaving it to the timeout"""
+        executor = CodeExecutor(container_pool=self.pool)
+
+        async def run():
+            task = asyncio.create_task(executor.execute_in_sandbox_async(self.program, "/tmp"))
+            await asyncio.sleep(0.3)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        start = time.time()
+        asyncio.run(run())
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(len(self.pool.killed), 1)
+        self.pool.wait_for_maintenance()
+        self.assertEqual(self.pool.stats()["recycles"], 1)
+
+    def test_timed_out_program_is_killed_in_the_container(self):
+        captured = self.pool.execute(self.program, timeout=0.3)
+        self.assertTrue(captured.timed_out)
+        self.assertEqual(len(self.pool.killed), 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for pinning execution slots to CPU sets
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import unittest
+
+from cpusets import available_cpus, format_cpu_list, parse_cpu_list, pin_current_thread, pinned_cpus, slot_cpus
+from sandbox_backend import DockerSandboxBackend
+
+
+def in_thread(func):
+    """Result of calling `func` in a new thread"""
+    box = {}
+
+    def target():
+        try:
+            box['result'] = func()
+        except Exception as e:
+            box['error'] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    if 'error' in box:
+        raise box['error']
+    return box['result']
+
+
+class TestCpuLists(unittest.TestCase):
+
+    def test_parse_and_format(self):
+        self.assertEqual(parse_cpu_list("0-3,6, 8-9"), [0, 1, 2, 3, 6, 8, 9])
+        self.assertEqual(parse_cpu_list(""), [])
+        self.assertEqual(format_cpu_list([9, 0, 1, 2, 3, 6, 8]), "0-3,6,8-9")
+        self.assertEqual(format_cpu_list([4]), "4")
+        with self.assertRaises(ValueError):
+            parse_cpu_list("3-1")
+
+    def test_slot_shares(self):
+        shares = slot_cpus(list(range(8)), 3)
+        self.assertEqual([sorted(s) for s in shares], [[0, 1, 2], [3, 4, 5], [6, 7]])
+        # More slots than CPUs: slots take turns on single CPUs
+        self.assertEqual(slot_cpus([2, 3], 3), [frozenset([2]), frozenset([3]), frozenset([2])])
+        self.assertEqual(slot_cpus([], 4), [])
+
+
+class TestPinning(unittest.TestCase):
+
+    def test_pinning_affects_only_the_calling_thread_and_its_children(self):
+        cpu = available_cpus()[-1]
+        before = os.sched_getaffinity(0)
+
+        def pinned_child():
+            pin_current_thread([cpu])
+            child = subprocess.run([sys.executable, "-c", "import os; print(sorted(os.sched_getaffinity(0)))"],
+                                   capture_output=True, text=True, check=True)
+            return pinned_cpus(), child.stdout.strip()
+
+        cpus, child_affinity = in_thread(pinned_child)
+        self.assertEqual(cpus, frozenset([cpu]))
+        self.assertEqual(child_affinity, str([cpu]))
+        self.assertEqual(os.sched_getaffinity(0), before)
+        self.assertIsNone(pinned_cpus())
+
+    def test_unavailable_cpus_are_rejected(self):
+        with self.assertRaises(ValueError):
+            in_thread(lambda: pin_current_thread([max(available_cpus()) + 1]))
+        with self.assertRaises(ValueError):
+            in_thread(lambda: pin_current_thread([]))
+
+    def test_docker_runs_get_the_slot_cpuset(self):
+        backend = DockerSandboxBackend()
+        self.assertNotIn("--cpuset-cpus", backend.command("/tmp/ws", "run1"))
+
+        cpu = available_cpus()[0]
+
+        def pinned_command():
+            pin_current_thread([cpu])
+            return backend.command("/tmp/ws", "run1")
+
+        cmd = in_thread(pinned_command)
+        self.assertEqual(cmd[cmd.index("--cpuset-cpus") + 1], str(cpu))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
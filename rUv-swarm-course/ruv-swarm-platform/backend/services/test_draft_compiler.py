@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tests for speculative compilation of editor drafts
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from code_executor import CodeExecutor
+from compile_cache import CompilationCache
+from draft_compiler import DraftCompiler
+from execution_scheduler import ExecutionScheduler
+
+UNLIMITED = 1_000_000  # Executions per minute
+
+PROGRAM = """
+#include <stdio.h>
+int main() { printf("draft %d\\n", VERSION); return 0; }
+"""
+
+
+def program(version: int) -> str:
+    return f"#define VERSION {version}\n{PROGRAM}"
+
+
+class PlainExecutor(CodeExecutor):
+    """Executor linking only libm, so drafts compile without libfann"""
+    LINK_LIBRARIES = ["-lm"]
+
+
+class SlowExecutor(PlainExecutor):
+    """Executor whose "compiler" takes far longer than the tests wait"""
+
+    def _build_compile_command(self, source_file, output_file, extra_flags=None):
+        return ["sleep", "30"]
+
+
+async def settle(drafts: DraftCompiler) -> None:
+    """Wait until no draft is queued or compiling"""
+    while drafts.stats()["queued"] or drafts.stats()["compiling"]:
+        await asyncio.sleep(0.01)
+
+
+class TestDraftCompiler(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp(prefix="draft_cache_test_")
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        self.cache = CompilationCache(cache_dir=self.cache_dir)
+
+    def test_needs_a_compile_cache(self):
+        with self.assertRaises(ValueError):
+            DraftCompiler(PlainExecutor())
+
+    def test_draft_warms_the_cache_for_the_run(self):
+        executor = PlainExecutor(compile_cache=self.cache)
+        drafts = DraftCompiler(executor)
+
+        async def run():
+            posted = await drafts.submit("alice", program(1))
+            await settle(drafts)
+            again = await drafts.submit("alice", program(1))
+            return posted, again
+
+        posted, again = asyncio.run(run())
+        self.assertEqual(drafts.status(posted["draft_id"])["state"], "cached")
+        self.assertEqual(again["state"], "cached")
+        self.assertEqual(drafts.stats()["compiled"], 1)
+        self.assertEqual(drafts.stats()["already_cached"], 1)
+
+        # The run's compile step finds the draft's binary
+        work_dir = tempfile.mkdtemp(prefix="draft_run_test_")
+        self.addCleanup(shutil.rmtree, work_dir, True)
+        success, error = executor.compile_code(program(1), work_dir)
+        self.assertTrue(success, error)
+        self.assertTrue(os.path.exists(os.path.join(work_dir, "program")))
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_compiler_errors_are_kept_for_the_editor(self):
+        drafts = DraftCompiler(PlainExecutor(compile_cache=self.cache))
+
+        async def run():
+            posted = await drafts.submit("alice", "int main() { return undefined_name; }")
+            await settle(drafts)
+            return drafts.status(posted["draft_id"])
+
+        status = asyncio.run(run())
+        self.assertEqual(status["state"], "failed")
+        self.assertIn("undefined_name", status["error"])
+
+    def test_invalid_code_is_rejected_without_compiling(self):
+        drafts = DraftCompiler(PlainExecutor(compile_cache=self.cache))
+        posted = asyncio.run(drafts.submit("alice", '#include <unistd.h>\nint main() { fork(); }'))
+        self.assertEqual(posted["state"], "rejected")
+        self.assertEqual(drafts.stats()["compiling"], 0)
+
+    def test_newer_draft_kills_the_superseded_compile(self):
+        drafts = DraftCompiler(SlowExecutor(compile_cache=self.cache))
+
+        async def compiling(draft_id):
+            while drafts.status(draft_id)["state"] != "compiling" or drafts._live[("alice", "main")].process is None:
+                await asyncio.sleep(0.01)
+
+        async def run():
+            first = await drafts.submit("alice", program(1))
+            await asyncio.wait_for(compiling(first["draft_id"]), timeout=5)
+            second = await drafts.submit("alice", program(2))
+            await asyncio.wait_for(compiling(second["draft_id"]), timeout=5)
+            await asyncio.wait_for(drafts.shutdown(), timeout=5)
+            return drafts.status(first["draft_id"]), drafts.status(second["draft_id"])
+
+        first, second = asyncio.run(run())
+        self.assertEqual(first["state"], "superseded")
+        self.assertEqual(second["state"], "dropped")
+        self.assertEqual(drafts.stats()["killed"], 2)
+
+    def test_oldest_draft_is_dropped_beyond_the_user_cap(self):
+        drafts = DraftCompiler(SlowExecutor(compile_cache=self.cache), max_per_user=2, concurrency=1)
+
+        async def run():
+            posted = [await drafts.submit("alice", program(i), document=f"doc{i}") for i in range(3)]
+            other = await drafts.submit("bob", program(9))
+            states = [drafts.status(p["draft_id"])["state"] for p in posted + [other]]
+            await drafts.shutdown()
+            return states
+
+        self.assertEqual(asyncio.run(run()), ["dropped", "queued", "queued", "queued"])
+
+    def test_drafts_wait_while_real_runs_are_queued(self):
+        scheduler = ExecutionScheduler(slots=1, per_user_rate=UNLIMITED, global_rate=UNLIMITED)
+        drafts = DraftCompiler(PlainExecutor(compile_cache=self.cache), scheduler=scheduler)
+
+        async def run():
+            await scheduler.acquire("holder", "interactive")
+            waiting = asyncio.create_task(scheduler.acquire("bob", "interactive"))
+            await asyncio.sleep(0)
+            posted = await drafts.submit("alice", program(1))
+            await asyncio.sleep(0.2)
+            held_back = drafts.status(posted["draft_id"])["state"]
+
+            scheduler.release()
+            await waiting
+            await settle(drafts)
+            scheduler.release()
+            return held_back, drafts.status(posted["draft_id"])["state"]
+
+        held_back, finished = asyncio.run(run())
+        self.assertEqual(held_back, "queued")
+        self.assertEqual(finished, "cached")
+        self.assertGreater(drafts.stats()["deferred"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Tests for the weighted fair-share execution scheduler
+"""
+
+import asyncio
+import unittest
+
+from cancellation import cancelled_result
+from execution_scheduler import (
+    ExecutionScheduler,
+    SchedulerFull,
+    TokenBucket,
+    parse_lane_weights,
+    percentile
+)
+
+UNLIMITED = 1_000_000  # Executions per minute
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeExecutor:
+
+    def __init__(self):
+        self.codes = []
+
+    async def execute_code_async(self, code):
+        self.codes.append(code)
+        return {"success": True, "stdout": code}
+
+
+class HangingExecutor:
+    """Runs that only end when cancelled, recording the cancellations"""
+
+    def __init__(self):
+        self.started = []
+        self.cancelled = []
+
+    async def execute_code_async(self, code):
+        self.started.append(code)
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            self.cancelled.append(code)
+            raise
+
+    async def execute_code_stream(self, code, debug=False):
+        self.started.append(code)
+        try:
+            yield {"event": "stdout", "data": code}
+            await asyncio.sleep(30)
+        finally:
+            self.cancelled.append(code)
+
+
+def make_scheduler(**kwargs):
+    options = {"slots": 1, "per_user_rate": UNLIMITED, "global_rate": UNLIMITED}
+    options.update(kwargs)
+    return ExecutionScheduler(**options)
+
+
+async def drain_in_order(scheduler, requests):
+    """Hold the only slot, queue `requests` and record the order slots are granted"""
+    order = []
+    await scheduler.acquire("holder", "interactive")
+
+    async def wait(user_id, lane):
+        await scheduler.acquire(user_id, lane)
+        order.append((user_id, lane))
+        await asyncio.sleep(0)
+        scheduler.release()
+
+    tasks = [asyncio.create_task(wait(user_id, lane)) for user_id, lane in requests]
+    await asyncio.sleep(0)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+class TestHelpers(unittest.TestCase):
+
+    def test_parse_lane_weights(self):
+        self.assertEqual(parse_lane_weights("interactive=6, submit=3"),
+                         {"interactive": 6.0, "submit": 3.0, "regrade": 1.0})
+        with self.assertRaises(ValueError):
+            parse_lane_weights("batch=2")
+        with self.assertRaises(ValueError):
+            parse_lane_weights("regrade=0")
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 0.50), 50.0)
+        self.assertEqual(percentile(values, 0.95), 95.0)
+        self.assertEqual(percentile([], 0.95), 0.0)
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(60, burst=2, now=0.0)
+        bucket.take(0.0)
+        bucket.take(0.0)
+        self.assertFalse(bucket.ready(0.0))
+        self.assertAlmostEqual(bucket.wait_time(0.0), 1.0)
+        self.assertTrue(bucket.ready(1.0))
+
+
+class TestScheduling(unittest.TestCase):
+
+    def test_lanes_share_slots_by_weight(self):
+        scheduler = make_scheduler(lane_weights={"interactive": 6, "submit": 3, "regrade": 1})
+        requests = [(f"u{i}", lane) for lane in ("regrade", "submit", "interactive") for i in range(20)]
+
+        order = asyncio.run(drain_in_order(scheduler, requests))
+
+        first = [lane for _, lane in order[:20]]
+        self.assertEqual(first.count("interactive"), 12)
+        self.assertEqual(first.count("submit"), 6)
+        self.assertEqual(first.count("regrade"), 2)
+
+    def test_users_take_turns_within_a_lane(self):
+        scheduler = make_scheduler()
+        requests = [("looper", "interactive")] * 5 + [("alice", "interactive"), ("bob", "interactive")]
+
+        order = asyncio.run(drain_in_order(scheduler, requests))
+
+        self.assertEqual([user for user, _ in order[:4]], ["looper", "alice", "bob", "looper"])
+
+    def test_idle_lane_does_not_bank_credit(self):
+        scheduler = make_scheduler(lane_weights={"interactive": 1, "submit": 1, "regrade": 1})
+
+        async def run():
+            # Interactive runs alone for a while, then submits arrive
+            await drain_in_order(scheduler, [("a", "interactive")] * 10)
+            return await drain_in_order(scheduler, [("a", "interactive")] * 4 + [("b", "submit")] * 4)
+
+        order = asyncio.run(run())
+        self.assertEqual([lane for _, lane in order[:4]], ["interactive", "submit"] * 2)
+
+    def test_per_user_rate_limit(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(slots=4, per_user_rate=2, clock=clock)
+
+        async def run():
+            await scheduler.acquire("alice")
+            await scheduler.acquire("alice")
+            third = asyncio.create_task(scheduler.acquire("alice"))
+            other = asyncio.create_task(scheduler.acquire("bob"))
+            await asyncio.sleep(0.05)
+            self.assertFalse(third.done())
+            self.assertTrue(other.done())
+
+            clock.now += 30  # One token refilled at 2 per minute
+            scheduler._dispatch()
+            await asyncio.wait_for(third, 1)
+
+        asyncio.run(run())
+        self.assertGreater(scheduler.stats()["rate_limit_stalls"], 0)
+
+    def test_global_rate_limit_spares_regrades(self):
+        scheduler = make_scheduler(slots=4, global_rate=1, clock=FakeClock())
+
+        async def run():
+            await scheduler.acquire("alice")
+            blocked = asyncio.create_task(scheduler.acquire("bob"))
+            await asyncio.wait_for(scheduler.acquire("instructor", "regrade"), 1)
+            await asyncio.sleep(0.05)
+            self.assertFalse(blocked.done())
+            blocked.cancel()
+
+        asyncio.run(run())
+
+    def test_cancelled_waiter_leaves_the_queue(self):
+        scheduler = make_scheduler()
+
+        async def run():
+            await scheduler.acquire("holder")
+            waiter = asyncio.create_task(scheduler.acquire("alice"))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            self.assertEqual(scheduler.stats()["queued"], 0)
+            scheduler.release()
+            self.assertEqual(scheduler.busy, 0)
+
+        asyncio.run(run())
+
+    def test_queue_cap_per_user(self):
+        scheduler = make_scheduler(max_queued_per_user=2)
+
+        async def run():
+            await scheduler.acquire("holder")
+            waiters = [asyncio.create_task(scheduler.acquire("alice")) for _ in range(2)]
+            await asyncio.sleep(0)
+            with self.assertRaises(SchedulerFull):
+                await scheduler.acquire("alice")
+            for waiter in waiters:
+                waiter.cancel()
+
+        asyncio.run(run())
+        self.assertEqual(scheduler.stats()["rejected"], 1)
+
+    def test_execute_and_wait_percentiles(self):
+        executor = FakeExecutor()
+        scheduler = make_scheduler(executor=executor, slots=2)
+
+        async def run():
+            return await asyncio.gather(*[
+                scheduler.execute(f"run {i}", f"user{i % 3}", lane)
+                for i, lane in enumerate(["interactive", "submit", "regrade"] * 4)
+            ])
+
+        results = asyncio.run(run())
+        self.assertEqual(len(executor.codes), 12)
+        self.assertTrue(all(result["success"] for result in results))
+
+        stats = scheduler.stats()
+        self.assertEqual(stats["busy"], 0)
+        for lane in ("interactive", "submit", "regrade"):
+            self.assertEqual(stats["lanes"][lane]["dispatched"], 4)
+            self.assertIn("p95", stats["lanes"][lane]["wait_ms"])
+
+
+class TestCancellation(unittest.TestCase):
+
+    def test_cancel_running_and_queued_runs_by_id(self):
+        executor = HangingExecutor()
+        scheduler = make_scheduler(executor=executor)
+
+        async def run():
+            running = asyncio.create_task(scheduler.execute("a", "alice", execution_id="run-a"))
+            queued = asyncio.create_task(scheduler.execute("b", "bob", execution_id="run-b"))
+            await asyncio.sleep(0.01)
+            self.assertEqual(scheduler.stats()["queued"], 1)
+
+            self.assertTrue(scheduler.cancel("run-b"))
+            self.assertEqual(await queued, cancelled_result("queue"))
+            self.assertEqual(scheduler.stats()["queued"], 0)
+
+            self.assertTrue(scheduler.cancel("run-a"))
+            self.assertEqual(await running, cancelled_result("execution"))
+            self.assertFalse(scheduler.cancel("run-a"))
+
+        asyncio.run(run())
+        self.assertEqual(executor.started, ["a"])
+        self.assertEqual(executor.cancelled, ["a"])
+        self.assertEqual(scheduler.busy, 0)
+        self.assertEqual(scheduler.stats()["cancelled"], 2)
+
+    def test_cancelled_run_frees_its_slot_for_the_next(self):
+        executor = HangingExecutor()
+        scheduler = make_scheduler(executor=executor)
+
+        async def run():
+            first = asyncio.create_task(scheduler.execute("a", "alice", execution_id="run-a"))
+            second = asyncio.create_task(scheduler.execute("b", "bob", execution_id="run-b"))
+            await asyncio.sleep(0.01)
+            self.assertEqual(executor.started, ["a"])
+            scheduler.cancel("run-a")
+            await first
+            await asyncio.sleep(0.01)
+            self.assertEqual(executor.started, ["a", "b"])
+            scheduler.cancel("run-b")
+            return await second
+
+        self.assertTrue(asyncio.run(run())["cancelled"])
+        self.assertEqual(scheduler.busy, 0)
+
+    def test_execution_ids_are_unique_while_in_progress(self):
+        scheduler = make_scheduler(executor=HangingExecutor())
+
+        async def run():
+            first = asyncio.create_task(scheduler.execute("a", "alice", execution_id="run-a"))
+            await asyncio.sleep(0)
+            with self.assertRaises(ValueError):
+                await scheduler.execute("b", "alice", execution_id="run-a")
+            scheduler.cancel("run-a")
+            await first
+
+        asyncio.run(run())
+
+    def test_closing_a_stream_cancels_the_run(self):
+        executor = HangingExecutor()
+        scheduler = make_scheduler(executor=executor)
+
+        async def run():
+            stream = scheduler.stream("a", "alice", execution_id="run-a")
+            self.assertEqual(await anext(stream), {"event": "stdout", "data": "a"})
+            await stream.aclose()  # The client went away
+            await asyncio.sleep(0)
+            return scheduler.busy
+
+        self.assertEqual(asyncio.run(run()), 0)
+        self.assertEqual(executor.cancelled, ["a"])
+        self.assertEqual(scheduler.stats()["disconnected"], 1)
+        self.assertFalse(scheduler._executions)
+
+    def test_stream_cancelled_by_id_ends_with_a_verdict(self):
+        scheduler = make_scheduler(executor=HangingExecutor())
+
+        async def run():
+            events = []
+            async for event in scheduler.stream("a", "alice", execution_id="run-a"):
+                events.append(event)
+                scheduler.cancel("run-a")
+            return events
+
+        events = asyncio.run(run())
+        self.assertEqual(events[-1], {"event": "verdict", **cancelled_result("execution")})
+        self.assertEqual(scheduler.stats()["disconnected"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
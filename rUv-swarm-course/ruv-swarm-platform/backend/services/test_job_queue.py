@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Tests for the durable execution job queue and the standalone workers
+"""
+
+import asyncio
+import os
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from cpusets import available_cpus
+from execution_worker import ExecutionWorker
+from job_queue import QueuedExecutor, SQLiteJobQueue, open_queue
+from output_capture import capture_process
+
+BROKEN_CODE = "#include <stdio.h>\nint main( { return 0; }\n"
+SERVICES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class EchoExecutor:
+    """Executor that returns its input, or raises for code "raise" """
+
+    def execute_code(self, code, debug=False):
+        if code == "raise":
+            raise RuntimeError("executor crashed")
+        return {"success": True, "stdout": code, "stage": "execution"}
+
+
+class SleepingExecutor:
+    """Executor whose runs hang in a subprocess until killed"""
+
+    def execute_code(self, code, debug=False):
+        captured = capture_process(["sleep", "30"], timeout=30, limit=1024, kill_after=1024)
+        return {"success": False, "cancelled": captured.cancelled, "stage": "execution"}
+
+
+class QueueTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="job_queue_test_")
+        self.path = os.path.join(self.tmp, "queue.db")
+        self.clock = FakeClock()
+        self.queue = SQLiteJobQueue(self.path, clock=self.clock, visibility_timeout=30,
+                                    max_attempts=2, retry_delay=5)
+
+    def tearDown(self):
+        self.queue.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+class TestSQLiteJobQueue(QueueTestCase):
+
+    def test_jobs_are_claimed_in_order_and_completed(self):
+        first = self.queue.enqueue({"code": "a"})
+        second = self.queue.enqueue({"code": "b"})
+
+        job = self.queue.claim("w1")
+        self.assertEqual((job.id, job.payload, job.attempt), (first, {"code": "a"}, 1))
+        self.assertEqual(self.queue.get(first)["state"], "running")
+        self.assertTrue(self.queue.complete(job, {"stdout": "a"}))
+
+        stored = self.queue.get(first)
+        self.assertEqual(stored["state"], "done")
+        self.assertEqual(stored["result"], {"stdout": "a"})
+        self.assertEqual(self.queue.claim("w2").id, second)
+        self.assertIsNone(self.queue.claim("w3"))
+        self.assertEqual(self.queue.stats(), {"queued": 0, "running": 1, "done": 1, "failed": 0, "cancelled": 0})
+
+    def test_expired_lease_goes_to_another_worker(self):
+        job_id = self.queue.enqueue({"code": "a"})
+        dead = self.queue.claim("dead-worker")
+        self.clock.now += 20
+        self.assertTrue(self.queue.heartbeat(dead))
+        self.clock.now += 20
+        self.assertIsNone(self.queue.claim("w2"))  # Heartbeat extended the lease
+
+        self.clock.now += 11
+        retried = self.queue.claim("w2")
+        self.assertEqual((retried.id, retried.attempt), (job_id, 2))
+        self.assertEqual(self.queue.reclaimed, 1)
+        # The first worker's lease is gone, whatever it does now
+        self.assertFalse(self.queue.heartbeat(dead))
+        self.assertFalse(self.queue.complete(dead, {"stdout": "stale"}))
+        self.assertTrue(self.queue.complete(retried, {"stdout": "fresh"}))
+        self.assertEqual(self.queue.get(job_id)["result"], {"stdout": "fresh"})
+
+    def test_job_fails_when_its_workers_keep_dying(self):
+        job_id = self.queue.enqueue({"code": "a"})
+        for _ in range(2):
+            self.assertIsNotNone(self.queue.claim("doomed"))
+            self.clock.now += 31
+        self.assertIsNone(self.queue.claim("w2"))
+
+        stored = self.queue.get(job_id)
+        self.assertEqual(stored["state"], "failed")
+        self.assertEqual(stored["error"], "Worker lost on attempt 2")
+
+    def test_failed_job_is_retried_after_a_delay(self):
+        job_id = self.queue.enqueue({"code": "a"})
+        self.assertTrue(self.queue.fail(self.queue.claim("w1"), "boom"))
+        self.assertEqual(self.queue.get(job_id)["state"], "queued")
+        self.assertIsNone(self.queue.claim("w1"))
+
+        self.clock.now += 5
+        job = self.queue.claim("w1")
+        self.assertEqual(job.attempt, 2)
+        self.assertTrue(self.queue.fail(job, "boom again"))
+        stored = self.queue.get(job_id)
+        self.assertEqual((stored["state"], stored["error"]), ("failed", "boom again"))
+
+    def test_purge_removes_old_finished_jobs(self):
+        done = self.queue.enqueue({"code": "a"})
+        self.queue.complete(self.queue.claim("w1"), {})
+        self.clock.now += 100
+        waiting = self.queue.enqueue({"code": "b"})
+
+        self.assertEqual(self.queue.purge(older_than=50), 1)
+        self.assertIsNone(self.queue.get(done))
+        self.assertEqual(self.queue.get(waiting)["state"], "queued")
+
+    def test_concurrent_claims_never_share_a_job(self):
+        job_ids = {self.queue.enqueue({"code": str(i)}) for i in range(200)}
+        claimed = []
+
+        def drain(name):
+            queue = SQLiteJobQueue(self.path)
+            while True:
+                job = queue.claim(name)
+                if job is None:
+                    break
+                claimed.append(job.id)
+                queue.complete(job, {})
+            queue.close()
+
+        threads = [threading.Thread(target=drain, args=(f"w{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(claimed), sorted(job_ids))
+
+    def test_queued_and_running_jobs_can_be_cancelled(self):
+        running = self.queue.enqueue({"code": "a"})
+        queued = self.queue.enqueue({"code": "b"})
+        job = self.queue.claim("w1")
+
+        self.assertTrue(self.queue.cancel(queued))
+        self.assertTrue(self.queue.cancel(running))
+        self.assertFalse(self.queue.cancel(running))
+        self.assertIsNone(self.queue.claim("w2"))
+        self.assertEqual(self.queue.cancelled([running, queued, "unknown"]), {running, queued})
+
+        # The worker's lease is gone with the cancellation
+        self.assertFalse(self.queue.heartbeat(job))
+        self.assertFalse(self.queue.complete(job, {"stdout": "a"}))
+        self.assertEqual(self.queue.get(running)["state"], "cancelled")
+        self.assertEqual(self.queue.stats()["cancelled"], 2)
+
+        self.clock.now += 100
+        self.assertEqual(self.queue.purge(older_than=50), 2)
+
+    def test_workers_only_claim_from_their_pools(self):
+        c_job = self.queue.enqueue({"code": "a"})
+        python_job = self.queue.enqueue({"code": "b"}, pool="python")
+
+        self.assertEqual(self.queue.claim("py", pools=["python"]).id, python_job)
+        self.assertIsNone(self.queue.claim("py", pools=["python"]))
+        self.assertEqual(self.queue.claim("c").id, c_job)
+        self.assertEqual(self.queue.get(python_job)["pool"], "python")
+
+    def test_queue_files_without_pools_are_upgraded(self):
+        path = os.path.join(self.tmp, "old.db")
+        db = sqlite3.connect(path)
+        db.executescript(SQLiteJobQueue.SCHEMA.replace("pool TEXT NOT NULL DEFAULT 'c',", "")
+                         .replace("(state, pool, seq)", "(state, seq)"))
+        db.execute("INSERT INTO jobs (id, payload, state, max_attempts, available_at, enqueued_at) "
+                   "VALUES ('old', '{}', 'queued', 3, 0, 0)")
+        db.commit()
+        db.close()
+
+        queue = SQLiteJobQueue(path)
+        self.assertEqual(queue.claim("w1").id, "old")
+        queue.close()
+
+    def test_open_queue_urls(self):
+        queue = open_queue(f"sqlite:///{self.tmp}/other.db")
+        self.assertIsInstance(queue, SQLiteJobQueue)
+        self.assertEqual(queue.path, f"{self.tmp}/other.db")
+        queue.close()
+        with self.assertRaises(ValueError):
+            open_queue("amqp://localhost")
+
+
+class TestExecutionWorker(QueueTestCase):
+
+    def test_worker_runs_jobs_and_retries_errors(self):
+        worker = ExecutionWorker(self.queue, EchoExecutor(), concurrency=1)
+        ok = self.queue.enqueue({"code": "hello"})
+        crashing = self.queue.enqueue({"code": "raise"})
+
+        self.assertTrue(worker.run_once())
+        self.assertTrue(worker.run_once())
+        self.clock.now += 5
+        self.assertTrue(worker.run_once())
+        self.assertFalse(worker.run_once())
+
+        self.assertEqual(self.queue.get(ok)["result"]["stdout"], "hello")
+        self.assertEqual(self.queue.get(crashing)["state"], "failed")
+        self.assertEqual(self.queue.get(crashing)["error"], "RuntimeError: executor crashed")
+        self.assertEqual(worker.stats()["completed"], 1)
+        self.assertEqual(worker.stats()["failed"], 2)
+
+    def test_queued_executor_round_trip(self):
+        queue = SQLiteJobQueue(self.path)
+        worker = ExecutionWorker(queue, concurrency=2, poll_interval=0.01)
+        worker.start()
+        try:
+            executor = QueuedExecutor(queue, timeout=30)
+            result = asyncio.run(executor.execute_code_async(BROKEN_CODE, debug=True))
+            self.assertEqual(result["stage"], "compilation")
+            self.assertIn("compilation", result["debug"]["stages_ms"])
+            self.assertEqual(executor.execute_code(BROKEN_CODE)["stage"], "compilation")
+        finally:
+            worker.stop()
+            queue.close()
+        self.assertEqual(worker.stats()["completed"], 2)
+
+    def test_slots_are_pinned_to_their_share_of_cpus(self):
+        cpu = available_cpus()[0]
+        worker = ExecutionWorker(self.queue, EchoExecutor(), cpus=[cpu], poll_interval=0.01)
+        self.assertEqual(worker.concurrency, 1)
+        self.assertEqual(worker.stats()["slot_cpus"], [str(cpu)])
+
+        seen = []
+        worker.executor.execute_code = lambda code, debug=False: seen.append(os.sched_getaffinity(0)) or {}
+        self.queue.enqueue({"code": "a"})
+        worker.start()
+        try:
+            deadline = time.monotonic() + 10
+            while not seen and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            worker.stop()
+        self.assertEqual(seen, [{cpu}])
+
+        with self.assertRaises(ValueError):
+            ExecutionWorker(self.queue, EchoExecutor(), cpus=[max(available_cpus()) + 1])
+
+    def test_worker_kills_the_run_of_a_cancelled_job(self):
+        queue = SQLiteJobQueue(self.path)
+        worker = ExecutionWorker(queue, SleepingExecutor(), concurrency=1, poll_interval=0.01,
+                                 cancel_poll_interval=0.05)
+        job_id = queue.enqueue({"code": "a"})
+        worker.start()
+        try:
+            deadline = time.monotonic() + 10
+            while queue.get(job_id)["state"] != "running" and time.monotonic() < deadline:
+                time.sleep(0.01)
+            start = time.monotonic()
+            self.assertTrue(queue.cancel(job_id))
+            while worker.stats()["cancelled"] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertLess(time.monotonic() - start, 2)
+        finally:
+            worker.stop()
+            queue.close()
+        self.assertEqual(worker.stats()["active"], 0)
+        self.assertEqual(worker.stats()["leases_lost"], 0)
+
+    def test_cancelling_a_queued_executor_call_cancels_its_job(self):
+        async def run():
+            call = asyncio.create_task(QueuedExecutor(self.queue, timeout=30).execute_code_async("a"))
+            while self.queue.stats()["queued"] == 0:
+                await asyncio.sleep(0.01)
+            call.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await call
+
+        asyncio.run(run())
+        self.assertEqual(self.queue.stats()["cancelled"], 1)
+        self.assertIsNone(self.queue.claim("w1"))
+
+    def test_queued_executor_times_out_without_workers(self):
+        result = QueuedExecutor(self.queue, timeout=0.05).execute_code(BROKEN_CODE)
+        self.assertEqual((result["success"], result["stage"]), (False, "queue"))
+
+
+class TestWorkerProcesses(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="job_queue_test_")
+        self.url = f"sqlite:///{self.tmp}/queue.db"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_job_of_a_killed_worker_process_is_retried(self):
+        queue = open_queue(self.url)
+        job_id = queue.enqueue({"code": "a"})
+        # A worker process that dies holding a half-second lease
+        subprocess.run([sys.executable, "-c",
+                        "import os; from job_queue import open_queue; "
+                        f"open_queue({self.url!r}, visibility_timeout=0.5).claim('doomed'); os._exit(1)"],
+                       cwd=SERVICES_DIR, check=False, timeout=30)
+        self.assertEqual(queue.get(job_id)["worker"], "doomed")
+        self.assertIsNone(queue.claim("w2"))
+
+        time.sleep(0.6)
+        retried = queue.claim("w2")
+        self.assertEqual((retried.id, retried.attempt), (job_id, 2))
+        queue.close()
+
+    def test_worker_process_serves_the_queue_and_stops_on_sigterm(self):
+        worker = subprocess.Popen([sys.executable, "execution_worker.py", "--queue", self.url,
+                                   "--concurrency", "2"],
+                                  cwd=SERVICES_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        queue = open_queue(self.url)
+        try:
+            result = QueuedExecutor(queue, timeout=60).execute_code(BROKEN_CODE)
+            self.assertEqual(result["stage"], "compilation")
+        finally:
+            worker.send_signal(signal.SIGTERM)
+            self.assertEqual(worker.wait(timeout=30), 0)
+            queue.close()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
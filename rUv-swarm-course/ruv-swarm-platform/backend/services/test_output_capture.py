@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Tests for bounded head + tail output capture
+"""
+
+import asyncio
+import resource
+import sys
+import threading
+import time
+import unittest
+
+from cancellation import cancel_scope
+from output_capture import HeadTailBuffer, capture_process, capture_process_async
+
+# Prints numbered lines forever
+FLOOD = [sys.executable, "-c", "import itertools\nfor i in itertools.count(): print(f'line {i}')"]
+
+
+class TestHeadTailBuffer(unittest.TestCase):
+
+    def test_small_output_is_kept_whole(self):
+        buffer = HeadTailBuffer(100)
+        buffer.write(b"hello ")
+        buffer.write(b"world")
+        self.assertEqual(buffer.getvalue(), "hello world")
+        self.assertEqual(buffer.omitted, 0)
+
+    def test_keeps_head_and_tail(self):
+        buffer = HeadTailBuffer(10)
+        for chunk in (b"abc", b"defgh", b"ijklmnop", b"qrstuvwxyz"):
+            buffer.write(chunk)
+        self.assertEqual(buffer.total, 26)
+        self.assertEqual(buffer.omitted, 16)
+        self.assertEqual(buffer.getvalue(), "abcde\n... (16 bytes truncated) ...\nvwxyz")
+
+    def test_tail_does_not_start_mid_character(self):
+        buffer = HeadTailBuffer(8)
+        buffer.write(b"abcd" + "xxxé".encode() * 3)
+        self.assertNotIn("�", buffer.getvalue())
+
+
+class TestCaptureProcess(unittest.TestCase):
+
+    def test_output_and_exit_code(self):
+        captured = capture_process(["sh", "-c", "printf out; printf err >&2; exit 3"],
+                                   timeout=5, limit=1024, kill_after=4096)
+        self.assertEqual((captured.stdout, captured.stderr), ("out", "err"))
+        self.assertEqual(captured.returncode, 3)
+        self.assertIsNone(captured.reason)
+        self.assertEqual(captured.output_bytes, 6)
+
+    def test_verbose_program_keeps_head_and_tail(self):
+        captured = capture_process(
+            [sys.executable, "-c", "for i in range(10000): print(f'line {i}')"],
+            timeout=10, limit=1000, kill_after=1024 * 1024
+        )
+        self.assertIsNone(captured.reason)
+        self.assertTrue(captured.stdout.startswith("line 0\n"))
+        self.assertTrue(captured.stdout.endswith("line 9999\n"))
+        self.assertIn("bytes truncated", captured.stdout)
+        self.assertLess(len(captured.stdout), 1100)
+
+    def test_killed_at_output_limit(self):
+        killed = []
+        start = time.time()
+        captured = capture_process(FLOOD, timeout=30, limit=1000, kill_after=100000,
+                                   on_kill=lambda: killed.append(True))
+        self.assertTrue(captured.output_limited)
+        self.assertGreater(captured.output_bytes, 100000)
+        self.assertLess(len(captured.stdout), 1100)
+        self.assertEqual(killed, [True])
+        self.assertLess(time.time() - start, 5)
+
+    def test_worker_memory_stays_flat(self):
+        """Capturing far more output than the limit does not grow the worker"""
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        captured = capture_process(["head", "-c", str(200 * 1024 * 1024), "/dev/zero"],
+                                   timeout=30, limit=64 * 1024, kill_after=1024 * 1024 * 1024)
+        after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.assertEqual(captured.output_bytes, 200 * 1024 * 1024)
+        self.assertLess(after - before, 20 * 1024)  # KB
+
+    def test_timeout(self):
+        killed = []
+        captured = capture_process(["sh", "-c", "printf partial; sleep 5"], timeout=0.3,
+                                   limit=1024, kill_after=4096, on_kill=lambda: killed.append(True))
+        self.assertTrue(captured.timed_out)
+        self.assertEqual(captured.stdout, "partial")
+        self.assertEqual(killed, [True])
+
+    def test_cancel_scope_kills_process(self):
+        killed = []
+        start = time.time()
+        with cancel_scope() as scope:
+            threading.Timer(0.2, scope.cancel).start()
+            captured = capture_process(["sh", "-c", "printf partial; sleep 5"], timeout=10,
+                                       limit=1024, kill_after=4096, on_kill=lambda: killed.append(True))
+        self.assertTrue(captured.cancelled)
+        self.assertEqual(captured.stdout, "partial")
+        self.assertEqual(killed, [True])
+        self.assertLess(time.time() - start, 2)
+
+    def test_slow_kill_hook_finishes_before_the_capture_returns(self):
+        """A cancel still in its kill hook never writes to a closed wakeup pipe"""
+        errors = []
+
+        def cancel():
+            try:
+                scope.cancel()
+            except Exception as e:
+                errors.append(e)
+
+        with cancel_scope() as scope:
+            canceller = threading.Timer(0.2, cancel)
+            canceller.start()
+            # The program dies at once; the hook is still running when its pipes close
+            captured = capture_process(["sleep", "5"], timeout=10, limit=1024, kill_after=4096,
+                                       on_kill=lambda: time.sleep(0.3))
+        canceller.join()
+        self.assertTrue(captured.cancelled)
+        self.assertEqual(errors, [])
+
+
+class TestCaptureProcessAsync(unittest.TestCase):
+
+    def test_output_and_exit_code(self):
+        captured = asyncio.run(capture_process_async(
+            ["sh", "-c", "printf out; printf err >&2"], timeout=5, limit=1024, kill_after=4096
+        ))
+        self.assertEqual((captured.stdout, captured.stderr), ("out", "err"))
+        self.assertEqual(captured.returncode, 0)
+        self.assertIsNone(captured.reason)
+
+    def test_killed_at_output_limit(self):
+        killed = []
+
+        async def on_kill():
+            killed.append(True)
+
+        start = time.time()
+        captured = asyncio.run(capture_process_async(FLOOD, timeout=30, limit=1000,
+                                                     kill_after=100000, on_kill=on_kill))
+        self.assertTrue(captured.output_limited)
+        self.assertTrue(captured.stdout.startswith("line 0\n"))
+        self.assertLess(len(captured.stdout), 1100)
+        self.assertEqual(killed, [True])
+        self.assertLess(time.time() - start, 5)
+
+    def test_timeout(self):
+        captured = asyncio.run(capture_process_async(["sleep", "5"], timeout=0.2,
+                                                     limit=1024, kill_after=4096))
+        self.assertTrue(captured.timed_out)
+
+    def test_cancellation_kills_process(self):
+        killed = []
+
+        async def on_kill():
+            killed.append(True)
+
+        async def run():
+            task = asyncio.create_task(capture_process_async(["sleep", "5"], timeout=10, limit=1024,
+                                                             kill_after=4096, on_kill=on_kill))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        start = time.time()
+        asyncio.run(run())
+        self.assertEqual(killed, [True])
+        self.assertLess(time.time() - start, 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for precompiled header preludes
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from code_executor import CodeExecutor
+from precompiled_headers import PrecompiledHeaders
+
+
+class TestPrecompiledHeaders(unittest.TestCase):
+
+    def setUp(self):
+        self.build_dir = tempfile.mkdtemp(prefix="pch_test_")
+        self.work_dir = tempfile.mkdtemp(prefix="pch_work_")
+        self.addCleanup(shutil.rmtree, self.build_dir, True)
+        self.addCleanup(shutil.rmtree, self.work_dir, True)
+        self.pch = PrecompiledHeaders(build_dir=self.build_dir)
+
+    def test_prelude_is_ordered_system_includes(self):
+        code = "#include <stdio.h>\n#include <math.h>\n#include <stdio.h>\nint main(void) { return 0; }\n"
+        self.assertEqual(self.pch.prelude_for(code), ("stdio.h", "math.h"))
+
+    def test_prelude_rejected_for_directive_before_include(self):
+        code = "#define FANN_NO_DLL\n#include <fann.h>\nint main(void) { return 0; }\n"
+        self.assertIsNone(self.pch.prelude_for(code))
+
+    def test_prelude_rejected_for_quoted_or_disallowed_include(self):
+        self.assertIsNone(self.pch.prelude_for('#include "fann.h"\n'))
+        self.assertIsNone(self.pch.prelude_for('#include <unistd.h>\n'))
+        self.assertIsNone(self.pch.prelude_for('int main(void) { return 0; }\n'))
+
+    def test_prelude_builds_and_compiles(self):
+        code = (
+            "#include <stdio.h>\n#include <stdlib.h>\n"
+            "int main(void) { printf(\"%d\\n\", abs(-1)); return 0; }\n"
+        )
+        source_file = os.path.join(self.work_dir, "program.c")
+        with open(source_file, 'w') as f:
+            f.write(code)
+
+        flags = self.pch.flags_for(code, CodeExecutor.COMPILATION_FLAGS)
+        self.assertEqual(flags[0], "-include")
+        self.assertTrue(os.path.exists(flags[1] + ".gch"))
+
+        # Reuses the published build instead of compiling the prelude again
+        self.assertEqual(self.pch.flags_for(code, CodeExecutor.COMPILATION_FLAGS), flags)
+
+        cmd = ["gcc"] + self.pch._header_flags(CodeExecutor.COMPILATION_FLAGS) + flags + [
+            "-Winvalid-pch", "-c", source_file, "-o", os.path.join(self.work_dir, "program.o")
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertNotIn("not used", result.stderr)
+
+        stats = self.pch.stats()
+        self.assertEqual(stats["builds"], 1)
+        self.assertEqual(stats["uses"], 2)
+
+    def test_failed_build_falls_back(self):
+        pch = PrecompiledHeaders(build_dir=self.build_dir, allowed_includes={"no_such_header.h"})
+        code = "#include <no_such_header.h>\n"
+
+        self.assertEqual(pch.flags_for(code, CodeExecutor.COMPILATION_FLAGS), [])
+        self.assertEqual(pch.flags_for(code, CodeExecutor.COMPILATION_FLAGS), [])
+        self.assertEqual(pch.stats()["build_failures"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for measuring runs with cgroup v2
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import unittest
+
+from output_capture import capture_process, capture_process_async
+from run_cgroups import (
+    RunCgroups, UsageWindow, parse_cpu_stat, read_usage, start_process, start_process_async, unmeasured
+)
+
+BUSY = [sys.executable, "-c", "sum(i * i for i in range(2_000_000))"]
+
+RUN_CGROUPS = RunCgroups()
+
+requires_cgroups = unittest.skipUnless(RUN_CGROUPS.available(), "cgroup v2 is not writable here")
+
+
+class TestParsing(unittest.TestCase):
+
+    def test_parse_cpu_stat(self):
+        stats = parse_cpu_stat("usage_usec 1500\nuser_usec 1000\nsystem_usec 500\nbogus\n")
+        self.assertEqual(stats, {"usage_usec": 1500, "user_usec": 1000, "system_usec": 500})
+
+    def test_disabled_runs_are_unmeasured(self):
+        run_cgroups = RunCgroups(enabled=False)
+        self.assertIsNone(run_cgroups.create("off"))
+        run_cgroups.remove(None)
+        self.assertFalse(run_cgroups.stats()["available"])
+
+    def test_plain_start_without_cgroup(self):
+        process = start_process(["echo", "plain"], stdout=subprocess.PIPE)
+        self.assertEqual(process.communicate()[0], b"plain\n")
+
+
+@requires_cgroups
+class TestRunCgroups(unittest.TestCase):
+
+    def setUp(self):
+        self.cgroup = RUN_CGROUPS.create("test")
+        self.addCleanup(RUN_CGROUPS.remove, self.cgroup)
+
+    def test_command_starts_inside_its_cgroup(self):
+        process = start_process(["cat", "/proc/self/cgroup"], self.cgroup, stdout=subprocess.PIPE)
+        stdout, _ = process.communicate()
+        self.assertEqual(process.returncode, 0)
+        self.assertTrue(stdout.decode().strip().endswith("/run-test"), stdout)
+
+    def test_async_command_starts_inside_its_cgroup(self):
+        async def run():
+            process = await start_process_async(["cat", "/proc/self/cgroup"], self.cgroup,
+                                                stdout=asyncio.subprocess.PIPE)
+            return (await process.communicate())[0].decode()
+
+        self.assertTrue(asyncio.run(run()).strip().endswith("/run-test"))
+
+    def test_command_reads_no_stdin(self):
+        process = start_process(["cat"], self.cgroup, stdout=subprocess.PIPE)
+        self.assertEqual(process.communicate(timeout=5)[0], b"")
+
+    def test_captured_run_is_measured_and_removed(self):
+        captured = capture_process(BUSY, timeout=30, limit=1024, kill_after=1024, cgroup=self.cgroup)
+        self.assertEqual(captured.returncode, 0)
+
+        usage = read_usage(self.cgroup)
+        self.assertGreater(usage["cpu_user_ms"] + usage["cpu_system_ms"], 0)
+        RUN_CGROUPS.remove(self.cgroup)
+        self.assertFalse(os.path.exists(self.cgroup))
+
+    def test_async_capture_runs_inside_the_cgroup(self):
+        captured = asyncio.run(capture_process_async(
+            ["cat", "/proc/self/cgroup"], timeout=10, limit=1024, kill_after=1024, cgroup=self.cgroup
+        ))
+        self.assertTrue(captured.stdout.strip().endswith("/run-test"))
+
+    def test_empty_cgroup_reads_as_unmeasured(self):
+        self.assertEqual(read_usage(self.cgroup), unmeasured())
+
+    def test_killed_leftovers_are_removed_with_the_cgroup(self):
+        process = start_process(["sleep", "30"], self.cgroup)
+        RUN_CGROUPS.remove(self.cgroup)
+        self.assertEqual(process.wait(timeout=5), -9)
+        self.assertFalse(os.path.exists(self.cgroup))
+
+    def test_usage_window_counts_only_its_run(self):
+        start_process(BUSY, self.cgroup).wait()
+        before = read_usage(self.cgroup)
+
+        window = UsageWindow(self.cgroup)
+        start_process([sys.executable, "-c", "pass"], self.cgroup).wait()
+        usage = window.finish()
+
+        self.assertGreaterEqual(usage["cpu_user_ms"], 0)
+        self.assertLess(usage["cpu_user_ms"] + usage["cpu_system_ms"],
+                        before["cpu_user_ms"] + before["cpu_system_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
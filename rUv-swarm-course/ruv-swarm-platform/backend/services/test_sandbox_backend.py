@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable sandbox backends
+"""
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from code_executor import CodeExecutor
+from run_cgroups import find_cgroup2_mount
+from sandbox_backend import (
+    DockerSandboxBackend, NamespaceSandboxBackend, create_backend, parse_memory
+)
+
+# The frontend demos' attack and resource programs
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "frontend", "demo"))
+import sandbox_demo  # noqa: E402
+import security_validation_test as validation_demo  # noqa: E402
+
+LAUNCHER_DIR = tempfile.mkdtemp(prefix="launcher_test_")
+NAMESPACE_BACKEND = NamespaceSandboxBackend(build_dir=LAUNCHER_DIR, cpu_seconds=2)
+
+
+def tearDownModule():
+    shutil.rmtree(LAUNCHER_DIR, ignore_errors=True)
+
+
+class PlainExecutor(CodeExecutor):
+    """Executor for programs that don't need FANN"""
+    LINK_LIBRARIES = ["-lm"]
+    EXECUTION_TIMEOUT = 3
+
+
+class TestBackendSelection(unittest.TestCase):
+
+    def test_docker_command_keeps_security_options(self):
+        cmd = DockerSandboxBackend("img:1", memory="64m", cpus="0.25").command("/tmp/ws", "abc")
+        self.assertEqual(cmd[:2], ["docker", "run"])
+        self.assertIn("sandbox_abc", cmd)
+        for option in (["--network", "none"], ["--memory", "64m"], ["--cpus", "0.25"],
+                       ["--cap-drop", "ALL"], ["-v", "/tmp/ws:/home/sandboxuser/workspace:ro"]):
+            index = cmd.index(option[0])
+            self.assertEqual(cmd[index:index + 2], option)
+        self.assertEqual(cmd[-2:], ["img:1", "/home/sandboxuser/workspace/program"])
+        self.assertNotIn("--cgroup-parent", cmd)
+
+    def test_docker_container_is_placed_in_the_run_cgroup(self):
+        cgroup = os.path.join(find_cgroup2_mount() or "/", "sandbox-runs", "run-abc")
+        cmd = DockerSandboxBackend("img:1").command("/tmp/ws", "abc", cgroup)
+        index = cmd.index("--cgroup-parent")
+        self.assertEqual(cmd[index + 1], "/sandbox-runs/run-abc")
+        self.assertFalse(DockerSandboxBackend.JOINS_CGROUP)
+
+    def test_executor_defaults_to_docker(self):
+        executor = CodeExecutor(docker_image="img:2")
+        self.assertIsInstance(executor.backend, DockerSandboxBackend)
+        self.assertEqual(executor.backend.docker_image, "img:2")
+
+    def test_create_backend(self):
+        self.assertIsInstance(create_backend("namespace", build_dir=LAUNCHER_DIR),
+                              NamespaceSandboxBackend)
+        with self.assertRaises(ValueError):
+            create_backend("chroot")
+
+    def test_parse_memory(self):
+        self.assertEqual(parse_memory("128m"), 128 * 1024 * 1024)
+        self.assertEqual(parse_memory("1g"), 1024 ** 3)
+        self.assertEqual(parse_memory("4096"), 4096)
+
+
+@unittest.skipUnless(shutil.which("gcc") and NAMESPACE_BACKEND.available(),
+                     "namespace sandbox not available on this host")
+class TestNamespaceSandbox(unittest.TestCase):
+    """Isolation checks run directly against the launcher, bypassing validation"""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="ns_sandbox_")
+        self.addCleanup(shutil.rmtree, self.work_dir, True)
+
+    def run_program(self, code, timeout=10):
+        source = os.path.join(self.work_dir, "program.c")
+        with open(source, "w") as f:
+            f.write(code)
+        subprocess.run(["gcc", "-O0", "-o", os.path.join(self.work_dir, "program"), source],
+                       check=True, capture_output=True)
+        NAMESPACE_BACKEND.prepare(self.work_dir)
+        return subprocess.run(NAMESPACE_BACKEND.command(self.work_dir, "test"),
+                              capture_output=True, text=True, timeout=timeout)
+
+    def test_identity_and_namespaces(self):
+        result = self.run_program("""
+#include <stdio.h>
+#include <unistd.h>
+int main(void) {
+    char host[64];
+    gethostname(host, sizeof(host));
+    printf("%d %d %s\\n", (int)getpid(), (int)getuid(), host);
+    return 7;
+}
+""")
+        self.assertEqual(result.stdout, "1 1000 sandbox\n")
+        self.assertEqual(result.returncode, 7)
+
+    def test_filesystem_is_confined(self):
+        result = self.run_program("""
+#include <stdio.h>
+int main(void) {
+    printf("%d", fopen("/etc/passwd", "r") != NULL);
+    printf("%d", fopen("/workspace/output.txt", "w") != NULL);
+    printf("%d", fopen("/workspace/program.c", "r") != NULL);
+    printf("%d", fopen("/tmp/scratch.txt", "w") != NULL);
+    printf("%d\\n", fopen("/proc/self/status", "r") != NULL);
+    return 0;
+}
+""")
+        self.assertEqual(result.stdout, "00110\n")
+        self.assertFalse(os.path.exists(os.path.join(self.work_dir, "output.txt")))
+
+    def test_network_and_namespace_syscalls_denied(self):
+        result = self.run_program("""
+#define _GNU_SOURCE
+#include <sched.h>
+#include <stdio.h>
+#include <sys/mount.h>
+#include <sys/socket.h>
+int main(void) {
+    printf("%d %d %d\\n", socket(AF_INET, SOCK_STREAM, 0),
+           unshare(CLONE_NEWUSER), mount("none", "/tmp", "tmpfs", 0, NULL));
+    return 0;
+}
+""")
+        self.assertEqual(result.stdout, "-1 -1 -1\n")
+
+    def test_process_limit(self):
+        result = self.run_program("""
+#include <stdio.h>
+#include <unistd.h>
+int main(void) {
+    int forked = 0;
+    for (int i = 0; i < 200; i++) {
+        pid_t pid = fork();
+        if (pid == 0) { pause(); _exit(0); }
+        if (pid < 0) break;
+        forked++;
+    }
+    printf("%d\\n", forked);
+    return 0;
+}
+""")
+        self.assertLess(int(result.stdout), NAMESPACE_BACKEND.max_processes)
+
+    def test_memory_limit(self):
+        result = self.run_program("""
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+int main(void) {
+    void *small = malloc(64 * 1024 * 1024);
+    if (small) memset(small, 1, 64 * 1024 * 1024);
+    void *large = malloc(256 * 1024 * 1024);
+    printf("%d %d\\n", small != NULL, large != NULL);
+    return 0;
+}
+""")
+        self.assertEqual(result.stdout, "1 0\n")
+
+    def test_cpu_limit(self):
+        result = self.run_program("int main(void) { for (;;) {} }", timeout=10)
+        self.assertIn(result.returncode, (128 + signal.SIGXCPU, 128 + signal.SIGKILL))
+
+    def test_program_dies_with_launcher(self):
+        source = os.path.join(self.work_dir, "program.c")
+        with open(source, "w") as f:
+            f.write("#include <unistd.h>\nint main(void) { sleep(30); return 0; }\n")
+        subprocess.run(["gcc", "-o", os.path.join(self.work_dir, "program"), source], check=True)
+        NAMESPACE_BACKEND.prepare(self.work_dir)
+
+        launcher = subprocess.Popen(NAMESPACE_BACKEND.command(self.work_dir, "test"))
+        time.sleep(0.2)
+        children = [pid for pid in os.listdir("/proc") if pid.isdigit() and
+                    self._parent(pid) == launcher.pid]
+        self.assertEqual(len(children), 1)
+
+        launcher.kill()
+        launcher.wait()
+        deadline = time.time() + 2
+        while os.path.exists(f"/proc/{children[0]}") and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertFalse(os.path.exists(f"/proc/{children[0]}"))
+
+    def test_startup_latency(self):
+        shutil.copy2("/bin/true", os.path.join(self.work_dir, "program"))
+        NAMESPACE_BACKEND.prepare(self.work_dir)
+        cmd = NAMESPACE_BACKEND.command(self.work_dir, "test")
+        timings = []
+        for _ in range(20):
+            start = time.perf_counter()
+            subprocess.run(cmd, check=True)
+            timings.append(time.perf_counter() - start)
+        # Single-digit milliseconds on an idle host; generous for CI
+        self.assertLess(sorted(timings)[len(timings) // 2], 0.05)
+
+    @staticmethod
+    def _parent(pid):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                return int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            return None
+
+
+@unittest.skipUnless(shutil.which("gcc") and NAMESPACE_BACKEND.available(),
+                     "namespace sandbox not available on this host")
+class TestCodeExecutorWithNamespaceBackend(unittest.TestCase):
+    """The executor's runtime security cases, on the namespace backend"""
+
+    def setUp(self):
+        self.executor = PlainExecutor(backend=NAMESPACE_BACKEND)
+
+    def test_safe_code_execution(self):
+        result = self.executor.execute_code("""
+#include <stdio.h>
+#include <math.h>
+
+int main() {
+    printf("Hello, secure world! %.1f\\n", sqrt(16.0));
+    return 0;
+}
+""")
+        self.assertTrue(result["success"], result)
+        self.assertEqual(result["stdout"], "Hello, secure world! 4.0\n")
+        self.assertEqual(result["exit_code"], 0)
+
+    def test_infinite_loop_timeout(self):
+        result = self.executor.execute_code("int main() { while (1) {} return 0; }\n")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["stage"], "execution")
+        self.assertIn("timeout", result["stderr"].lower())
+
+    def test_validation_still_applies(self):
+        result = self.executor.execute_code('#include <stdlib.h>\nint main() { system("ls"); }\n')
+        self.assertEqual(result["stage"], "validation")
+
+    def test_async_and_streaming(self):
+        import asyncio
+        code = '#include <stdio.h>\nint main() { printf("streamed\\n"); return 3; }\n'
+
+        async def run():
+            result = await self.executor.execute_code_async(code)
+            events = [event async for event in self.executor.execute_code_stream(code)]
+            return result, events
+
+        result, events = asyncio.run(run())
+        self.assertEqual((result["stdout"], result["exit_code"]), ("streamed\n", 3))
+        self.assertIn({"event": "stdout", "data": "streamed\n"}, events)
+        self.assertEqual(events[-1]["exit_code"], 3)
+
+    def test_runs_are_measured_by_their_cgroup(self):
+        import asyncio
+        if not self.executor.run_cgroups.available():
+            self.skipTest("cgroup v2 is not writable here")
+        code = "int main() { volatile long n = 0; while (n < 100000000) n++; return 0; }\n"
+
+        async def run():
+            result = await self.executor.execute_code_async(code)
+            events = [event async for event in self.executor.execute_code_stream(code)]
+            return result, events[-1]
+
+        results = [self.executor.execute_code(code), *asyncio.run(run())]
+        for result in results:
+            self.assertTrue(result["success"], result)
+            self.assertGreater(result["cpu_user_ms"] + result["cpu_system_ms"], 0)
+            self.assertIn("memory_peak_kb", result)
+        self.assertEqual(self.executor.run_cgroups.stats()["created"], 3)
+        parent = self.executor.run_cgroups.stats()["parent"]
+        self.assertFalse([name for name in os.listdir(parent) if name.startswith("run-")])
+
+
+@unittest.skipUnless(shutil.which("gcc") and NAMESPACE_BACKEND.available(),
+                     "namespace sandbox not available on this host")
+class TestDemoCasesOnNamespaceBackend(unittest.TestCase):
+    """Cases of frontend/demo/sandbox_demo.py and security_validation_test.py, on the namespace backend"""
+
+    def setUp(self):
+        self.executor = PlainExecutor(backend=NAMESPACE_BACKEND)
+
+    def test_demo_attacks_are_blocked(self):
+        for case in sandbox_demo.SECURITY_TESTS + validation_demo.SECURITY_TESTS:
+            with self.subTest(case["name"]):
+                result = self.executor.execute_code(case["code"])
+                self.assertFalse(result["success"])
+                self.assertEqual(result["stage"], "validation")
+
+    def test_demo_resource_programs_run(self):
+        result = self.executor.execute_code(sandbox_demo.MEMORY_TEST)
+        self.assertTrue(result["success"], result)
+        self.assertIn("64MB allocation successful", result["stdout"])
+
+        result = self.executor.execute_code(sandbox_demo.CPU_TEST)
+        self.assertTrue(result["success"], result)
+        self.assertIn("Calculation completed", result["stdout"])
+
+    def test_demo_file_attacks_are_contained_without_validation(self):
+        attacks = {case["name"]: case["code"] for case in sandbox_demo.SECURITY_TESTS}
+        for name, reached in (("File System Access", "Accessed /proc"),
+                              ("Path Traversal Protection", "Path traversal successful")):
+            with self.subTest(name):
+                work_dir = tempfile.mkdtemp(prefix="ns_demo_")
+                self.addCleanup(shutil.rmtree, work_dir, True)
+                success, error = self.executor.compile_code(attacks[name], work_dir)
+                self.assertTrue(success, error)
+                NAMESPACE_BACKEND.prepare(work_dir)
+                result = subprocess.run(NAMESPACE_BACKEND.command(work_dir, "demo"),
+                                        capture_output=True, text=True, timeout=10)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                self.assertNotIn(reached, result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass security scanner
+"""
+
+import re
+import time
+import unittest
+
+from code_executor import CodeExecutor
+from security_scanner import RuleSet, SecurityScanner, literal_prefix
+
+
+def legacy_violations(code):
+    """Forbidden patterns found by one re.search per pattern"""
+    return {pattern for pattern in CodeExecutor.FORBIDDEN_PATTERNS
+            if re.search(pattern, code, re.IGNORECASE | re.MULTILINE)}
+
+
+class TestSecurityScanner(unittest.TestCase):
+
+    def setUp(self):
+        self.rules = RuleSet('c', CodeExecutor.FORBIDDEN_PATTERNS,
+                             CodeExecutor.ALLOWED_INCLUDES, CodeExecutor.SUSPICIOUS_STRINGS)
+
+    def test_literal_prefix(self):
+        self.assertEqual(literal_prefix(r'system\s*\('), 'system')
+        self.assertEqual(literal_prefix(r'exec[lv]?[pe]?\s*\('), 'exec')
+        self.assertEqual(literal_prefix(r'Runtime\.exec'), 'Runtime.exec')
+        self.assertEqual(literal_prefix(r'evals?\('), 'eval')
+        with self.assertRaises(ValueError):
+            RuleSet('c', [r'\s*system'])
+
+    def test_matches_per_pattern_search(self):
+        samples = [
+            'int main() { SYSTEM ("ls"); }',
+            'execvp(argv[0], argv); fork();',
+            'FILE *f = fopen(name, "/proc/self/maps");',
+            'int fd = open(path, O_RDWR);',
+            'p = dlopen("x.so", 0); __asm__("nop");',
+            '#include <sys/socket.h>\n__attribute__((constructor)) void f(void) {}',
+            'void *p = mmap (0, 4096, 3, 34, -1, 0); popen("id", "r");',
+            'int main(void) { printf("%d\\n", 42); return 0; }',
+        ]
+        for code in samples:
+            with self.subTest(code=code):
+                found = {v.rule for v in self.rules.scan(code) if v.kind == 'pattern'}
+                self.assertEqual(found, legacy_violations(code))
+
+    def test_overlapping_keywords_are_all_checked(self):
+        # "open" inside "popen", "fopen" and "dlopen" is still a match
+        found = {v.rule for v in self.rules.scan('dlopen(lib, 0);')}
+        self.assertIn(r'dlopen\s*\(', found)
+        found = {v.rule for v in self.rules.scan('fd = dlopen(path, O_RDWR);')}
+        self.assertEqual(found, {r'dlopen\s*\(', r'open\s*\([^()]*O_RDWR'})
+
+        found = [v.rule for v in self.rules.scan('popen("x", "r");')]
+        self.assertEqual(found, [r'popen\s*\('])
+
+    def test_reports_every_violation_with_line(self):
+        code = 'int main() {\n  fork();\n  system("ls");\n}\n'
+        violations = self.rules.scan(code)
+        self.assertEqual([(v.kind, v.line) for v in violations], [('pattern', 2), ('pattern', 3)])
+        self.assertEqual(code[violations[1].offset:violations[1].offset + 6], 'system')
+
+    def test_includes(self):
+        self.assertEqual(self.rules.scan('#include <stdio.h>\n#include "mine.h"\n'), [])
+        # Local headers are allowed, paths and extensionless headers are not
+        violations = self.rules.scan('#include <pthread.h>\n#include "../etc/x.h"\n#include <sys/types>\n')
+        self.assertEqual([(v.kind, v.rule, v.line) for v in violations],
+                         [('include', '../etc/x.h', 2), ('string', '../', 2), ('include', 'sys/types', 3)])
+
+    def test_string_literals(self):
+        self.assertEqual(self.rules.scan('char *s = "hello \\"world\\"";'), [])
+        violations = self.rules.scan('char *a = "x\\"y../z";\nchar *b = "LD_PRELOAD=evil.so";')
+        self.assertEqual([(v.kind, v.rule, v.line) for v in violations],
+                         [('string', '../', 1), ('string', 'LD_PRELOAD', 2)])
+        # The text between two literals is not itself a literal
+        self.assertEqual(self.rules.scan('a = "x"; b = /proc; c = "y";'), [])
+
+    def test_verdict_cache(self):
+        scanner = SecurityScanner([self.rules], cache_size=2)
+        first = scanner.scan('c', 'fork();')
+        self.assertIs(scanner.scan('c', 'fork();'), first)
+        scanner.scan('c', 'a')
+        scanner.scan('c', 'b')
+        scanner.scan('c', 'fork();')
+        self.assertEqual(scanner.stats(), {'hits': 1, 'misses': 4, 'cached_verdicts': 2})
+        with self.assertRaises(ValueError):
+            scanner.scan('cobol', 'x')
+
+    def test_adversarial_input_is_linear(self):
+        # Each of these backtracks quadratically with the per-pattern scan
+        inputs = [
+            'fopen(' * (1024 * 1024 // 6),
+            'open(' * (1024 * 1024 // 5),
+            '"\\' * (1024 * 1024 // 2),
+            '#include <' + ' ' * (1024 * 1024),
+            '#include <' * (1024 * 1024 // 10),
+        ]
+        for code in inputs:
+            start = time.perf_counter()
+            self.rules.scan(code)
+            self.assertLess(time.perf_counter() - start, 5.0)
+
+
+class TestValidateCode(unittest.TestCase):
+
+    def test_messages_keep_check_priority(self):
+        executor = CodeExecutor()
+        self.assertEqual(executor.validate_code('char *s = "/dev/null";\nfork();'),
+                         (False, r'Forbidden pattern detected: fork\s*\('))
+        self.assertEqual(executor.validate_code('#include <linux/fs.h>\nchar *s = "/dev/null";'),
+                         (False, 'Forbidden include: linux/fs.h'))
+        self.assertEqual(executor.validate_code('char *s = "/dev/null";'),
+                         (False, 'Suspicious string literal detected'))
+        self.assertEqual(executor.validate_code('#include <stdio.h>\nint main(void) { return 0; }\n'),
+                         (True, None))
+
+    def test_scanner_is_shared(self):
+        self.assertIs(CodeExecutor().security_scanner(), CodeExecutor().security_scanner())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for per-stage execution timing and latency histograms
+"""
+
+import asyncio
+import unittest
+
+from code_executor import CodeExecutor
+from stage_timing import LatencyHistogram, StageLatency, StageTimer
+
+BROKEN_CODE = "#include <stdio.h>\nint main( { return 0; }\n"
+UNSAFE_CODE = '#include <stdlib.h>\nint main() { system("ls"); return 0; }\n'
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestStageTimer(unittest.TestCase):
+
+    def test_stages_are_timed_in_order(self):
+        clock = FakeClock()
+        timer = StageTimer(clock)
+        with timer.stage("validation"):
+            clock.now += 0.002
+        with timer.stage("compilation"):
+            clock.now += 0.150
+        self.assertEqual(timer.to_dict(), {
+            "stages_ms": {"validation": 2.0, "compilation": 150.0},
+            "total_ms": 152.0,
+        })
+
+    def test_failing_stage_is_still_recorded(self):
+        clock = FakeClock()
+        timer = StageTimer(clock)
+        with self.assertRaises(RuntimeError):
+            with timer.stage("execution"):
+                clock.now += 0.5
+                raise RuntimeError("boom")
+        self.assertEqual(timer.stages, {"execution": 500.0})
+
+    def test_repeated_stage_accumulates(self):
+        timer = StageTimer()
+        timer.record("execution", 3)
+        timer.record("execution", 4)
+        self.assertEqual(timer.stages["execution"], 7)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_buckets_and_quantiles(self):
+        histogram = LatencyHistogram(buckets=(10, 100, 1000))
+        for value in [5] * 90 + [50] * 9 + [5000]:
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(),
+                         [("10", 90), ("100", 99), ("1000", 99), ("+Inf", 100)])
+        self.assertEqual(histogram.quantile(0.50), 10)
+        self.assertEqual(histogram.quantile(0.95), 100)
+        self.assertEqual(histogram.quantile(1.0), float('inf'))
+        self.assertIsNone(LatencyHistogram().quantile(0.5))
+
+    def test_stage_latency_per_language_and_stage(self):
+        latency = StageLatency(buckets=(10, 100))
+        for compile_ms in (5, 50):
+            timer = StageTimer()
+            timer.record("compilation", compile_ms)
+            timer.record("execution", 1)
+            latency.observe("c", timer)
+
+        snapshot = latency.snapshot()
+        self.assertEqual(set(snapshot["c"]), {"compilation", "execution", "total"})
+        self.assertEqual(snapshot["c"]["compilation"]["count"], 2)
+        self.assertEqual(snapshot["c"]["compilation"]["buckets"], {"10": 1, "100": 2, "+Inf": 2})
+        self.assertEqual(snapshot["c"]["total"]["sum_ms"], 57)
+
+        text = latency.render_prometheus()
+        self.assertIn("# TYPE sandbox_execution_stage_latency_ms histogram", text)
+        self.assertIn('sandbox_execution_stage_latency_ms_bucket{language="c",stage="compilation",le="10"} 1',
+                      text)
+        self.assertIn('sandbox_execution_stage_latency_ms_count{language="c",stage="total"} 2', text)
+
+
+class TestExecutorStageTiming(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = CodeExecutor()
+
+    def test_rejected_run_only_times_validation(self):
+        result = self.executor.execute_code(UNSAFE_CODE, debug=True)
+        self.assertEqual(result["stage"], "validation")
+        self.assertEqual(list(result["debug"]["stages_ms"]), ["validation"])
+
+    def test_failed_compile_times_every_stage_reached(self):
+        result = self.executor.execute_code(BROKEN_CODE, debug=True)
+        self.assertEqual(result["stage"], "compilation")
+        self.assertEqual(list(result["debug"]["stages_ms"]),
+                         ["validation", "workspace", "compilation", "cleanup"])
+        self.assertGreater(result["debug"]["stages_ms"]["compilation"], 0)
+        self.assertEqual(self.executor.stage_latency.snapshot()["c"]["compilation"]["count"], 1)
+
+    def test_debug_field_is_optional(self):
+        result = asyncio.run(self.executor.execute_code_async(BROKEN_CODE))
+        self.assertNotIn("debug", result)
+        self.assertEqual(self.executor.stage_latency.snapshot()["c"]["total"]["count"], 1)
+
+    def test_stream_verdict_carries_timings(self):
+        async def collect():
+            return [event async for event in self.executor.execute_code_stream(BROKEN_CODE, debug=True)]
+
+        verdict = asyncio.run(collect())[-1]
+        self.assertEqual(verdict["event"], "verdict")
+        self.assertIn("compilation", verdict["debug"]["stages_ms"])
+        # Cleanup happens after the verdict but is still counted
+        self.assertEqual(self.executor.stage_latency.snapshot()["c"]["cleanup"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled run workspaces
+"""
+
+import asyncio
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from code_executor import CodeExecutor
+from workspace_pool import WorkspacePool, filesystem_type
+
+BROKEN_CODE = "#include <stdio.h>\nint main( { return 0; }\n"
+
+
+class FailingWipePool(WorkspacePool):
+    """Pool whose workspaces can never be emptied"""
+
+    def _wipe(self, workspace):
+        with self._lock:
+            self.wipe_failures += 1
+        return False
+
+
+class TestWorkspacePool(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="workspace_pool_test_")
+        self.pool = WorkspacePool(root=self.root, size=2)
+
+    def tearDown(self):
+        self.pool.shutdown()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_workspaces_are_precreated_and_private(self):
+        self.assertEqual(len(os.listdir(self.root)), 2)
+        workspace = self.pool.acquire()
+        self.assertEqual(os.path.dirname(workspace), self.root)
+        self.assertEqual(os.listdir(workspace), [])
+        self.assertEqual(stat.S_IMODE(os.stat(workspace).st_mode), 0o700)
+        self.assertEqual(self.pool.stats()["reused"], 1)
+
+    def test_released_workspace_is_wiped_before_reuse(self):
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        os.makedirs(os.path.join(first, "nested", "deeper"))
+        for name in ("program.c", ".hidden", os.path.join("nested", "deeper", "file")):
+            with open(os.path.join(first, name), "w") as f:
+                f.write("secret")
+        os.symlink("/etc", os.path.join(first, "link"))
+        os.chmod(first, 0o711)
+
+        self.pool.release(first)
+        self.pool.release(second)
+        self.pool.drain()
+
+        for _ in range(2):
+            workspace = self.pool.acquire()
+            self.assertEqual(os.listdir(workspace), [])
+            self.assertEqual(stat.S_IMODE(os.stat(workspace).st_mode), 0o700)
+        self.assertTrue(os.path.exists("/etc"))
+
+    def test_busy_pool_creates_and_later_trims(self):
+        workspaces = [self.pool.acquire() for _ in range(3)]
+        self.assertEqual(len(set(workspaces)), 3)
+        self.assertEqual(self.pool.stats()["created"], 1)
+
+        for workspace in workspaces:
+            self.pool.release(workspace)
+        self.pool.drain()
+
+        stats = self.pool.stats()
+        self.assertEqual((stats["free"], stats["in_use"], stats["discarded"]), (2, 0, 1))
+        self.assertEqual(len(os.listdir(self.root)), 2)
+
+    def test_release_of_unknown_workspace(self):
+        workspace = self.pool.acquire()
+        self.pool.release(workspace)
+        with self.assertRaises(ValueError):
+            self.pool.release(workspace)
+
+    def test_unwipeable_workspace_is_never_reused(self):
+        pool = FailingWipePool(root=os.path.join(self.root, "failing"), size=1)
+        try:
+            workspace = pool.acquire()
+            pool.release(workspace)
+            pool.drain()
+            self.assertFalse(os.path.exists(workspace))
+            self.assertEqual(pool.stats()["discarded"], 1)
+            self.assertNotEqual(pool.acquire(), workspace)
+        finally:
+            pool.shutdown()
+
+    def test_shutdown_removes_workspaces(self):
+        workspace = self.pool.acquire()
+        self.pool.shutdown()
+        self.assertEqual(os.listdir(self.root), [])
+        self.assertFalse(os.path.exists(workspace))
+        with self.assertRaises(RuntimeError):
+            self.pool.acquire()
+
+    def test_filesystem_type(self):
+        mounts = os.path.join(self.root, "mounts")
+        with open(mounts, "w") as f:
+            f.write("/dev/sda1 / ext4 rw 0 0\n"
+                    "tmpfs /dev/shm tmpfs rw 0 0\n")
+        self.assertEqual(filesystem_type("/dev/shm/runs", mounts), "tmpfs")
+        self.assertEqual(filesystem_type("/dev/shmx", mounts), "ext4")
+        self.assertIsNone(filesystem_type("/", os.path.join(self.root, "missing")))
+
+
+class TestExecutorWithWorkspacePool(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="workspace_pool_test_")
+        self.pool = WorkspacePool(root=self.root, size=1)
+        self.executor = CodeExecutor(workspace_pool=self.pool)
+
+    def tearDown(self):
+        self.pool.shutdown()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def assert_workspace_returned_empty(self):
+        self.pool.drain()
+        stats = self.pool.stats()
+        self.assertEqual((stats["in_use"], stats["free"], stats["created"]), (0, 1, 0))
+        workspace = self.pool.acquire()
+        self.assertEqual(os.listdir(workspace), [])
+        self.pool.release(workspace)
+
+    def test_failed_compile_returns_workspace(self):
+        result = self.executor.execute_code(BROKEN_CODE)
+        self.assertEqual(result["stage"], "compilation")
+        self.assert_workspace_returned_empty()
+
+    def test_async_run_returns_workspace(self):
+        result = asyncio.run(self.executor.execute_code_async(BROKEN_CODE))
+        self.assertEqual(result["stage"], "compilation")
+        self.assert_workspace_returned_empty()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,201 @@
+"""
+RAM-Backed Workspace Pool
+Hands out pre-created run directories on tmpfs instead of creating and
+deleting a directory on disk for every compile and run. Released workspaces
+are wiped by a background thread and only then handed out again, so the
+request path does no directory creation or removal at all.
+"""
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+import logging
+
+from sandbox_config import SandboxConfig
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE_MODE = 0o700
+
+
+def default_root() -> str:
+    """SandboxConfig.WORKSPACE_POOL_ROOT, or a directory on /dev/shm when it is a tmpfs"""
+    if SandboxConfig.WORKSPACE_POOL_ROOT:
+        return SandboxConfig.WORKSPACE_POOL_ROOT
+    if filesystem_type('/dev/shm') == 'tmpfs':
+        return '/dev/shm/sandbox_workspaces'
+    return os.path.join(tempfile.gettempdir(), 'sandbox_workspaces')
+
+
+def filesystem_type(path: str, mounts_file: str = '/proc/self/mounts') -> Optional[str]:
+    """Type of the filesystem holding `path`, from the longest matching mount point"""
+    path = os.path.realpath(path)
+    best, fs_type = '', None
+    try:
+        with open(mounts_file) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point = fields[1].replace('\\040', ' ')
+                inside = path == mount_point or path.startswith(mount_point.rstrip('/') + '/')
+                if inside and len(mount_point) >= len(best):
+                    best, fs_type = mount_point, fields[2]
+    except OSError:
+        return None
+    return fs_type
+
+
+class WorkspacePool:
+    """Reusable, private run directories under `root`.
+
+    A workspace is handed to one run at a time. On release it goes to a
+    wiper thread that removes everything inside it and checks that it is
+    empty before putting it back on the free list; a workspace that cannot
+    be wiped is deleted and never reused, so no file written for one
+    submission can be seen by the next. When every workspace is busy a new
+    one is created rather than making the run wait; the pool keeps at most
+    `size` free workspaces and deletes the rest after use.
+    """
+
+    def __init__(self, root: Optional[str] = None,
+                 size: int = SandboxConfig.WORKSPACE_POOL_SIZE):
+        self.root = root or default_root()
+        self.size = size
+        os.makedirs(self.root, mode=WORKSPACE_MODE, exist_ok=True)
+
+        self._free = deque()
+        self._in_use = set()
+        self._lock = threading.Lock()
+        self._dirty: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._wiper = threading.Thread(target=self._wipe_loop, name="workspace_wiper", daemon=True)
+        self._closed = False
+
+        # Metrics
+        self.reused = 0
+        self.created = 0
+        self.discarded = 0
+        self.wipe_failures = 0
+
+        for _ in range(size):
+            self._free.append(self._create())
+        self._wiper.start()
+
+    def acquire(self) -> str:
+        """An empty workspace owned by the caller until release()"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Workspace pool is shut down")
+            if self._free:
+                workspace = self._free.popleft()
+                self.reused += 1
+            else:
+                workspace = None
+                self.created += 1
+
+        if workspace is None:
+            workspace = self._create()
+        else:
+            # A sandbox backend may have opened it up for its unprivileged user
+            os.chmod(workspace, WORKSPACE_MODE)
+        with self._lock:
+            self._in_use.add(workspace)
+        return workspace
+
+    def release(self, workspace: str) -> None:
+        """Give a workspace back; it is wiped in the background before reuse"""
+        with self._lock:
+            if workspace not in self._in_use:
+                raise ValueError(f"Not a workspace of this pool in use: {workspace}")
+            self._in_use.discard(workspace)
+        self._dirty.put(workspace)
+
+    @contextmanager
+    def workspace(self) -> Iterator[str]:
+        workspace = self.acquire()
+        try:
+            yield workspace
+        finally:
+            self.release(workspace)
+
+    def stats(self) -> Dict[str, any]:
+        with self._lock:
+            return {
+                "root": self.root,
+                "filesystem": filesystem_type(self.root),
+                "size": self.size,
+                "free": len(self._free),
+                "in_use": len(self._in_use),
+                "wiping": self._dirty.qsize(),
+                "reused": self.reused,
+                "created": self.created,
+                "discarded": self.discarded,
+                "wipe_failures": self.wipe_failures,
+            }
+
+    def drain(self) -> None:
+        """Wait until every released workspace has been wiped"""
+        self._dirty.join()
+
+    def shutdown(self) -> None:
+        """Stop the wiper and delete the pool's workspaces"""
+        with self._lock:
+            self._closed = True
+        self._dirty.put(None)
+        self._wiper.join()
+        with self._lock:
+            workspaces = list(self._free) + list(self._in_use)
+            self._free.clear()
+        for workspace in workspaces:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    def _create(self) -> str:
+        return tempfile.mkdtemp(prefix="sandbox_", dir=self.root)
+
+    def _wipe_loop(self) -> None:
+        while True:
+            workspace = self._dirty.get()
+            try:
+                if workspace is None:
+                    return
+                self._recycle(workspace)
+            except Exception as e:
+                logger.warning(f"Failed to recycle workspace {workspace}: {e}")
+            finally:
+                self._dirty.task_done()
+
+    def _recycle(self, workspace: str) -> None:
+        with self._lock:
+            keep = not self._closed and len(self._free) < self.size
+
+        if keep and self._wipe(workspace):
+            with self._lock:
+                self._free.append(workspace)
+            return
+
+        shutil.rmtree(workspace, ignore_errors=True)
+        with self._lock:
+            self.discarded += 1
+
+    def _wipe(self, workspace: str) -> bool:
+        """Empty a workspace; False if anything is left in it"""
+        try:
+            os.chmod(workspace, WORKSPACE_MODE)
+            with os.scandir(workspace) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.unlink(entry.path)
+            if not os.listdir(workspace):
+                return True
+        except OSError as e:
+            logger.warning(f"Failed to wipe workspace {workspace}: {e}")
+        with self._lock:
+            self.wipe_failures += 1
+        return False
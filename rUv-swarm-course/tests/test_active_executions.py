@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test Suite for cancelling direct runs by their execution id
+"""
+
+import asyncio
+import pytest
+
+from backend.services.active_executions import (
+    ActiveExecutions, DuplicateExecutionError, ExecutionCancelledError
+)
+
+
+async def _sleep(delay, result=None, stopped=None):
+    try:
+        await asyncio.sleep(delay)
+    except asyncio.CancelledError:
+        if stopped is not None:
+            stopped.set()
+        raise
+    return result or {"success": True}
+
+
+class TestActiveExecutions:
+    """Test registration, cancellation and ownership of runs"""
+    
+    @pytest.mark.asyncio
+    async def test_run_returns_the_result_and_forgets_the_id(self):
+        """A finished run returns its result and frees its id"""
+        executions = ActiveExecutions()
+        result = await executions.run("run-1", 1, _sleep(0, {"output": "hi"}))
+        
+        assert result == {"output": "hi"}
+        assert not executions.active("run-1", 1)
+        assert executions.metrics()["in_flight"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_cancel_by_id_stops_the_run(self):
+        """Cancelling by id cancels the run's task and raises in the request"""
+        executions = ActiveExecutions()
+        stopped = asyncio.Event()
+        request = asyncio.ensure_future(executions.run("run-1", 1, _sleep(5, stopped=stopped)))
+        await asyncio.sleep(0.01)
+        
+        assert executions.cancel("run-1", 1)
+        with pytest.raises(ExecutionCancelledError):
+            await asyncio.wait_for(request, 1)
+        assert stopped.is_set()
+        assert not executions.active("run-1", 1)
+        assert executions.metrics()["cancelled"] == 1
+        assert not executions.cancel("run-1", 1)
+    
+    @pytest.mark.asyncio
+    async def test_only_the_owner_can_cancel(self):
+        """Another user's cancel is refused and the run goes on"""
+        executions = ActiveExecutions()
+        task = executions.start("run-1", 1, _sleep(0.05))
+        
+        assert not executions.cancel("run-1", 2)
+        assert await task == {"success": True}
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_id_is_rejected(self):
+        """An id in use by a run in flight cannot start another run"""
+        executions = ActiveExecutions()
+        task = executions.start("run-1", 1, _sleep(0.05))
+        
+        with pytest.raises(DuplicateExecutionError):
+            executions.start("run-1", 1, _sleep(0))
+        await task
+        assert await executions.run("run-1", 1, _sleep(0)) == {"success": True}
+    
+    @pytest.mark.asyncio
+    async def test_ids_are_scoped_by_user(self):
+        """Another user's run with the same id neither blocks nor is visible"""
+        executions = ActiveExecutions()
+        first = executions.start("run-1", 1, _sleep(5))
+        second = executions.start("run-1", 2, _sleep(0.05, {"output": "mine"}))
+        
+        assert executions.active("run-1", 1)
+        assert not executions.active("run-1", 3)
+        assert executions.cancel("run-1", 1)
+        assert await second == {"output": "mine"}
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert executions.metrics()["in_flight"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_request_cancels_its_run(self):
+        """A request that goes away takes its run with it"""
+        executions = ActiveExecutions()
+        stopped = asyncio.Event()
+        request = asyncio.ensure_future(executions.run(None, 1, _sleep(5, stopped=stopped)))
+        await asyncio.sleep(0.01)
+        
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        await asyncio.sleep(0)
+        assert stopped.is_set()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the resumable bulk regrade
+"""
+
+import json
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from backend.models import Base, CodeExercise, CodeSubmission, RegradeItem, RegradeRun
+from backend.services.bulk_regrade import BulkRegrade, load_test_cases
+from backend.services.grading_harness import grading_harness
+
+requires_node = pytest.mark.skipif(not grading_harness.available, reason="node is not installed")
+
+TEST_CASES = [
+    {"input": "5", "expected": "10", "description": "Test with input 5"},
+    {"input": "-3", "expected": "-6", "description": "Test with negative input"},
+]
+CORRECT = "function solution(n) { return n * 2; }"
+WRONG = "function solution(n) { return n * 3; }"
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'regrade.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as session, session.begin():
+        session.add(CodeExercise(id=1, lesson_id=1, title="Double", order_index=1,
+                                 test_cases=json.dumps(TEST_CASES)))
+        # Verdicts as stored before the test cases were fixed
+        for i in range(7):
+            session.add(CodeSubmission(user_id=i + 1, exercise_id=1, submitted_code=CORRECT if i % 2 else WRONG,
+                                       passed=not i % 2))
+    yield factory
+    engine.dispose()
+
+
+def verdicts(session_factory):
+    with session_factory() as session:
+        return session.execute(
+            select(CodeSubmission.passed).order_by(CodeSubmission.id)
+        ).scalars().all()
+
+
+class TestLoadTestCases:
+    """Test reading an exercise's test cases"""
+    
+    def test_plain_list(self):
+        assert load_test_cases(json.dumps(TEST_CASES)) == (TEST_CASES, "solution")
+    
+    def test_object_with_function_name(self):
+        raw = json.dumps({"function_name": "doubleNumber", "test_cases": TEST_CASES})
+        assert load_test_cases(raw) == (TEST_CASES, "doubleNumber")
+    
+    def test_empty(self):
+        assert load_test_cases(None) == ([], "solution")
+
+
+@requires_node
+class TestBulkRegrade:
+    """Test regrading submissions in checkpointed batches"""
+    
+    def test_regrades_every_submission(self, session_factory):
+        reports = []
+        regrade = BulkRegrade(session_factory, batch_size=3, processes=2, concurrency=2,
+                              on_progress=reports.append)
+        progress = regrade.run(1)
+        
+        assert verdicts(session_factory) == [False, True, False, True, False, True, False]
+        assert progress.status == "completed"
+        assert (progress.total, progress.processed, progress.changed) == (7, 7, 7)
+        assert [r.processed for r in reports] == [3, 6, 7, 7]
+        assert reports[0].eta_seconds is not None
+        
+        with session_factory() as session:
+            submission = session.get(CodeSubmission, 2)
+            results = json.loads(submission.test_results)
+            assert results["passed_tests"] == 2
+            assert submission.execution_time_ms is not None
+    
+    def test_resumes_after_last_checkpoint(self, session_factory):
+        # A previous run wrote the first four submissions before it died
+        with session_factory() as session, session.begin():
+            session.add(RegradeRun(exercise_id=1, status="failed", last_submission_id=4,
+                                   total=7, processed=4, changed=0, errors=0))
+        
+        progress = BulkRegrade(session_factory, batch_size=2, processes=1).run(1)
+        
+        # Submissions already covered by the checkpoint are not regraded
+        assert verdicts(session_factory)[:4] == [True, False, True, False]
+        assert verdicts(session_factory)[4:] == [False, True, False]
+        assert progress.processed == 7
+        with session_factory() as session:
+            runs = session.execute(select(RegradeRun)).scalars().all()
+            assert [run.status for run in runs] == ["completed"]
+    
+    def test_resumed_run_leaves_out_later_submissions(self, session_factory):
+        # A run over the first five submissions died after writing four
+        with session_factory() as session, session.begin():
+            session.add(RegradeRun(exercise_id=1, status="failed", last_submission_id=4,
+                                   max_submission_id=5, total=5, processed=4, changed=0, errors=0))
+        
+        progress = BulkRegrade(session_factory, batch_size=2, processes=1).run(1)
+        
+        assert verdicts(session_factory)[4:] == [False, False, True]
+        assert (progress.status, progress.total, progress.processed) == ("completed", 5, 5)
+    
+    def test_ungraded_submissions_are_retried_on_resume(self, session_factory, monkeypatch):
+        with monkeypatch.context() as patch:
+            # Worker processes fork from here, so they see the broken runtime
+            patch.setattr(grading_harness, "node_binary", "/nonexistent/node")
+            progress = BulkRegrade(session_factory, batch_size=3, processes=1).run(1)
+        
+        # Nothing was recorded as graded and the stored verdicts are untouched
+        assert (progress.status, progress.processed, progress.failed) == ("failed", 0, 7)
+        assert verdicts(session_factory) == [True, False, True, False, True, False, True]
+        with session_factory() as session:
+            statuses = session.execute(select(RegradeItem.status)).scalars().all()
+            assert statuses == ["failed"] * 7
+        
+        progress = BulkRegrade(session_factory, batch_size=3, processes=1).run(1)
+        
+        assert (progress.status, progress.processed, progress.failed) == ("completed", 7, 0)
+        assert verdicts(session_factory) == [False, True, False, True, False, True, False]
+        with session_factory() as session:
+            assert len(session.execute(select(RegradeRun)).scalars().all()) == 1
+            statuses = session.execute(select(RegradeItem.status)).scalars().all()
+            assert statuses == ["done"] * 7
+    
+    def test_completed_run_starts_over(self, session_factory):
+        BulkRegrade(session_factory, batch_size=10, processes=1).run(1)
+        progress = BulkRegrade(session_factory, batch_size=10, processes=1).run(1)
+        
+        assert progress.processed == 7
+        assert progress.changed == 0
+        with session_factory() as session:
+            assert len(session.execute(select(RegradeRun)).scalars().all()) == 2
+    
+    def test_unknown_exercise(self, session_factory):
+        with pytest.raises(ValueError):
+            BulkRegrade(session_factory, processes=1).run(99)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test Suite for concurrent test case fan-out
+"""
+
+import asyncio
+import time
+import pytest
+
+from backend.services.case_fanout import fan_out
+
+
+def _case(value=None, delay=0.0, error=None, tracker=None):
+    async def run():
+        if tracker is not None:
+            tracker["running"] += 1
+            tracker["peak"] = max(tracker["peak"], tracker["running"])
+        try:
+            await asyncio.sleep(delay)
+            if error:
+                raise error
+            return value
+        finally:
+            if tracker is not None:
+                tracker["running"] -= 1
+    return run
+
+
+class TestFanOut:
+    """Test concurrency cap, per-case timeout and aggregate deadline"""
+    
+    @pytest.mark.asyncio
+    async def test_cases_run_concurrently_in_order(self):
+        """Total latency tracks the slowest case and results keep input order"""
+        start = time.monotonic()
+        outcomes = await fan_out(
+            [_case(i, delay=0.2) for i in range(5)],
+            concurrency=5, case_timeout=1, deadline=5
+        )
+        
+        assert time.monotonic() - start < 0.6
+        assert [o.value for o in outcomes] == [0, 1, 2, 3, 4]
+        assert all(o.ok for o in outcomes)
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        """No more than `concurrency` cases run at the same time"""
+        tracker = {"running": 0, "peak": 0}
+        await fan_out(
+            [_case(delay=0.05, tracker=tracker) for _ in range(8)],
+            concurrency=3, case_timeout=1, deadline=5
+        )
+        
+        assert tracker["peak"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_case_timeout_and_error(self):
+        """A slow or failing case is reported without affecting the others"""
+        outcomes = await fan_out(
+            [_case("ok"), _case(delay=1), _case(error=ValueError("bad input"))],
+            concurrency=3, case_timeout=0.1, deadline=5
+        )
+        
+        assert [o.status for o in outcomes] == ["ok", "timeout", "error"]
+        assert outcomes[2].error == "bad input"
+    
+    @pytest.mark.asyncio
+    async def test_deadline_returns_partial_results(self):
+        """Cases unfinished at the deadline are cancelled and marked"""
+        start = time.monotonic()
+        outcomes = await fan_out(
+            [_case("fast"), _case(delay=2), _case(delay=2)],
+            concurrency=2, case_timeout=5, deadline=0.2
+        )
+        
+        assert time.monotonic() - start < 1
+        assert outcomes[0].value == "fast"
+        assert [o.status for o in outcomes[1:]] == ["deadline", "deadline"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test Suite for cgroup run accounting
+"""
+
+import asyncio
+import os
+import sys
+import pytest
+
+from backend.services.cgroup_accounting import (
+    CgroupAccounting,
+    ResourceUsage,
+    find_cgroup2_mount,
+    parse_cpu_stat,
+    read_usage
+)
+
+CPU_STAT = """usage_usec 250000
+user_usec 200000
+system_usec 50000
+nr_periods 40
+nr_throttled 7
+throttled_usec 35000
+"""
+
+
+class TestReading:
+    """Test parsing of cgroup v2 files"""
+    
+    def test_parse_cpu_stat(self):
+        stats = parse_cpu_stat(CPU_STAT + "core_sched.force_idle_usec 0\n")
+        assert stats["user_usec"] == 200000
+        assert stats["nr_throttled"] == 7
+        assert stats["core_sched.force_idle_usec"] == 0
+    
+    def test_read_usage(self, tmp_path):
+        (tmp_path / "cpu.stat").write_text(CPU_STAT)
+        (tmp_path / "memory.peak").write_text(f"{48 * 1024 * 1024}\n")
+        usage = read_usage(str(tmp_path))
+        assert usage == ResourceUsage(
+            cpu_user_ms=200, cpu_system_ms=50, memory_peak_kb=48 * 1024,
+            cpu_throttled_count=7, cpu_throttled_ms=35, measured_by="cgroup"
+        )
+    
+    def test_missing_controllers_leave_fields_empty(self, tmp_path):
+        # Without the cpu and memory controllers only the times are present
+        (tmp_path / "cpu.stat").write_text("usage_usec 1000\nuser_usec 800\nsystem_usec 200\n")
+        usage = read_usage(str(tmp_path))
+        assert usage.cpu_user_ms == 0
+        assert usage.memory_peak_kb is None
+        assert usage.cpu_throttled_count is None
+    
+    def test_unreadable_cgroup(self, tmp_path):
+        assert read_usage(str(tmp_path / "gone")).measured_by == "none"
+    
+    def test_find_cgroup2_mount(self, tmp_path):
+        mounts = tmp_path / "mounts"
+        mounts.write_text(
+            "cgroup /sys/fs/cgroup/cpu cgroup rw,cpu 0 0\n"
+            "cgroup2 /sys/fs/cgroup/unified cgroup2 rw 0 0\n"
+        )
+        assert find_cgroup2_mount(str(mounts)) == "/sys/fs/cgroup/unified"
+        assert find_cgroup2_mount(str(tmp_path / "missing")) is None
+
+
+class TestMerge:
+    """Test filling unmeasured fields from a fallback"""
+    
+    def test_gaps_are_filled(self):
+        cgroup = ResourceUsage(cpu_user_ms=10, cpu_system_ms=2, measured_by="cgroup")
+        rusage = ResourceUsage(cpu_user_ms=99, cpu_system_ms=99, memory_peak_kb=2048, measured_by="rusage")
+        merged = cgroup.merge(rusage)
+        assert merged.cpu_user_ms == 10
+        assert merged.memory_peak_kb == 2048
+        assert merged.measured_by == "cgroup+rusage"
+    
+    def test_nothing_measured_takes_fallback(self):
+        merged = ResourceUsage().merge(ResourceUsage(cpu_user_ms=1, measured_by="runtime"))
+        assert merged.measured_by == "runtime"
+        assert merged.cpu_user_ms == 1
+
+
+class TestCgroupAccounting:
+    """Test run cgroups on the host"""
+    
+    def test_unavailable_without_cgroup2(self, tmp_path):
+        accounting = CgroupAccounting(root=str(tmp_path), parent="runs")
+        assert accounting.create() is None
+        assert accounting.collect(None).measured_by == "none"
+    
+    def test_controllers_that_cannot_be_enabled_are_logged(self, tmp_path, caplog):
+        (tmp_path / "cgroup.controllers").write_text("cpu memory\n")
+        server = tmp_path / CgroupAccounting._own_cgroup().lstrip("/")
+        (server / "cgroup.subtree_control").mkdir(parents=True)  # Not writable as a file
+        accounting = CgroupAccounting(root=str(tmp_path), parent="runs")
+        
+        with caplog.at_level("WARNING", logger="backend.services.cgroup_accounting"):
+            assert accounting.available()
+        assert "Could not enable the cpu controller" in caplog.text
+        assert "Could not enable the memory controller" in caplog.text
+    
+    def test_disabled(self):
+        assert CgroupAccounting(enabled=False).create() is None
+    
+    def test_run_is_measured_and_removed(self):
+        accounting = CgroupAccounting()
+        cgroup = accounting.create()
+        if cgroup is None:
+            pytest.skip("cgroup v2 is not writable here")
+        
+        async def run():
+            process = await accounting.start(
+                cgroup, sys.executable, "-c", "sum(i * i for i in range(2_000_000))"
+            )
+            return await process.wait()
+        
+        assert asyncio.run(run()) == 0
+        usage = accounting.collect(cgroup)
+        assert usage.measured_by == "cgroup"
+        assert usage.cpu_user_ms + usage.cpu_system_ms > 0
+        assert not os.path.exists(cgroup)
+    
+    def test_command_starts_inside_its_cgroup(self):
+        """The command's first view of /proc/self/cgroup is already the run cgroup"""
+        accounting = CgroupAccounting()
+        cgroup = accounting.create()
+        if cgroup is None:
+            pytest.skip("cgroup v2 is not writable here")
+        
+        async def run():
+            process = await accounting.start(cgroup, "cat", "/proc/self/cgroup",
+                                             stdout=asyncio.subprocess.PIPE)
+            stdout, _ = await process.communicate()
+            return stdout.decode()
+        
+        try:
+            assert asyncio.run(run()).strip().endswith(os.path.basename(cgroup))
+        finally:
+            accounting.remove(cgroup)
+    
+    def test_without_cgroup_the_command_runs_directly(self):
+        async def run():
+            process = await CgroupAccounting(enabled=False).start(None, "true")
+            return await process.wait()
+        
+        assert asyncio.run(run()) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -9,14 +9,12 @@ import asyncio
 import json
 from fastapi.testclient import TestClient
 from backend.main import app
-from backend.api.code_execution import (
-    _execute_javascript,
-    _execute_python,
-    _execute_java,
-    _execute_cpp,
-    _execute_rust,
-    _execute_go
-)
+from backend.services.runners.cpp import execute_cpp
+from backend.services.runners.go import execute_go
+from backend.services.runners.java import execute_java
+from backend.services.runners.javascript import execute_javascript
+from backend.services.runners.python import execute_python
+from backend.services.runners.rust import execute_rust
 
 client = TestClient(app)
 
@@ -28,7 +26,7 @@ class TestJavaScriptExecution:
     async def test_basic_console_log(self):
         """Test basic console.log output"""
         code = 'console.log("Hello, World!");'
-        result = await _execute_javascript(code)
+        result = await execute_javascript(code)
         
         assert result["success"] is True
         assert "Hello, World!" in result["output"]
@@ -42,7 +40,7 @@ class TestJavaScriptExecution:
         console.log("2 + 2 =", 2 + 2);
         console.log("Math.sqrt(16) =", Math.sqrt(16));
         '''
-        result = await _execute_javascript(code)
+        result = await execute_javascript(code)
         
         assert result["success"] is True
         assert "2 + 2" in result["output"]
@@ -62,7 +60,7 @@ class TestJavaScriptExecution:
         const mySwarm = createSwarm(5);
         console.log("Swarm created with", mySwarm.length, "agents");
         '''
-        result = await _execute_javascript(code)
+        result = await execute_javascript(code)
         
         assert result["success"] is True
         assert "[rUv-Swarm Simulation]" in result["output"]
@@ -73,7 +71,7 @@ class TestJavaScriptExecution:
     async def test_security_violation(self):
         """Test security pattern detection"""
         code = 'require("fs").readFileSync("/etc/passwd");'
-        result = await _execute_javascript(code)
+        result = await execute_javascript(code)
         
         assert result["success"] is False
         assert "Security violation" in result["error"]
@@ -90,7 +88,7 @@ class TestJavaScriptExecution:
         
         console.log("Fibonacci of 5:", fibonacci(5));
         '''
-        result = await _execute_javascript(code)
+        result = await execute_javascript(code)
         
         assert result["success"] is True
         assert "Function 'fibonacci' defined" in result["output"]
@@ -103,7 +101,7 @@ class TestPythonExecution:
     async def test_basic_print(self):
         """Test basic print output"""
         code = 'print("Hello, Python World!")'
-        result = await _execute_python(code)
+        result = await execute_python(code)
         
         assert result["success"] is True
         assert "Hello, Python World!" in result["output"]
@@ -125,7 +123,7 @@ class TestPythonExecution:
         swarm = Swarm()
         print(f"Created swarm with {len(swarm.agents)} agents")
         '''
-        result = await _execute_python(code)
+        result = await execute_python(code)
         
         assert result["success"] is True
         assert "[rUv-Swarm Python Simulation]" in result["output"]
@@ -136,7 +134,7 @@ class TestPythonExecution:
     async def test_security_violation(self):
         """Test security pattern detection"""
         code = 'import os\nos.system("ls /")'
-        result = await _execute_python(code)
+        result = await execute_python(code)
         
         assert result["success"] is False
         assert "Security violation" in result["error"]
@@ -150,7 +148,7 @@ class TestPythonExecution:
         print("Original:", numbers)
         print("Squared:", squared)
         '''
-        result = await _execute_python(code)
+        result = await execute_python(code)
         
         assert result["success"] is True
         assert "Original:" in result["output"]
@@ -170,7 +168,7 @@ class TestJavaExecution:
             }
         }
         '''
-        result = await _execute_java(code)
+        result = await execute_java(code)
         
         assert result["success"] is True
         assert "Hello, Java World!" in result["output"]
@@ -193,7 +191,7 @@ class TestJavaExecution:
             }
         }
         '''
-        result = await _execute_java(code)
+        result = await execute_java(code)
         
         assert result["success"] is True
         assert "[rUv-Swarm Java Simulation]" in result["output"]
@@ -214,7 +212,7 @@ class TestCppExecution:
             return 0;
         }
         '''
-        result = await _execute_cpp(code)
+        result = await execute_cpp(code)
         
         assert result["success"] is True
         assert "Hello, C++ World!" in result["output"]
@@ -243,7 +241,7 @@ class TestCppExecution:
             }
         };
         '''
-        result = await _execute_cpp(code)
+        result = await execute_cpp(code)
         
         assert result["success"] is True
         assert "[rUv-Swarm C++ Simulation]" in result["output"]
@@ -261,7 +259,7 @@ class TestRustExecution:
             println!("Hello, Rust World!");
         }
         '''
-        result = await _execute_rust(code)
+        result = await execute_rust(code)
         
         assert result["success"] is True
         assert "Hello, Rust World!" in result["output"]
@@ -283,7 +281,7 @@ class TestRustExecution:
             println!("Creating memory-safe swarm");
         }
         '''
-        result = await _execute_rust(code)
+        result = await execute_rust(code)
         
         assert result["success"] is True
         assert "[rUv-Swarm Rust Simulation]" in result["output"]
@@ -306,7 +304,7 @@ class TestGoExecution:
             fmt.Println("Hello, Go World!")
         }
         '''
-        result = await _execute_go(code)
+        result = await execute_go(code)
         
         assert result["success"] is True
         assert "Hello, Go World!" in result["output"]
@@ -332,7 +330,7 @@ class TestGoExecution:
             fmt.Println("Creating concurrent swarm")
         }
         '''
-        result = await _execute_go(code)
+        result = await execute_go(code)
         
         assert result["success"] is True
         assert "[rUv-Swarm Go Simulation]" in result["output"]
@@ -390,7 +388,7 @@ class TestRuvSwarmAlgorithms:
         pso = PSO(20, 2)
         print(f"PSO swarm initialized with {len(pso.swarm)} particles")
         '''
-        result = await _execute_python(code)
+        result = await execute_python(code)
         
         assert result["success"] is True
         assert "[rUv-Swarm Python Simulation]" in result["output"]
@@ -416,7 +414,7 @@ class TestRuvSwarmAlgorithms:
         const antColony = createColony(50);
         console.log("Ant colony created with", antColony.length, "ants");
         '''
-        result = await _execute_javascript(code)
+        result = await execute_javascript(code)
         
         assert result["success"] is True
         assert "[rUv-Swarm Simulation]" in result["output"]
@@ -450,7 +448,7 @@ class TestRuvSwarmAlgorithms:
             println!("Boids flock created with {} members", flock.len());
         }
         '''
-        result = await _execute_rust(code)
+        result = await execute_rust(code)
         
         assert result["success"] is True
         assert "[rUv-Swarm Rust Simulation]" in result["output"]
@@ -471,7 +469,7 @@ class TestSecurityFeatures:
         ]
         
         for code in dangerous_codes:
-            result = await _execute_javascript(code)
+            result = await execute_javascript(code)
             assert result["success"] is False
             assert "Security violation" in result["error"]
     
@@ -486,7 +484,7 @@ class TestSecurityFeatures:
         ]
         
         for code in dangerous_codes:
-            result = await _execute_python(code)
+            result = await execute_python(code)
             assert result["success"] is False
             assert "Security violation" in result["error"]
 
@@ -498,7 +496,7 @@ class TestPerformanceMetrics:
     async def test_execution_time_tracking(self):
         """Test that execution time is properly tracked"""
         code = 'console.log("Performance test");'
-        result = await _execute_javascript(code)
+        result = await execute_javascript(code)
         
         assert result["success"] is True
         assert "execution_time_ms" in result
@@ -509,7 +507,7 @@ class TestPerformanceMetrics:
     async def test_memory_usage_tracking(self):
         """Test memory usage reporting"""
         code = 'print("Memory test")'
-        result = await _execute_python(code)
+        result = await execute_python(code)
         
         assert result["success"] is True
         assert "memory_used_kb" in result
@@ -518,10 +516,10 @@ class TestPerformanceMetrics:
     @pytest.mark.asyncio
     async def test_different_language_memory_usage(self):
         """Test different memory usage for different languages"""
-        js_result = await _execute_javascript('console.log("test");')
-        python_result = await _execute_python('print("test")')
-        java_result = await _execute_java('System.out.println("test");')
-        cpp_result = await _execute_cpp('cout << "test";')
+        js_result = await execute_javascript('console.log("test");')
+        python_result = await execute_python('print("test")')
+        java_result = await execute_java('System.out.println("test");')
+        cpp_result = await execute_cpp('cout << "test";')
         
         # Different languages should report different memory usage
         memory_usage = {
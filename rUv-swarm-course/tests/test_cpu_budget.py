@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test Suite for per-user CPU budgets
+"""
+
+import pytest
+
+from backend.services.cpu_budget import CpuBudget, CpuBudgetExceededError
+
+WINDOW = 3600
+
+
+class FakeClock:
+    def __init__(self, now=10 * WINDOW):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+def _budget(limit_seconds=10, clock=None, enabled=True):
+    return CpuBudget(limit_seconds=limit_seconds, window_seconds=WINDOW,
+                     enabled=enabled, clock=clock or FakeClock())
+
+
+class TestCharging:
+    """Test what a run costs"""
+    
+    def test_cost_is_measured_cpu_time(self):
+        assert CpuBudget.cost_ms({"cpu_user_ms": 700, "cpu_system_ms": 50,
+                                  "execution_time_ms": 2000}) == 750
+    
+    def test_cost_falls_back_to_wall_time(self):
+        assert CpuBudget.cost_ms({"cpu_user_ms": None, "execution_time_ms": 120}) == 120
+    
+    def test_charge_reduces_remaining(self):
+        budget = _budget()
+        remaining = budget.charge("alice", {"cpu_user_ms": 2500, "cpu_system_ms": 500})
+        assert remaining == pytest.approx(7.0)
+        assert budget.remaining("bob") == 10
+    
+    def test_heavy_run_counts_like_many_light_ones(self):
+        budget = _budget()
+        budget.charge("heavy", {"cpu_user_ms": 10000})
+        for _ in range(100):
+            budget.charge("light", {"cpu_user_ms": 100})
+        assert budget.remaining("heavy") == pytest.approx(budget.remaining("light"))
+    
+    def test_disabled_budget_never_refuses(self):
+        budget = _budget(enabled=False)
+        budget.charge("alice", {"cpu_user_ms": 60000})
+        budget.check("alice")
+        assert budget.headers("alice") == {}
+
+
+class TestSlidingWindow:
+    """Test refusal and recovery as usage ages out"""
+    
+    def test_exhausted_budget_is_refused(self):
+        budget = _budget()
+        budget.charge("alice", {"cpu_user_ms": 10000})
+        with pytest.raises(CpuBudgetExceededError) as e:
+            budget.check("alice")
+        assert e.value.retry_after > 0
+        assert budget.stats()["refused"] == 1
+    
+    def test_usage_decays_over_the_next_window(self):
+        clock = FakeClock()
+        budget = _budget(clock=clock)
+        budget.charge("alice", {"cpu_user_ms": 8000})
+        
+        clock.now += WINDOW  # Start of the next window: all 8s still count
+        assert budget.remaining("alice") == pytest.approx(2.0)
+        clock.now += WINDOW // 2  # Half of it has aged out
+        assert budget.remaining("alice") == pytest.approx(6.0)
+        clock.now += WINDOW
+        assert budget.remaining("alice") == 10
+        assert budget.stats()["tracked_users"] == 0
+    
+    def test_retry_after_matches_recovery(self):
+        clock = FakeClock()
+        budget = _budget(clock=clock)
+        budget.charge("alice", {"cpu_user_ms": 20000})
+        retry_after = budget.retry_after("alice")
+        
+        clock.now += retry_after - 2
+        with pytest.raises(CpuBudgetExceededError):
+            budget.check("alice")
+        clock.now += 2
+        budget.check("alice")
+    
+    def test_retry_after_while_previous_window_decays(self):
+        clock = FakeClock()
+        budget = _budget(clock=clock)
+        budget.charge("alice", {"cpu_user_ms": 9000})
+        clock.now += WINDOW
+        budget.charge("alice", {"cpu_user_ms": 3000})  # 12s used
+        
+        clock.now += budget.retry_after("alice")
+        budget.check("alice")
+    
+    def test_headers(self):
+        budget = _budget()
+        budget.charge("alice", {"cpu_user_ms": 1234})
+        assert budget.headers("alice") == {
+            "X-CPU-Budget-Limit": "10",
+            "X-CPU-Budget-Remaining": "8.766",
+            "X-CPU-Budget-Window": "3600",
+        }
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
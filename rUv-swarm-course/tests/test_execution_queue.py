@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the bounded execution job queue
+"""
+
+import asyncio
+import pytest
+
+from backend.services.execution_queue import ExecutionQueue, QueueFullError
+
+
+def _runner(result=None, delay=0.0, error=None):
+    async def run():
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return result or {"success": True}
+    return run
+
+
+class TestExecutionQueue:
+    """Test job lifecycle, backpressure and metrics"""
+    
+    @pytest.mark.asyncio
+    async def test_job_completes_and_result_is_stored(self):
+        """A submitted job runs in the background and its result can be polled"""
+        queue = ExecutionQueue(max_size=10, workers=2, result_ttl=60, job_timeout=5)
+        try:
+            job = queue.submit("execute", _runner({"output": "hi"}), owner_id=1)
+            assert job.status == "queued"
+            
+            finished = await queue.wait(job.id, timeout=2)
+            assert finished.status == "completed"
+            assert finished.result == {"output": "hi"}
+            assert finished.to_dict()["queue_wait_ms"] is not None
+            assert queue.get(job.id) is finished
+        finally:
+            await queue.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_with_retry_after(self):
+        """Submissions beyond capacity raise instead of queueing unboundedly"""
+        queue = ExecutionQueue(max_size=2, workers=1, result_ttl=60, job_timeout=5)
+        try:
+            queue.submit("execute", _runner(delay=0.5))
+            await asyncio.sleep(0)  # Let the worker take the first job
+            queue.submit("execute", _runner())
+            queue.submit("execute", _runner())
+            
+            with pytest.raises(QueueFullError) as excinfo:
+                queue.submit("execute", _runner())
+            
+            assert excinfo.value.retry_after >= 1
+            metrics = queue.metrics()
+            assert metrics["depth"] == 2
+            assert metrics["busy_workers"] == 1
+            assert metrics["rejected"] == 1
+        finally:
+            await queue.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_failures_and_timeouts_are_reported(self):
+        """Runner errors and job timeouts finish the job as failed"""
+        queue = ExecutionQueue(max_size=10, workers=2, result_ttl=60, job_timeout=0.2)
+        try:
+            broken = queue.submit("execute", _runner(error=RuntimeError("boom")))
+            slow = queue.submit("execute", _runner(delay=5))
+            
+            assert (await queue.wait(broken.id, timeout=2)).error == "boom"
+            timed_out = await queue.wait(slow.id, timeout=2)
+            assert timed_out.status == "failed"
+            assert "timed out" in timed_out.error
+            assert queue.metrics()["failed"] == 2
+        finally:
+            await queue.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_results_expire_after_ttl(self):
+        """Finished jobs are dropped from the result store after their TTL"""
+        queue = ExecutionQueue(max_size=10, workers=1, result_ttl=0.1, job_timeout=5)
+        try:
+            job = queue.submit("execute", _runner())
+            await queue.wait(job.id, timeout=2)
+            await asyncio.sleep(0.2)
+            
+            assert queue.get(job.id) is None
+        finally:
+            await queue.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_long_poll_returns_unfinished_job_on_timeout(self):
+        """Waiting shorter than the run returns the job still in progress"""
+        queue = ExecutionQueue(max_size=10, workers=1, result_ttl=60, job_timeout=5)
+        try:
+            job = queue.submit("execute", _runner(delay=1))
+            polled = await queue.wait(job.id, timeout=0.05)
+            
+            assert polled.status in ("queued", "running")
+            assert polled.result is None
+        finally:
+            await queue.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_shutdown_fails_queued_jobs(self):
+        """Shutting down releases anyone waiting on queued jobs"""
+        queue = ExecutionQueue(max_size=10, workers=1, result_ttl=60, job_timeout=5)
+        queue.submit("execute", _runner(delay=5))
+        await asyncio.sleep(0)
+        queued = queue.submit("execute", _runner())
+        
+        await queue.shutdown()
+        
+        assert queued.status == "failed"
+        assert queued.done.is_set()
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_queued_job_never_runs(self):
+        """A job cancelled while queued finishes at once and is skipped by the workers"""
+        ran = []
+        
+        async def run():
+            ran.append(True)
+            return {"success": True}
+        
+        queue = ExecutionQueue(max_size=10, workers=1, result_ttl=60, job_timeout=5)
+        try:
+            queue.submit("execute", _runner(delay=0.2))
+            await asyncio.sleep(0)
+            queued = queue.submit("execute", run)
+            
+            assert queue.cancel(queued.id) is queued
+            assert queued.status == "cancelled"
+            assert queued.error == "Execution cancelled"
+            
+            later = queue.submit("execute", _runner({"output": "later"}))
+            assert (await queue.wait(later.id, timeout=2)).status == "completed"
+            assert ran == []
+        finally:
+            await queue.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_queued_jobs_free_their_places(self):
+        """Cancelling queued jobs makes room for new ones before any worker is free"""
+        queue = ExecutionQueue(max_size=2, workers=1, result_ttl=60, job_timeout=5)
+        try:
+            queue.submit("execute", _runner(delay=0.5))
+            await asyncio.sleep(0)
+            for _ in range(3):
+                first = queue.submit("execute", _runner())
+                second = queue.submit("execute", _runner())
+                with pytest.raises(QueueFullError):
+                    queue.submit("execute", _runner())
+                queue.cancel(first.id)
+                queue.cancel(second.id)
+            
+            assert queue.metrics()["depth"] == 0
+            later = queue.submit("execute", _runner({"output": "later"}))
+            assert (await queue.wait(later.id, timeout=2)).result == {"output": "later"}
+            assert queue.metrics()["depth"] == 0
+        finally:
+            await queue.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_running_job_stops_its_runner(self):
+        """Cancelling a running job cancels its runner and frees the worker"""
+        stopped = asyncio.Event()
+        
+        async def run():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                stopped.set()
+                raise
+        
+        queue = ExecutionQueue(max_size=10, workers=1, result_ttl=60, job_timeout=5)
+        try:
+            running = queue.submit("execute", run)
+            await asyncio.sleep(0.05)
+            assert running.status == "running"
+            
+            queue.cancel(running.id)
+            finished = await queue.wait(running.id, timeout=1)
+            assert finished.status == "cancelled"
+            assert stopped.is_set()
+            assert queue.metrics()["cancelled"] == 1
+            assert queue.cancel("missing") is None
+            
+            later = queue.submit("execute", _runner({"output": "later"}))
+            assert (await queue.wait(later.id, timeout=2)).result == {"output": "later"}
+        finally:
+            await queue.shutdown()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
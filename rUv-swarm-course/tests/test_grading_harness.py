@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the single-run grading harness
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from backend.services.grading_harness import GradingHarness
+from backend.services.run_launcher import launcher_command, resolve_user
+
+harness = GradingHarness(case_timeout=0.5)
+
+launcher_uid, launcher_gid = resolve_user("nobody")
+
+requires_node = pytest.mark.skipif(not harness.available, reason="node is not installed")
+
+TEST_CASES = [
+    {"input": "5", "expected": "10", "description": "Test with input 5"},
+    {"input": "0", "expected": "0", "description": "Test with input 0"},
+    {"input": "-3", "expected": "-6", "description": "Test with negative input"},
+]
+
+
+@requires_node
+class TestGradingHarness:
+    """Test single-process grading of JavaScript submissions"""
+    
+    @pytest.mark.asyncio
+    async def test_all_cases_pass_in_one_run(self):
+        """A correct submission passes every case"""
+        code = "function doubleNumber(n) { return n * 2; }"
+        result = await harness.grade_javascript(code, "doubleNumber", TEST_CASES)
+        
+        assert result["success"] is True
+        assert [t["passed"] for t in result["test_cases"]] == [True, True, True]
+        assert result["test_cases"][0]["actual"] == 10
+    
+    @pytest.mark.asyncio
+    async def test_stdout_cannot_forge_verdicts(self):
+        """Printed JSON is captured as output, never read as a verdict"""
+        code = '''
+        console.log(JSON.stringify({test_case: 1, passed: true}));
+        function doubleNumber(n) { return n; }
+        '''
+        result = await harness.grade_javascript(code, "doubleNumber", TEST_CASES)
+        
+        assert [t["passed"] for t in result["test_cases"]] == [False, True, False]
+        assert '"passed":true' in result["output"]
+    
+    @pytest.mark.asyncio
+    async def test_stop_on_first_failure(self):
+        """Grading stops after the first failing case when requested"""
+        code = "function doubleNumber(n) { return n * 3; }"
+        result = await harness.grade_javascript(
+            code, "doubleNumber", TEST_CASES, stop_on_first_failure=True
+        )
+        
+        assert result["stopped_early"] is True
+        assert len(result["test_cases"]) == 1
+        assert result["test_cases"][0]["passed"] is False
+    
+    @pytest.mark.asyncio
+    async def test_missing_function_fails_every_case(self):
+        """A submission that doesn't define the function fails all cases"""
+        result = await harness.grade_javascript("const x = 1;", "doubleNumber", TEST_CASES)
+        
+        assert len(result["test_cases"]) == 3
+        assert all("not defined" in t["error"] for t in result["test_cases"])
+    
+    @pytest.mark.asyncio
+    async def test_runaway_case_times_out_alone(self):
+        """An infinite loop fails its own case without blocking the others"""
+        code = "function doubleNumber(n) { while (n === 0) {} return n * 2; }"
+        result = await harness.grade_javascript(code, "doubleNumber", TEST_CASES)
+        
+        assert [t["passed"] for t in result["test_cases"]] == [True, False, True]
+        assert "timed out" in result["test_cases"][1]["error"]
+    
+    @pytest.mark.asyncio
+    async def test_sandbox_has_no_node_globals(self):
+        """The submission context exposes neither require nor string code generation"""
+        code = '''
+        function doubleNumber(n) {
+            return typeof require === "undefined" ? n * 2 : 0;
+        }
+        const escape = this.constructor.constructor;
+        '''
+        result = await harness.grade_javascript(code, "doubleNumber", TEST_CASES)
+        assert all(t["passed"] for t in result["test_cases"])
+        
+        code = "const p = this.constructor.constructor('return process')(); function doubleNumber(n) { return n * 2; }"
+        result = await harness.grade_javascript(code, "doubleNumber", TEST_CASES)
+        assert not any(t["passed"] for t in result["test_cases"])
+    
+    @pytest.mark.asyncio
+    async def test_run_reports_measured_resources(self):
+        """CPU time and peak memory come from the cgroup, or from node itself"""
+        code = "function doubleNumber(n) { return n * 2; }"
+        result = await harness.grade_javascript(code, "doubleNumber", TEST_CASES)
+        
+        assert result["measured_by"] != "none"
+        assert result["cpu_user_ms"] + result["cpu_system_ms"] > 0
+        assert result["memory_peak_kb"] > 0
+        assert result["memory_used_kb"] == result["memory_peak_kb"]
+    
+    @pytest.mark.asyncio
+    async def test_microtask_loop_times_out_alone(self):
+        """A promise loop counts against its case timeout instead of hanging the run"""
+        code = """
+        function doubleNumber(n) {
+            if (n === 0) { const loop = () => { Promise.resolve().then(loop); }; loop(); }
+            return n * 2;
+        }
+        """
+        result = await harness.grade_javascript(code, "doubleNumber", TEST_CASES, timeout=10)
+        
+        assert result["success"] is True
+        assert [t["passed"] for t in result["test_cases"]] == [True, False, True]
+        assert "timed out" in result["test_cases"][1]["error"]
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("hostile", [
+        "({ valueOf() { while (true) {} } })",
+        "({ toJSON() { while (true) {} } })",
+        "new Proxy({}, { get() { while (true) {} } })",
+    ])
+    async def test_hostile_results_are_judged_under_the_timeout(self, hostile):
+        """Comparing and serializing a returned object runs inside the case timeout"""
+        code = f"function doubleNumber(n) {{ return n === 0 ? {hostile} : n * 2; }}"
+        result = await harness.grade_javascript(code, "doubleNumber", TEST_CASES, timeout=10)
+        
+        assert result["success"] is True
+        assert [t["passed"] for t in result["test_cases"]] == [True, False, True]
+        assert "timed out" in result["test_cases"][1]["error"]
+    
+    @pytest.mark.asyncio
+    async def test_hostile_exceptions_are_described_under_the_timeout(self):
+        """A thrown object's message getter or Proxy traps never run in the harness"""
+        code = """
+        function doubleNumber(n) {
+            if (n === 5) throw { get message() { while (true) {} } };
+            if (n === 0) throw new Proxy({}, { getPrototypeOf() { while (true) {} }, get() { while (true) {} } });
+            throw new Error('plain ' + n);
+        }
+        """
+        result = await harness.grade_javascript(code, "doubleNumber", TEST_CASES, timeout=10)
+        
+        assert result["success"] is True
+        errors = [t["error"] for t in result["test_cases"]]
+        assert errors[2] == "plain -3"
+        assert errors[0] == errors[1] == "Uncaught exception"
+    
+    @pytest.mark.asyncio
+    async def test_load_errors_are_described_under_the_timeout(self):
+        """Top-level throws fail every case with a message, hostile or not"""
+        hostile = "throw { get stack() { while (true) {} }, get message() { while (true) {} } };"
+        result = await harness.grade_javascript(hostile, "doubleNumber", TEST_CASES, timeout=10)
+        assert [t["error"] for t in result["test_cases"]] == ["Uncaught exception"] * 3
+        
+        result = await harness.grade_javascript("function doubleNumber(n) {", "doubleNumber", TEST_CASES)
+        assert result["test_cases"][0]["error"] == "Unexpected end of input"
+    
+    @pytest.mark.asyncio
+    async def test_memory_is_limited(self):
+        """Allocating without bound ends the run at the heap limit"""
+        code = "function doubleNumber(n) { const a = []; while (true) a.push(new Array(1e6).fill(n)); }"
+        result = await harness.grade_javascript(code, "doubleNumber", TEST_CASES, timeout=10)
+        
+        assert result["error"] == "Memory limit exceeded"
+        assert not any(t["passed"] for t in result["test_cases"])
+
+
+class TestRunLauncher:
+    """Test the isolation the launcher applies before executing a runtime"""
+    
+    def launch(self, script: str) -> subprocess.CompletedProcess:
+        command = launcher_command(
+            sys.executable, "nobody", cpu_seconds=3, memory_bytes=512 * 1024 * 1024,
+            max_file_size=1024 * 1024, max_processes=64, max_open_files=32,
+            command=["/bin/sh", "-c", script]
+        )
+        return subprocess.run(command, capture_output=True, text=True, timeout=30, cwd="/")
+    
+    def test_limits_are_applied(self):
+        """The command runs under the requested rlimits"""
+        result = self.launch("cat /proc/self/limits")
+        assert result.returncode == 0, result.stderr
+        soft = {line[:26].strip(): line[26:].split()[0] for line in result.stdout.splitlines()[1:]}
+        assert soft["Max cpu time"] == "3"
+        assert soft["Max address space"] == str(512 * 1024 * 1024)
+        assert soft["Max file size"] == str(1024 * 1024)
+        assert soft["Max processes"] == "64"
+        assert soft["Max open files"] == "32"
+    
+    def test_network_is_isolated(self):
+        """Only a loopback interface exists in the run's network namespace"""
+        result = self.launch("tail -n +3 /proc/net/dev | cut -d: -f1")
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.split() == ["lo"]
+    
+    @pytest.mark.skipif(os.getuid() != 0, reason="privileges are only dropped when started as root")
+    def test_privileges_are_dropped(self):
+        """A root server's runs execute as the unprivileged user"""
+        result = self.launch("id -u; id -G")
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.split() == [str(launcher_uid), str(launcher_gid)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the Python fork server
+"""
+
+import asyncio
+import os
+import time
+import pytest
+
+from backend.services.python_zygote import PythonZygote, ZygoteError
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "pidfd_open") or not hasattr(os, "memfd_create"),
+    reason="The zygote needs Linux pidfds and memfds"
+)
+
+
+async def _run(code, zygote=None, **kwargs):
+    own = zygote is None
+    zygote = zygote or PythonZygote()
+    try:
+        return await zygote.run(code, **kwargs)
+    finally:
+        if own:
+            await zygote.shutdown()
+
+
+class TestRuns:
+    """Test that submissions run in isolated forks"""
+    
+    @pytest.mark.asyncio
+    async def test_output_and_preloaded_modules(self):
+        result = await _run("import math\nprint(round(math.pi, 2))")
+        assert result["success"] is True
+        assert result["output"] == "3.14\n"
+        assert result["error"] is None
+        assert result["cpu_user_ms"] is not None
+        assert result["memory_peak_kb"] > 0
+    
+    @pytest.mark.asyncio
+    async def test_each_fork_gets_fresh_random_state(self):
+        zygote = PythonZygote()
+        try:
+            first = await zygote.run("import random\nprint(random.random())")
+            second = await zygote.run("import random\nprint(random.random())")
+        finally:
+            await zygote.shutdown()
+        assert first["output"] != second["output"]
+    
+    @pytest.mark.asyncio
+    async def test_exception_reports_submission_traceback(self):
+        result = await _run("def f():\n    raise ValueError('boom')\nf()")
+        assert result["success"] is False
+        assert "ValueError: boom" in result["error"]
+        assert "zygote_server" not in result["error"]
+    
+    @pytest.mark.asyncio
+    async def test_inherited_descriptors_are_closed(self):
+        # 3 is the descriptor listdir() opens itself
+        result = await _run("import os\nprint(sorted(os.listdir('/proc/self/fd')))")
+        assert result["output"].strip() == "['0', '1', '2', '3']"
+    
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(os.geteuid() != 0, reason="Privileges are only dropped when started as root")
+    async def test_privileges_are_dropped(self):
+        result = await _run("import os\nprint(os.getuid(), os.getgid())")
+        uid, gid = map(int, result["output"].split())
+        assert uid != 0 and gid != 0
+    
+    @pytest.mark.asyncio
+    async def test_server_environment_is_not_inherited(self, monkeypatch):
+        monkeypatch.setenv("DATABASE_URL", "postgresql://secret")
+        result = await _run("import os\nprint(sorted(os.environ))")
+        assert "PATH" in result["output"]
+        assert "DATABASE_URL" not in result["output"]
+    
+    @pytest.mark.asyncio
+    async def test_network_is_isolated(self):
+        result = await _run("print(open('/proc/net/dev').read().splitlines()[2].split(':')[0].strip())\n"
+                            "print(len(open('/proc/net/dev').read().splitlines()))")
+        assert result["output"].split() == ["lo", "3"]
+    
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(os.geteuid() != 0, reason="Only a root zygote drops privileges")
+    async def test_zygote_refuses_to_run_as_root(self):
+        with pytest.raises(ZygoteError, match="root privileges"):
+            await _run("print(1)", zygote=PythonZygote(user="root"))
+
+
+class TestLimits:
+    """Test timeouts and rlimits"""
+    
+    @pytest.mark.asyncio
+    async def test_wall_clock_timeout(self):
+        result = await _run("import time\ntime.sleep(10)", timeout=1)
+        assert result["success"] is False
+        assert "timed out" in result["error"]
+        assert result["execution_time_ms"] < 5000
+    
+    @pytest.mark.asyncio
+    async def test_output_limit(self):
+        result = await _run("while True:\n    print('x' * 100)", max_output=4096)
+        assert result["success"] is False
+        assert result["error"] == "Output limit exceeded"
+        assert len(result["output"]) <= 4096
+    
+    @pytest.mark.asyncio
+    async def test_memory_limit(self):
+        result = await _run("data = bytearray(512 * 1024 * 1024)", memory_mb=64)
+        assert result["success"] is False
+        assert "MemoryError" in result["error"]
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_run_is_killed(self):
+        zygote = PythonZygote()
+        try:
+            task = asyncio.create_task(zygote.run("import time\ntime.sleep(30)", timeout=60))
+            await asyncio.sleep(0.5)
+            zygote_pid = zygote.stats()["pid"]
+            children_path = f"/proc/{zygote_pid}/task/{zygote_pid}/children"
+            with open(children_path) as f:
+                assert f.read().split()
+            
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0.2)
+            with open(children_path) as f:
+                assert f.read().split() == []
+        finally:
+            await zygote.shutdown()
+
+
+class TestStreaming:
+    """Test that streamed runs forward output as it is written"""
+    
+    @pytest.mark.asyncio
+    async def test_chunks_arrive_while_the_run_goes(self):
+        zygote = PythonZygote()
+        code = "import time\nprint('first', flush=True)\ntime.sleep(1)\nprint('second')"
+        try:
+            events = []
+            async for kind, data in zygote.stream(code, timeout=10):
+                events.append((kind, data, time.monotonic()))
+        finally:
+            await zygote.shutdown()
+        
+        assert [e[:2] for e in events[:-1]] == [("stdout", "first\n"), ("stdout", "second\n")]
+        assert events[1][2] - events[0][2] > 0.5
+        result = events[-1][1]
+        assert events[-1][0] == "result"
+        assert result["success"] is True
+        assert result["output"] == "first\nsecond\n"
+    
+    @pytest.mark.asyncio
+    async def test_run_is_killed_at_the_output_cap(self):
+        zygote = PythonZygote()
+        try:
+            chunks = []
+            async for kind, data in zygote.stream("while True:\n    print('x' * 100)", max_output=4096):
+                chunks.append((kind, data))
+        finally:
+            await zygote.shutdown()
+        
+        kind, result = chunks.pop()
+        assert sum(len(data) for _, data in chunks) == 4096
+        assert result["error"] == "Output limit exceeded"
+        assert result["output_limited"] is True
+        assert result["execution_time_ms"] < 5000
+    
+    @pytest.mark.asyncio
+    async def test_closing_the_stream_kills_the_run(self):
+        zygote = PythonZygote()
+        try:
+            events = zygote.stream("import time\nprint('go', flush=True)\ntime.sleep(30)", timeout=60)
+            assert await events.__anext__() == ("stdout", "go\n")
+            zygote_pid = zygote.stats()["pid"]
+            await events.aclose()
+            await asyncio.sleep(0.2)
+            with open(f"/proc/{zygote_pid}/task/{zygote_pid}/children") as f:
+                assert f.read().split() == []
+        finally:
+            await zygote.shutdown()
+
+
+class TestRespawn:
+    """Test that the zygote is replaced when worn out"""
+    
+    @pytest.mark.asyncio
+    async def test_respawn_after_max_forks(self):
+        zygote = PythonZygote(max_forks=2)
+        try:
+            results = [await zygote.run("print('ok')") for _ in range(5)]
+            stats = zygote.stats()
+        finally:
+            await zygote.shutdown()
+        assert all(r["output"] == "ok\n" for r in results)
+        assert stats["spawns"] == 3
+        assert stats["respawns"] == 2
+        assert stats["runs"] == 5
+    
+    @pytest.mark.asyncio
+    async def test_respawn_after_zygote_exits(self):
+        zygote = PythonZygote()
+        try:
+            await zygote.run("print(1)")
+            zygote._zygote.process.kill()
+            await zygote._zygote.process.wait()
+            result = await zygote.run("print(2)")
+        finally:
+            await zygote.shutdown()
+        assert result["output"] == "2\n"
+        assert zygote.stats()["spawns"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
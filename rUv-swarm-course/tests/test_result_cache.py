@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the grading result cache
+"""
+
+import time
+import pytest
+
+from backend.services.result_cache import ResultCache, normalize_code
+
+
+def _key(cache, code="function f(n) { return n * 2; }", version="v1", exercise_id=1, **kwargs):
+    return cache.key(exercise_id, version, "javascript", code,
+                     kwargs.get("toolchain", "node v20"), kwargs.get("stop_early", False))
+
+
+class TestNormalization:
+    """Test that only run-neutral differences share a key"""
+    
+    def test_line_endings_and_trailing_whitespace(self):
+        assert normalize_code("\ufeffa\r\nb\rc\n\n  ") == "a\nb\nc"
+    
+    def test_whitespace_inside_lines_is_kept(self):
+        cache = ResultCache()
+        assert _key(cache, "const s = `a  \nb`;") != _key(cache, "const s = `a\nb`;")
+        assert _key(cache, "x();\r\n") == _key(cache, "x();")
+
+
+class TestResultCache:
+    """Test hits, invalidation and eviction"""
+    
+    def test_hit_returns_stored_result(self):
+        cache = ResultCache(max_entries=10, enabled=True)
+        key = _key(cache)
+        assert cache.get(key) is None
+        result = {"success": True, "test_cases": []}
+        cache.put(key, result)
+        assert cache.get(key) is result
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+    
+    def test_key_covers_toolchain_and_options(self):
+        cache = ResultCache(max_entries=10, enabled=True)
+        cache.put(_key(cache), {"success": True})
+        assert cache.get(_key(cache, toolchain="node v22")) is None
+        assert cache.get(_key(cache, stop_early=True)) is None
+        assert cache.get(_key(cache, exercise_id=2)) is None
+    
+    def test_new_exercise_version_invalidates(self):
+        cache = ResultCache(max_entries=10, enabled=True)
+        cache.put(_key(cache, "a()"), {"success": True})
+        cache.put(_key(cache, "b()"), {"success": True})
+        cache.put(_key(cache, "a()", exercise_id=2), {"success": True})
+        
+        assert cache.get(_key(cache, "a()", version="v2")) is None
+        assert cache.stats()["invalidations"] == 2
+        # Results of other exercises are kept
+        assert cache.get(_key(cache, "a()", exercise_id=2)) is not None
+        assert cache.get(_key(cache, "a()")) is None
+    
+    def test_explicit_invalidation(self):
+        cache = ResultCache(max_entries=10, enabled=True)
+        cache.put(_key(cache), {"success": True})
+        assert cache.invalidate(1) == 1
+        assert cache.get(_key(cache)) is None
+    
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2, enabled=True)
+        cache.put(_key(cache, "a()"), {"success": True})
+        cache.put(_key(cache, "b()"), {"success": True})
+        cache.get(_key(cache, "a()"))
+        cache.put(_key(cache, "c()"), {"success": True})
+        assert cache.get(_key(cache, "b()")) is None
+        assert cache.get(_key(cache, "a()")) is not None
+        assert cache.stats()["evictions"] == 1
+    
+    def test_disabled(self):
+        cache = ResultCache(max_entries=10, enabled=False)
+        cache.put(_key(cache), {"success": True})
+        assert cache.get(_key(cache)) is None
+    
+    def test_hits_take_microseconds(self):
+        cache = ResultCache(max_entries=10, enabled=True)
+        code = "function f(n) { return n * 2; }\n" * 100
+        cache.put(_key(cache, code), {"success": True})
+        
+        runs = 1000
+        start = time.perf_counter()
+        for _ in range(runs):
+            assert cache.get(_key(cache, code)) is not None
+        assert (time.perf_counter() - start) / runs < 0.001
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
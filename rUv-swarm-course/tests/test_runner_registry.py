@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the language runner registry
+"""
+
+import asyncio
+import subprocess
+import sys
+import pytest
+
+from backend.services.runner_registry import (
+    RunnerProfile,
+    RunnerRegistry,
+    UnsupportedLanguageError,
+    runner_registry
+)
+
+active = {"now": 0, "peak": 0}
+
+
+async def tracked_runner(code: str, delay: float = 0.05):
+    active["now"] += 1
+    active["peak"] = max(active["peak"], active["now"])
+    try:
+        await asyncio.sleep(delay)
+        return {"success": True, "output": code}
+    finally:
+        active["now"] -= 1
+
+
+async def failing_runner(code: str):
+    if code == "raise":
+        raise RuntimeError("toolchain crashed")
+    return {"success": False, "output": "", "error": "SyntaxError"}
+
+
+async def chunked_runner(code: str):
+    closed = active.setdefault("closed", [])
+    try:
+        for line in code.splitlines(keepends=True):
+            yield "stdout", line
+            await asyncio.sleep(0)
+        yield "result", {"success": True, "output": ""}
+    finally:
+        closed.append(code)
+
+
+def _registry(**limits):
+    registry = RunnerRegistry()
+    for language, limit in limits.items():
+        registry.register(language, f"{__name__}:tracked_runner",
+                          RunnerProfile(kind="compiled", max_concurrency=limit))
+    return registry
+
+
+class TestLoading:
+    """Test that runners are imported on first use"""
+    
+    def test_targets_are_not_imported_at_registration(self):
+        registry = RunnerRegistry()
+        runner = registry.register("fake", "not_a_real_module_xyz:run")
+        assert not runner.loaded
+        assert "not_a_real_module_xyz" not in sys.modules
+        assert registry.metrics()["fake"]["loaded"] is False
+    
+    def test_default_runners_are_imported_on_first_use(self):
+        """Importing the registry loads none of the runner modules"""
+        script = (
+            "import sys\n"
+            "import backend.services.runner_registry\n"
+            "print(sorted(m for m in sys.modules if m.startswith(('backend.services.runners.', 'backend.api'))))"
+        )
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[]"
+    
+    @pytest.mark.asyncio
+    async def test_default_runner_loads_its_own_module(self):
+        runner = RunnerRegistry().register("go", runner_registry.get("go").target)
+        result = await runner.run('fmt.Println("hi")')
+        assert result["output"] == "hi"
+        assert "backend.services.runners.go" in sys.modules
+    
+    def test_default_runners_declare_profiles(self):
+        assert set(runner_registry.languages()) == {"javascript", "python", "java", "cpp", "rust", "go"}
+        assert runner_registry.get("rust").profile.compiled
+        assert not runner_registry.get("python").profile.compiled
+    
+    @pytest.mark.asyncio
+    async def test_first_run_loads_target(self):
+        registry = _registry(demo=1)
+        result = await registry.run("demo", "hello", 0)
+        assert result["output"] == "hello"
+        assert registry.get("demo").loaded
+    
+    def test_target_must_name_a_function(self):
+        with pytest.raises(ValueError):
+            RunnerRegistry().register("demo", "backend.api.code_execution")
+    
+    @pytest.mark.asyncio
+    async def test_unsupported_language(self):
+        with pytest.raises(UnsupportedLanguageError):
+            await RunnerRegistry().run("cobol", "")
+
+
+class TestConcurrency:
+    """Test that each language is limited to its own slots"""
+    
+    @pytest.mark.asyncio
+    async def test_runs_beyond_limit_wait(self):
+        active.update(now=0, peak=0)
+        registry = _registry(slow=2)
+        await asyncio.gather(*(registry.run("slow", str(i)) for i in range(6)))
+        assert active["peak"] == 2
+        metrics = registry.metrics()["slow"]
+        assert metrics["calls"] == 6
+        assert metrics["completed"] == 6
+        assert metrics["in_flight"] == 0
+        assert metrics["wait_time_ms"]["max"] >= 50
+    
+    @pytest.mark.asyncio
+    async def test_slow_language_does_not_block_others(self):
+        registry = _registry(slow=1, quick=4)
+        slow_runs = [asyncio.create_task(registry.run("slow", str(i), 0.5)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        
+        result = await asyncio.wait_for(registry.run("quick", "fast", 0), timeout=0.2)
+        assert result["success"]
+        assert registry.metrics()["slow"]["waiting"] == 2
+        
+        for task in slow_runs:
+            task.cancel()
+        await asyncio.gather(*slow_runs, return_exceptions=True)
+        assert registry.metrics()["slow"]["waiting"] == 0
+        assert registry.metrics()["slow"]["in_flight"] == 0
+    
+    def test_limit_defaults_by_kind(self, monkeypatch):
+        from backend.config import settings
+        monkeypatch.setattr(settings, "RUNNER_COMPILED_CONCURRENCY", 3)
+        monkeypatch.setattr(settings, "RUNNER_INTERPRETED_CONCURRENCY", 9)
+        assert RunnerProfile(kind="compiled").concurrency() == 3
+        assert RunnerProfile(kind="interpreted").concurrency() == 9
+        assert RunnerProfile(kind="compiled", max_concurrency=5).concurrency() == 5
+
+
+class TestStreaming:
+    """Test runs that report their output as it is written"""
+    
+    @pytest.mark.asyncio
+    async def test_stream_target_yields_chunks_then_result(self):
+        registry = RunnerRegistry()
+        runner = registry.register("demo", f"{__name__}:tracked_runner",
+                                   stream_target=f"{__name__}:chunked_runner")
+        events = [event async for event in runner.stream("a\nb\n")]
+        assert events == [("stdout", "a\n"), ("stdout", "b\n"),
+                          ("result", {"success": True, "output": ""})]
+        assert registry.metrics()["demo"]["completed"] == 1
+        assert registry.metrics()["demo"]["in_flight"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_runner_without_stream_target_sends_output_once(self):
+        runner = _registry(demo=1).get("demo")
+        events = [event async for event in runner.stream("hello", 0)]
+        assert events == [("stdout", "hello"), ("result", {"success": True, "output": "hello"})]
+    
+    @pytest.mark.asyncio
+    async def test_closing_stream_closes_run_and_frees_slot(self):
+        runner = RunnerRegistry().register("demo", f"{__name__}:tracked_runner",
+                                           RunnerProfile(max_concurrency=1),
+                                           stream_target=f"{__name__}:chunked_runner")
+        events = runner.stream("first\nsecond\n")
+        assert await events.__anext__() == ("stdout", "first\n")
+        await events.aclose()
+        assert "first\nsecond\n" in active["closed"]
+        assert runner.in_flight == 0
+        assert runner.completed == 0
+    
+    def test_default_python_runner_streams(self):
+        assert runner_registry.get("python").stream_target.endswith(":stream_python")
+
+
+class TestMetrics:
+    """Test latency and error counters"""
+    
+    @pytest.mark.asyncio
+    async def test_errors_and_failures_are_counted(self):
+        registry = RunnerRegistry()
+        registry.register("flaky", f"{__name__}:failing_runner")
+        
+        result = await registry.run("flaky", "x = (")
+        assert not result["success"]
+        with pytest.raises(RuntimeError):
+            await registry.run("flaky", "raise")
+        
+        metrics = registry.metrics()["flaky"]
+        assert metrics["calls"] == 2
+        assert metrics["failures"] == 1
+        assert metrics["errors"] == 1
+        assert metrics["completed"] == 0
+        assert metrics["in_flight"] == 0
+        assert metrics["latency_ms"]["p50"] is not None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
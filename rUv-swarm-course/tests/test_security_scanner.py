@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the single-pass security scanner
+"""
+
+import re
+import time
+import pytest
+
+from backend.services.security_scanner import (
+    DANGEROUS_PATTERNS, RuleSet, SecurityScanner, security_scanner
+)
+
+
+def _per_pattern(language, code):
+    """Patterns found by one re.search per pattern"""
+    return {p for p in DANGEROUS_PATTERNS[language] if re.search(p, code, re.IGNORECASE)}
+
+
+class TestLanguageRules:
+    """Test that every language rule set matches like the per-pattern scan"""
+    
+    @pytest.mark.parametrize("language,code", [
+        ("javascript", "const fs = require('fs'); process.exit(1);"),
+        ("javascript", "const f = new Function('return 1'); EVAL ('x');"),
+        ("javascript", "function add(a, b) { return a + b; }"),
+        ("python", "import os\nfrom os import path\nprint(open('x'))"),
+        ("python", "__import__('sys'); exec ('1'); eval('2'); file('x')"),
+        ("python", "def reopen(x):\n    return x"),
+        ("java", "Runtime.getRuntime(); new ProcessBuilder(); System.exit(0);"),
+        ("java", "System.getProperty(\"x\"); Class.forName(\"y\"); // reflection"),
+        ("cpp", "#include <unistd.h>\nsystem(\"ls\"); execvp(a, b); popen(c, d); __asm(\"nop\");"),
+        ("rust", "use std::process; use std::fs; unsafe { libc::exit(0) }"),
+        ("go", "import \"os/exec\"\nsyscall.Exit(0); unsafe.Pointer(nil)"),
+        ("go", "fmt.Println(\"hello\")"),
+    ])
+    def test_matches_per_pattern_search(self, language, code):
+        found = {v.rule for v in security_scanner.scan(language, code)}
+        assert found == _per_pattern(language, code)
+    
+    def test_reports_line_of_each_violation(self):
+        violations = security_scanner.scan("python", "x = 1\nimport os\ny = eval('2')\n")
+        assert [(v.rule, v.line) for v in violations] == [(r'import\s+os', 2), (r'eval\s*\(', 3)]
+    
+    def test_rules_need_a_literal_keyword(self):
+        with pytest.raises(ValueError):
+            RuleSet("python", [r'\w+\s*\('])
+
+
+class TestVerdictCache:
+    """Test caching of verdicts by code hash"""
+    
+    def test_hits_and_eviction(self):
+        scanner = SecurityScanner([RuleSet("go", DANGEROUS_PATTERNS["go"])], cache_size=1)
+        first = scanner.scan("go", "syscall.Exit(0)")
+        assert scanner.scan("go", "syscall.Exit(0)") is first
+        scanner.scan("go", "fmt.Println()")
+        scanner.scan("go", "syscall.Exit(0)")
+        assert scanner.stats() == {"hits": 1, "misses": 3, "cached_verdicts": 1}
+    
+    def test_unknown_language(self):
+        with pytest.raises(ValueError):
+            security_scanner.scan("cobol", "DISPLAY 'HI'")
+
+
+class TestAdversarialInput:
+    """Test that crafted 1MB inputs scan in linear time"""
+    
+    @pytest.mark.parametrize("language,unit", [
+        ("javascript", "require("),
+        ("python", "import "),
+        ("cpp", "exec"),
+        ("java", "System."),
+    ])
+    def test_one_megabyte(self, language, unit):
+        code = unit * (1024 * 1024 // len(unit))
+        start = time.perf_counter()
+        RuleSet(language, DANGEROUS_PATTERNS[language]).scan(code)
+        assert time.perf_counter() - start < 5.0
+    
+    def test_unterminated_includes(self):
+        """A line of unclosed include directives is read once, not once per '#'"""
+        rules = RuleSet("cpp", DANGEROUS_PATTERNS["cpp"], allowed_includes=["stdio.h"])
+        code = "#include <" * (1024 * 1024 // 10)
+        start = time.perf_counter()
+        assert rules.scan(code) == []
+        assert time.perf_counter() - start < 5.0
+        
+        assert [v.rule for v in rules.scan('#include <x #include <sys/socket.h>\n')] == \
+            ["x #include <sys/socket.h"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
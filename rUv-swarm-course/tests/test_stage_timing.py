@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test Suite for per-stage execution timing
+"""
+
+import asyncio
+import pytest
+
+from backend.services.grading_harness import GradingHarness
+from backend.services.runner_registry import RunnerProfile, RunnerRegistry
+from backend.services.stage_timing import (
+    LatencyHistogram,
+    StageLatency,
+    StageTimer,
+    timed_stage,
+    tracing
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+async def validating_runner(code: str, delay: float = 0.02):
+    with timed_stage("validation"):
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(delay)
+    return {"success": True, "output": code}
+
+
+class TestStageTimer:
+    """Test timing of nested stages"""
+    
+    def test_nested_stages_are_exclusive(self):
+        clock = FakeClock()
+        timer = StageTimer(clock)
+        with timer.stage("execution"):
+            clock.now += 0.010
+            with timer.stage("validation"):
+                clock.now += 0.003
+            clock.now += 0.020
+        
+        assert timer.stages == pytest.approx({"execution": 30.0, "validation": 3.0})
+        assert timer.to_dict()["total_ms"] == pytest.approx(33.0)
+    
+    def test_recorded_time_is_taken_out_of_open_stage(self):
+        clock = FakeClock()
+        timer = StageTimer(clock)
+        with timer.stage("grading"):
+            clock.now += 0.1
+            timer.record("execution", 60)
+        assert timer.stages == pytest.approx({"grading": 40.0, "execution": 60.0})
+    
+    def test_timed_stage_without_tracing_is_a_no_op(self):
+        with timed_stage("validation"):
+            pass
+        
+        timer = StageTimer()
+        with tracing(timer):
+            with timed_stage("validation"):
+                pass
+            with tracing(None):
+                with timed_stage("ignored"):
+                    pass
+        assert list(timer.stages) == ["validation"]
+
+
+class TestStageLatency:
+    """Test latency histograms per language and stage"""
+    
+    def test_histogram_quantiles(self):
+        histogram = LatencyHistogram(buckets=(10, 100))
+        for value in [5] * 95 + [50] * 4 + [500]:
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        assert snapshot["buckets"] == {"10": 95, "100": 99, "+Inf": 100}
+        assert (snapshot["p50_ms"], snapshot["p99_ms"]) == (10, 100)
+    
+    def test_observe_and_export(self):
+        latency = StageLatency(buckets=(10, 100))
+        timer = StageTimer()
+        timer.record("queue", 2)
+        timer.record("execution", 40)
+        latency.observe("python", timer)
+        
+        snapshot = latency.snapshot()
+        assert set(snapshot["python"]) == {"queue", "execution", "total"}
+        assert snapshot["python"]["total"]["sum_ms"] == 42
+        text = latency.render_prometheus()
+        assert 'code_execution_stage_latency_ms_bucket{language="python",stage="execution",le="100"} 1' in text
+        assert 'code_execution_stage_latency_ms_count{language="python",stage="queue"} 1' in text
+
+
+class TestRunnerStages:
+    """Test stages recorded along the execution path"""
+    
+    @pytest.mark.asyncio
+    async def test_runner_records_queue_and_execution(self):
+        registry = RunnerRegistry()
+        registry.register("python", f"{__name__}:validating_runner",
+                          RunnerProfile(max_concurrency=1))
+        
+        async def traced_run():
+            timer = StageTimer()
+            with tracing(timer):
+                await registry.run("python", "print(1)")
+            return timer
+        
+        first, second = await asyncio.gather(traced_run(), traced_run())
+        for timer in (first, second):
+            assert list(timer.stages) == ["queue", "validation", "execution"]
+            assert timer.stages["validation"] >= 10
+            assert timer.stages["execution"] >= 20
+        # One slot, so one of the runs waited for the other
+        assert max(first.stages["queue"], second.stages["queue"]) >= 25
+    
+    @pytest.mark.asyncio
+    async def test_grading_harness_stages(self):
+        harness = GradingHarness(case_timeout=0.5)
+        if not harness.available:
+            pytest.skip("node is not installed")
+        
+        timer = StageTimer()
+        with tracing(timer):
+            with timed_stage("grading"):
+                await harness.grade_javascript(
+                    "function double(n) { return n * 2; }", "double",
+                    [{"input": "2", "expected": "4"}]
+                )
+        assert set(timer.stages) == {"grading", "execution", "cleanup"}
+        assert timer.stages["execution"] > timer.stages["cleanup"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])